@@ -0,0 +1,3 @@
+from .nav_analytics import LOOKBACKS, NAV_FIELDS, PERIODS, NavMatrix, analyze, load_start
+
+__all__ = ['LOOKBACKS', 'NAV_FIELDS', 'PERIODS', 'NavMatrix', 'analyze', 'load_start']
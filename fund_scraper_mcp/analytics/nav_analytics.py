@@ -0,0 +1,390 @@
+"""
+净值历史批量分析（NumPy 向量化）
+把多只基金的净值历史对齐成 基金 × 交易日 的二维数组，对所有基金一次性计算：
+
+- 区间收益：近1周 / 1月 / 3月 / 6月 / 1年 / 今年以来（按自然日回溯，期初取回溯日当天或之前最近的净值）
+- 分析区间内的年化收益、年化波动率、最大回撤（及回撤起止日期）、夏普比率、索提诺比率
+- 滚动窗口收益和年化波动率
+
+对齐规则：交易日取所有基金日期的并集；某只基金某日没有净值（QDII 境外节假日、暂停估值、数据缺失）时沿用前一个净值，
+成立之前为 NaN，不参与计算。默认使用累计净值，避免分红除息日单位净值的下跌被算作亏损。
+
+需要 numpy（可选依赖）：pip install numpy
+"""
+import calendar
+import math
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:     # 可选依赖
+    np = None
+
+
+# 每年交易日数（年化用）
+TRADING_DAYS = 252
+
+# 区间收益的区间
+PERIODS = ('1w', '1m', '3m', '6m', '1y', 'ytd')
+
+# 风险指标的分析区间
+LOOKBACKS = ('1m', '3m', '6m', '1y', '2y', '3y', '5y', 'ytd', 'all')
+
+# 可分析的净值列
+NAV_FIELDS = ('total_nav', 'nav')
+
+_MONTHS = {'1m': 1, '3m': 3, '6m': 6, '1y': 12, '2y': 24, '3y': 36, '5y': 60}
+
+# 读取数据时在最早的期初日期之前多读的天数，保证长假前也能取到期初净值
+_LOAD_MARGIN = timedelta(days=15)
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise ImportError("净值分析需要安装 numpy：pip install numpy")
+
+
+def period_start(as_of: date, period: str) -> Optional[date]:
+    """区间的期初日期（取该日或之前最近的净值作为期初）；all 返回 None"""
+    if period == 'all':
+        return None
+    if period == '1w':
+        return as_of - timedelta(days=7)
+    if period == 'ytd':
+        return date(as_of.year - 1, 12, 31)
+    months = _MONTHS.get(period)
+    if months is None:
+        raise ValueError(f"未知的区间: {period}")
+    month = as_of.month - months
+    year = as_of.year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return date(year, month, min(as_of.day, calendar.monthrange(year, month)[1]))
+
+
+def load_start(as_of: date, lookback: str, periods: Sequence[str] = PERIODS) -> Optional[date]:
+    """计算区间收益和 lookback 区间的风险指标需要读取的最早日期（None 表示全部历史）"""
+    if lookback not in LOOKBACKS:
+        raise ValueError(f"未知的分析区间: {lookback}，可选: {', '.join(LOOKBACKS)}")
+    starts = [period_start(as_of, period) for period in (*periods, lookback)]
+    if None in starts:
+        return None
+    return min(starts) - _LOAD_MARGIN
+
+
+def latest_date(store, symbols: Iterable[str]) -> Optional[str]:
+    """这些基金在存储中的最新净值日期"""
+    dates = [day for day in map(store.last_date, symbols) if day]
+    return max(dates) if dates else None
+
+
+class NavMatrix:
+    """
+    对齐后的净值矩阵
+
+    values[i, j] 为 symbols[i] 在 dates[j] 的净值（float64，前向填充，成立前为 NaN）；
+    last_observed[i] 为该基金最后一个真实净值所在的列（之后的列是沿用的值）
+    """
+
+    def __init__(self, symbols: List[str], dates, values, last_observed, field: str = 'total_nav'):
+        self.symbols = symbols
+        self.dates = dates
+        self.values = values
+        self.last_observed = last_observed
+        self.field = field
+        self._rows = {symbol: row for row, symbol in enumerate(symbols)}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    def date_at(self, column: int) -> str:
+        return date.fromordinal(int(self.dates[column])).isoformat()
+
+    def column_at(self, day: date) -> int:
+        """day 当天或之前最近的交易日所在的列（早于第一个交易日时为 -1）"""
+        return int(np.searchsorted(self.dates, day.toordinal(), side='right')) - 1
+
+    @classmethod
+    def from_series(
+        cls,
+        series: Dict[str, Tuple[Sequence[int], Sequence[float]]],
+        field: str = 'total_nav'
+    ) -> 'NavMatrix':
+        """
+        由 {基金代码: (日期序数, 净值)} 构建，各基金的日期需升序，可以互不相同（field 为净值列名，用作结果的字段名）
+
+        日期并集、散列到矩阵、前向填充都是整体的数组运算，不按基金循环
+        """
+        require_numpy()
+        symbols = list(series)
+        day_arrays = [np.asarray(series[symbol][0], dtype=np.int32) for symbol in symbols]
+        value_arrays = [np.asarray(series[symbol][1], dtype=np.float64) for symbol in symbols]
+        all_days = np.concatenate(day_arrays) if symbols else np.empty(0, dtype=np.int32)
+        all_values = np.concatenate(value_arrays) if symbols else np.empty(0)
+
+        dates = np.unique(all_days)
+        rows = np.repeat(np.arange(len(symbols)), [len(days) for days in day_arrays])
+        columns = np.searchsorted(dates, all_days)
+        observed = all_values > 0     # 缺失（NaN）和无效的净值都不计入
+        rows, columns = rows[observed], columns[observed]
+
+        values = np.full((len(symbols), len(dates)), np.nan)
+        values[rows, columns] = all_values[observed]
+        last_observed = np.full(len(symbols), -1, dtype=np.int64)
+        np.maximum.at(last_observed, rows, columns)
+
+        # 前向填充：每个位置取该行到此为止最后一个有值的列（成立前仍指向第 0 列的 NaN）
+        source = np.where(np.isnan(values), 0, np.arange(len(dates)))
+        np.maximum.accumulate(source, axis=1, out=source)
+        values = np.take_along_axis(values, source, axis=1)
+        return cls(symbols, dates, values, last_observed, field)
+
+    @classmethod
+    def from_store(
+        cls,
+        store,
+        symbols: Optional[Iterable[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        field: str = 'total_nav'
+    ) -> 'NavMatrix':
+        """
+        从净值存储读取并对齐（ColumnarNavStore 直接复制列数组，其他存储逐行读取）；没有数据的基金不在矩阵中
+
+        Args:
+            store: 净值存储
+            symbols: 基金代码（None 表示存储中的全部基金）
+            start_date / end_date: 日期范围（YYYY-MM-DD）
+            field: total_nav（累计净值）或 nav（单位净值）
+        """
+        if field not in NAV_FIELDS:
+            raise ValueError(f"未知的净值列: {field}，可选: {', '.join(NAV_FIELDS)}")
+        series = {}
+        for symbol in symbols if symbols is not None else store.symbols():
+            if hasattr(store, 'read_column'):
+                days, values = store.read_column(symbol, field, start_date, end_date)
+            else:
+                rows = store.read(symbol, start_date, end_date)
+                days = [date.fromisoformat(row.date).toordinal() for row in rows]
+                values = [math.nan if getattr(row, field) is None else getattr(row, field) for row in rows]
+            if len(days):
+                series[symbol] = (days, values)
+        return cls.from_series(series, field)
+
+
+# ---------- 批量指标（输入输出都是 基金 × 交易日 的数组） ----------
+
+def daily_returns(values):
+    """逐日收益率（第一列为 NaN）"""
+    returns = np.full_like(values, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[:, 1:] = values[:, 1:] / values[:, :-1] - 1
+    return returns
+
+
+def rolling_returns(values, window: int):
+    """滚动 window 个交易日的收益率（前 window 列为 NaN）"""
+    result = np.full_like(values, np.nan)
+    if window < values.shape[1]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[:, window:] = values[:, window:] / values[:, :-window] - 1
+    return result
+
+
+def rolling_volatility(returns, window: int):
+    """滚动 window 个交易日的年化波动率（累加和差分，窗口内有缺失时为 NaN）"""
+    result = np.full_like(returns, np.nan)
+    if window < 2 or window > returns.shape[1]:
+        return result
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    pad = np.zeros((returns.shape[0], 1))
+    sums = np.concatenate([pad, np.cumsum(filled, axis=1)], axis=1)
+    squares = np.concatenate([pad, np.cumsum(filled * filled, axis=1)], axis=1)
+    counts = np.concatenate([pad, np.cumsum(valid, axis=1)], axis=1)
+
+    s1 = sums[:, window:] - sums[:, :-window]
+    s2 = squares[:, window:] - squares[:, :-window]
+    n = counts[:, window:] - counts[:, :-window]
+    variance = np.maximum(s2 - s1 * s1 / window, 0) / (window - 1)
+    result[:, window - 1:] = np.where(n == window, np.sqrt(variance * TRADING_DAYS), np.nan)
+    return result
+
+
+def max_drawdown(values):
+    """
+    每行的最大回撤
+
+    Returns:
+        (最大回撤（≤ 0，没有数据为 NaN）, 回撤开始（前高点）所在列, 回撤最低点所在列)
+    """
+    columns = np.arange(values.shape[1])
+    peaks = np.fmax.accumulate(values, axis=1)
+    with np.errstate(invalid='ignore'):
+        drawdowns = values / peaks - 1
+        peak_columns = np.maximum.accumulate(np.where(values >= peaks, columns, 0), axis=1)
+    has_data = ~np.all(np.isnan(values), axis=1)
+    drawdowns = np.where(np.isnan(drawdowns), 0.0, drawdowns)
+    troughs = np.argmin(drawdowns, axis=1)
+    rows = np.arange(values.shape[0])
+    worst = np.where(has_data, drawdowns[rows, troughs], np.nan)
+    return worst, peak_columns[rows, troughs], troughs
+
+
+def risk_metrics(values, risk_free: float = 0.0, min_observations: int = 20) -> Dict[str, Any]:
+    """
+    年化收益、年化波动率、夏普比率、索提诺比率、最大回撤
+
+    Args:
+        values: 分析区间内的净值（最后一个真实净值之后应为 NaN）
+        risk_free: 年化无风险利率（小数，如 0.02）
+        min_observations: 日收益数少于该值的基金，波动率和比率为 NaN
+    """
+    returns = daily_returns(values)[:, 1:]
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=1)
+    filled = np.where(valid, returns, 0.0)
+    daily_rf = risk_free / TRADING_DAYS
+    rows = np.arange(values.shape[0])
+
+    # 区间内第一个和最后一个有效净值（区间中途成立或停止更新的基金按实际有净值的日期计算）
+    has_data = ~np.isnan(values)
+    first = np.argmax(has_data, axis=1)
+    last = values.shape[1] - 1 - np.argmax(has_data[:, ::-1], axis=1)
+    start_values = values[rows, first]
+    end_values = values[rows, last]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=1) / count
+        variance = (np.square(filled - mean[:, None]) * valid).sum(axis=1) / (count - 1)
+        std = np.sqrt(variance)
+        excess = mean - daily_rf
+        downside = np.sqrt((np.square(np.minimum(filled - daily_rf, 0)) * valid).sum(axis=1) / count)
+        sharpe = excess / std * math.sqrt(TRADING_DAYS)
+        sortino = excess / downside * math.sqrt(TRADING_DAYS)
+        total = end_values / start_values - 1
+        years = count / TRADING_DAYS
+        annualized = np.power(1 + total, 1 / years) - 1
+
+    enough = count >= max(min_observations, 2)
+    drawdown, peaks, troughs = max_drawdown(values)
+    return {
+        'first_column': first,
+        'observations': count,
+        'total_return': total,
+        'annualized_return': np.where(enough, annualized, np.nan),
+        'volatility': np.where(enough, std * math.sqrt(TRADING_DAYS), np.nan),
+        'sharpe': np.where(enough & np.isfinite(sharpe), sharpe, np.nan),
+        'sortino': np.where(enough & np.isfinite(sortino), sortino, np.nan),
+        'max_drawdown': drawdown,
+        'drawdown_peak': peaks,
+        'drawdown_trough': troughs,
+    }
+
+
+def _column(values, digits: int) -> List[Optional[float]]:
+    """数组转为可序列化的列表（NaN 为 None）"""
+    rounded = np.round(values.astype(np.float64), digits)
+    return [None if math.isnan(value) else value for value in rounded.tolist()]
+
+
+def analyze(
+    matrix: NavMatrix,
+    as_of: Optional[str] = None,
+    lookback: str = '1y',
+    periods: Sequence[str] = PERIODS,
+    risk_free: float = 0.0,
+    rolling_window: Optional[int] = None,
+    min_observations: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    计算所有基金的指标，返回每只基金一条记录（顺序同 matrix.symbols）
+
+    收益、波动率、回撤为百分数，保留 2 位小数；夏普、索提诺比率保留 3 位小数
+
+    Args:
+        matrix: 对齐后的净值矩阵
+        as_of: 截止日期（None 时为矩阵的最后一个交易日）
+        lookback: 风险指标的分析区间，见 LOOKBACKS
+        periods: 区间收益的区间，见 PERIODS
+        risk_free: 年化无风险利率（小数）
+        rolling_window: 滚动窗口的交易日数（None 表示不计算滚动指标）
+        min_observations: 日收益数少于该值时不计算波动率和比率
+    """
+    require_numpy()
+    if lookback not in LOOKBACKS:
+        raise ValueError(f"未知的分析区间: {lookback}，可选: {', '.join(LOOKBACKS)}")
+    if not len(matrix) or not len(matrix.dates):
+        return []
+
+    end_day = date.fromisoformat(as_of) if as_of else date.fromordinal(int(matrix.dates[-1]))
+    end = matrix.column_at(end_day)
+    if end < 0:
+        return []
+    values = matrix.values
+    latest = values[:, end]
+    last_observed = np.minimum(matrix.last_observed, end)
+
+    columns: Dict[str, List[Any]] = {
+        'symbol': matrix.symbols,
+        'last_date': [matrix.date_at(col) if col >= 0 else None for col in last_observed.tolist()],
+        matrix.field: _column(latest, 4),
+    }
+
+    for period in periods:
+        base = matrix.column_at(period_start(end_day, period))
+        if base < 0:
+            period_return = np.full(len(matrix), np.nan)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                period_return = latest / values[:, base] - 1
+            # 期初之前就不再更新的基金，沿用的净值没有意义
+            period_return[last_observed < base] = np.nan
+        columns[f'return_{period}'] = _column(period_return * 100, 2)
+
+    start_day = period_start(end_day, lookback)
+    start = max(matrix.column_at(start_day), 0) if start_day else 0
+    # 最后一个真实净值之后沿用的净值不计入风险指标和滚动指标（否则已清盘的基金会得到整段区间的零波动）
+    window_values = values[:, start:end + 1].copy()
+    window_values[np.arange(start, end + 1) > last_observed[:, None]] = np.nan
+    metrics = risk_metrics(window_values, risk_free, min_observations)
+    has_data = metrics['observations'] > 0
+    columns['start_date'] = [
+        matrix.date_at(start + col) if ok else None
+        for col, ok in zip(metrics['first_column'].tolist(), has_data.tolist())
+    ]
+    columns['observations'] = metrics['observations'].tolist()
+    columns['total_return'] = _column(metrics['total_return'] * 100, 2)
+    columns['annualized_return'] = _column(metrics['annualized_return'] * 100, 2)
+    columns['volatility'] = _column(metrics['volatility'] * 100, 2)
+    columns['max_drawdown'] = _column(metrics['max_drawdown'] * 100, 2)
+    in_drawdown = (metrics['max_drawdown'] < 0).tolist()
+    columns['drawdown_peak_date'] = [
+        matrix.date_at(start + col) if ok else None for col, ok in zip(metrics['drawdown_peak'].tolist(), in_drawdown)
+    ]
+    columns['drawdown_trough_date'] = [
+        matrix.date_at(start + col) if ok else None for col, ok in zip(metrics['drawdown_trough'].tolist(), in_drawdown)
+    ]
+    columns['sharpe'] = _column(metrics['sharpe'], 3)
+    columns['sortino'] = _column(metrics['sortino'], 3)
+
+    if rolling_window:
+        returns = rolling_returns(window_values, rolling_window)
+        volatility = rolling_volatility(daily_returns(window_values), rolling_window)
+        has_window = ~np.all(np.isnan(returns), axis=1)
+        with np.errstate(invalid='ignore'):
+            best = np.where(has_window, np.where(np.isnan(returns), -np.inf, returns).max(axis=1), np.nan)
+            worst = np.where(has_window, np.where(np.isnan(returns), np.inf, returns).min(axis=1), np.nan)
+        has_volatility = ~np.all(np.isnan(volatility), axis=1)
+        max_volatility = np.where(has_volatility, np.where(np.isnan(volatility), -np.inf, volatility).max(axis=1), np.nan)
+        columns['rolling_return_latest'] = _column(returns[:, -1] * 100, 2)
+        columns['rolling_return_best'] = _column(best * 100, 2)
+        columns['rolling_return_worst'] = _column(worst * 100, 2)
+        columns['rolling_volatility_latest'] = _column(volatility[:, -1] * 100, 2)
+        columns['rolling_volatility_max'] = _column(max_volatility * 100, 2)
+
+    fields = list(columns)
+    return [dict(zip(fields, record)) for record in zip(*columns.values())]
@@ -0,0 +1,125 @@
+"""
+页面池基准测试：对比每次 new_page()/close() 与 BrowserManager 页面池
+用法：
+  python benchmarks/bench_page_pool.py                 # 默认 200 次导航，4 轮
+  python benchmarks/bench_page_pool.py --pages 500     # 自定义导航次数
+  python benchmarks/bench_page_pool.py --rounds 6      # 自定义轮数
+
+在本地 HTTP 服务上生成一组模拟基金详情页，不访问天天基金网。
+为避免先测的一方替后测的一方预热：每一轮的每种方式都使用新启动的浏览器（独立的缓存和连接），
+两种方式的先后顺序逐轮交替，页面响应带 Cache-Control: no-store；结果取各轮的中位数。
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_manager import BrowserManager
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{symbol}</title></head>
+<body>
+<div class="fundDetail-tit">测试基金{symbol}</div>
+<div class="dataOfFund">单位净值 (2026-01-30) 1.1670-0.51% 累计净值3.7400</div>
+<div class="infoOfFund">类型：混合型-灵活 | 规模：29.37亿元 基金经理：张三成 立 日：2001-12-18 管 理 人：测试基金基金评级</div>
+</body></html>
+"""
+
+
+class _NoStoreHandler(http.server.SimpleHTTPRequestHandler):
+    """禁止浏览器缓存页面，每次导航都真正请求服务"""
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_local_site(num_pages: int):
+    """生成本地页面集合并启动 HTTP 服务，返回 (base_url, server)"""
+    root = tempfile.mkdtemp(prefix="fund_bench_")
+    for i in range(num_pages):
+        symbol = f"{i:06d}"
+        with open(os.path.join(root, f"{symbol}.html"), "w", encoding="utf-8") as f:
+            f.write(PAGE_TEMPLATE.format(symbol=symbol))
+
+    handler = functools.partial(_NoStoreHandler, directory=root)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+
+async def bench_new_page(bm: BrowserManager, urls) -> float:
+    """旧方式：每个基金新建并关闭一个页面"""
+    start = time.perf_counter()
+    for url in urls:
+        page = await bm.new_page()
+        try:
+            await page.goto(url, wait_until="load")
+            await page.evaluate("() => document.querySelector('.dataOfFund').textContent")
+        finally:
+            await page.close()
+    return time.perf_counter() - start
+
+
+async def bench_pool(bm: BrowserManager, urls) -> float:
+    """新方式：从页面池借用页面"""
+    start = time.perf_counter()
+    for url in urls:
+        async with bm.page() as page:
+            await page.goto(url, wait_until="load")
+            await page.evaluate("() => document.querySelector('.dataOfFund').textContent")
+    return time.perf_counter() - start
+
+
+ARMS = {"new_page": bench_new_page, "pool": bench_pool}
+
+
+async def run_arm(name: str, urls, warmup_urls) -> float:
+    """在新启动的浏览器中测量一种方式（两种方式的预热完全相同）"""
+    async with BrowserManager(headless=True) as bm:
+        await ARMS[name](bm, warmup_urls)
+        return await ARMS[name](bm, urls)
+
+
+async def main(num_pages: int, rounds: int):
+    base_url, server = start_local_site(num_pages + 5)
+    urls = [f"{base_url}/{i:06d}.html" for i in range(num_pages)]
+    warmup_urls = [f"{base_url}/{i:06d}.html" for i in range(num_pages, num_pages + 5)]
+
+    timings = {name: [] for name in ARMS}
+    try:
+        for round_no in range(rounds):
+            order = list(ARMS) if round_no % 2 == 0 else list(reversed(ARMS))
+            for name in order:
+                elapsed = await run_arm(name, urls, warmup_urls)
+                timings[name].append(elapsed)
+                print(f"  第 {round_no + 1} 轮 {name:>8}: {elapsed:.2f}s", flush=True)
+    finally:
+        server.shutdown()
+
+    before = statistics.median(timings["new_page"])
+    after = statistics.median(timings["pool"])
+    print(f"\n导航次数: {num_pages} × {rounds} 轮（中位数）")
+    print(f"new_page()/close(): {before:.2f}s  ({before / num_pages * 1000:.1f} ms/页)")
+    print(f"页面池:             {after:.2f}s  ({after / num_pages * 1000:.1f} ms/页)")
+    print(f"加速比: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="页面池基准测试")
+    parser.add_argument('--pages', type=int, default=200, help='导航次数 (默认: 200)')
+    parser.add_argument('--rounds', type=int, default=4, help='轮数，两种方式的先后顺序逐轮交替 (默认: 4)')
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, max(1, args.rounds)))
@@ -0,0 +1,111 @@
+"""
+排行榜响应解析基准测试：对比旧的 正则截取 + split('","') 与 utils.rank_parser
+用法：
+  python benchmarks/bench_rank_parser.py                # 默认 26000 行
+  python benchmarks/bench_rank_parser.py --rows 50000
+
+以 fixtures/rankdata_sample.js 中的样例行为模板，复制生成指定行数的响应
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rank_parser import parse_rank_data
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'rankdata_sample.js')
+
+
+def build_payload(num_rows: int) -> str:
+    """以样例行为模板生成 num_rows 行的响应"""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        sample = f.read()
+    rows = list(parse_rank_data(sample).raw_rows())
+
+    generated = []
+    for i in range(num_rows):
+        fields = rows[i % len(rows)].split(',')
+        fields[0] = f"{i:06d}"
+        generated.append(','.join(fields))
+
+    datas = ','.join(f'"{row}"' for row in generated)
+    return (f"var rankData = {{datas:[{datas}],allRecords:{num_rows},pageIndex:1,"
+            f"pageNum:{num_rows},allPages:1,allNum:{num_rows}}};")
+
+
+def parse_regex_split(content: str) -> list:
+    """旧实现：fetch_funds_fast / test_fast 中的正则 + split"""
+    m = re.search(r'datas:\[(.*?)\]', content, re.DOTALL)
+    datas_str = m.group(1)
+    data_list = [s.strip().strip('"') for s in datas_str.split('","')]
+    return [item.split(',') for item in data_list if item.strip()]
+
+
+def parse_streaming(content: str) -> list:
+    """新实现：单遍扫描，逐行产出"""
+    return [row.fields for row in parse_rank_data(content).rows()]
+
+
+def parse_regex_split_typed(content: str) -> list:
+    """旧实现 + 与 RankRow 相同的数值转换，用于同口径对比"""
+    def to_float(value):
+        try:
+            return float(value.rstrip('%')) if value and value != '--' else None
+        except ValueError:
+            return None
+    return [fields[:4] + [to_float(v) for v in fields[4:16]] for fields in parse_regex_split(content)]
+
+
+def parse_streaming_count(content: str) -> int:
+    """新实现（不物化列表，只遍历）"""
+    return sum(1 for _ in parse_rank_data(content).rows())
+
+
+def peak_memory(func, content: str) -> float:
+    """单次调用的内存峰值（MB）"""
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def bench(func, content: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排行榜响应解析基准测试")
+    parser.add_argument('--rows', type=int, default=26000, help='行数 (默认: 26000)')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次 (默认: 5)')
+    args = parser.parse_args()
+
+    content = build_payload(args.rows)
+    old_rows = parse_regex_split(content)
+    new_rows = parse_streaming(content)
+    assert [list(r) for r in new_rows] == old_rows, "两种实现的解析结果不一致"
+
+    print(f"响应大小: {len(content) / 1024 / 1024:.2f} MB, 行数: {args.rows}")
+    print(f"  {'实现':<24} {'耗时':>10} {'内存峰值':>10}")
+    for name, func in (
+        ("正则 + split（字符串）", parse_regex_split),
+        ("正则 + split + 类型转换", parse_regex_split_typed),
+        ("rank_parser 物化列表", parse_streaming),
+        ("rank_parser 逐行遍历", parse_streaming_count),
+    ):
+        elapsed = bench(func, content, args.repeat) * 1000
+        print(f"  {name:<24} {elapsed:8.1f} ms {peak_memory(func, content):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
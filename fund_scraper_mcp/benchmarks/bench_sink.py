@@ -0,0 +1,157 @@
+"""
+输出写入基准测试：对比事件循环中逐行 writerow + flush 与写线程缓冲输出（CsvSink）
+用法：
+  python benchmarks/bench_sink.py                          # 默认 20000 条记录，并发 16，请求耗时 5ms
+  python benchmarks/bench_sink.py --records 50000 -c 16    # 自定义记录数和并发
+  python benchmarks/bench_sink.py --fsync                  # 逐行 fsync 对比每秒 fsync 一次
+
+模拟并发抓取：每个 worker 等待一个模拟的请求耗时后写入一条记录并记入断点日志；
+统计事件循环中花在写入上的时间，并用一个 1ms 周期的探针任务测量调度延迟。
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.journal import CrawlJournal
+from storage.sink import CsvSink, FUND_FIELDNAMES, FUND_HEADERS
+
+
+def make_record(i: int) -> dict:
+    return {
+        'symbol': f"{i:06d}", 'sname': f"测试基金{i}", 'per_nav': '1.1670', 'total_nav': '3.7400',
+        'yesterday_nav': 1.173, 'nav_rate': '-0.51', 'nav_a': -0.006, 'sg_states': '开放',
+        'nav_date': '2026-01-30', 'fund_manager': '张三', 'jjlx': '混合型-灵活', 'jjzfe': '29.37亿元',
+    }
+
+
+class LagProbe:
+    """事件循环调度延迟探针"""
+
+    def __init__(self, period: float = 0.001):
+        self.period = period
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.period)
+            self.lags.append(time.perf_counter() - start - self.period)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self) -> str:
+        lags = sorted(self.lags)
+        if not lags:
+            return "-"
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        return f"p99 {p99 * 1000:.2f} ms, 最大 {lags[-1] * 1000:.2f} ms"
+
+
+async def crawl(records: int, concurrency: int, latency: float, write):
+    """并发模拟抓取，每条记录调用一次 write(record, symbol)，返回 (总耗时, 事件循环中花在 write 上的时间)"""
+    queue = asyncio.Queue()
+    blocked = 0.0
+    for i in range(records):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal blocked
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await asyncio.sleep(latency)
+            record = make_record(i)
+            t = time.perf_counter()
+            write(record, record['symbol'])
+            blocked += time.perf_counter() - t
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, blocked
+
+
+async def bench_per_row(path: str, records: int, concurrency: int, latency: float, fsync: bool):
+    """旧方式：事件循环中逐行写入、flush（可选 fsync），再写断点日志"""
+    journal = CrawlJournal.for_output(path)
+    journal.start_run()
+    f = open(path, 'w', newline='', encoding='utf-8-sig')
+    f.write(','.join(FUND_HEADERS) + '\n')
+    writer = csv.DictWriter(f, fieldnames=FUND_FIELDNAMES, extrasaction='ignore')
+
+    def write(record, symbol):
+        writer.writerow(record)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+        journal.record_done(symbol, f.tell())
+
+    probe = LagProbe()
+    probe.start()
+    elapsed, blocked = await crawl(records, concurrency, latency, write)
+    await probe.stop()
+    f.close()
+    journal.close()
+    return elapsed, blocked, probe
+
+
+async def bench_sink(path: str, records: int, concurrency: int, latency: float, fsync: bool):
+    """新方式：记录交给写线程，写出后批量记入断点日志"""
+    journal = CrawlJournal.for_output(path)
+    journal.start_run()
+    sink = CsvSink(path, on_flush=journal.record_done_many, fsync_interval=1.0 if fsync else None)
+    sink.open()
+
+    probe = LagProbe()
+    probe.start()
+    elapsed, blocked = await crawl(records, concurrency, latency, sink.write)
+    await probe.stop()
+    close_start = time.perf_counter()
+    sink.close()
+    elapsed += time.perf_counter() - close_start
+    journal.close()
+    return elapsed, blocked, probe, sink.get_stats()
+
+
+async def main(records: int, concurrency: int, latency: float, fsync: bool):
+    root = tempfile.mkdtemp(prefix="fund_sink_bench_")
+    before, before_blocked, before_probe = await bench_per_row(
+        os.path.join(root, "per_row.csv"), records, concurrency, latency, fsync)
+    after, after_blocked, after_probe, stats = await bench_sink(
+        os.path.join(root, "sink.csv"), records, concurrency, latency, fsync)
+
+    print(f"记录数: {records}，并发: {concurrency}，模拟请求耗时: {latency * 1000:.1f} ms，fsync: {'是' if fsync else '否'}")
+    for label, elapsed, blocked, probe in (
+        ("逐行写入:  ", before, before_blocked, before_probe),
+        ("写线程缓冲:", after, after_blocked, after_probe),
+    ):
+        print(f"{label} {elapsed:.2f}s ({records / elapsed:,.0f} 条/秒)  "
+              f"事件循环中写入耗时 {blocked * 1e6 / records:.1f} µs/条  调度延迟 {probe.summary()}")
+    print(f"总耗时加速比: {before / after:.2f}x，事件循环写入耗时减少: {before_blocked / after_blocked:.1f}x")
+    print(f"缓冲输出统计: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="输出写入基准测试")
+    parser.add_argument('--records', type=int, default=20000, help='记录数 (默认: 20000)')
+    parser.add_argument('--concurrency', '-c', type=int, default=16, help='并发数 (默认: 16)')
+    parser.add_argument('--latency', type=float, default=0.005, help='模拟请求耗时（秒，默认: 0.005）')
+    parser.add_argument('--fsync', action='store_true', help='逐行 fsync 对比每秒 fsync 一次')
+    args = parser.parse_args()
+    asyncio.run(main(args.records, args.concurrency, args.latency, args.fsync))
@@ -0,0 +1 @@
+var rankData = {datas:["009317,金信核心竞争力混合A,JXHXJZLHHA,2026-02-13,1.1921,2.5879,-1.45,0.52,3.61,8.02,15.33,21.07,18.44,35.90,2.85,158.79,2020-04-20,1,21.45,1.50%,0.15%,1,0.15%,1,","000001,华夏成长混合,HXCZHH,2026-02-13,1.1670,3.7400,-0.51,-0.34,2.10,4.56,9.87,12.01,5.43,-3.21,1.02,359.12,2001-12-18,1,8.77,1.50%,0.15%,1,0.15%,1,","110022,易方达消费行业股票,YFDXFHYGP,2026-02-13,3.5210,3.5210,0.26,1.11,-0.85,-2.34,1.20,-5.67,-12.30,-20.11,0.44,252.10,2010-08-20,1,3.91,1.50%,0.15%,1,0.15%,1,","161005,富国天惠成长混合(LOF)A,FGTHCZHHLOFA,2026-02-13,2.9870,6.1230,0.78,1.45,3.02,6.78,11.22,14.56,8.90,1.23,2.11,1012.45,2005-11-16,1,7.44,1.50%,0.15%,1,0.15%,1,","519001,银华价值优选混合,YHJZYXHH,2026-02-13,--,--,,,,,,,,,,,2002-10-08,1,,1.50%,0.15%,1,0.15%,1,","000002,华夏成长混合(后端),HXCZHHHD,2026-02-13,1.1670,3.7400,-0.51,-0.34,2.10,4.56,9.87,12.01,5.43,-3.21,1.02,359.12,2001-12-18,1,,,,1,,1,","004851,广发医疗保健股票A,GFYLBJGPA,2026-02-13,2.0123,2.0123,1.92,3.33,5.55,-1.11,-6.66,-9.99,-30.01,-40.20,3.02,101.23,2017-07-14,1,4.12,1.50%,0.15%,1,0.15%,1,","006228,中欧医疗创新股票A,ZOYLCXGPA,2026-02-13,1.3456,1.3456,2.01,3.40,5.80,-0.90,-6.10,-8.70,-28.30,-38.90,3.20,34.56,2018-09-25,1,1.88,1.50%,0.15%,1,0.15%,1,"],allRecords:8,pageIndex:1,pageNum:500,allPages:1,allNum:8,gpNum:3,hhNum:4,zqNum:0,zsNum:0,bbNum:0,qdiiNum:0,etfNum:0,lofNum:1,fofNum:0};
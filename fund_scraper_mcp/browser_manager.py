@@ -3,26 +3,57 @@
 使用 Playwright 控制 Microsoft Edge 浏览器
 """
 import asyncio
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
 
 from utils.anti_detection import AntiDetection
+from utils.resource_blocker import ResourceBlocker
 
 
 class BrowserManager:
     """浏览器管理器 - 管理 Microsoft Edge 浏览器实例"""
     
-    def __init__(self, headless: bool = True):
+    def __init__(
+        self,
+        headless: bool = True,
+        pool_size: int = 4,
+        max_page_uses: int = 50,
+        resource_blocker: Optional[ResourceBlocker] = None,
+        block_resources: bool = True
+    ):
+        """
+        Args:
+            headless: 是否无头模式
+            pool_size: 页面池上限（同时存在的爬取页面数）
+            max_page_uses: 单个页面导航多少次后回收重建（防止内存泄漏）
+            resource_blocker: 自定义资源拦截策略（None 时使用默认策略）
+            block_resources: 是否拦截图片、字体、广告等提取数据用不到的资源
+        """
         self.headless = headless
+        if resource_blocker is None and block_resources:
+            resource_blocker = ResourceBlocker()
+        self.resource_blocker = resource_blocker
+        self.pool_size = max(1, pool_size)
+        self.max_page_uses = max(1, max_page_uses)
         self._playwright: Optional[Playwright] = None
         self._browser: Optional[Browser] = None
         self._context: Optional[BrowserContext] = None
+        self._start_lock = asyncio.Lock()
+
+        # 页面池：空闲页面 + 每个页面的使用次数
+        self._idle_pages: List[Page] = []
+        self._page_uses: dict = {}
+        self._pool_slots = asyncio.Semaphore(self.pool_size)
+        self._pool_stats = {"created": 0, "reused": 0, "recycled": 0, "discarded": 0}
     
     async def start(self) -> None:
-        """启动浏览器"""
-        if self._browser is not None:
-            return
-        
+        """启动浏览器（可重复调用；第一次借用页面时也会自动启动）"""
+        async with self._start_lock:
+            if self._browser is None:
+                await self._launch()
+
+    async def _launch(self) -> None:
         self._playwright = await async_playwright().start()
         
         # 启动 Edge 浏览器（使用系统已安装的 Edge，无需下载 Chromium）
@@ -51,6 +82,12 @@ class BrowserManager:
         # 添加反检测脚本
         for script in AntiDetection.get_stealth_scripts():
             await self._context.add_init_script(script)
+
+        # 安装资源拦截策略（统计按每次启动重新计算）
+        if self.resource_blocker is not None:
+            self.resource_blocker.reset_stats()
+            await self._context.route("**/*", self.resource_blocker.handle)
+            self._context.on("response", self.resource_blocker.on_response)
     
     async def get_browser(self) -> Browser:
         """获取浏览器实例"""
@@ -66,6 +103,96 @@ class BrowserManager:
         page = await self._context.new_page()
         return page
     
+    async def acquire_page(self) -> Page:
+        """
+        从页面池借出一个页面
+
+        池中页面全部被占用时会等待，直到有页面归还。
+        用完必须调用 release_page 归还，推荐使用 page() 上下文管理器。
+        """
+        await self._pool_slots.acquire()
+        try:
+            while self._idle_pages:
+                page = self._idle_pages.pop()
+                if not page.is_closed():
+                    self._pool_stats["reused"] += 1
+                    return page
+                self._page_uses.pop(page, None)
+
+            page = await self.new_page()
+            self._page_uses[page] = 0
+            self._pool_stats["created"] += 1
+            return page
+        except BaseException:
+            self._pool_slots.release()
+            raise
+
+    async def release_page(self, page: Page, discard: bool = False) -> None:
+        """
+        归还页面到页面池
+
+        Args:
+            page: acquire_page 借出的页面
+            discard: 为 True 时直接关闭页面（如导航出错、页面状态未知）
+        """
+        recycle = False
+        try:
+            uses = self._page_uses.get(page, 0) + 1
+            self._page_uses[page] = uses
+
+            if page.is_closed() or self._context is None:
+                discard = True
+            elif not discard and uses >= self.max_page_uses:
+                self._pool_stats["recycled"] += 1
+                recycle = True
+            elif not discard:
+                # 重置页面状态：离开当前站点页面，释放其 DOM 和脚本
+                try:
+                    await page.goto("about:blank", timeout=5000)
+                except Exception:
+                    discard = True
+
+            if discard:
+                self._pool_stats["discarded"] += 1
+
+            if discard or recycle:
+                self._page_uses.pop(page, None)
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            else:
+                self._idle_pages.append(page)
+        finally:
+            self._pool_slots.release()
+
+    def ensure_pool_capacity(self, size: int) -> None:
+        """扩大页面池上限，使其至少能同时借出 size 个页面"""
+        extra = size - self.pool_size
+        if extra <= 0:
+            return
+        self.pool_size = size
+        for _ in range(extra):
+            self._pool_slots.release()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        借用池中页面的上下文管理器
+
+        用法：
+            async with browser_manager.page() as page:
+                await page.goto(url)
+        """
+        page = await self.acquire_page()
+        try:
+            yield page
+        except BaseException:
+            await self.release_page(page, discard=True)
+            raise
+        else:
+            await self.release_page(page)
+
     async def get_status(self) -> dict:
         """获取浏览器状态"""
         if self._browser is None:
@@ -82,6 +209,13 @@ class BrowserManager:
                 "connected": is_connected,
                 "pages_open": pages_count,
                 "headless": self.headless,
+                "page_pool": {
+                    "size": self.pool_size,
+                    "idle": len(self._idle_pages),
+                    "max_page_uses": self.max_page_uses,
+                    **self._pool_stats
+                },
+                "resource_blocking": self.resource_blocker.get_stats() if self.resource_blocker else None,
                 "message": "浏览器运行正常" if is_connected else "浏览器连接断开"
             }
         except Exception as e:
@@ -92,6 +226,10 @@ class BrowserManager:
     
     async def close(self) -> None:
         """关闭浏览器"""
+        # 池中页面随上下文一起关闭
+        self._idle_pages.clear()
+        self._page_uses.clear()
+
         try:
             if self._context:
                 try:
@@ -1,15 +1,18 @@
 """
-命令行工具 - 获取基金数据并保存为 CSV/JSON（支持断点续传）
+命令行工具 - 获取基金数据并保存为 CSV/JSONL/Parquet（支持断点续传）
 用法：
   python fetch_funds.py --max 100                    # 获取前100个基金
   python fetch_funds.py --all                        # 获取所有基金（约26000+个，耗时较长）
-  python fetch_funds.py --max 100 --format csv       # 保存为 CSV 格式
+  python fetch_funds.py --max 100 --format parquet   # 保存为 Parquet 格式（带类型的列存储）
   python fetch_funds.py --max 100 --output my.csv    # 指定输出文件名
   python fetch_funds.py --all --resume               # 断点续传，从上次中断处继续
+  python fetch_funds.py --all --resume --retry-failed  # 只重试日志中记录为失败的基金
+  python fetch_funds.py --all --refresh              # 日常更新：只为新基金和详情过期的基金请求详情页
+  python fetch_funds.py --all --hybrid               # 排行榜净值 + 属性缓存，只在缓存缺失或过期时访问详情页
+  python fetch_funds.py --all --share-classes        # 同上，且同一基金的 A/B/C 类份额只访问一次详情页
 """
 import asyncio
 import json
-import csv
 import sys
 import os
 import argparse
@@ -26,85 +29,64 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from browser_manager import BrowserManager
 from scrapers.eastmoney_scraper import EastmoneyScraper
+from storage.journal import CrawlJournal
+from storage.sink import SINK_FORMATS, format_for_path, open_sink
+from utils.retry import count_by_type
 
 
-class IncrementalCSVWriter:
-    """增量写入 CSV 的工具类"""
+class IncrementalWriter:
+    """增量写入输出文件的工具类（记录交给写线程批量写出，不阻塞事件循环）"""
 
-    def __init__(self, filename):
+    def __init__(self, filename, fmt=None, count=None, on_flush=None, fsync_interval=None):
+        """
+        Args:
+            filename: 输出文件
+            fmt: 输出格式，见 SINK_FORMATS（None 时按扩展名判断）
+            count: 已有记录数（由断点日志提供时不再扫描已有文件）
+            on_flush: 记录写出后的回调 (基金代码列表, 文件字节长度)，用于断点日志
+            fsync_interval: 每隔多少秒 fsync 一次（None 表示不 fsync）
+        """
         self.filename = filename
         self.abs_path = os.path.abspath(filename)
-        # 英文字段名（用于 DictWriter）
-        self.fieldnames = [
-            'symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
-            'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager',
-            'jjlx', 'jjzfe'
-        ]
-        # 中文标题对应
-        self.chinese_headers = [
-            '基金代码', '基金名称', '单位净值', '累计净值', '前一日净值',
-            '增长率', '涨跌额', '申购状态', '净值日期', '基金经理',
-            '基金类型', '基金zfe'
-        ]
-        self.count = 0
-        self.file = None
-        self.writer = None
-        self.is_new_file = not os.path.exists(filename)
+        self.count = count or 0
+        self.known_count = count is not None
+        self.fmt = fmt or format_for_path(filename)
+        self.sink = open_sink(filename, self.fmt, on_flush=on_flush, fsync_interval=fsync_interval)
+        self.is_new_file = self.sink.is_new_file
 
     def __enter__(self):
-        # 如果是新文件，创建并写入表头
         if self.is_new_file:
-            self.file = open(self.filename, 'w', newline='', encoding='utf-8-sig')
-            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
-            # 手动写入中文标题
-            self.file.write(','.join(self.chinese_headers) + '\n')
             print(f"📝 创建新文件: {self.abs_path}")
         else:
-            # 如果是已存在的文件，追加模式打开
-            self.file = open(self.filename, 'a', newline='', encoding='utf-8-sig')
-            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
-            # 读取已有记录数
-            with open(self.filename, 'r', encoding='utf-8-sig') as f:
-                self.count = sum(1 for _ in f) - 1  # 减去表头
+            # 读取已有记录数（没有断点日志时只能数未压缩文件的行数）
+            if not self.known_count and self.fmt in ('csv', 'jsonl'):
+                with open(self.filename, 'r', encoding='utf-8-sig') as f:
+                    self.count = sum(1 for _ in f) - (self.fmt == 'csv')  # CSV 减去表头
             print(f"📝 追加到已有文件: {self.abs_path}")
             print(f"   已有 {self.count} 条记录")
 
+        self.sink.open()
         return self
 
-    def write(self, data):
-        """写入一条记录"""
-        self.writer.writerow(data)
-        self.file.flush()  # 立即刷新到磁盘
+    def write(self, data, symbol=None):
+        """提交一条记录；写出后 symbol 随 on_flush 回调返回"""
+        self.sink.write(data, symbol)
         self.count += 1
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.file:
-            self.file.close()
-
-
-def load_processed_symbols(filename):
-    """从已有的CSV文件中读取已处理的基金代码"""
-    if not os.path.exists(filename):
-        return set()
-
-    processed = set()
-    try:
-        with open(filename, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 兼容中文和英文标题
-                symbol = row.get('symbol') or row.get('基金代码')
-                if symbol:
-                    processed.add(symbol)
-    except Exception as e:
-        print(f"⚠️ 读取已有文件失败: {e}")
-        return set()
+        self.sink.close()
 
-    return processed
 
+async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, delay=1.0, resume=False,
+                                  concurrency=1, readiness="selector", backend="browser", retry_failed=False,
+                                  fsync_interval=None, fmt=None):
+    """
+    增量获取基金数据（边爬边写）
 
-async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, delay=1.0, resume=False):
-    """增量获取基金数据（边爬边写）"""
+    每只基金的完成 / 失败记录在 <输出文件>.journal 中，续传时只重放日志；
+    retry_failed=True 时只重试日志中记录为失败的基金。记录由写线程批量写出，
+    写出（设置 fsync_interval 时为 fsync）之后才在日志中记为完成
+    """
 
     print("=" * 70)
     if max_funds:
@@ -113,45 +95,59 @@ async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, d
         print("开始获取所有基金数据（约26000+个，预计需要数小时）...")
     print("=" * 70)
 
-    # 如果是续传模式，读取已处理的基金代码
+    # 断点日志（续传时只重放日志，不再解析整个输出文件）
+    journal = CrawlJournal.for_output(output_file)
+    if journal.dropped_bytes:
+        print(f"⚠️ 丢弃输出文件末尾未完成的 {journal.dropped_bytes} 字节（上次运行中断）")
+
+    # 如果是续传模式，跳过已处理的基金代码
     processed_symbols = set()
     if resume:
         print("\n🔄 断点续传模式")
-        processed_symbols = load_processed_symbols(output_file)
+        processed_symbols = journal.processed
         if processed_symbols:
             print(f"   已处理 {len(processed_symbols)} 个基金，将跳过这些基金")
+            if journal.failed:
+                print(f"   日志中记录失败 {len(journal.failed)} 个")
         else:
             print("   未找到已处理记录，从头开始")
 
     print("\n[1/3] 正在启动浏览器...")
-    browser_manager = BrowserManager(headless=True)
+    browser_manager = BrowserManager(headless=True, pool_size=max(4, concurrency))
+    scraper = None
 
     try:
         await browser_manager.start()
         print("✅ 浏览器启动成功")
 
         print("\n[2/3] 正在初始化爬虫...")
-        scraper = EastmoneyScraper(browser_manager)
+        scraper = EastmoneyScraper(browser_manager, readiness=readiness, detail_backend=backend)
         print("✅ 爬虫初始化完成")
 
         print("\n[3/3] 正在获取基金数据...")
 
-        # 获取基金代码列表
-        print("  [步骤1] 正在获取基金代码列表...")
-        print("    正在访问基金代码数据页面...")
-        codes_result = await scraper.scrape_all_fund_codes()
+        journal.start_run(max_funds=max_funds, resume=resume, retry_failed=retry_failed,
+                          concurrency=concurrency, backend=backend)
 
-        if not codes_result['success']:
-            print(f"❌ 获取基金代码列表失败")
-            return None
+        if retry_failed:
+            all_codes = [{'symbol': symbol} for symbol in journal.failed_symbols()]
+            print(f"  [步骤1] 只重试日志中记录为失败的 {len(all_codes)} 个基金")
+        else:
+            # 获取基金代码列表
+            print("  [步骤1] 正在获取基金代码列表...")
+            codes_result = await scraper.scrape_all_fund_codes()
 
-        all_codes = codes_result['data']
-        print(f"  ✅ 成功获取 {len(all_codes)} 个基金代码")
+            if not codes_result['success']:
+                print(f"❌ 获取基金代码列表失败")
+                return None
 
-        # 限制数量（如果指定）
-        if max_funds:
-            all_codes = all_codes[:max_funds]
-            print(f"  ℹ️  限制为前 {max_funds} 个基金")
+            all_codes = codes_result['data']
+            print(f"  ✅ 成功获取 {len(all_codes)} 个基金代码")
+
+            # 限制数量（如果指定）
+            if max_funds:
+                all_codes = all_codes[:max_funds]
+                print(f"  ℹ️  限制为前 {max_funds} 个基金")
 
         total = len(all_codes)
 
@@ -164,70 +160,36 @@ async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, d
             print(f"  ℹ️  还需处理 {len(todo_codes)} 个基金")
 
         # 开始增量写入
-        print(f"\n  [步骤2] 开始批量获取基金详情（每批 {batch_size} 个，延迟 {delay}秒）...")
-        print(f"  💾 数据将实时写入文件: {os.path.abspath(output_file)}\n")
-
-        success_count = 0
-        failed_count = 0
-        failed_symbols = []
-
-        with IncrementalCSVWriter(output_file) as csv_writer:
-            for i in range(0, len(todo_codes), batch_size):
-                batch = todo_codes[i:i+batch_size]
-                batch_symbols = [f['symbol'] for f in batch]
-
-                batch_num = i // batch_size + 1
-                total_batches = (len(todo_codes) + batch_size - 1) // batch_size
-                print(f"  【批次 {batch_num}/{total_batches}】 正在获取第 {i+1}-{min(i+batch_size, len(todo_codes))} 个基金...")
-
-                batch_success = 0
-                for idx, symbol in enumerate(batch_symbols, 1):
-                    try:
-                        # 显示当前进度
-                        current = i + idx
-                        overall = skipped + current
-                        print(f"    [{overall}/{total}] {symbol}...", end='', flush=True)
-
-                        result = await scraper.scrape_detail(symbol)
-                        if result['success']:
-                            fund_data = result['data']
-
-                            # 格式化为与旧代码兼容的字段名
-                            formatted_data = {
-                                'symbol': fund_data.get('symbol', ''),
-                                'sname': fund_data.get('sname', ''),
-                                'per_nav': fund_data.get('per_nav', ''),
-                                'total_nav': fund_data.get('total_nav', ''),
-                                'yesterday_nav': fund_data.get('yesterday_nav', ''),
-                                'nav_rate': fund_data.get('nav_rate', ''),
-                                'nav_a': fund_data.get('nav_a', ''),
-                                'sg_states': fund_data.get('sg_states', ''),
-                                'nav_date': fund_data.get('nav_date', ''),
-                                'fund_manager': fund_data.get('fund_manager', ''),
-                                'jjlx': fund_data.get('jjlx', ''),
-                                'jjzfe': fund_data.get('fund_scale', '')  # fund_scale -> jjzfe
-                            }
-
-                            # 立即写入文件
-                            csv_writer.write(formatted_data)
-                            success_count += 1
-                            batch_success += 1
-                            print(" ✅")
-                        else:
-                            failed_count += 1
-                            failed_symbols.append(symbol)
-                            print(" ❌")
-                    except Exception as e:
-                        print(f" ❌ 错误: {str(e)[:50]}")
-                        failed_count += 1
-                        failed_symbols.append(symbol)
-
-                    # 延迟
-                    await scraper.random_delay(delay * 0.8, delay * 1.2)
-
-                # 批次完成统计
-                print(f"  批次完成: 成功 {batch_success}/{len(batch_symbols)} 个")
-                print(f"  总进度: 成功 {success_count + skipped}/{total} (本次新增 {success_count})\n")
+        print(f"\n  💾 数据将实时写入文件: {os.path.abspath(output_file)}")
+
+        todo_symbols = [f['symbol'] for f in todo_codes]
+        fetched_records = []  # 本次获取的记录，结束后并入快照
+
+        known_count = len(journal.done) if os.path.exists(output_file) else None
+        with IncrementalWriter(output_file, fmt, count=known_count, on_flush=journal.record_done_many,
+                               fsync_interval=fsync_interval) as writer:
+            def on_record(idx, symbol, record):
+                # 每批结束后按原顺序写入文件
+                writer.write(record, symbol)
+                fetched_records.append(record)
+
+            def on_failed(idx, symbol, kind):
+                journal.record_failed(symbol, kind)
+
+            # 分批获取并在最后重试一轮失败的基金；起始请求间隔之后由限速器按响应情况自动调整
+            _, failed_indexes = await scraper.collect_details(
+                todo_symbols, batch_size, delay, concurrency,
+                on_record=on_record, on_failed=on_failed, skipped=skipped
+            )
+            failed = {todo_symbols[idx]: kind for idx, kind in failed_indexes.items()}  # 基金代码 -> 错误类型
+            success_count = len(fetched_records)
+            print(f"  总进度: 成功 {success_count + skipped}/{total} (本次新增 {success_count})\n")
+
+        scraper.snapshot.merge(fetched_records)
+
+        failed_by_type = count_by_type(failed)
+
+        print_scraper_stats(scraper, readiness)
 
         # 返回统计信息
         return {
@@ -235,8 +197,109 @@ async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, d
             'total_count': success_count + skipped,
             'new_count': success_count,
             'skipped_count': skipped,
-            'failed_count': failed_count,
-            'failed_symbols': failed_symbols[:100] if len(failed_symbols) > 100 else failed_symbols
+            'failed_count': len(failed),
+            'failed_by_type': failed_by_type,
+            'failed_symbols': list(failed)
+        }
+
+    except Exception as e:
+        print(f"\n❌ 发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+    finally:
+        journal.close()
+        if scraper is not None:
+            await scraper.close()
+        await browser_manager.close()
+
+
+def print_scraper_stats(scraper, readiness):
+    """打印分阶段耗时、限速和回退统计"""
+    summary = scraper.timer.summary()
+    for operation, label in (('detail', f'浏览器, 就绪模式: {readiness}'), ('detail_http', 'HTTP')):
+        timings = summary.get(operation, {})
+        if not timings:
+            continue
+        print(f"  ⏱️  详情页耗时（{label}）:")
+        for stage, stat in timings.items():
+            print(f"     {stage:<10} p50 {stat['p50_ms']:>8.1f} ms   p95 {stat['p95_ms']:>8.1f} ms   (n={stat['count']})")
+    for family, stat in scraper.rate_limiter.get_stats().items():
+        print(f"  🚦 限速 {family}: 当前 {stat['rate']} 次/秒，成功 {stat['successes']}，失败 {stat['failures']}")
+        circuit = stat.get('circuit')
+        if circuit and circuit['trips']:
+            print(f"     熔断 {circuit['trips']} 次，当前状态: {circuit['state']}")
+    if scraper.http_fallbacks:
+        print(f"  ℹ️  HTTP 解析失败回退到浏览器: {scraper.http_fallbacks} 次")
+
+
+async def refresh_funds(output_file, max_funds=None, batch_size=100, delay=1.0, concurrency=1,
+                        readiness="selector", backend="browser", max_age_days=7, hybrid=False, fmt=None,
+                        share_classes=False):
+    """
+    增量获取，输出完整数据
+    hybrid=False: 排行榜净值与上次快照比对，只为新基金和详情过期的基金请求详情页
+    hybrid=True: 排行榜净值 + 慢变属性缓存，只在属性缓存缺失或过期时请求详情页；
+                 share_classes=True 时同一基金的各份额只访问一次详情页
+    """
+
+    print("=" * 70)
+    if hybrid:
+        print("开始获取基金数据（排行榜净值 + 属性缓存）...")
+    else:
+        print(f"开始增量刷新基金数据（详情最长沿用 {max_age_days} 天）...")
+    print("=" * 70)
+
+    browser_manager = BrowserManager(headless=True, pool_size=max(4, concurrency))
+    scraper = None
+
+    try:
+        await browser_manager.start()
+        scraper = EastmoneyScraper(browser_manager, readiness=readiness, detail_backend=backend)
+
+        if hybrid:
+            result = await scraper.fetch_funds_hybrid(
+                batch_size=batch_size,
+                max_funds=max_funds,
+                delay=delay,
+                concurrency=concurrency,
+                share_classes=share_classes
+            )
+        else:
+            result = await scraper.refresh_funds_info(
+                max_age_days=max_age_days,
+                batch_size=batch_size,
+                max_funds=max_funds,
+                delay=delay,
+                concurrency=concurrency
+            )
+        if not result['success']:
+            print(f"❌ {result.get('error', '')}")
+            return None
+
+        # 输出完整的合并后数据（整体重写，旧的断点日志不再适用）
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        CrawlJournal(f"{output_file}.journal").reset()
+        with IncrementalWriter(output_file, fmt) as writer:
+            for record in result['data']:
+                writer.write(record)
+
+        print_scraper_stats(scraper, readiness)
+
+        return {
+            'success': True,
+            'total_count': result['total_count'],
+            'new_count': result.get('refresh', {}).get('detail_fetched', result['total_count']),
+            'skipped_count': 0,
+            'refresh': result.get('refresh'),
+            'attribute_cache_hits': result.get('attribute_cache_hits'),
+            'detail_fetched': result.get('detail_fetched'),
+            'share_classes': result.get('share_classes'),
+            'failed_count': result['failed_count'],
+            'failed_by_type': result['failed_by_type'],
+            'failed_symbols': result['failed_symbols']
         }
 
     except Exception as e:
@@ -246,6 +309,8 @@ async def fetch_funds_incremental(output_file, max_funds=None, batch_size=100, d
         return None
 
     finally:
+        if scraper is not None:
+            await scraper.close()
         await browser_manager.close()
 
 
@@ -258,21 +323,62 @@ def main():
   python fetch_funds.py --max 100                    # 获取前100个基金
   python fetch_funds.py --all                        # 获取所有基金
   python fetch_funds.py --max 500 --output my.csv    # 指定文件名
+  python fetch_funds.py --all --format jsonl.gz      # 带类型的 JSON Lines（gzip 压缩，可续传）
   python fetch_funds.py --all --resume               # 断点续传
   python fetch_funds.py --all --batch 200 --delay 0.5  # 自定义批次大小和延迟
+  python fetch_funds.py --all --concurrency 4        # 同时进行4个请求
+  python fetch_funds.py --all --refresh              # 日常更新（只重新获取新基金和详情过期的基金）
+  python fetch_funds.py --all --hybrid               # 排行榜净值 + 属性缓存（缓存缺失或过期才访问详情页）
+  python fetch_funds.py --all --share-classes        # 同一基金的 A/B/C 类份额只访问一次详情页（隐含 --hybrid）
         """
     )
 
     parser.add_argument('--max', type=int, help='获取的最大基金数量')
     parser.add_argument('--all', action='store_true', help='获取所有基金（约26000+个）')
     parser.add_argument('--output', '-o', help='输出文件名（默认自动生成）')
+    parser.add_argument('--format', '-f', choices=list(SINK_FORMATS),
+                        help='输出格式 (默认: 按 --output 的扩展名判断，否则为 csv)；'
+                             'jsonl.zst 需要 zstandard，parquet 需要 pyarrow')
     parser.add_argument('--resume', action='store_true', help='断点续传模式（从已有文件继续）')
     parser.add_argument('--batch', type=int, default=100,
                         help='每批获取的基金数量 (默认: 100)')
     parser.add_argument('--delay', type=float, default=1.0,
-                        help='每批之间的延迟秒数 (默认: 1.0)')
+                        help='起始请求间隔秒数，之后按响应情况自动调整 (默认: 1.0)')
+    parser.add_argument('--concurrency', '-c', type=int, default=1,
+                        help='同时进行的详情请求数 (默认: 1)')
+    parser.add_argument('--readiness', choices=EastmoneyScraper.READINESS_MODES, default='selector',
+                        help='页面就绪判定: selector=等待数据文本出现, networkidle=等待网络空闲 (默认: selector)')
+    parser.add_argument('--backend', choices=EastmoneyScraper.DETAIL_BACKENDS, default='browser',
+                        help='详情页抓取后端: browser=浏览器渲染, http=直接请求HTML（解析失败时回退浏览器）(默认: browser)')
+
+    parser.add_argument('--fsync-interval', type=float,
+                        help='每隔多少秒把输出文件 fsync 到磁盘（默认只刷新到操作系统，进程崩溃不丢数据，断电可能丢失最近的记录）')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='配合 --resume：只重试断点日志中记录为失败的基金')
+    parser.add_argument('--refresh', action='store_true',
+                        help='增量刷新：用排行榜净值更新上次的快照，只为新基金和详情过期的基金请求详情页，输出完整数据')
+    parser.add_argument('--max-age', type=int, default=7,
+                        help='增量刷新时详情页数据的最长沿用天数 (默认: 7)')
+
+    parser.add_argument('--hybrid', action='store_true',
+                        help='净值取自排行榜接口，基金经理/类型/规模取自本地属性缓存，只在缓存缺失或过期时访问详情页')
+    parser.add_argument('--share-classes', action='store_true',
+                        help='按份额类别（A/B/C 类、前端/后端）分组，每组只访问一次详情页，'
+                             '基金经理/公司/类型/成立日期分给同组其他份额（隐含 --hybrid）')
 
     args = parser.parse_args()
+    if args.share_classes:
+        args.hybrid = True
+
+    if (args.refresh or args.hybrid) and args.resume:
+        print("❌ 错误: --refresh / --hybrid 与 --resume 不能同时使用")
+        sys.exit(1)
+    if args.retry_failed and not args.resume:
+        print("❌ 错误: --retry-failed 需要配合 --resume 和 --output 使用")
+        sys.exit(1)
+    if args.refresh and args.hybrid:
+        print("❌ 错误: --refresh 与 --hybrid 只能选择一个")
+        sys.exit(1)
 
     # 确定获取数量
     if args.all:
@@ -294,16 +400,43 @@ def main():
             print("❌ 错误: 断点续传模式必须使用 --output 指定文件名")
             sys.exit(1)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f'funds_data_{timestamp}.csv'
+        output_file = f"funds_data_{timestamp}{SINK_FORMATS[args.format or 'csv'][0]}"
+    fmt = args.format or format_for_path(output_file)
 
-    # 获取数据（增量模式）
-    result = asyncio.run(fetch_funds_incremental(
-        output_file=output_file,
-        max_funds=max_funds,
-        batch_size=args.batch,
-        delay=args.delay,
-        resume=args.resume
-    ))
+    # Parquet 文件写完才有文件尾，不能追加
+    if fmt == 'parquet' and os.path.exists(output_file) and not (args.refresh or args.hybrid):
+        print("❌ 错误: Parquet 输出不支持追加或断点续传，请换一个文件名，或使用 jsonl / jsonl.gz 格式")
+        sys.exit(1)
+
+    if args.refresh or args.hybrid:
+        result = asyncio.run(refresh_funds(
+            output_file=output_file,
+            max_funds=max_funds,
+            batch_size=args.batch,
+            delay=args.delay,
+            concurrency=args.concurrency,
+            readiness=args.readiness,
+            backend=args.backend,
+            max_age_days=args.max_age,
+            hybrid=args.hybrid,
+            fmt=fmt,
+            share_classes=args.share_classes
+        ))
+    else:
+        # 获取数据（增量模式）
+        result = asyncio.run(fetch_funds_incremental(
+            output_file=output_file,
+            max_funds=max_funds,
+            batch_size=args.batch,
+            delay=args.delay,
+            resume=args.resume,
+            concurrency=args.concurrency,
+            readiness=args.readiness,
+            backend=args.backend,
+            retry_failed=args.retry_failed,
+            fsync_interval=args.fsync_interval,
+            fmt=fmt
+        ))
 
     if not result:
         sys.exit(1)
@@ -318,7 +451,19 @@ def main():
     if result.get('skipped_count', 0) > 0:
         print(f"   - 已有记录: {result.get('skipped_count', 0)} 个")
         print(f"   - 新增记录: {result.get('new_count', 0)} 个")
+    refresh = result.get('refresh')
+    if refresh:
+        print(f"   - 新基金: {refresh['new']} 个，净值更新: {refresh['changed']} 个，净值未变: {refresh['unchanged']} 个")
+        print(f"   - 重新获取详情: {refresh['detail_fetched']} 个（详情过期 {refresh['stale']} 个）")
+    if result.get('attribute_cache_hits') is not None:
+        print(f"   - 属性缓存命中: {result['attribute_cache_hits']} 个，访问详情页: {result['detail_fetched']} 个")
+    share_classes = result.get('share_classes')
+    if share_classes:
+        print(f"   - 基金族: {share_classes['families']} 个，同族共用属性: "
+              f"{share_classes['family_cache_hits'] + share_classes['shared_detail']} 个")
     print(f"❌ 失败: {result.get('failed_count', 0)} 个")
+    for kind, count in result.get('failed_by_type', {}).items():
+        print(f"   - {kind}: {count} 个")
     if result.get('failed_symbols'):
         print(f"   失败的基金代码: {', '.join(result['failed_symbols'][:10])}")
         if len(result['failed_symbols']) > 10:
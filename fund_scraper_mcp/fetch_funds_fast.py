@@ -1,208 +1,255 @@
 """
 快速获取基金数据 - 使用天天基金排行榜API
 无需浏览器，直接HTTP请求，速度快
+用法：
+  python fetch_funds_fast.py                                 # 弹出对话框选择保存位置
+  python fetch_funds_fast.py --format parquet                # 对话框默认保存为 Parquet
+  python fetch_funds_fast.py --output funds.jsonl.gz         # 不弹对话框，格式按扩展名判断
+  python fetch_funds_fast.py --output funds.dat --format jsonl
 """
+import argparse
 import requests
-import csv
-import time
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import os
 import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from utils.rank_parser import parse_rank_data, RankParseError, build_rank_params, row_to_fund
+from utils.rate_limiter import get_rate_limiter, is_blocked_response
+from utils.retry import RETRYABLE_KINDS, ErrorKind, RetryPolicy, ScrapeError, classify_error, classify_status
+from storage.attribute_cache import FundAttributeCache, apply_attributes
+from storage.sink import SINK_FORMATS, open_sink
+
 # 设置控制台编码为UTF-8
 if sys.platform == 'win32':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-def get_all_funds_data(output_file="all_funds_fast.csv"):
+# API endpoint
+RANK_API_URL = "http://fund.eastmoney.com/data/rankhandler.aspx"
+
+# 请求头
+RANK_API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Referer': 'http://fund.eastmoney.com/data/fundranking.html'
+}
+
+# 默认参数
+DEFAULT_PAGE_SIZE = 500     # 每页获取500条
+DEFAULT_MAX_WORKERS = 8     # 同时在途的分页请求数
+DEFAULT_RETRIES = 3         # 单页失败后的重试次数
+RETRY_BASE_DELAY = 0.5      # 退避基数（秒）
+
+# 分页请求可重试的错误：超时、被拒绝，以及响应被截断等解析失败
+RANK_RETRYABLE_KINDS = RETRYABLE_KINDS | {ErrorKind.PARSE_FAILURE}
+
+
+class RankPageError(ScrapeError):
+    """单页数据获取或解析失败（kind 为 ErrorKind）"""
+
+
+def create_session(max_workers=DEFAULT_MAX_WORKERS):
+    """创建复用 keep-alive 连接的会话，连接池大小与并发数一致"""
+    session = requests.Session()
+    session.headers.update(RANK_API_HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def fetch_rank_page(session, page, page_size):
+    """
+    获取一页排行榜原始响应
+
+    Raises:
+        RankPageError: 被拒绝访问或状态码异常
+    """
+    limiter = get_rate_limiter()
+    limiter.acquire_sync('rank')
+    try:
+        response = session.get(RANK_API_URL, params=build_rank_params(page, page_size), timeout=30)
+    except requests.RequestException:
+        limiter.record_failure('rank')
+        raise
+    response.encoding = 'utf-8'
+    if response.status_code != 200:
+        limiter.record_failure('rank')
+        raise RankPageError(classify_status(response.status_code) or ErrorKind.UNKNOWN, f"状态码 {response.status_code}")
+
+    # 解析响应 var rankData = {...}
+    content = response.text
+    if is_blocked_response(content):
+        limiter.record_failure('rank')
+        raise RankPageError(ErrorKind.BLOCKED, "API访问被拒绝")
+    limiter.record_success('rank')
+    return content
+
+
+def parse_rank_rows(content):
+    """
+    从排行榜响应中解析基金数据
+
+    Raises:
+        RankPageError: 响应中找不到 datas 数组
+    """
+    try:
+        rank_data = parse_rank_data(content)
+        # 数据格式: "基金代码,基金名称,拼音缩写,净值日期,单位净值,累计净值,日增长率,..."
+        # 示例: "009317,金信核心竞争力混合A,JXHXJZLHHA,2026-02-13,1.1921,2.5879,-1.45,..."
+        return [row_to_fund(row.fields) for row in rank_data.rows() if len(row.fields) >= 10]
+    except RankParseError as e:
+        raise RankPageError(ErrorKind.PARSE_FAILURE, str(e))
+
+
+def fetch_rank_page_rows(session, page, page_size, retries=DEFAULT_RETRIES):
+    """获取并解析一页数据，可恢复的失败按 RetryPolicy 退避重试（指数退避 + 随机抖动）"""
+    policy = RetryPolicy(max_attempts=retries + 1, base_delay=RETRY_BASE_DELAY, retryable=RANK_RETRYABLE_KINDS)
+    try:
+        return policy.call_sync(lambda: parse_rank_rows(fetch_rank_page(session, page, page_size)))
+    except Exception as e:
+        raise RankPageError(classify_error(e), f"第 {page} 页获取失败: {str(e)[:80]}") from e
+
+
+def fetch_all_rank_pages(session, pages, page_size, max_workers=DEFAULT_MAX_WORKERS, retries=DEFAULT_RETRIES):
+    """
+    并发获取多页数据
+
+    Returns:
+        (按页号排列的 {页号: 基金列表}, 失败页列表 [(页号, 错误信息)])
+    """
+    results = {}
+    failed_pages = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_rank_page_rows, session, page, page_size, retries): page
+            for page in pages
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                results[page] = future.result()
+                print(f"  第 {page} 页 ✅ {len(results[page])} 个")
+            except Exception as e:
+                failed_pages.append((page, str(e)))
+                print(f"  第 {page} 页 ❌ {str(e)[:80]}")
+
+    return dict(sorted(results.items())), sorted(failed_pages)
+
+
+def get_all_funds_data(output_file="all_funds_fast.csv", max_workers=DEFAULT_MAX_WORKERS,
+                       retries=DEFAULT_RETRIES, page_size=DEFAULT_PAGE_SIZE, fmt=None):
     """
     从天天基金排行榜API批量获取所有基金数据
     一次性获取26000+基金，比逐个爬取快100倍
+
+    Args:
+        output_file: 输出文件
+        max_workers: 同时在途的分页请求数
+        retries: 单页失败后的重试次数
+        page_size: 每页条数
+        fmt: 输出格式，见 SINK_FORMATS（None 时按扩展名判断）
     """
     print("=" * 70)
     print("快速获取所有基金数据（约26000+个）")
     print("使用天天基金排行榜API，无需浏览器")
     print("=" * 70)
 
-    # API endpoint
-    base_url = "http://fund.eastmoney.com/data/rankhandler.aspx"
-
-    # 请求头
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Referer': 'http://fund.eastmoney.com/data/fundranking.html'
-    }
-
-    # 第一次请求，获取总数
-    params = {
-        'op': 'ph',      # 排行榜
-        'dt': 'kf',      # 开放式基金
-        'ft': 'all',     # 所有类型
-        'rs': '',
-        'gs': '0',
-        'sc': 'zzf',     # 按规模排序
-        'st': 'desc',    # 降序
-        'sd': '2020-01-01',
-        'ed': '2099-12-31',
-        'qdii': '',
-        'tabSubtype': ',,,,,',
-        'pi': '1',      # 第1页
-        'pn': '50',     # 每页50条
-        'dx': '1'
-    }
+    session = create_session(max_workers)
 
+    # 第一页同时用于获取总数
     print("\n[步骤1] 正在获取基金总数...")
     try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=30)
-        response.encoding = 'utf-8'
-
-        # 解析响应 var rankData = {...}
-        content = response.text
-        if 'ErrCode:-999' in content or '无访问权限' in content:
-            print("❌ API访问被拒绝，使用备用方案...")
-            return get_funds_from_js()
-
-        # 使用正则提取allRecords
-        import re
-        m = re.search(r'allRecords:(\d+)', content)
-        if not m:
+        content = fetch_rank_page(session, 1, page_size)
+
+        # 从元数据中读取allRecords
+        total_count = parse_rank_data(content).all_records
+        if total_count is None:
             print("❌ 无法获取基金总数，使用备用方案...")
-            return get_funds_from_js()
+            return get_funds_from_js(fmt)
 
-        total_count = int(m.group(1))
+        first_page_funds = parse_rank_rows(content)
         print(f"✅ 共有 {total_count} 个基金")
 
     except Exception as e:
         print(f"❌ 第一次请求失败: {e}")
         print("使用备用方案...")
-        return get_funds_from_js()
+        return get_funds_from_js(fmt)
 
     # 计算需要请求多少页
-    page_size = 500  # 每页获取500条
     total_pages = (total_count + page_size - 1) // page_size
 
-    print(f"\n[步骤2] 开始分页获取数据（每页{page_size}条，共{total_pages}页）...\n")
+    print(f"\n[步骤2] 开始并发获取数据（每页{page_size}条，共{total_pages}页，并发{max_workers}）...\n")
+    print(f"  第 1 页 ✅ {len(first_page_funds)} 个")
 
-    all_funds = []
-
-    for page in range(1, total_pages + 1):
-        print(f"  获取第 {page}/{total_pages} 页...", end='', flush=True)
-
-        params['pi'] = str(page)
-        params['pn'] = str(page_size)
+    pages, failed_pages = fetch_all_rank_pages(
+        session, range(2, total_pages + 1), page_size, max_workers=max_workers, retries=retries
+    )
+    pages[1] = first_page_funds
+    session.close()
 
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=30)
-            response.encoding = 'utf-8'
-
-            # 解析数据 - 使用正则表达式提取datas数组
-            import re
-            content = response.text
-
-            # 提取 datas:["...","...",...] 中的内容
-            m = re.search(r'datas:\[(.*?)\]', content, re.DOTALL)
-            if not m:
-                print(f" ❌ 无法解析数据")
-                continue
-
-            datas_str = m.group(1)
-            # 分割成单个基金数据（用","分隔，但要注意字符串内的引号）
-            data_list = [s.strip().strip('"') for s in datas_str.split('","')]
-
-            for item in data_list:
-                if not item or not item.strip():
-                    continue
-
-                # 数据格式: "基金代码,基金名称,拼音缩写,净值日期,单位净值,累计净值,日增长率,..."
-                # 示例: "009317,金信核心竞争力混合A,JXHXJZLHHA,2026-02-13,1.1921,2.5879,-1.45,..."
-                fields = item.split(',')
-                if len(fields) < 10:
-                    continue
-
-                try:
-                    nav_rate_str = fields[6] if len(fields) > 6 else '0'
-                    nav_rate = nav_rate_str.replace('%', '').strip()
-
-                    fund = {
-                        'symbol': fields[0],              # [0] 基金代码
-                        'sname': fields[1],               # [1] 基金名称
-                        'nav_date': fields[3],            # [3] 净值日期
-                        'per_nav': fields[4],             # [4] 单位净值
-                        'total_nav': fields[5],           # [5] 累计净值
-                        'nav_rate': nav_rate,             # [6] 日增长率
-                        'nav_a': '',                      # 涨跌额（需计算）
-                        'yesterday_nav': '',              # 前一日净值（需计算）
-                        'sg_states': '开放',              # 申购状态（默认开放）
-                        'fund_manager': '',               # 基金经理（API不提供）
-                        'jjlx': '',                       # 基金类型（API不提供）
-                        'jjzfe': fields[14] if len(fields) > 14 else ''  # [14] 基金规模
-                    }
-
-                    # 计算前一日净值和涨跌额
-                    if fund['per_nav'] and fund['nav_rate']:
-                        try:
-                            per_nav = float(fund['per_nav'])
-                            rate = float(fund['nav_rate'])
-                            yesterday_nav = per_nav / (1 + rate / 100)
-                            nav_a = per_nav - yesterday_nav
-
-                            fund['yesterday_nav'] = str(round(yesterday_nav, 4))
-                            fund['nav_a'] = str(round(nav_a, 4))
-                        except:
-                            pass
-
-                    all_funds.append(fund)
-
-                except Exception as e:
-                    print(f"  解析基金数据失败: {str(e)[:100]}")
-                    continue
-
-            print(f" ✅ 成功获取 {len(data_list)} 个")
-            time.sleep(0.5)  # 短暂延迟，避免请求过快
-
-        except Exception as e:
-            print(f" ❌ {str(e)[:50]}")
-
-    # 写入CSV
-    print(f"\n[步骤3] 正在写入CSV文件...")
-
-    # 中文标题
-    chinese_headers = ['基金代码', '基金名称', '单位净值', '累计净值', '前一日净值',
-                      '增长率', '涨跌额', '申购状态', '净值日期', '基金经理',
-                      '基金类型', '基金zfe']
-
-    fieldnames = ['symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
-                 'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager',
-                 'jjlx', 'jjzfe']
+    # 按页号顺序拼接
+    all_funds = []
+    for page in sorted(pages):
+        all_funds.extend(pages[page])
+
+    if failed_pages:
+        print(f"\n⚠️ 有 {len(failed_pages)} 页获取失败，结果不完整:")
+        for page, error in failed_pages:
+            print(f"   第 {page} 页: {error}")
+
+    # 排行榜接口不提供基金经理和类型：用之前访问详情页时缓存的属性补全（不检查有效期，不访问详情页）
+    attribute_cache = FundAttributeCache()
+    filled = 0
+    for idx, fund in enumerate(all_funds):
+        attributes = attribute_cache.peek(fund['symbol'])
+        if attributes:
+            all_funds[idx] = apply_attributes(fund, attributes)
+            filled += 1
+    if filled:
+        print(f"\n  ℹ️  从属性缓存补全基金经理/类型/规模/申购状态: {filled} 个")
+    if filled < len(all_funds):
+        # 排行榜不提供这些字段，没有缓存的基金留空（不使用默认值）
+        print(f"  ℹ️  {len(all_funds) - filled} 个基金没有缓存属性，基金经理/类型/规模/申购状态为空"
+              f"（可用 fetch_funds.py --hybrid 补全）")
+
+    # 写入输出文件（格式按扩展名：.csv / .jsonl / .jsonl.gz / .jsonl.zst / .parquet）
+    print(f"\n[步骤3] 正在写入输出文件...")
 
     # 获取根目录
     root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     output_path = os.path.join(root_dir, output_file)
 
-    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-        # 写入中文标题
-        f.write(','.join(chinese_headers) + '\n')
-
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+    # 整体重写
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    with open_sink(output_path, fmt) as sink:
         for fund in all_funds:
-            writer.writerow(fund)
+            sink.write(fund)
 
     print(f"\n{'='*70}")
     print(f"✅ 数据获取完成！")
     print(f"{'='*70}")
     print(f"文件位置: {output_path}")
     print(f"总记录数: {len(all_funds)} 个")
+    if failed_pages:
+        print(f"失败页数: {len(failed_pages)} 页（第 {', '.join(str(p) for p, _ in failed_pages)} 页）")
     print(f"{'='*70}")
 
     return output_path
 
 
-def get_funds_from_js():
+def get_funds_from_js(fmt=None):
     """
     备用方案：从fundcode_search.js获取基金代码，然后批量获取
+
+    Args:
+        fmt: 输出格式，见 SINK_FORMATS（None 时为 csv）
     """
     print("\n使用备用方案：从基金代码列表获取数据...\n")
 
@@ -212,33 +259,28 @@ def get_funds_from_js():
 
     async def fetch():
         browser_manager = BrowserManager(headless=True)
-        await browser_manager.start()
-
-        scraper = EastmoneyScraper(browser_manager)
-
-        # 使用现有的批量获取方法
-        result = await scraper.fetch_all_funds_info(max_funds=None, batch_size=100, delay=0.5)
+        scraper = None
+        try:
+            await browser_manager.start()
+            scraper = EastmoneyScraper(browser_manager)
 
-        await browser_manager.close()
+            # 使用现有的批量获取方法
+            result = await scraper.fetch_all_funds_info(max_funds=None, batch_size=100, delay=0.5)
+        finally:
+            # 出错时也要保存属性缓存、关闭 HTTP 连接池和浏览器
+            if scraper is not None:
+                await scraper.close()
+            await browser_manager.close()
 
         if result['success']:
             # 写入CSV
             root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            output_file = os.path.join(root_dir, f"all_funds_fast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-
-            chinese_headers = ['基金代码', '基金名称', '单位净值', '累计净值', '前一日净值',
-                              '增长率', '涨跌额', '申购状态', '净值日期', '基金经理',
-                              '基金类型', '基金zfe']
+            extension = SINK_FORMATS[fmt or 'csv'][0]
+            output_file = os.path.join(root_dir, f"all_funds_fast_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}")
 
-            fieldnames = ['symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
-                         'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager',
-                         'jjlx', 'jjzfe']
-
-            with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-                f.write(','.join(chinese_headers) + '\n')
-                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            with open_sink(output_file, fmt) as sink:
                 for fund in result['data']:
-                    writer.writerow(fund)
+                    sink.write(fund)
 
             print(f"\n✅ 成功！文件: {output_file}")
             print(f"总记录数: {len(result['data'])} 个")
@@ -251,36 +293,52 @@ if __name__ == "__main__":
     import os
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-    # 创建隐藏的 Tkinter 窗口用于文件对话框
-    root = tk.Tk()
-    root.withdraw()  # 隐藏主窗口
-
-    # 设置默认输出目录为 E:\数据
-    default_dir = r"E:\数据"
-    # 如果 E:\数据 不存在，则回退到与 .bat 同目录
-    if not os.path.exists(default_dir):
-        default_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-    default_filename = f"{datetime.now().strftime('%Y%m%d')}_基金数据.csv"
-    default_path = os.path.join(default_dir, default_filename)
-
-    # 弹出文件保存对话框
-    output_file = filedialog.asksaveasfilename(
-        title="选择基金数据保存位置",
-        initialdir=default_dir,
-        initialfile=default_filename,
-        defaultextension=".csv",
-        filetypes=[("CSV文件", "*.csv"), ("所有文件", "*.*")]
-    )
-
-    root.destroy()
-
-    # 如果用户取消了选择，则退出
+    parser = argparse.ArgumentParser(description='通过排行榜接口快速获取全部基金数据（无需浏览器）')
+    parser.add_argument('--output', type=str, default=None,
+                        help='输出文件（不指定时弹出对话框选择保存位置）')
+    parser.add_argument('--format', choices=list(SINK_FORMATS), default=None,
+                        help='输出格式 (默认按输出文件扩展名判断，未知扩展名为 csv)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'同时在途的分页请求数 (默认: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'单页失败后的重试次数 (默认: {DEFAULT_RETRIES})')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'每页条数 (默认: {DEFAULT_PAGE_SIZE})')
+    args = parser.parse_args()
+
+    output_file = args.output
     if not output_file:
-        print("\n用户取消操作，程序退出。")
-        input("\n按回车键退出...")
-        sys.exit(0)
+        # 创建隐藏的 Tkinter 窗口用于文件对话框
+        root = tk.Tk()
+        root.withdraw()  # 隐藏主窗口
+
+        # 设置默认输出目录为 E:\数据
+        default_dir = r"E:\数据"
+        # 如果 E:\数据 不存在，则回退到与 .bat 同目录
+        if not os.path.exists(default_dir):
+            default_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        extension = SINK_FORMATS[args.format or 'csv'][0]
+        default_filename = f"{datetime.now().strftime('%Y%m%d')}_基金数据{extension}"
+
+        # 弹出文件保存对话框
+        output_file = filedialog.asksaveasfilename(
+            title="选择基金数据保存位置",
+            initialdir=default_dir,
+            initialfile=default_filename,
+            defaultextension=extension,
+            filetypes=[("CSV文件", "*.csv"), ("JSON Lines", "*.jsonl *.jsonl.gz *.jsonl.zst"),
+                       ("Parquet文件", "*.parquet"), ("所有文件", "*.*")]
+        )
+
+        root.destroy()
+
+        # 如果用户取消了选择，则退出
+        if not output_file:
+            print("\n用户取消操作，程序退出。")
+            input("\n按回车键退出...")
+            sys.exit(0)
 
     # 执行数据获取
-    get_all_funds_data(output_file)
-
+    get_all_funds_data(output_file, max_workers=args.workers, retries=args.retries,
+                       page_size=args.page_size, fmt=args.format)
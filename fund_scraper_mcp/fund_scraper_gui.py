@@ -37,6 +37,9 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from browser_manager import BrowserManager
 from scrapers.eastmoney_scraper import EastmoneyScraper
+from storage.journal import CrawlJournal
+from storage.sink import format_for_path, open_sink
+from utils.share_class import deduplicate_funds
 
 
 class FundScraperGUI:
@@ -104,6 +107,16 @@ class FundScraperGUI:
                    textvariable=self.delay_var, width=10).grid(row=1, column=1,
                                                                 sticky=tk.W, pady=5, padx=5)
 
+        # 增量刷新：只为新基金和详情过期的基金请求详情页
+        self.refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="只更新变化的基金（净值由排行榜批量更新，详情超过7天才重新获取）",
+                        variable=self.refresh_var).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        # 份额类别合并：A/B/C 类、前端/后端份额每组只访问一次详情页
+        self.share_class_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="同一基金的 A/B/C 类份额只访问一次详情页（净值取自排行榜，保留所有份额）",
+                        variable=self.share_class_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
+
         # 控制按钮
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=5, column=0, columnspan=3, pady=10)
@@ -146,7 +159,8 @@ class FundScraperGUI:
         """浏览文件对话框"""
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl *.jsonl.gz *.jsonl.zst"),
+                       ("Parquet files", "*.parquet"), ("All files", "*.*")],
             initialfile=self.output_var.get()
         )
         if filename:
@@ -165,34 +179,7 @@ class FundScraperGUI:
         1. 保留基金代码最小的（通常是A类或前端）
         2. 通过基金名称判断是否为同一基金
         """
-        import re
-
-        # 按基金名称分组
-        name_to_funds = {}
-        for fund in funds:
-            # 提取基金名称（去除前端/后端/ABC标记）
-            name = fund['sname']
-            # 移除 (前端：xxx 后端：xxx) 这样的标记
-            clean_name = re.sub(r'\(.*?前端.*?后端.*?\)', '', name)
-            # 移除 A/B/C 类标记
-            clean_name = re.sub(r'[ABC](?:\(|$)', '', clean_name)
-            clean_name = clean_name.strip()
-
-            if clean_name not in name_to_funds:
-                name_to_funds[clean_name] = []
-            name_to_funds[clean_name].append(fund)
-
-        # 对每组基金，保留代码最小的
-        result = []
-        for clean_name, group in name_to_funds.items():
-            if len(group) == 1:
-                result.append(group[0])
-            else:
-                # 选择基金代码最小的
-                selected = min(group, key=lambda x: x['symbol'])
-                result.append(selected)
-
-        return result
+        return deduplicate_funds(funds)
 
     def start_scraping(self):
         """开始获取数据"""
@@ -202,6 +189,12 @@ class FundScraperGUI:
             messagebox.showerror("错误", "请指定输出文件名")
             return
 
+        # Parquet 文件写完才有文件尾，不能追加
+        if format_for_path(output_file) == 'parquet' and os.path.exists(output_file) \
+                and not (self.refresh_var.get() or self.share_class_var.get()):
+            messagebox.showerror("错误", "Parquet 输出不支持追加或断点续传，请换一个文件名，或使用 .jsonl / .jsonl.gz")
+            return
+
         # 禁用开始按钮，启用停止按钮
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
@@ -219,7 +212,7 @@ class FundScraperGUI:
         """停止获取"""
         self.stop_flag = True
         self.log("正在停止...")
-        self.status_var.set("正在停止，请稍候...")
+        self.status_var.set("正在停止，当前批次结束后停止...")
 
     def run_scraper(self):
         """运行爬虫（在线程中）"""
@@ -241,32 +234,33 @@ class FundScraperGUI:
         batch_size = self.batch_var.get()
         delay = self.delay_var.get()
 
+        if self.refresh_var.get() or self.share_class_var.get():
+            await self.refresh_funds(output_file, dedupe, batch_size, delay, share_classes=self.share_class_var.get())
+            return
+
         self.log("="*70)
         self.log("开始获取所有基金数据（约26000+个）")
         self.log("="*70)
 
+        # 断点日志（续传时只重放日志，不再解析整个输出文件）
+        journal = CrawlJournal.for_output(output_file)
+        if journal.dropped_bytes:
+            self.log(f"⚠️ 丢弃输出文件末尾未完成的 {journal.dropped_bytes} 字节（上次运行中断）")
+
+        sink = None
+
         # 断点续传
         processed_symbols = set()
         if resume and os.path.exists(output_file):
             self.log(f"\n断点续传模式")
-            # 读取已处理的基金代码
-            try:
-                with open(output_file, 'r', encoding='utf-8-sig') as f:
-                    import csv
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # 兼容中文和英文标题
-                        symbol = row.get('symbol') or row.get('基金代码')
-                        if symbol:
-                            processed_symbols.add(symbol)
-                if processed_symbols:
-                    self.log(f"已处理 {len(processed_symbols)} 个基金，将跳过这些基金")
-            except Exception as e:
-                self.log(f"⚠️ 读取已有文件失败: {e}")
+            processed_symbols = journal.processed
+            if processed_symbols:
+                self.log(f"已处理 {len(processed_symbols)} 个基金，将跳过这些基金")
 
         self.status_var.set("正在启动浏览器...")
         self.log("\n[1/3] 正在启动浏览器...")
         browser_manager = BrowserManager(headless=True)
+        scraper = None
 
         try:
             await browser_manager.start()
@@ -276,13 +270,14 @@ class FundScraperGUI:
             self.log("\n[2/3] 正在初始化爬虫...")
             scraper = EastmoneyScraper(browser_manager)
             self.log("✅ 爬虫初始化完成")
+            journal.start_run(resume=resume, dedupe=dedupe, source="gui")
 
             # 获取基金代码列表
             self.status_var.set("正在获取基金列表...")
             self.log("\n[3/3] 正在获取基金数据...")
             self.log("  [步骤1] 正在获取基金代码列表...")
 
-            codes_result = await scraper.scrape_all_fund_codes()
+            codes_result = await scraper.scrape_all_fund_codes(verbose=False)
 
             if not codes_result['success']:
                 self.log(f"❌ 获取基金代码列表失败")
@@ -311,109 +306,59 @@ class FundScraperGUI:
             total = len(all_codes)
 
             # 开始获取
-            self.log(f"\n  [步骤2] 开始批量获取基金详情（每批 {batch_size} 个，延迟 {delay}秒）...")
+            self.log(f"\n  [步骤2] 开始批量获取基金详情（每批 {batch_size} 个，起始间隔 {delay}秒）...")
             self.log(f"  💾 数据将实时写入文件: {os.path.abspath(output_file)}\n")
 
-            success_count = 0
-            failed_count = 0
-
-            # 打开文件（追加模式）
-            import csv
-            is_new_file = not os.path.exists(output_file)
-            file_handle = open(output_file, 'a' if not is_new_file else 'w',
-                             newline='', encoding='utf-8-sig')
-
-            # 英文字段名
-            fieldnames = ['symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
-                         'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager',
-                         'jjlx', 'jjzfe']
+            fetched_records = []  # 本次获取的记录，结束后并入快照
+            failed = {}           # 基金代码 -> 错误类型（重试成功后移除）
 
-            # 中文标题对应
-            chinese_headers = ['基金代码', '基金名称', '单位净值', '累计净值', '前一日净值',
-                             '增长率', '涨跌额', '申购状态', '净值日期', '基金经理',
-                             '基金类型', '基金zfe']
-
-            writer = csv.DictWriter(file_handle, fieldnames=fieldnames, extrasaction='ignore')
-
-            if is_new_file:
-                # 手动写入中文标题
-                file_handle.write(','.join(chinese_headers) + '\n')
+            # 打开文件（追加模式）：记录由写线程批量写出，写出后才记入断点日志
+            sink = open_sink(output_file, on_flush=journal.record_done_many)
+            if sink.is_new_file:
                 self.log(f"📝 创建新文件: {os.path.abspath(output_file)}")
             else:
                 self.log(f"📝 追加到已有文件: {os.path.abspath(output_file)}")
-
-            # 批量处理
-            for i in range(0, len(todo_codes), batch_size):
-                if self.stop_flag:
-                    self.log("\n用户取消操作")
-                    break
-
-                batch = todo_codes[i:i+batch_size]
-                batch_symbols = [f['symbol'] for f in batch]
-
-                batch_num = i // batch_size + 1
-                total_batches = (len(todo_codes) + batch_size - 1) // batch_size
-                self.log(f"  【批次 {batch_num}/{total_batches}】 正在获取第 {i+1}-{min(i+batch_size, len(todo_codes))} 个基金...")
-
-                batch_success = 0
-                for idx, symbol in enumerate(batch_symbols, 1):
-                    if self.stop_flag:
-                        break
-
-                    try:
-                        current = i + idx
-                        overall = skipped + current
-
-                        self.status_var.set(f"正在获取 {symbol} ({overall}/{total})...")
-                        self.log(f"    [{overall}/{total}] {symbol}...", end='')
-
-                        result = await scraper.scrape_detail(symbol)
-                        if result['success']:
-                            fund_data = result['data']
-
-                            # 格式化数据
-                            formatted_data = {
-                                'symbol': fund_data.get('symbol', ''),
-                                'sname': fund_data.get('sname', ''),
-                                'per_nav': fund_data.get('per_nav', ''),
-                                'total_nav': fund_data.get('total_nav', ''),
-                                'yesterday_nav': fund_data.get('yesterday_nav', ''),
-                                'nav_rate': fund_data.get('nav_rate', ''),
-                                'nav_a': fund_data.get('nav_a', ''),
-                                'sg_states': fund_data.get('sg_states', ''),
-                                'nav_date': fund_data.get('nav_date', ''),
-                                'fund_manager': fund_data.get('fund_manager', ''),
-                                'jjlx': fund_data.get('jjlx', ''),
-                                'jjzfe': fund_data.get('fund_scale', '')
-                            }
-
-                            # 立即写入文件
-                            writer.writerow(formatted_data)
-                            file_handle.flush()
-
-                            success_count += 1
-                            batch_success += 1
-                            self.log(" ✅")
-                        else:
-                            failed_count += 1
-                            self.log(" ❌")
-                    except Exception as e:
-                        self.log(f" ❌ 错误: {str(e)[:50]}")
-                        failed_count += 1
-
-                    # 延迟
-                    await asyncio.sleep(delay)
-
-                # 批次统计
-                self.log(f"  批次完成: 成功 {batch_success}/{len(batch_symbols)} 个")
-                self.log(f"  总进度: 成功 {success_count + skipped}/{total} (本次新增 {success_count})\n")
-
-                # 更新进度条
-                progress = ((success_count + skipped) / total) * 100
-                self.progress_var.set(progress)
-
-            # 关闭文件
-            file_handle.close()
+            sink.open()
+
+            # 与 fetch_funds.py、后台任务共用 collect_details：分批获取，最后重试一轮失败的基金
+            todo_symbols = [f['symbol'] for f in todo_codes]
+            total_batches = (len(todo_symbols) + batch_size - 1) // batch_size
+
+            def on_record(idx, symbol, record):
+                # 每批结束后交给写线程写入文件
+                sink.write(record, symbol)
+                fetched_records.append(record)
+                failed.pop(symbol, None)
+                self.log(f"    [{skipped + idx + 1}/{total}] {symbol}... ✅")
+
+            def on_failed(idx, symbol, kind):
+                failed[symbol] = kind
+                journal.record_failed(symbol, kind)
+                self.log(f"    [{skipped + idx + 1}/{total}] {symbol}... ❌ {kind}")
+
+            def on_batch(start, end):
+                self.progress_var.set((len(fetched_records) + skipped) / total * 100)
+                self.status_var.set(f"正在获取第 {skipped + start + 1}-{skipped + end} 个基金 (共 {total})...")
+                self.log(f"  【批次 {start // batch_size + 1}/{total_batches}】 正在获取第 {start + 1}-{end} 个基金...")
+
+            def on_retry(count):
+                self.status_var.set(f"正在重试失败的 {count} 个基金...")
+                self.log(f"\n  重试失败的 {count} 个基金...")
+
+            await scraper.collect_details(
+                todo_symbols, batch_size, delay, 1,
+                on_record=on_record, on_failed=on_failed, on_batch=on_batch, on_retry=on_retry,
+                should_stop=lambda: self.stop_flag, verbose=False
+            )
+            if self.stop_flag:
+                self.log("\n用户取消操作")
+            success_count = len(fetched_records)
+            failed_count = len(failed)
+
+            # 写出剩余记录并关闭文件（已关闭的 sink 不再在 finally 中关闭）
+            closing, sink = sink, None
+            closing.close()
+            scraper.snapshot.merge(fetched_records)
 
             # 完成
             self.log("\n" + "="*70)
@@ -438,6 +383,90 @@ class FundScraperGUI:
             messagebox.showerror("错误", f"发生错误：{str(e)}")
 
         finally:
+            # 出错时也要写出已提交的记录；关闭失败不能影响断点日志和浏览器的关闭
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception as e:
+                    self.log(f"❌ 写入输出文件失败: {str(e)}")
+            journal.close()
+            if scraper is not None:
+                # 保存属性缓存、限速器状态并关闭 HTTP 连接池
+                await scraper.close()
+            await browser_manager.close()
+
+    async def refresh_funds(self, output_file, dedupe, batch_size, delay, share_classes=False):
+        """
+        增量获取，输出完整数据
+        share_classes=False: 排行榜净值与上次快照比对，只为新基金和详情过期的基金请求详情页
+        share_classes=True: 排行榜净值 + 属性缓存，同一基金的各份额只访问一次详情页
+        """
+        self.log("="*70)
+        if share_classes:
+            self.log("开始获取基金数据（排行榜净值，同一基金的各份额只访问一次详情页）")
+        else:
+            self.log("开始增量刷新基金数据（只重新获取新基金和详情过期的基金）")
+        self.log("="*70)
+
+        self.status_var.set("正在启动浏览器...")
+        browser_manager = BrowserManager(headless=True)
+        scraper = None
+
+        try:
+            await browser_manager.start()
+            scraper = EastmoneyScraper(browser_manager)
+
+            if share_classes:
+                self.status_var.set("正在获取排行榜净值和各基金族详情...")
+                result = await scraper.fetch_funds_hybrid(batch_size=batch_size, delay=delay, share_classes=True)
+            else:
+                self.status_var.set("正在比对排行榜净值与上次快照...")
+                result = await scraper.refresh_funds_info(batch_size=batch_size, delay=delay)
+            if not result['success']:
+                self.log(f"❌ {result.get('error', '')}")
+                messagebox.showerror("错误", result.get('error', ''))
+                return
+
+            funds = result['data']
+            if dedupe:
+                funds = self._deduplicate_funds(funds)
+
+            # 整体重写输出文件，旧的断点日志不再适用
+            CrawlJournal(f"{output_file}.journal").reset()
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            with open_sink(output_file) as sink_all:
+                for fund in funds:
+                    sink_all.write(fund)
+
+            self.log("\n" + "="*70)
+            self.log("获取完成" if share_classes else "增量刷新完成")
+            self.log("="*70)
+            self.log(f"✅ 文件位置: {os.path.abspath(output_file)}")
+            self.log(f"✅ 总记录数: {len(funds)} 个")
+            refresh = result.get('refresh')
+            if refresh:
+                self.log(f"   - 新基金: {refresh['new']} 个，净值更新: {refresh['changed']} 个，净值未变: {refresh['unchanged']} 个")
+                self.log(f"   - 重新获取详情: {refresh['detail_fetched']} 个（详情过期 {refresh['stale']} 个）")
+            if result.get('share_classes'):
+                self.log(f"   - 访问详情页: {result['detail_fetched']} 个，同族共用详情: "
+                         f"{result['share_classes']['family_cache_hits'] + result['share_classes']['shared_detail']} 个")
+            self.log(f"❌ 失败: {result['failed_count']} 个")
+
+            self.status_var.set(f"完成！共 {len(funds)} 个，失败: {result['failed_count']}")
+            self.progress_var.set(100)
+
+            messagebox.showinfo("完成", f"{'获取' if share_classes else '增量刷新'}完成！\n\n共 {len(funds)} 个\n失败: {result['failed_count']} 个\n\n文件位置:\n{os.path.abspath(output_file)}")
+
+        except Exception as e:
+            self.log(f"\n❌ 发生错误: {str(e)}")
+            import traceback
+            self.log(traceback.format_exc())
+            messagebox.showerror("错误", f"发生错误：{str(e)}")
+
+        finally:
+            if scraper is not None:
+                await scraper.close()
             await browser_manager.close()
 
 
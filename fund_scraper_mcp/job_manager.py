@@ -0,0 +1,438 @@
+"""
+后台抓取任务
+完整获取全部基金需要数小时，不适合在一次工具调用中完成并一次性返回；
+任务在服务的事件循环中后台运行，结果边抓边写入任务目录下的 JSONL 文件（带断点日志），
+客户端轮询进度、按游标分页读取已写出的结果，也可以取消任务
+
+任务目录（缓存目录下的 jobs/<任务ID>/）：
+  job.json                任务参数、状态和进度
+  results.jsonl           已获取的 12 字段记录（类型化 JSON Lines）
+  results.jsonl.journal   断点日志，记录已写出的基金和文件长度
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from scrapers.eastmoney_scraper import EastmoneyScraper
+from storage.files import atomic_write, default_cache_dir
+from storage.journal import CrawlJournal
+from storage.sink import JsonlSink
+from utils.retry import count_by_type
+
+
+class JobStatus:
+    """任务状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    INTERRUPTED = "interrupted"     # 服务退出时仍在运行，可用 resume_job_id 继续
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED, INTERRUPTED)
+
+
+class CrawlJob:
+    """一个后台抓取任务"""
+
+    MODES = ("full", "refresh", "hybrid")
+
+    def __init__(self, job_id: str, directory: Path, mode: str = "full", params: Optional[Dict[str, Any]] = None):
+        self.id = job_id
+        self.directory = directory
+        self.mode = mode
+        self.params = params or {}
+        self.status = JobStatus.PENDING
+        self.phase = ""
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.finished_at: Optional[str] = None
+        self.total = 0              # 需要获取的基金数
+        self.skipped = 0            # 续传时已获取、本次跳过的基金数
+        self.cached = 0             # 无需访问详情页、直接写出的基金数（refresh / hybrid）
+        self.succeeded = 0          # 本次获取成功数
+        self.failed: Dict[str, str] = {}   # 基金代码 -> 错误类型
+        self.summary: Dict[str, Any] = {}  # 任务结束时的统计（refresh / hybrid 模式的计数等）
+        self.task: Optional[asyncio.Task] = None
+        self.journal: Optional[CrawlJournal] = None
+        self._started: Optional[float] = None      # 本次运行开始时间（monotonic）
+        self._elapsed = 0.0                        # 已结束运行的累计耗时
+
+    @property
+    def results_path(self) -> Path:
+        return self.directory / "results.jsonl"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.directory / "job.json"
+
+    def elapsed(self) -> float:
+        if self._started is None:
+            return self._elapsed
+        return self._elapsed + time.monotonic() - self._started
+
+    def committed_size(self) -> int:
+        """结果文件中已写出并记入日志的字节长度（分页只读到这里）"""
+        if self.journal is not None:
+            return self.journal.output_size or 0
+        try:
+            return os.path.getsize(self.results_path)
+        except OSError:
+            return 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态、进度、吞吐量和预计剩余时间"""
+        processed = self.succeeded + len(self.failed)
+        elapsed = self.elapsed()
+        throughput = processed / elapsed if elapsed > 0 and processed else None
+        remaining = max(0, self.total - self.skipped - self.cached - processed)
+        eta = None
+        if self.status == JobStatus.RUNNING and throughput:
+            eta = round(remaining / throughput, 1)
+        return {
+            "job_id": self.id,
+            "mode": self.mode,
+            "params": self.params,
+            "status": self.status,
+            "phase": self.phase,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "total": self.total,
+                "skipped": self.skipped,
+                "cached": self.cached,
+                "succeeded": self.succeeded,
+                "failed": len(self.failed),
+                "remaining": remaining,
+                "percent": round(100 * (self.skipped + self.cached + processed) / self.total, 1) if self.total else None,
+            },
+            "elapsed_seconds": round(elapsed, 1),
+            "throughput_per_second": round(throughput, 3) if throughput else None,
+            "eta_seconds": eta,
+            "failed_by_type": count_by_type(self.failed),
+            "summary": self.summary or None,
+            "results_path": str(self.results_path),
+            "results_bytes": self.committed_size(),
+        }
+
+    def save(self) -> None:
+        """把状态写入 job.json（状态变化时调用）"""
+        meta = self.to_dict()
+        meta["failed_symbols"] = self.failed
+        meta["elapsed_seconds"] = self.elapsed()
+        atomic_write(self.meta_path, json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    @classmethod
+    def load(cls, directory: Path) -> 'CrawlJob':
+        """从 job.json 恢复任务（服务重启后仍可查询进度、读取结果）"""
+        meta = json.loads((directory / "job.json").read_text(encoding='utf-8'))
+        job = cls(meta["job_id"], directory, meta["mode"], meta.get("params"))
+        job.status = meta["status"]
+        if job.status not in JobStatus.FINISHED:
+            job.status = JobStatus.INTERRUPTED
+        job.phase = meta.get("phase", "")
+        job.error = meta.get("error")
+        job.created_at = meta.get("created_at", job.created_at)
+        job.finished_at = meta.get("finished_at")
+        progress = meta.get("progress", {})
+        job.total = progress.get("total", 0)
+        job.skipped = progress.get("skipped", 0)
+        job.cached = progress.get("cached", 0)
+        job.succeeded = progress.get("succeeded", 0)
+        job.failed = meta.get("failed_symbols", {})
+        job.summary = meta.get("summary") or {}
+        job._elapsed = meta.get("elapsed_seconds", 0.0)
+        return job
+
+
+class JobManager:
+    """后台抓取任务管理（同一时间只运行一个任务，所有任务共用服务的爬虫和限速器）"""
+
+    def __init__(self, get_scraper: Callable[[], Any], directory: Optional[Path] = None):
+        """
+        Args:
+            get_scraper: 返回 EastmoneyScraper 的协程函数
+            directory: 任务目录（None 时为缓存目录下的 jobs/）
+        """
+        self.get_scraper = get_scraper
+        self.directory = Path(directory) if directory else default_cache_dir() / "jobs"
+        self.jobs: Dict[str, CrawlJob] = {}
+        self._load_jobs()
+
+    def _load_jobs(self) -> None:
+        if not self.directory.exists():
+            return
+        for path in sorted(self.directory.iterdir()):
+            try:
+                job = CrawlJob.load(path)
+            except (OSError, ValueError, KeyError):
+                continue
+            self.jobs[job.id] = job
+
+    def running_job(self) -> Optional[CrawlJob]:
+        for job in self.jobs.values():
+            if job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+                return job
+        return None
+
+    def start(self, mode: str = "full", resume_job_id: Optional[str] = None, **params) -> Dict[str, Any]:
+        """
+        启动任务（立即返回任务 ID）
+
+        Args:
+            mode: full / refresh / hybrid，与 fetch_all_funds_info 相同
+            resume_job_id: 继续一个已中断或已取消的 full 任务（跳过已获取的基金，结果追加到原文件）
+            **params: batch_size / max_funds / delay / concurrency / max_age_days / share_classes
+                     （share_classes 时净值取自排行榜，按 hybrid 模式执行）
+        """
+        running = self.running_job()
+        if running is not None:
+            return {"success": False, "error": f"已有任务在运行: {running.id}", "job_id": running.id}
+
+        if resume_job_id:
+            job = self.jobs.get(resume_job_id)
+            if job is None:
+                return {"success": False, "error": f"任务不存在: {resume_job_id}"}
+            if job.mode != "full" or job.status not in (JobStatus.INTERRUPTED, JobStatus.CANCELLED, JobStatus.FAILED):
+                return {"success": False, "error": f"只能继续已中断、已取消或失败的 full 任务（当前: {job.mode} / {job.status}）"}
+            job.params.update(params)
+            job.error = None
+            job.finished_at = None
+        else:
+            if params.get("share_classes"):
+                mode = "hybrid"
+            if mode not in CrawlJob.MODES:
+                return {"success": False, "error": f"未知模式: {mode}，可选: {', '.join(CrawlJob.MODES)}"}
+            job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            job = CrawlJob(job_id, self.directory / job_id, mode, params)
+            job.directory.mkdir(parents=True, exist_ok=True)
+            self.jobs[job.id] = job
+
+        job.status = JobStatus.PENDING
+        job.save()
+        job.task = asyncio.create_task(self._run(job))
+        return {"success": True, "job_id": job.id, "status": job.status, "mode": job.mode}
+
+    def status(self, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """任务进度；不指定 job_id 时列出所有任务"""
+        if job_id is None:
+            return {"success": True, "data": [job.to_dict() for job in self.jobs.values()]}
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"success": False, "error": f"任务不存在: {job_id}"}
+        return {"success": True, "data": job.to_dict()}
+
+    def results(self, job_id: str, cursor: int = 0, page_size: int = 500) -> Dict[str, Any]:
+        """
+        按游标分页读取已写出的结果（任务运行中也可读取）
+
+        Args:
+            cursor: 上一页返回的 next_cursor（结果文件中的字节偏移，0 表示从头开始）
+            page_size: 每页记录数
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"success": False, "error": f"任务不存在: {job_id}"}
+        committed = job.committed_size()
+        if cursor < 0 or cursor > committed:
+            return {"success": False, "error": f"无效的游标: {cursor}"}
+
+        records: List[Dict[str, Any]] = []
+        position = cursor
+        if page_size > 0 and cursor < committed:
+            with open(job.results_path, 'rb') as f:
+                if cursor:
+                    f.seek(cursor - 1)
+                    if f.read(1) != b'\n':
+                        return {"success": False, "error": f"无效的游标: {cursor}"}
+                while len(records) < page_size and position < committed:
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break
+                    position += len(line)
+                    records.append(json.loads(line))
+
+        finished = job.status in JobStatus.FINISHED
+        return {
+            "success": True,
+            "data": records,
+            "job_id": job.id,
+            "status": job.status,
+            "cursor": cursor,
+            "next_cursor": position,
+            # 任务仍在运行时之后还会有新结果，继续用 next_cursor 轮询
+            "has_more": position < committed or not finished,
+        }
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """取消运行中的任务（已写出的结果保留，可用 resume_job_id 继续）"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"success": False, "error": f"任务不存在: {job_id}"}
+        if job.task is None or job.task.done():
+            return {"success": False, "error": f"任务未在运行（当前: {job.status}）"}
+        job.task.cancel()
+        return {"success": True, "job_id": job.id, "status": "cancelling"}
+
+    async def shutdown(self) -> None:
+        """服务退出：停止运行中的任务并标记为已中断"""
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    pass
+                job.status = JobStatus.INTERRUPTED
+                job.save()
+
+    # ---- 任务执行 ----
+
+    async def _run(self, job: CrawlJob) -> None:
+        journal: Optional[CrawlJournal] = None
+        sink: Optional[JsonlSink] = None
+        job._started = time.monotonic()
+        try:
+            # 继续已中断的任务时重放日志，截掉未记入日志的结尾；
+            # 打开失败（目录不可写、磁盘已满、日志损坏）时任务直接失败，不会一直停在 pending
+            journal = CrawlJournal.for_output(job.results_path)
+            journal.start_run(job_id=job.id, mode=job.mode, **job.params)
+            job.journal = journal
+            sink = JsonlSink(job.results_path, on_flush=journal.record_done_many)
+            sink.open()
+
+            job.status = JobStatus.RUNNING
+            job.save()
+            scraper = await self.get_scraper()
+            if job.mode == "full":
+                await self._run_full(job, scraper, sink, journal)
+            else:
+                await self._run_bulk(job, scraper, sink, journal)
+            job.status = JobStatus.COMPLETED
+            job.phase = "完成"
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            # 写出剩余结果后再更新状态，保证完成的任务可以读到全部结果
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception as e:
+                    job.status = JobStatus.FAILED
+                    job.error = f"写入结果失败: {e}"
+            if journal is not None:
+                try:
+                    journal.close()
+                except Exception as e:
+                    job.status = JobStatus.FAILED
+                    job.error = job.error or f"写入断点日志失败: {e}"
+            job._elapsed = job.elapsed()
+            job._started = None
+            job.finished_at = datetime.now().isoformat(timespec='seconds')
+            job.save()
+
+    async def _run_full(self, job: CrawlJob, scraper: EastmoneyScraper, sink: JsonlSink, journal: CrawlJournal) -> None:
+        """逐批获取详情并写出结果，与 fetch_funds.py 的增量获取共用 EastmoneyScraper.collect_details（最后重试一轮失败的基金）"""
+        params = job.params
+
+        job.phase = "获取基金代码列表"
+        codes_result = await scraper.scrape_all_fund_codes(verbose=False)
+        if not codes_result['success']:
+            raise RuntimeError(f"获取基金代码列表失败: {codes_result.get('error', '')}")
+        symbols = [fund['symbol'] for fund in codes_result['data']]
+        if params.get("max_funds"):
+            symbols = symbols[:params["max_funds"]]
+
+        done = journal.processed
+        todo = [symbol for symbol in symbols if symbol not in done]
+        job.total = len(symbols)
+        job.skipped = len(symbols) - len(todo)
+        job.succeeded = 0
+        job.failed = {}
+
+        fetched: List[Dict[str, Any]] = []
+
+        def on_record(idx: int, symbol: str, record: Dict[str, Any]) -> None:
+            # 每批结束后写出，进度随之更新
+            sink.write(record, symbol)
+            fetched.append(record)
+            job.failed.pop(symbol, None)
+            job.succeeded += 1
+
+        def on_failed(idx: int, symbol: str, kind: str) -> None:
+            job.failed[symbol] = kind
+            journal.record_failed(symbol, kind)
+
+        def on_batch(start: int, end: int) -> None:
+            job.phase = f"获取详情 {job.skipped + start + 1}-{job.skipped + end}/{job.total}"
+            job.save()
+
+        def on_retry(count: int) -> None:
+            job.phase = f"重试失败的 {count} 个基金"
+            job.save()
+
+        try:
+            await scraper.collect_details(
+                todo, params.get("batch_size", 100), params.get("delay", 1.0), params.get("concurrency", 1),
+                on_record=on_record, on_failed=on_failed, on_batch=on_batch, on_retry=on_retry, verbose=False
+            )
+        finally:
+            scraper.attribute_cache.save()
+            scraper.snapshot.merge(fetched)
+
+    async def _run_bulk(self, job: CrawlJob, scraper: EastmoneyScraper, sink: JsonlSink, journal: CrawlJournal) -> None:
+        """refresh / hybrid：无需访问详情页的记录先写出，其余记录随详情页每批结束写出"""
+        params = job.params
+        job.total = job.skipped = job.cached = job.succeeded = 0
+        job.failed = {}
+
+        def on_ready(total: int, records: List[Dict[str, Any]]) -> None:
+            job.total = total
+            job.cached = len(records)
+            for record in records:
+                sink.write(record, record['symbol'])
+            job.save()
+
+        def on_record(symbol: str, record: Dict[str, Any]) -> None:
+            sink.write(record, symbol)
+            job.succeeded += 1
+
+        def on_failed(symbol: str, kind: str, record: Optional[Dict[str, Any]]) -> None:
+            # 详情获取失败但仍有旧记录的基金照常写出，同时计入失败
+            if record is not None:
+                sink.write(record, symbol)
+            job.failed[symbol] = kind
+            journal.record_failed(symbol, kind)
+
+        def on_batch(start: int, end: int) -> None:
+            job.phase = f"获取详情 {start + 1}-{end}"
+            job.save()
+
+        def on_retry(count: int) -> None:
+            job.phase = f"重试失败的 {count} 个基金"
+            job.save()
+
+        args = (params.get("batch_size", 100), params.get("max_funds"), params.get("delay", 1.0), params.get("concurrency", 1))
+        callbacks = dict(on_ready=on_ready, on_record=on_record, on_failed=on_failed, on_batch=on_batch, on_retry=on_retry,
+                         verbose=False)
+        if job.mode == "refresh":
+            job.phase = "比对排行榜净值与上次快照"
+            result = await scraper.refresh_funds_info(params.get("max_age_days", 7), *args, **callbacks)
+        else:
+            job.phase = "排行榜净值 + 属性缓存"
+            result = await scraper.fetch_funds_hybrid(*args, share_classes=bool(params.get("share_classes")), **callbacks)
+        if not result['success']:
+            raise RuntimeError(result.get('error', ''))
+
+        job.summary = {key: result[key] for key in ('mode', 'refresh', 'attribute_cache_hits', 'detail_fetched',
+                                                    'share_classes', 'failed_count', 'failed_by_type')
+                       if result.get(key) is not None}
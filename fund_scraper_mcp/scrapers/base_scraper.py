@@ -7,13 +7,20 @@ import asyncio
 
 from browser_manager import BrowserManager
 from utils.anti_detection import AntiDetection
+from utils.rate_limiter import RateLimiter, get_rate_limiter
 
 
 class BaseScraper(ABC):
     """爬虫抽象基类"""
     
-    def __init__(self, browser_manager: BrowserManager):
+    def __init__(self, browser_manager: BrowserManager, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            browser_manager: 浏览器管理器
+            rate_limiter: 按接口族限速的令牌桶（None 时使用进程内共享的限速器）
+        """
         self.browser_manager = browser_manager
+        self.rate_limiter = rate_limiter or get_rate_limiter()
     
     @abstractmethod
     async def scrape_all_fund_codes(self) -> Dict[str, Any]:
@@ -60,9 +67,12 @@ class BaseScraper(ABC):
         response.update(kwargs)
         return response
     
-    def _error_response(self, error: str) -> Dict[str, Any]:
-        """构造错误响应"""
-        return {
+    def _error_response(self, error: str, error_type: Optional[str] = None) -> Dict[str, Any]:
+        """构造错误响应（error_type 为 utils.retry.ErrorKind 中的错误类型）"""
+        response = {
             "success": False,
             "error": error
         }
+        if error_type:
+            response["error_type"] = error_type
+        return response
@@ -8,17 +8,44 @@
 """
 import re
 import json
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, List, Callable, Tuple
+from datetime import date, datetime
+from urllib.parse import urlencode
 
 from .base_scraper import BaseScraper
+from .http_detail import HttpDetailClient, DetailParseError, parse_detail_html
+from .nav_api import NavApiClient
+from analytics.nav_analytics import NavMatrix, analyze, latest_date, load_start
 from browser_manager import BrowserManager
+from storage.attribute_cache import FundAttributeCache, apply_attributes
+from storage.fund_code_cache import FundCodeCache
+from storage.files import default_cache_dir
+from storage.nav_columns import ColumnarNavStore
+from storage.nav_store import CsvNavStore, nav_row_to_dict
+from storage.nav_sync import NavSyncEngine
+from storage.screener import FundScreener, merge_sources
+from storage.snapshot import FundSnapshot, ListingSnapshot, plan_refresh
+from utils.rank_parser import (
+    LISTING_FIELDS, RankParseError, build_rank_params, parse_rank_data, row_to_fund, row_to_listing
+)
+from utils.stage_timer import StageTimer, StageRun
+from utils.rate_limiter import RateLimiter, is_blocked_response
+from utils.retry import ErrorKind, RetryPolicy, ScrapeError, classify_error, classify_status, count_by_type
+from utils.share_class import SHARED_ATTRIBUTES, ShareClassIndex, shared_attributes
+
+logger = logging.getLogger(__name__)
 
 
 class EastmoneyScraper(BaseScraper):
     """天天基金网爬虫"""
     
     BASE_URL = "https://fund.eastmoney.com"
+    FUND_CODES_PATH = "/js/fundcode_search.js"
+    RANK_API_PATH = "/data/rankhandler.aspx"
+    RANK_REFERER = "https://fund.eastmoney.com/data/fundranking.html"
     
     # 基金类型映射
     FUND_TYPE_MAP = {
@@ -31,60 +58,450 @@ class EastmoneyScraper(BaseScraper):
         "money": "hb",      # 货币型
         "fof": "fof",       # FOF
     }
+
+    # 页面就绪判定方式
+    # selector: domcontentloaded 后等待提取所需的文本出现（默认，更快）
+    # networkidle: 等待网络空闲 + 选择器 + 随机延迟（旧方式）
+    READINESS_MODES = ("selector", "networkidle")
+
+    # 详情页就绪：.dataOfFund 含净值日期，.infoOfFund 含类型和基金经理
+    DETAIL_READY_JS = """
+        () => {
+            const title = document.querySelector('.fundDetail-tit');
+            const data = document.querySelector('.dataOfFund');
+            const info = document.querySelector('.infoOfFund');
+            if (!title || !data || !info) return false;
+            const infoText = info.textContent;
+            return /\\(\\d{4}-\\d{2}-\\d{2}\\)/.test(data.textContent)
+                && /类型[：:]/.test(infoText)
+                && /基金经理[：:]/.test(infoText);
+        }
+    """
+
+    # 详情页字段提取脚本（HTTP 后端的 parse_detail_html 输出与之相同）
+    DETAIL_EXTRACT_JS = """
+        () => {
+            const getText = (sel) => {
+                const el = document.querySelector(sel);
+                return el ? el.textContent.trim() : '';
+            };
+
+            // 基金名称
+            const fundName = getText('.fundDetail-tit');
+
+            // 从 dataOfFund 文本中提取净值信息
+            const dataOfFundText = getText('.dataOfFund');
+
+            // 提取净值日期 - 格式: (2026-01-30)
+            let navDate = '';
+            const dateMatch = dataOfFundText.match(/\\((\\d{4}-\\d{2}-\\d{2})\\)/);
+            if (dateMatch) {
+                navDate = dateMatch[1];
+            }
+
+            // 提取单位净值和增长率 - 格式: 1.1670-0.51%
+            let perNav = '', navRate = '';
+            const navMatch = dataOfFundText.match(/(\\d+\\.\\d+)([\\-\\+]?\\d+\\.\\d+)%/);
+            if (navMatch) {
+                perNav = navMatch[1];
+                navRate = navMatch[2];
+            }
+
+            // 提取累计净值
+            let totalNav = '';
+            const totalNavMatch = dataOfFundText.match(/累计净值(\\d+\\.\\d+)/);
+            if (totalNavMatch) {
+                totalNav = totalNavMatch[1];
+            }
+
+            // 从 infoOfFund 文本中提取基金信息
+            const infoOfFundText = getText('.infoOfFund');
+
+            // 提取基金经理 - 格式: 基金经理：郑晓辉等成 立 日
+            let fundManager = '';
+            const managerMatch = infoOfFundText.match(/基金经理[：:](.*?)成 立 日/);
+            if (managerMatch) {
+                fundManager = managerMatch[1].trim();
+            }
+
+            // 提取基金类型 - 格式: 类型：混合型-灵活  |
+            let fundType = '';
+            const typeMatch = infoOfFundText.match(/类型[：:](.*?)\\|/);
+            if (typeMatch) {
+                fundType = typeMatch[1].trim();
+            }
+
+            // 提取基金规模 - 格式: 规模：29.37亿元
+            let fundScale = '';
+            const scaleMatch = infoOfFundText.match(/规模[：:](\\d+\\.\\d+亿元)/);
+            if (scaleMatch) {
+                fundScale = scaleMatch[1];
+            }
+
+            // 提取成立日期 - 格式: 成 立 日：2001-12-18
+            let establishDate = '';
+            const estMatch = infoOfFundText.match(/成 立 日[：:](\\d{4}-\\d{2}-\\d{2})/);
+            if (estMatch) {
+                establishDate = estMatch[1];
+            }
+
+            // 提取管理人 - 格式: 管 理 人：华夏基金基金评级
+            let fundCompany = '';
+            const companyMatch = infoOfFundText.match(/管 理 人[：:](.*?)基金评级/);
+            if (companyMatch) {
+                fundCompany = companyMatch[1].trim();
+            }
+
+            // 申购状态
+            let sgStates = '开放';
+            const stateEl = document.querySelector('.fundInfoItem .staticCell');
+            if (stateEl) {
+                sgStates = stateEl.textContent.includes('暂停') ? '暂停申购' : '开放';
+            }
+
+            return {
+                sname: fundName,
+                per_nav: perNav,
+                total_nav: totalNav,
+                nav_rate: navRate,
+                nav_date: navDate,
+                fund_manager: fundManager,
+                jjlx: fundType,
+                fund_company: fundCompany,
+                establishment_date: establishDate,
+                fund_scale: fundScale,
+                sg_states: sgStates
+            };
+        }
+    """
+
+    # 排行榜就绪：#dbtable 已渲染出带基金代码链接的行
+    LIST_READY_JS = """
+        () => document.querySelectorAll('#dbtable tbody tr td a').length > 0
+    """
+
+    # 净值历史就绪：#jztable 已渲染出以日期开头的行
+    NAV_READY_JS = """
+        () => Array.from(document.querySelectorAll('#jztable tbody tr')).some(
+            row => /^\\d{4}-\\d{2}-\\d{2}/.test((row.cells[0]?.textContent || '').trim())
+        )
+    """
+
+    # 详情页抓取后端
+    # browser: Playwright 渲染页面（默认）
+    # http: 直接请求 HTML 并解析，解析失败时回退到浏览器
+    DETAIL_BACKENDS = ("browser", "http")
+
+    # 本地筛选使用的排行榜数据超过该时间（秒）后重新获取
+    LISTING_MAX_AGE = 6 * 3600
+
+    def __init__(
+        self,
+        browser_manager: BrowserManager,
+        readiness: str = "selector",
+        timer: Optional[StageTimer] = None,
+        detail_backend: str = "browser",
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        code_cache: Optional[FundCodeCache] = None,
+        nav_store=None,
+        snapshot: Optional[FundSnapshot] = None,
+        attribute_cache: Optional[FundAttributeCache] = None,
+        listing_snapshot: Optional[ListingSnapshot] = None
+    ):
+        """
+        Args:
+            browser_manager: 浏览器管理器
+            readiness: 页面就绪判定方式，见 READINESS_MODES
+            timer: 分阶段耗时统计（None 时新建）
+            detail_backend: 详情页抓取后端，见 DETAIL_BACKENDS
+            rate_limiter: 按接口族限速的令牌桶（None 时使用进程内共享的限速器）
+            retry_policy: 批量获取详情时的重试策略（None 时使用默认策略）
+            code_cache: 全量基金代码的磁盘缓存（None 时使用默认缓存目录）
+            nav_store: 净值历史本地存储（None 时首次使用时在默认缓存目录创建）
+            snapshot: 基金信息快照，供增量刷新比对（None 时使用默认缓存目录）
+            attribute_cache: 基金慢变属性缓存，每次成功获取详情时更新（None 时使用默认缓存目录）
+            listing_snapshot: 最近一次排行榜全量数据，供本地筛选（None 时使用默认缓存目录）
+        """
+        super().__init__(browser_manager, rate_limiter)
+        if readiness not in self.READINESS_MODES:
+            raise ValueError(f"未知的就绪模式: {readiness}，可选: {', '.join(self.READINESS_MODES)}")
+        if detail_backend not in self.DETAIL_BACKENDS:
+            raise ValueError(f"未知的详情页后端: {detail_backend}，可选: {', '.join(self.DETAIL_BACKENDS)}")
+        self.readiness = readiness
+        self.timer = timer or StageTimer()
+        self.detail_backend = detail_backend
+        self.http_fallbacks = 0
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.code_cache = code_cache or FundCodeCache()
+        self._nav_store = nav_store
+        self.snapshot = snapshot or FundSnapshot()
+        self.attribute_cache = attribute_cache or FundAttributeCache()
+        self.listing_snapshot = listing_snapshot or ListingSnapshot()
+        self._screener: Optional[FundScreener] = None
+        self._screener_key: Optional[tuple] = None
+        self._nav_sync: Optional[NavSyncEngine] = None
+        self._http_client: Optional[HttpDetailClient] = None
+
+    async def close(self) -> None:
+        """释放爬虫自身持有的资源（HTTP 连接池）；浏览器由 BrowserManager 管理"""
+        if self._http_client is not None:
+            await self._http_client.close()
+            self._http_client = None
+        if self._nav_sync is not None:
+            self._nav_sync.save_state()
+            await self._nav_sync.client.close()
+            self._nav_sync = None
+        if self._nav_store is not None:
+            self._nav_store.flush()
+        self.attribute_cache.save()
+
+    @property
+    def nav_store(self):
+        """净值历史本地存储（默认为列式存储，首次使用时导入旧的按基金 CSV 存储）"""
+        if self._nav_store is None:
+            store = ColumnarNavStore()
+            legacy_root = default_cache_dir() / 'nav'
+            if not store.symbols() and legacy_root.is_dir():
+                store.import_from(CsvNavStore(legacy_root))
+            self._nav_store = store
+        return self._nav_store
+
+    @property
+    def nav_sync(self) -> NavSyncEngine:
+        """净值历史同步引擎（通过 lsjz 接口增量同步到 nav_store）"""
+        if self._nav_sync is None:
+            client = NavApiClient(rate_limiter=self.rate_limiter)
+            self._nav_sync = NavSyncEngine(self.nav_store, client, retry_policy=self.retry_policy)
+        return self._nav_sync
+
+    async def _open_page(
+        self,
+        page,
+        operation: str,
+        family: str,
+        url: str,
+        selector: str,
+        ready_js: str,
+        settle: tuple
+    ) -> StageRun:
+        """
+        限速后导航到页面并等待就绪，按阶段记录耗时
+
+        失败时抛出带错误类型的 ScrapeError：导航超时为 timeout，
+        错误状态码按 classify_status 分类，等不到数据区块时为 selector_missing（页面为拦截页时为 blocked）
+
+        Args:
+            page: 页面对象
+            operation: 操作名（用于耗时统计）
+            family: 限速接口族（detail / f10 / rank）
+            url: 目标地址
+            selector: networkidle 模式下等待的选择器
+            ready_js: selector 模式下的就绪判定函数
+            settle: networkidle 模式下的随机延迟区间 (min, max)
+        """
+        run = self.timer.start(operation)
+        await self.rate_limiter.acquire(family)
+        run.mark("throttle")
+
+        try:
+            if self.readiness == "networkidle":
+                response = await self._goto(page, url, "networkidle", 60000)
+                run.mark("navigate")
+                self._check_status(response)
+                await self._wait_ready(page, page.wait_for_selector(selector, timeout=30000))
+                run.mark("ready")
+                await self.random_delay(*settle)
+                run.mark("settle")
+            else:
+                response = await self._goto(page, url, "domcontentloaded", 30000)
+                run.mark("navigate")
+                self._check_status(response)
+                await self._wait_ready(page, page.wait_for_function(ready_js, timeout=30000))
+                run.mark("ready")
+        except ScrapeError as e:
+            # 超时、被拒绝：降低该接口族的速率并计入熔断器
+            self.rate_limiter.record_result(family, e.kind)
+            raise
+
+        self.rate_limiter.record_result(family)
+        return run
+
+    @staticmethod
+    async def _goto(page, url: str, wait_until: str, timeout: int):
+        try:
+            return await page.goto(url, wait_until=wait_until, timeout=timeout)
+        except Exception as e:
+            raise ScrapeError(classify_error(e), f"页面加载失败: {e}") from e
+
+    @staticmethod
+    async def _wait_ready(page, waiter) -> None:
+        """等待数据区块；超时后检查页面是否为拦截页"""
+        try:
+            await waiter
+        except Exception as e:
+            if classify_error(e) != ErrorKind.TIMEOUT:
+                raise ScrapeError(classify_error(e), str(e)) from e
+            try:
+                blocked = is_blocked_response(await page.content())
+            except Exception:
+                blocked = False
+            if blocked:
+                raise ScrapeError(ErrorKind.BLOCKED, "访问被拒绝") from e
+            raise ScrapeError(ErrorKind.SELECTOR_MISSING, "等待数据区块超时") from e
+
+    @staticmethod
+    def _check_status(response) -> None:
+        """错误状态码直接失败，不再等待选择器超时"""
+        if response is None:
+            return
+        kind = classify_status(response.status)
+        if kind is not None:
+            raise ScrapeError(kind, f"状态码: {response.status}")
     
-    async def scrape_all_fund_codes(self) -> Dict[str, Any]:
+    async def scrape_all_fund_codes(self, refresh: bool = False, verbose: bool = True) -> Dict[str, Any]:
         """
         获取全量基金代码列表（约20000+只）
         数据源：fund.eastmoney.com/js/fundcode_search.js
+
+        解析结果缓存在磁盘上：有效期内直接加载二进制索引；过期后用 ETag / Last-Modified
+        条件请求重新验证，304 时沿用缓存。HTTP 请求失败时使用旧缓存，没有缓存才打开浏览器
+
+        Args:
+            refresh: 忽略缓存有效期，立即向服务器验证
+            verbose: 是否打印进度（MCP 服务和后台任务中为 False，stdout 是协议通道）
         """
-        print("    正在访问基金代码数据页面...")
-        page = await self.browser_manager.new_page()
+        log = print if verbose else (lambda *args, **kwargs: None)
+        cache = self.code_cache
+        if not refresh and cache.is_fresh():
+            funds = cache.load()
+            if funds is not None:
+                log(f"    ✅ 从缓存加载 {len(funds)} 个基金代码")
+                return self._fund_codes_response(funds, "hit")
 
+        log("    正在请求基金代码数据...")
+        if self._http_client is None:
+            self._http_client = HttpDetailClient(self.BASE_URL)
         try:
-            # 访问全量基金代码JS文件
-            url = f"{self.BASE_URL}/js/fundcode_search.js"
-            print(f"    URL: {url}")
-            response = await page.goto(url, wait_until="load", timeout=30000)
-
-            if response.status != 200:
-                return self._error_response(f"请求失败，状态码: {response.status}")
-
-            print("    正在解析基金代码...")
-            content = await response.text()
-            
-            # 解析 var r = [[...], [...], ...];
-            # 格式: ["000001","HXCZHH","华夏成长混合","混合型-偏股","HUAXIACHENGZHANGHUNHE"]
-            match = re.search(r'var r = (\[.*\]);', content, re.DOTALL)
-            if not match:
-                return self._error_response("无法解析基金代码数据")
-            
-            funds_data = json.loads(match.group(1))
-            
-            # 转换为标准格式
-            funds = []
-            for item in funds_data:
-                if len(item) >= 4:
-                    funds.append({
-                        'symbol': item[0],           # 基金代码
-                        'abbr': item[1],             # 拼音缩写
-                        'sname': item[2],            # 基金名称
-                        'jjlx': item[3],             # 基金类型
-                        'pinyin': item[4] if len(item) > 4 else ''  # 全拼
-                    })
-
-            print(f"    ✅ 解析完成，共 {len(funds)} 个基金代码")
-
-            return self._success_response(
-                funds,
-                total_count=len(funds),
-                source="fundcode_search.js"
+            status, content, headers = await self._http_client.fetch(
+                self.FUND_CODES_PATH, headers=cache.validators()
             )
-            
         except Exception as e:
-            return self._error_response(f"获取全量基金代码失败: {str(e)}")
-        finally:
-            await page.close()
-    
+            log(f"    ⚠️ 请求失败: {e}")
+            status, content, headers = None, '', {}
+
+        if status == 304:
+            funds = cache.load()
+            if funds is not None:
+                cache.touch()
+                log(f"    ✅ 基金代码未变化，从缓存加载 {len(funds)} 个")
+                return self._fund_codes_response(funds, "revalidated")
+        elif status == 200:
+            funds = self._parse_fund_codes(content)
+            if funds:
+                cache.store(funds, etag=headers.get('etag'), last_modified=headers.get('last-modified'))
+                log(f"    ✅ 解析完成，共 {len(funds)} 个基金代码")
+                return self._fund_codes_response(funds, "miss")
+
+        funds = cache.load()
+        if funds is not None:
+            log(f"    ⚠️ 无法更新基金代码，使用旧缓存（{len(funds)} 个）")
+            return self._fund_codes_response(funds, "stale")
+
+        return await self._scrape_fund_codes_browser(verbose)
+
+    async def search_funds(self, query: str, limit: int = 20, fund_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        在全量基金代码列表中搜索基金（代码前缀、拼音首字母 / 全拼前缀、名称子串）
+
+        代码列表缓存过期或不存在时先通过 scrape_all_fund_codes 更新，之后的查询都在内存索引中完成
+
+        Args:
+            query: 搜索词
+            limit: 最多返回条数
+            fund_type: 只保留基金类型包含该文本的基金
+        """
+        if not self.code_cache.is_fresh() or self.code_cache.search_index() is None:
+            codes_result = await self.scrape_all_fund_codes(verbose=False)
+            if not codes_result['success']:
+                return codes_result
+        index = self.code_cache.search_index()
+        if index is None:
+            return self._error_response("基金代码列表不可用", error_type=ErrorKind.UNKNOWN)
+
+        results, total = index.search(query, limit, fund_type)
+        return self._success_response(
+            results,
+            query=query,
+            total_matches=total,
+            returned=len(results),
+            source="fund_search_index"
+        )
+
+    def _fund_codes_response(self, funds: List[Dict[str, Any]], cache_status: str) -> Dict[str, Any]:
+        return self._success_response(
+            funds,
+            total_count=len(funds),
+            source="fundcode_search.js",
+            cache=cache_status
+        )
+
+    @staticmethod
+    def _parse_fund_codes(content: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        解析 fundcode_search.js，无法解析时返回 None
+
+        格式: var r = [["000001","HXCZHH","华夏成长混合","混合型-偏股","HUAXIACHENGZHANGHUNHE"], ...];
+        """
+        match = re.search(r'var r = (\[.*\]);', content, re.DOTALL)
+        if not match:
+            return None
+
+        funds_data = json.loads(match.group(1))
+
+        # 转换为标准格式
+        funds = []
+        for item in funds_data:
+            if len(item) >= 4:
+                funds.append({
+                    'symbol': item[0],           # 基金代码
+                    'abbr': item[1],             # 拼音缩写
+                    'sname': item[2],            # 基金名称
+                    'jjlx': item[3],             # 基金类型
+                    'pinyin': item[4] if len(item) > 4 else ''  # 全拼
+                })
+        return funds
+
+    async def _scrape_fund_codes_browser(self, verbose: bool = True) -> Dict[str, Any]:
+        """通过浏览器下载 fundcode_search.js（HTTP 请求失败且没有缓存时使用）"""
+        log = print if verbose else (lambda *args, **kwargs: None)
+        log("    正在访问基金代码数据页面...")
+        try:
+            async with self.browser_manager.page() as page:
+                # 访问全量基金代码JS文件
+                url = f"{self.BASE_URL}{self.FUND_CODES_PATH}"
+                log(f"    URL: {url}")
+                response = await page.goto(url, wait_until="load", timeout=30000)
+
+                if response.status != 200:
+                    return self._error_response(
+                        f"请求失败，状态码: {response.status}",
+                        error_type=classify_status(response.status) or ErrorKind.UNKNOWN
+                    )
+
+                log("    正在解析基金代码...")
+                funds = self._parse_fund_codes(await response.text())
+                if funds is None:
+                    return self._error_response("无法解析基金代码数据", error_type=ErrorKind.PARSE_FAILURE)
+
+                self.code_cache.store(funds)
+                log(f"    ✅ 解析完成，共 {len(funds)} 个基金代码")
+
+                return self._fund_codes_response(funds, "miss")
+
+        except Exception as e:
+            return self._error_response(f"获取全量基金代码失败: {str(e)}", error_type=classify_error(e))
+
     async def scrape_list(
         self,
         fund_type: str = "all",
@@ -95,203 +512,165 @@ class EastmoneyScraper(BaseScraper):
         从排行榜获取基金列表（包含净值数据）
         注意：排行榜可能不包含最新发行的基金
         """
-        page_obj = await self.browser_manager.new_page()
-        
         try:
-            # 构造排行榜URL
-            ft = self.FUND_TYPE_MAP.get(fund_type, "")
-            url = f"{self.BASE_URL}/data/fundranking.html"
-            if ft:
-                url += f"#t={ft}"
-            
-            await page_obj.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # 等待表格加载
-            await page_obj.wait_for_selector("#dbtable tbody tr", timeout=30000)
-            
-            # 添加延迟，确保数据加载完成
-            await self.random_delay(1, 2)
-            
-            # 提取表格数据
-            funds = await page_obj.evaluate("""
-                () => {
-                    const rows = document.querySelectorAll('#dbtable tbody tr');
-                    return Array.from(rows).map(row => {
-                        const cells = row.querySelectorAll('td');
-                        if (cells.length < 8) return null;
-                        
-                        return {
-                            symbol: cells[2]?.querySelector('a')?.textContent?.trim() || '',
-                            sname: cells[3]?.querySelector('a')?.textContent?.trim() || '',
-                            nav_date: cells[4]?.textContent?.trim() || '',
-                            per_nav: cells[5]?.textContent?.trim() || '',
-                            total_nav: cells[6]?.textContent?.trim() || '',
-                            nav_rate: cells[7]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
-                            week_rate: cells[8]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
-                            month_rate: cells[9]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
-                            quarter_rate: cells[10]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
-                            half_year_rate: cells[11]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
-                            year_rate: cells[12]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || ''
-                        };
-                    }).filter(item => item !== null && item.symbol !== '');
-                }
-            """)
-            
-            # 分页处理
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paged_funds = funds[start_idx:end_idx]
-            
-            return self._success_response(
-                paged_funds,
-                total_count=len(funds),
-                page=page,
-                page_size=page_size,
-                source="ranking"
-            )
-            
+            async with self.browser_manager.page() as page_obj:
+                # 构造排行榜URL
+                ft = self.FUND_TYPE_MAP.get(fund_type, "")
+                url = f"{self.BASE_URL}/data/fundranking.html"
+                if ft:
+                    url += f"#t={ft}"
+
+                # 等待表格加载
+                run = await self._open_page(
+                    page_obj, "list", "rank", url, "#dbtable tbody tr", self.LIST_READY_JS, settle=(1, 2)
+                )
+
+                # 提取表格数据
+                funds = await page_obj.evaluate("""
+                    () => {
+                        const rows = document.querySelectorAll('#dbtable tbody tr');
+                        return Array.from(rows).map(row => {
+                            const cells = row.querySelectorAll('td');
+                            if (cells.length < 8) return null;
+
+                            return {
+                                symbol: cells[2]?.querySelector('a')?.textContent?.trim() || '',
+                                sname: cells[3]?.querySelector('a')?.textContent?.trim() || '',
+                                nav_date: cells[4]?.textContent?.trim() || '',
+                                per_nav: cells[5]?.textContent?.trim() || '',
+                                total_nav: cells[6]?.textContent?.trim() || '',
+                                nav_rate: cells[7]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
+                                week_rate: cells[8]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
+                                month_rate: cells[9]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
+                                quarter_rate: cells[10]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
+                                half_year_rate: cells[11]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || '',
+                                year_rate: cells[12]?.querySelector('span')?.textContent?.trim()?.replace('%', '') || ''
+                            };
+                        }).filter(item => item !== null && item.symbol !== '');
+                    }
+                """)
+                run.mark("extract")
+                run.finish()
+
+                # 分页处理
+                start_idx = (page - 1) * page_size
+                end_idx = start_idx + page_size
+                paged_funds = funds[start_idx:end_idx]
+
+                return self._success_response(
+                    paged_funds,
+                    total_count=len(funds),
+                    page=page,
+                    page_size=page_size,
+                    source="ranking"
+                )
+
         except Exception as e:
-            return self._error_response(f"获取基金排行榜失败: {str(e)}")
-        finally:
-            await page_obj.close()
+            return self._error_response(f"获取基金排行榜失败: {str(e)}", error_type=classify_error(e))
     
+    @staticmethod
+    def _add_derived_nav(data: Dict[str, Any]) -> None:
+        """计算前一日净值和涨跌额"""
+        if data['per_nav'] and data['nav_rate']:
+            try:
+                per_nav = float(data['per_nav'])
+                nav_rate = float(data['nav_rate'])
+                yesterday_nav = per_nav / (1 + nav_rate / 100)
+                nav_a = per_nav - yesterday_nav
+
+                data['yesterday_nav'] = round(yesterday_nav, 4)
+                data['nav_a'] = round(nav_a, 4)
+            except:
+                data['yesterday_nav'] = ''
+                data['nav_a'] = ''
+
     async def scrape_detail(self, symbol: str) -> Dict[str, Any]:
         """
         获取单个基金的详细信息
         数据源：基金详情页
+
+        detail_backend 为 http 时先走 HTTP 后端，仅在 HTML 解析失败时回退到浏览器
         """
-        page = await self.browser_manager.new_page()
-        
+        if self.detail_backend == "http":
+            result = await self._scrape_detail_http(symbol)
+            if result is not None:
+                return result
+            self.http_fallbacks += 1
+
+        return await self._scrape_detail_browser(symbol)
+
+    async def _scrape_detail_http(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        通过 HTTP 获取基金详情（不启动浏览器）
+
+        Returns:
+            响应字典；HTML 无法解析时返回 None，由调用方回退到浏览器
+        """
+        if self._http_client is None:
+            self._http_client = HttpDetailClient(self.BASE_URL)
+
+        run = self.timer.start("detail_http")
         try:
-            # 访问基金详情页
-            url = f"{self.BASE_URL}/{symbol}.html"
-            await page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # 等待关键元素加载
-            await page.wait_for_selector(".fundDetail-tit", timeout=30000)
-            
-            await self.random_delay(0.5, 1.5)
-            
-            # 提取详情数据
-            data = await page.evaluate("""
-                () => {
-                    const getText = (sel) => {
-                        const el = document.querySelector(sel);
-                        return el ? el.textContent.trim() : '';
-                    };
-
-                    // 基金名称
-                    const fundName = getText('.fundDetail-tit');
-
-                    // 从 dataOfFund 文本中提取净值信息
-                    const dataOfFundText = getText('.dataOfFund');
-
-                    // 提取净值日期 - 格式: (2026-01-30)
-                    let navDate = '';
-                    const dateMatch = dataOfFundText.match(/\\((\\d{4}-\\d{2}-\\d{2})\\)/);
-                    if (dateMatch) {
-                        navDate = dateMatch[1];
-                    }
+            await self.rate_limiter.acquire("detail")
+            run.mark("throttle")
+            try:
+                status, html = await self._http_client.fetch_detail_html(symbol)
+            except Exception as e:
+                self.rate_limiter.record_result("detail", classify_error(e))
+                raise
+            run.mark("fetch")
+            kind = classify_status(status) if status != 200 else None
+            if kind is None and is_blocked_response(html):
+                kind = ErrorKind.BLOCKED
+            if kind is None and status != 200:
+                kind = ErrorKind.UNKNOWN
+            self.rate_limiter.record_result("detail", kind)
+            if kind is not None:
+                return self._error_response(f"获取基金详情失败: 状态码 {status}", error_type=kind)
 
-                    // 提取单位净值和增长率 - 格式: 1.1670-0.51%
-                    let perNav = '', navRate = '';
-                    const navMatch = dataOfFundText.match(/(\\d+\\.\\d+)([\\-\\+]?\\d+\\.\\d+)%/);
-                    if (navMatch) {
-                        perNav = navMatch[1];
-                        navRate = navMatch[2];
-                    }
+            try:
+                data = parse_detail_html(html)
+            except DetailParseError:
+                return None
+            run.mark("parse")
 
-                    // 提取累计净值
-                    let totalNav = '';
-                    const totalNavMatch = dataOfFundText.match(/累计净值(\\d+\\.\\d+)/);
-                    if (totalNavMatch) {
-                        totalNav = totalNavMatch[1];
-                    }
+            # 补充基金代码
+            data['symbol'] = symbol
+            self._add_derived_nav(data)
 
-                    // 从 infoOfFund 文本中提取基金信息
-                    const infoOfFundText = getText('.infoOfFund');
+            return self._success_response(data, source="detail_page", backend="http")
 
-                    // 提取基金经理 - 格式: 基金经理：郑晓辉等成 立 日
-                    let fundManager = '';
-                    const managerMatch = infoOfFundText.match(/基金经理[：:](.*?)成 立 日/);
-                    if (managerMatch) {
-                        fundManager = managerMatch[1].trim();
-                    }
+        except Exception as e:
+            return self._error_response(f"获取基金详情失败: {str(e)}", error_type=classify_error(e))
+        finally:
+            # 失败、回退的请求同样计入总耗时
+            run.finish()
 
-                    // 提取基金类型 - 格式: 类型：混合型-灵活  |
-                    let fundType = '';
-                    const typeMatch = infoOfFundText.match(/类型[：:](.*?)\\|/);
-                    if (typeMatch) {
-                        fundType = typeMatch[1].trim();
-                    }
+    async def _scrape_detail_browser(self, symbol: str) -> Dict[str, Any]:
+        """通过浏览器渲染详情页获取基金详情"""
+        try:
+            async with self.browser_manager.page() as page:
+                # 访问基金详情页
+                url = f"{self.BASE_URL}/{symbol}.html"
 
-                    // 提取基金规模 - 格式: 规模：29.37亿元
-                    let fundScale = '';
-                    const scaleMatch = infoOfFundText.match(/规模[：:](\\d+\\.\\d+亿元)/);
-                    if (scaleMatch) {
-                        fundScale = scaleMatch[1];
-                    }
+                # 等待关键元素加载
+                run = await self._open_page(
+                    page, "detail", "detail", url, ".fundDetail-tit", self.DETAIL_READY_JS, settle=(0.5, 1.5)
+                )
 
-                    // 提取成立日期 - 格式: 成 立 日：2001-12-18
-                    let establishDate = '';
-                    const estMatch = infoOfFundText.match(/成 立 日[：:](\\d{4}-\\d{2}-\\d{2})/);
-                    if (estMatch) {
-                        establishDate = estMatch[1];
-                    }
+                # 提取详情数据
+                data = await page.evaluate(self.DETAIL_EXTRACT_JS)
+                run.mark("extract")
 
-                    // 提取管理人 - 格式: 管 理 人：华夏基金基金评级
-                    let fundCompany = '';
-                    const companyMatch = infoOfFundText.match(/管 理 人[：:](.*?)基金评级/);
-                    if (companyMatch) {
-                        fundCompany = companyMatch[1].trim();
-                    }
+                # 补充基金代码
+                data['symbol'] = symbol
+                self._add_derived_nav(data)
 
-                    // 申购状态
-                    let sgStates = '开放';
-                    const stateEl = document.querySelector('.fundInfoItem .staticCell');
-                    if (stateEl) {
-                        sgStates = stateEl.textContent.includes('暂停') ? '暂停申购' : '开放';
-                    }
+                run.finish()
+                return self._success_response(data, source="detail_page")
 
-                    return {
-                        sname: fundName,
-                        per_nav: perNav,
-                        total_nav: totalNav,
-                        nav_rate: navRate,
-                        nav_date: navDate,
-                        fund_manager: fundManager,
-                        jjlx: fundType,
-                        fund_company: fundCompany,
-                        establishment_date: establishDate,
-                        fund_scale: fundScale,
-                        sg_states: sgStates
-                    };
-                }
-            """)
-            
-            # 补充基金代码
-            data['symbol'] = symbol
-            
-            # 计算前一日净值和涨跌额
-            if data['per_nav'] and data['nav_rate']:
-                try:
-                    per_nav = float(data['per_nav'])
-                    nav_rate = float(data['nav_rate'])
-                    yesterday_nav = per_nav / (1 + nav_rate / 100)
-                    nav_a = per_nav - yesterday_nav
-                    
-                    data['yesterday_nav'] = round(yesterday_nav, 4)
-                    data['nav_a'] = round(nav_a, 4)
-                except:
-                    data['yesterday_nav'] = ''
-                    data['nav_a'] = ''
-            
-            return self._success_response(data, source="detail_page")
-            
         except Exception as e:
-            return self._error_response(f"获取基金详情失败: {str(e)}")
-        finally:
-            await page.close()
+            return self._error_response(f"获取基金详情失败: {str(e)}", error_type=classify_error(e))
     
     async def scrape_nav_history(
         self,
@@ -301,84 +680,248 @@ class EastmoneyScraper(BaseScraper):
         limit: int = 30
     ) -> Dict[str, Any]:
         """
-        获取基金净值历史数据
+        获取基金净值历史数据（新到旧）
+
+        先把该基金增量同步到本地存储（今天已同步过则不发请求），再从本地存储读取，
+        因此可以查询完整历史；同步失败且本地没有数据、或本地存储读取失败时回退到渲染 F10 页面，
+        失败原因放在响应的 sync_error 中
+        """
+        sync_error = None
+        try:
+            sync_result = await self.nav_sync.sync_fund(symbol)
+            if not sync_result['success']:
+                sync_error = sync_result.get('error')
+            if sync_result.get('new_rows'):
+                self.nav_store.flush()
+            if sync_result['success'] or self.nav_store.last_date(symbol):
+                rows = self.nav_store.read(symbol, start_date, end_date)
+                nav_list = [nav_row_to_dict(row) for row in rows[::-1][:limit]]
+                # 同步失败但本地已有数据时返回本地数据，并带上同步失败原因
+                extra = {'sync_error': sync_error} if sync_error else {}
+                return self._success_response(
+                    nav_list,
+                    symbol=symbol,
+                    total_count=len(nav_list),
+                    source="nav_store",
+                    synced=sync_result['success'],
+                    **extra
+                )
+        except (OSError, ValueError) as e:
+            # 本地存储写出或读取失败（磁盘错误、索引损坏、日期格式不对等）
+            sync_error = f"本地净值存储失败: {e}"
+
+        logger.warning("基金 %s 净值历史回退到 F10 页面: %s", symbol, sync_error)
+        result = await self._scrape_nav_history_browser(symbol, start_date, end_date, limit)
+        result['sync_error'] = sync_error
+        return result
+
+    async def _scrape_nav_history_browser(
+        self,
+        symbol: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        limit: int
+    ) -> Dict[str, Any]:
+        """通过浏览器渲染 F10 页面获取净值历史（仅第一页）"""
+        try:
+            async with self.browser_manager.page() as page:
+                # 访问净值历史页面
+                url = f"{self.BASE_URL}/f10/jjjz_{symbol}.html"
+
+                # 等待表格加载
+                run = await self._open_page(
+                    page, "nav_history", "f10", url, "#jztable tbody tr", self.NAV_READY_JS, settle=(0.5, 1)
+                )
+
+                # 提取净值历史
+                nav_list = await page.evaluate("""
+                    () => {
+                        const rows = document.querySelectorAll('#jztable tbody tr');
+                        return Array.from(rows).map(row => {
+                            const cells = row.querySelectorAll('td');
+                            if (cells.length < 4) return null;
+
+                            return {
+                                date: cells[0]?.textContent?.trim() || '',
+                                nav: cells[1]?.textContent?.trim() || '',
+                                total_nav: cells[2]?.textContent?.trim() || '',
+                                rate: cells[3]?.textContent?.trim()?.replace('%', '') || ''
+                            };
+                        }).filter(item => item !== null && item.date !== '');
+                    }
+                """)
+                run.mark("extract")
+                run.finish()
+
+                # 日期过滤
+                if start_date or end_date:
+                    filtered_list = []
+                    for item in nav_list:
+                        if start_date and item['date'] < start_date:
+                            continue
+                        if end_date and item['date'] > end_date:
+                            continue
+                        filtered_list.append(item)
+                    nav_list = filtered_list
+
+                # 限制数量
+                nav_list = nav_list[:limit]
+
+                return self._success_response(
+                    nav_list,
+                    symbol=symbol,
+                    total_count=len(nav_list),
+                    source="nav_history_page"
+                )
+
+        except Exception as e:
+            return self._error_response(f"获取净值历史失败: {str(e)}", error_type=classify_error(e))
+
+    async def analyze_nav(
+        self,
+        symbols: Optional[List[str]] = None,
+        lookback: str = '1y',
+        as_of: Optional[str] = None,
+        risk_free: float = 0.0,
+        rolling_window: Optional[int] = None,
+        field: str = 'total_nav'
+    ) -> Dict[str, Any]:
+        """
+        批量计算净值指标：区间收益、年化波动率、最大回撤、夏普 / 索提诺比率、滚动窗口（见 analytics.nav_analytics）
+
+        指定 symbols 时先把这些基金增量同步到本地存储；不指定时分析本地存储中的全部基金（先用 sync_nav.py 同步）。
+        读取在事件循环中完成（只复制列数组），计算在线程中进行
+
+        Args:
+            symbols: 基金代码（None 表示本地存储中的全部基金）
+            lookback: 风险指标的分析区间
+            as_of: 截止日期（None 时为这些基金的最新净值日期）
+            risk_free: 年化无风险利率（小数，如 0.02）
+            rolling_window: 滚动窗口的交易日数
+            field: total_nav（累计净值）或 nav（单位净值）
         """
-        page = await self.browser_manager.new_page()
-        
         try:
-            # 访问净值历史页面
-            url = f"{self.BASE_URL}/f10/jjjz_{symbol}.html"
-            await page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # 等待表格加载
-            await page.wait_for_selector("#jztable tbody tr", timeout=30000)
-            
-            await self.random_delay(0.5, 1)
-            
-            # 提取净值历史
-            nav_list = await page.evaluate("""
-                () => {
-                    const rows = document.querySelectorAll('#jztable tbody tr');
-                    return Array.from(rows).map(row => {
-                        const cells = row.querySelectorAll('td');
-                        if (cells.length < 4) return null;
-                        
-                        return {
-                            date: cells[0]?.textContent?.trim() || '',
-                            nav: cells[1]?.textContent?.trim() || '',
-                            total_nav: cells[2]?.textContent?.trim() || '',
-                            rate: cells[3]?.textContent?.trim()?.replace('%', '') || ''
-                        };
-                    }).filter(item => item !== null && item.date !== '');
-                }
-            """)
-            
-            # 日期过滤
-            if start_date or end_date:
-                filtered_list = []
-                for item in nav_list:
-                    if start_date and item['date'] < start_date:
-                        continue
-                    if end_date and item['date'] > end_date:
-                        continue
-                    filtered_list.append(item)
-                nav_list = filtered_list
-            
-            # 限制数量
-            nav_list = nav_list[:limit]
-            
+            if symbols:
+                await self.nav_sync.sync_all(symbols)
+                self.nav_store.flush()
+            store = self.nav_store
+            symbols = list(symbols) if symbols else store.symbols()
+            end_date = as_of or latest_date(store, symbols)
+            if not end_date:
+                return self._error_response("本地没有这些基金的净值历史，请先同步（sync_nav.py）")
+
+            start = load_start(date.fromisoformat(end_date), lookback)
+            matrix = NavMatrix.from_store(store, symbols, start.isoformat() if start else None, end_date, field)
+            records = await asyncio.to_thread(
+                analyze, matrix, end_date, lookback, risk_free=risk_free, rolling_window=rolling_window
+            )
             return self._success_response(
-                nav_list,
-                symbol=symbol,
-                total_count=len(nav_list),
-                source="nav_history_page"
+                records,
+                as_of=end_date,
+                lookback=lookback,
+                field=field,
+                total_count=len(records),
+                missing=[symbol for symbol in symbols if symbol not in matrix],
+                trading_days=len(matrix.dates),
+                source="nav_store"
             )
-            
-        except Exception as e:
-            return self._error_response(f"获取净值历史失败: {str(e)}")
-        finally:
-            await page.close()
-    
-    async def scrape_funds_batch(self, symbols: List[str]) -> Dict[str, Any]:
+        except (ImportError, ValueError) as e:
+            return self._error_response(str(e))
+
+    @staticmethod
+    def format_fund_record(fund_data: Dict[str, Any]) -> Dict[str, Any]:
+        """将 scrape_detail 的结果格式化为与新浪数据兼容的 12 个字段"""
+        return {
+            'symbol': fund_data.get('symbol', ''),
+            'sname': fund_data.get('sname', ''),
+            'per_nav': fund_data.get('per_nav', ''),
+            'total_nav': fund_data.get('total_nav', ''),
+            'yesterday_nav': fund_data.get('yesterday_nav', ''),
+            'nav_rate': fund_data.get('nav_rate', ''),
+            'nav_a': fund_data.get('nav_a', ''),
+            'sg_states': fund_data.get('sg_states', ''),
+            'nav_date': fund_data.get('nav_date', ''),
+            'fund_manager': fund_data.get('fund_manager', ''),
+            'jjlx': fund_data.get('jjlx', ''),
+            'jjzfe': fund_data.get('fund_scale', '')  # fund_scale -> jjzfe
+        }
+
+    async def scrape_details(
+        self,
+        symbols: List[str],
+        concurrency: int = 1,
+        delay: Optional[float] = None,
+        on_done: Optional[Callable[[int, str, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        获取多个基金详情，结果顺序与 symbols 一致
+
+        请求节奏由共享限速器的 detail 接口族控制：所有并发请求共用同一个令牌桶，
+        响应正常时逐步提速，超时或被拒绝时减速；超时、被拒绝的请求按 retry_policy 退避重试
+
+        Args:
+            symbols: 基金代码列表
+            concurrency: 同时进行的详情请求数（1 表示逐个获取）
+            delay: 起始请求间隔（秒），用于设置限速器的起始速率；None 表示沿用当前速率
+            on_done: 每个基金完成时的回调 (序号, 基金代码, 结果)，用于进度显示
+
+        Returns:
+            每个基金的 scrape_detail 结果列表
+        """
+        if delay is not None:
+            self.rate_limiter.set_delay("detail", delay)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(symbols)
+
+        async def fetch_one(idx: int, symbol: str) -> None:
+            try:
+                result = await self.retry_policy.run(lambda: self.scrape_detail(symbol))
+            except Exception as e:
+                result = self._error_response(str(e), error_type=classify_error(e))
+            if result['success']:
+                self.attribute_cache.update(symbol, result['data'])
+            results[idx] = result
+            if on_done:
+                on_done(idx, symbol, result)
+
+        if concurrency <= 1:
+            for idx, symbol in enumerate(symbols):
+                await fetch_one(idx, symbol)
+            return results
+
+        # 并发模式：信号量限制同时在途的请求数，令牌桶限制全局速率
+        self.browser_manager.ensure_pool_capacity(concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def worker(idx: int, symbol: str) -> None:
+            async with semaphore:
+                await fetch_one(idx, symbol)
+
+        await asyncio.gather(*(worker(idx, symbol) for idx, symbol in enumerate(symbols)))
+        return results
+
+    async def scrape_funds_batch(self, symbols: List[str], concurrency: int = 1) -> Dict[str, Any]:
         """
         批量获取多个基金的详情
+
+        Args:
+            symbols: 基金代码列表
+            concurrency: 同时进行的详情请求数
         """
         results = []
         errors = []
-        
-        for symbol in symbols:
-            try:
-                result = await self.scrape_detail(symbol)
-                if result['success']:
-                    results.append(result['data'])
-                else:
-                    errors.append({'symbol': symbol, 'error': result['error']})
-                
-                # 每个请求之间添加延迟
-                await self.random_delay(1, 2)
-                
-            except Exception as e:
-                errors.append({'symbol': symbol, 'error': str(e)})
+
+        details = await self.scrape_details(symbols, concurrency=concurrency)
+
+        for symbol, result in zip(symbols, details):
+            if result['success']:
+                results.append(result['data'])
+            else:
+                errors.append({
+                    'symbol': symbol,
+                    'error': result['error'],
+                    'error_type': result.get('error_type', ErrorKind.UNKNOWN)
+                })
         
         return self._success_response(
             results,
@@ -392,7 +935,14 @@ class EastmoneyScraper(BaseScraper):
         self,
         batch_size: int = 100,
         max_funds: Optional[int] = None,
-        delay: float = 1.0
+        delay: float = 1.0,
+        concurrency: int = 1,
+        on_ready: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+        on_record: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_failed: Optional[Callable[[str, str, Optional[Dict[str, Any]]], None]] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        verbose: bool = True
     ) -> Dict[str, Any]:
         """
         获取所有基金的完整信息
@@ -400,92 +950,561 @@ class EastmoneyScraper(BaseScraper):
         Args:
             batch_size: 每批处理的基金数量
             max_funds: 最多获取的基金数量（None表示全部）
-            delay: 每个请求之间的延迟（秒）
+            delay: 起始请求间隔（秒），之后由限速器按响应情况自动调整
+            concurrency: 同时进行的详情请求数（1 表示逐个获取）
+            on_ready: 确定基金范围后调用一次 (基金总数, 无需访问详情页即可输出的记录)，
+                后台任务据此边抓边写出结果；refresh / hybrid 模式的同名回调含义相同
+            on_record: 其余每条输出记录确定后调用 (基金代码, 记录)，每批结束后按顺序调用
+            on_failed: 重试后仍失败的基金调用 (基金代码, 错误类型, 仍然输出的旧记录或 None)
+            on_batch / on_retry: 同 collect_details
+            verbose: 是否打印进度（MCP 服务和后台任务中为 False，stdout 是协议通道）
 
         Returns:
             包含所有基金信息的字典，字段与新浪数据格式兼容：
             ['symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
              'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager', 'jjlx', 'jjzfe']
         """
+        log = print if verbose else (lambda *args, **kwargs: None)
         try:
             # 1. 获取全量基金代码
-            print("  [步骤1] 正在获取基金代码列表...")
-            codes_result = await self.scrape_all_fund_codes()
+            log("  [步骤1] 正在获取基金代码列表...")
+            codes_result = await self.scrape_all_fund_codes(verbose=verbose)
             if not codes_result['success']:
                 return self._error_response("获取基金代码列表失败")
 
             all_codes = codes_result['data']
-            print(f"  ✅ 成功获取 {len(all_codes)} 个基金代码")
+            log(f"  ✅ 成功获取 {len(all_codes)} 个基金代码")
 
             # 限制数量（如果指定）
             if max_funds:
                 all_codes = all_codes[:max_funds]
-                print(f"  ℹ️  限制为前 {max_funds} 个基金")
-
-            total = len(all_codes)
-
-            # 2. 批量获取详情
-            print(f"\n  [步骤2] 开始批量获取基金详情（每批 {batch_size} 个，延迟 {delay}秒）...\n")
-            all_results = []
-            failed = []
-
-            for i in range(0, total, batch_size):
-                batch = all_codes[i:i+batch_size]
-                batch_symbols = [f['symbol'] for f in batch]
-
-                batch_num = i // batch_size + 1
-                total_batches = (total + batch_size - 1) // batch_size
-                print(f"  【批次 {batch_num}/{total_batches}】 正在获取第 {i+1}-{min(i+batch_size, total)} 个基金...")
-
-                success_count = 0
-                for idx, symbol in enumerate(batch_symbols, 1):
-                    try:
-                        # 显示当前进度
-                        current = i + idx
-                        print(f"    [{current}/{total}] {symbol}...", end='', flush=True)
-
-                        result = await self.scrape_detail(symbol)
-                        if result['success']:
-                            fund_data = result['data']
-
-                            # 格式化为与旧代码兼容的字段名
-                            formatted_data = {
-                                'symbol': fund_data.get('symbol', ''),
-                                'sname': fund_data.get('sname', ''),
-                                'per_nav': fund_data.get('per_nav', ''),
-                                'total_nav': fund_data.get('total_nav', ''),
-                                'yesterday_nav': fund_data.get('yesterday_nav', ''),
-                                'nav_rate': fund_data.get('nav_rate', ''),
-                                'nav_a': fund_data.get('nav_a', ''),
-                                'sg_states': fund_data.get('sg_states', ''),
-                                'nav_date': fund_data.get('nav_date', ''),
-                                'fund_manager': fund_data.get('fund_manager', ''),
-                                'jjlx': fund_data.get('jjlx', ''),
-                                'jjzfe': fund_data.get('fund_scale', '')  # fund_scale -> jjzfe
-                            }
-                            all_results.append(formatted_data)
-                            success_count += 1
-                            print(" ✅")
-                        else:
-                            failed.append(symbol)
-                            print(" ❌")
-                    except Exception as e:
-                        print(f" ❌ 错误: {str(e)[:50]}")
-                        failed.append(symbol)
-
-                    # 延迟
-                    await self.random_delay(delay * 0.8, delay * 1.2)
+                log(f"  ℹ️  限制为前 {max_funds} 个基金")
 
-                # 批次完成统计
-                print(f"  批次完成: 成功 {success_count}/{len(batch_symbols)} 个\n")
+            symbols = [f['symbol'] for f in all_codes]
+            if on_ready is not None:
+                on_ready(len(symbols), [])
+            records, failed = await self.collect_details(
+                symbols, batch_size, delay, concurrency,
+                on_record=on_record and (lambda idx, symbol, record: on_record(symbol, record)),
+                on_batch=on_batch, on_retry=on_retry, verbose=verbose
+            )
+            if on_failed is not None:
+                for idx in sorted(failed):
+                    on_failed(symbols[idx], failed[idx], None)
+            all_results = [record for record in records if record is not None]
+            self.snapshot.merge(all_results)
 
             return self._success_response(
                 all_results,
                 total_count=len(all_results),
                 failed_count=len(failed),
-                failed_symbols=failed[:100] if len(failed) > 100 else failed,  # 最多返回100个失败的
+                failed_by_type=count_by_type(failed),
+                failed_symbols=[symbols[idx] for idx in sorted(failed)],
                 source="fetch_all_funds_info"
             )
 
         except Exception as e:
-            return self._error_response(f"获取所有基金信息失败: {str(e)}")
+            return self._error_response(f"获取所有基金信息失败: {str(e)}", error_type=classify_error(e))
+
+    def _family_attributes(self, families: ShareClassIndex, symbol: str) -> Optional[Dict[str, Any]]:
+        """同一基金族中任一份额的共有属性在有效期内时返回这些属性"""
+        for member in families.members(symbol):
+            shared = self.attribute_cache.fresh(member, SHARED_ATTRIBUTES)
+            if shared is not None:
+                return shared
+        return None
+
+    async def collect_details(
+        self,
+        symbols: List[str],
+        batch_size: int,
+        delay: float,
+        concurrency: int,
+        on_record: Optional[Callable[[int, str, Dict[str, Any]], None]] = None,
+        on_failed: Optional[Callable[[int, str, str], None]] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        skipped: int = 0,
+        verbose: bool = True
+    ) -> Tuple[List[Optional[Dict[str, Any]]], Dict[int, str]]:
+        """
+        分批获取详情并格式化为 12 字段记录，最后逐个重试一轮失败的基金（页面不存在的除外）
+
+        命令行、后台任务和各批量模式共用这一流程；回调用于边抓边写出结果、记录断点日志
+
+        Args:
+            symbols: 基金代码列表
+            batch_size: 每批基金数（每批结束后保存属性缓存）
+            delay: 详情页起始请求间隔（秒），之后由限速器自动调整
+            concurrency: 每批内的并发数
+            on_record: 每批（及重试）结束后按原顺序对每条新记录调用 (序号, 基金代码, 记录)
+            on_failed: 基金获取失败时调用 (序号, 基金代码, 错误类型)；重试仍失败时会再调用一次
+            on_batch: 每批开始前调用 (起始序号, 结束序号)
+            on_retry: 重试开始前调用 (重试的基金数)
+            should_stop: 每批开始前和重试前检查，返回 True 时停止（未处理的基金记录为 None，不计入失败）
+            skipped: 进度显示中已跳过的基金数（续传时）
+            verbose: 是否打印进度
+
+        Returns:
+            (与 symbols 等长的记录列表（失败为 None）, {序号: 错误类型})
+        """
+        total = len(symbols)
+        log = print if verbose else (lambda *args, **kwargs: None)
+        log(f"\n  [步骤2] 开始批量获取基金详情（每批 {batch_size} 个，起始间隔 {delay}秒，并发 {concurrency}）...\n")
+        records: List[Optional[Dict[str, Any]]] = [None] * total
+        failed: Dict[int, str] = {}  # 序号 -> 错误类型
+        self.rate_limiter.set_delay("detail", delay)
+
+        def collect(indexes: List[int], details: List[Dict[str, Any]]) -> int:
+            success_count = 0
+            for idx, result in zip(indexes, details):
+                if result['success']:
+                    # 格式化为与旧代码兼容的字段名
+                    records[idx] = self.format_fund_record(result['data'])
+                    failed.pop(idx, None)
+                    success_count += 1
+                    if on_record is not None:
+                        on_record(idx, symbols[idx], records[idx])
+                else:
+                    failed[idx] = result.get('error_type', ErrorKind.UNKNOWN)
+                    if on_failed is not None:
+                        on_failed(idx, symbols[idx], failed[idx])
+            return success_count
+
+        for i in range(0, total, batch_size):
+            if should_stop is not None and should_stop():
+                break
+            end = min(i + batch_size, total)
+            if on_batch is not None:
+                on_batch(i, end)
+
+            batch_num = i // batch_size + 1
+            total_batches = (total + batch_size - 1) // batch_size
+            log(f"  【批次 {batch_num}/{total_batches}】 正在获取第 {skipped + i + 1}-{skipped + end} 个基金...")
+
+            def report(idx: int, symbol: str, result: Dict[str, Any]) -> None:
+                # 显示当前进度
+                status = "✅" if result['success'] else f"❌ {result.get('error', '')[:50]}"
+                log(f"    [{skipped + i + idx + 1}/{skipped + total}] {symbol}... {status}", flush=True)
+
+            details = await self.scrape_details(symbols[i:end], concurrency=concurrency, on_done=report)
+            success_count = collect(list(range(i, end)), details)
+
+            # 批次完成统计
+            log(f"  批次完成: 成功 {success_count}/{end - i} 个\n")
+            self.attribute_cache.save()
+
+        retry_indexes = [idx for idx, kind in failed.items() if kind != ErrorKind.NOT_FOUND]
+        if retry_indexes and not (should_stop is not None and should_stop()):
+            if on_retry is not None:
+                on_retry(len(retry_indexes))
+            log(f"  [步骤3] 重试失败的 {len(retry_indexes)} 个基金...\n")
+            retry_symbols = [symbols[idx] for idx in retry_indexes]
+
+            def report_retry(n: int, symbol: str, result: Dict[str, Any]) -> None:
+                status = "✅" if result['success'] else f"❌ {result.get('error', '')[:50]}"
+                log(f"    [重试 {n + 1}/{len(retry_indexes)}] {symbol}... {status}", flush=True)
+
+            details = await self.scrape_details(retry_symbols, on_done=report_retry)
+            collect(retry_indexes, details)
+            self.attribute_cache.save()
+
+        return records, failed
+
+    async def _fetch_rank_page(self, page: int, page_size: int) -> Dict[str, Any]:
+        """请求一页排行榜接口，data 为 12 字段记录列表，附带总页数和 listing（LISTING_FIELDS 顺序的各行）"""
+        if self._http_client is None:
+            self._http_client = HttpDetailClient(self.BASE_URL)
+        path = f"{self.RANK_API_PATH}?{urlencode(build_rank_params(page, page_size))}"
+        try:
+            await self.rate_limiter.acquire("rank")
+            try:
+                status, content, _ = await self._http_client.fetch(path, headers={'Referer': self.RANK_REFERER})
+                kind = classify_status(status)
+                if kind is None and is_blocked_response(content):
+                    kind = ErrorKind.BLOCKED
+                if kind is not None:
+                    raise ScrapeError(kind, f"状态码: {status}")
+                try:
+                    rank = parse_rank_data(content)
+                    rows = [row for row in rank.rows() if len(row.fields) >= 10]
+                    funds = [row_to_fund(row.fields) for row in rows]
+                except RankParseError as e:
+                    raise ScrapeError(ErrorKind.PARSE_FAILURE, str(e)) from e
+            except Exception as e:
+                self.rate_limiter.record_result("rank", classify_error(e))
+                raise
+            self.rate_limiter.record_result("rank")
+            return self._success_response(
+                funds, page=page, all_pages=rank.all_pages or 1, listing=[row_to_listing(row) for row in rows]
+            )
+        except Exception as e:
+            return self._error_response(f"获取排行榜第 {page} 页失败: {str(e)}", error_type=classify_error(e))
+
+    async def fetch_rank_listing(self, page_size: int = 500, concurrency: int = 4) -> Dict[str, Any]:
+        """
+        通过排行榜接口批量获取所有开放式基金的最新净值（约 50 个请求即可覆盖全部基金）
+
+        Args:
+            page_size: 每页基金数
+            concurrency: 同时请求的页数（速率仍由限速器的 rank 接口族控制）
+
+        各区间收益等完整的排行榜数据另存到 listing_snapshot，供本地筛选（screen_funds）使用
+
+        Returns:
+            data 为 12 字段记录列表（基金经理、类型为空，规模字段不可靠，需详情页补充）
+        """
+        first = await self.retry_policy.run(lambda: self._fetch_rank_page(1, page_size))
+        if not first['success']:
+            return first
+
+        pages: Dict[int, List[Dict[str, Any]]] = {1: first['data']}
+        listings: Dict[int, List[tuple]] = {1: first['listing']}
+        failed: Dict[int, str] = {}
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(page: int) -> None:
+            async with semaphore:
+                result = await self.retry_policy.run(lambda: self._fetch_rank_page(page, page_size))
+            if result['success']:
+                pages[page] = result['data']
+                listings[page] = result['listing']
+            else:
+                failed[page] = result.get('error_type', ErrorKind.UNKNOWN)
+
+        await asyncio.gather(*(fetch(page) for page in range(2, first['all_pages'] + 1)))
+
+        funds = [fund for page in sorted(pages) for fund in pages[page]]
+        if not failed or self.listing_snapshot.saved_at() is None:
+            # 有页面失败时不覆盖已有的完整数据
+            self.listing_snapshot.save(LISTING_FIELDS, (row for page in sorted(listings) for row in listings[page]))
+        return self._success_response(
+            funds,
+            total_count=len(funds),
+            all_pages=first['all_pages'],
+            failed_pages=sorted(failed) or None,
+            source="rankhandler"
+        )
+
+    @staticmethod
+    def _mtime(path) -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _build_screener(self) -> FundScreener:
+        """由排行榜数据、基金信息快照和属性缓存构建筛选索引"""
+        listing, _ = self.listing_snapshot.load()
+        records, _ = self.snapshot.load()
+        return FundScreener(merge_sources(listing, records, self.attribute_cache.peek))
+
+    async def screen_funds(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort_by: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        在本地数据上筛选、排序基金（见 storage.screener），不渲染排行榜页面
+
+        排行榜数据不存在、超过 LISTING_MAX_AGE 或 refresh=True 时先通过排行榜接口重新获取（约 50 个 HTTP 请求），
+        获取失败时沿用旧数据；筛选索引在数据文件变化后重建，之后的查询都在内存中完成
+
+        Args:
+            filters: 筛选条件（见 FundScreener.screen）
+            sort_by: 排序字段，"-" 前缀表示降序
+            limit: 返回条数
+            offset: 跳过前多少条
+            refresh: 忽略有效期，重新获取排行榜数据
+        """
+        saved_at = self.listing_snapshot.saved_at()
+        listing_status = "cached"
+        if refresh or saved_at is None or time.time() - saved_at > self.LISTING_MAX_AGE:
+            listing_result = await self.fetch_rank_listing()
+            if listing_result['success'] and (not listing_result.get('failed_pages') or saved_at is None):
+                listing_status = "refreshed"
+            elif saved_at is None:
+                return listing_result
+            else:
+                listing_status = "stale"
+
+        key = (self.listing_snapshot.saved_at(), self._mtime(self.snapshot.path), self._mtime(self.attribute_cache.path))
+        if self._screener is None or key != self._screener_key:
+            # 构建需要解析、排序全部数据，放到线程中避免阻塞事件循环
+            self._screener = await asyncio.to_thread(self._build_screener)
+            self._screener_key = key
+
+        try:
+            results, total = self._screener.screen(filters, sort_by or (), limit, offset)
+        except (AttributeError, TypeError, ValueError) as e:
+            return self._error_response(f"筛选条件无效: {e}")
+        return self._success_response(
+            results,
+            total_matches=total,
+            returned=len(results),
+            offset=offset,
+            listing_status=listing_status,
+            listing_saved_at=datetime.fromtimestamp(self.listing_snapshot.saved_at()).isoformat(timespec='seconds'),
+            source="fund_screener"
+        )
+
+    async def refresh_funds_info(
+        self,
+        max_age_days: int = 7,
+        batch_size: int = 100,
+        max_funds: Optional[int] = None,
+        delay: float = 1.0,
+        concurrency: int = 1,
+        on_ready: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+        on_record: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_failed: Optional[Callable[[str, str, Optional[Dict[str, Any]]], None]] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        增量刷新所有基金信息
+
+        先用排行榜接口批量获取最新净值，与上次快照比对：净值有变化的基金直接更新净值字段，
+        只为新基金和详情超过 max_age_days 天未更新的基金请求详情页；结果合并回快照，
+        返回完整的合并后数据。没有快照时执行完整获取
+
+        Args:
+            max_age_days: 详情页字段（基金经理、类型、规模、申购状态）的最长沿用天数
+            batch_size / max_funds / delay / concurrency: 同 fetch_all_funds_info
+            on_ready / on_record / on_failed / on_batch / on_retry / verbose: 同 fetch_all_funds_info；
+                详情页获取失败但快照或排行榜中有旧记录时，旧记录随 on_failed 传出
+
+        Returns:
+            与 fetch_all_funds_info 相同的字段，附带 refresh 统计
+        """
+        log = print if verbose else (lambda *args, **kwargs: None)
+        previous, detail_dates = self.snapshot.load()
+        if not previous:
+            log("  ℹ️  没有上次的快照，执行完整获取")
+            result = await self.fetch_all_funds_info(
+                batch_size, max_funds, delay, concurrency,
+                on_ready=on_ready, on_record=on_record, on_failed=on_failed, on_batch=on_batch, on_retry=on_retry,
+                verbose=verbose
+            )
+            if result['success']:
+                result['mode'] = "full"
+            return result
+
+        try:
+            log("  [步骤1] 正在获取基金代码列表和排行榜净值...")
+            codes_result = await self.scrape_all_fund_codes(verbose=verbose)
+            if not codes_result['success']:
+                return self._error_response("获取基金代码列表失败")
+            listing_result = await self.fetch_rank_listing()
+            if not listing_result['success']:
+                # 拿不到批量净值时只按快照日期刷新过期的基金
+                log(f"  ⚠️ 排行榜接口失败: {listing_result.get('error', '')}")
+            listing = {f['symbol']: f for f in listing_result.get('data') or []}
+
+            universe = [f['symbol'] for f in codes_result['data']]
+            known = set(universe)
+            universe.extend(symbol for symbol in listing if symbol not in known)
+            if max_funds:
+                universe = universe[:max_funds]
+
+            plan = plan_refresh(universe, listing, previous, detail_dates, max_age_days=max_age_days)
+            counts = plan.counts
+            log(
+                f"  ✅ 共 {len(universe)} 个基金：新基金 {counts['new']}，净值更新 {counts['changed']}，"
+                f"净值未变 {counts['unchanged']}，详情过期 {counts['stale']}"
+            )
+
+            failed: Dict[int, str] = {}
+            records = plan.records
+            if on_ready is not None:
+                pending = set(plan.fetch)
+                on_ready(len(universe), [records[symbol] for symbol in universe
+                                         if symbol in records and symbol not in pending])
+            today = datetime.now().strftime('%Y-%m-%d')
+
+            def detail_done(idx: int, symbol: str, record: Dict[str, Any]) -> None:
+                records[symbol] = record
+                detail_dates[symbol] = today
+                if on_record is not None:
+                    on_record(symbol, record)
+
+            try:
+                if plan.fetch:
+                    _, failed = await self.collect_details(
+                        plan.fetch, batch_size, delay, concurrency,
+                        on_record=detail_done, on_batch=on_batch, on_retry=on_retry, verbose=verbose
+                    )
+                    if on_failed is not None:
+                        for idx in sorted(failed):
+                            on_failed(plan.fetch[idx], failed[idx], records.get(plan.fetch[idx]))
+            finally:
+                # 中途取消时也把已获取的详情并入快照
+                merged = dict(previous)
+                merged.update(records)
+                self.snapshot.save(merged.values(), detail_dates)
+
+            all_results = [records[symbol] for symbol in universe if symbol in records]
+            return self._success_response(
+                all_results,
+                total_count=len(all_results),
+                failed_count=len(failed),
+                failed_by_type=count_by_type(failed),
+                failed_symbols=[plan.fetch[idx] for idx in sorted(failed)],
+                mode="refresh",
+                refresh=dict(counts, detail_fetched=len(plan.fetch) - len(failed)),
+                source="refresh_funds_info"
+            )
+
+        except Exception as e:
+            return self._error_response(f"刷新基金信息失败: {str(e)}", error_type=classify_error(e))
+
+    async def fetch_funds_hybrid(
+        self,
+        batch_size: int = 100,
+        max_funds: Optional[int] = None,
+        delay: float = 1.0,
+        concurrency: int = 1,
+        share_classes: bool = False,
+        on_ready: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+        on_record: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_failed: Optional[Callable[[str, str, Optional[Dict[str, Any]]], None]] = None,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        排行榜批量数据 + 慢变属性缓存，输出与 fetch_all_funds_info 相同的 12 个字段
+
+        净值字段取自排行榜接口；基金经理、类型、规模、申购状态取自 attribute_cache，
+        只有缓存缺失或过期、或排行榜中没有的基金才访问详情页。详情页获取失败时沿用过期的缓存属性，
+        没有任何缓存属性的基金计入失败（failed_symbols），不输出记录
+
+        share_classes=True 时按份额类别分组（A/B/C 类、前端/后端）：同组任一份额的共有属性
+        （基金经理、基金公司、类型、成立日期）在有效期内即可直接使用，否则每组只访问一次详情页，
+        再把共有属性分给同组的其他份额；规模和申购状态沿用各份额自己的缓存。
+        代表份额的详情页获取失败时，同组其他份额同样沿用各自过期的缓存属性，没有缓存属性的计入失败
+
+        Args:
+            batch_size / max_funds / delay / concurrency: 同 fetch_all_funds_info
+            share_classes: 每个基金族只访问一次详情页
+            on_ready / on_record / on_failed / on_batch / on_retry / verbose: 同 fetch_all_funds_info；
+                同族其他份额的记录随代表份额一起通过 on_record 传出
+        """
+        log = print if verbose else (lambda *args, **kwargs: None)
+        try:
+            log("  [步骤1] 正在获取基金代码列表和排行榜净值...")
+            codes_result = await self.scrape_all_fund_codes(verbose=verbose)
+            if not codes_result['success']:
+                return self._error_response("获取基金代码列表失败")
+            listing_result = await self.fetch_rank_listing()
+            if not listing_result['success']:
+                log(f"  ⚠️ 排行榜接口失败，所有基金都将访问详情页: {listing_result.get('error', '')}")
+            listing = {f['symbol']: f for f in listing_result.get('data') or []}
+
+            universe = [f['symbol'] for f in codes_result['data']]
+            known = set(universe)
+            universe.extend(symbol for symbol in listing if symbol not in known)
+            if max_funds:
+                universe = universe[:max_funds]
+
+            families = None
+            if share_classes:
+                names = {f['symbol']: f for f in codes_result['data']}
+                families = ShareClassIndex(
+                    names.get(symbol) or listing.get(symbol) or {'symbol': symbol} for symbol in universe
+                )
+
+            records: Dict[str, Dict[str, Any]] = {}
+            fetch: List[str] = []
+            family_hits = 0
+            for symbol in universe:
+                row = listing.get(symbol)
+                attributes = self.attribute_cache.get(symbol)
+                if row is not None and attributes is not None:
+                    records[symbol] = apply_attributes(row, attributes)
+                    continue
+                shared = self._family_attributes(families, symbol) if row is not None and families is not None else None
+                if shared is not None:
+                    records[symbol] = apply_attributes(row, dict(self.attribute_cache.peek(symbol), **shared))
+                    family_hits += 1
+                else:
+                    fetch.append(symbol)
+            cache_hits = len(records) - family_hits
+
+            # 同一基金族只访问代表份额的详情页，其余有排行榜净值的份额沿用代表份额的共有属性
+            followers: Dict[str, List[str]] = {}
+            if families is not None:
+                detail: List[str] = []
+                for members in families.group(fetch).values():
+                    # 排行榜中没有的份额拿不到净值，必须访问自己的详情页
+                    own = [symbol for symbol in members if symbol not in listing]
+                    leaders = own or [min(members)]
+                    detail.extend(leaders)
+                    followers[leaders[0]] = [symbol for symbol in members if symbol not in leaders]
+                position = {symbol: idx for idx, symbol in enumerate(universe)}
+                fetch = sorted(detail, key=position.__getitem__)
+            shared_count = sum(len(symbols) for symbols in followers.values())
+            log(f"  ✅ 共 {len(universe)} 个基金：属性缓存命中 {cache_hits}，"
+                  + (f"同族共有属性命中 {family_hits}，同族共用详情页 {shared_count}，" if families is not None else "")
+                  + f"需访问详情页 {len(fetch)}")
+
+            if on_ready is not None:
+                on_ready(len(universe), [records[symbol] for symbol in universe if symbol in records])
+
+            def emit(symbol: str, record: Dict[str, Any]) -> None:
+                records[symbol] = record
+                if on_record is not None:
+                    on_record(symbol, record)
+
+            def detail_done(idx: int, symbol: str, record: Dict[str, Any]) -> None:
+                emit(symbol, record)
+                # 把共有属性分给同族的其他份额
+                shared = shared_attributes(self.attribute_cache.peek(symbol))
+                for sibling in followers.get(symbol, ()):
+                    if shared:
+                        self.attribute_cache.update(sibling, shared)
+                    emit(sibling, apply_attributes(listing[sibling], self.attribute_cache.peek(sibling)))
+
+            failures: Dict[str, str] = {}  # 基金代码 -> 错误类型（含代表份额失败的同族份额）
+            detail_fetched = 0
+            if fetch:
+                fetched, failed = await self.collect_details(
+                    fetch, batch_size, delay, concurrency,
+                    on_record=detail_done, on_batch=on_batch, on_retry=on_retry, verbose=verbose
+                )
+                detail_fetched = sum(record is not None for record in fetched)
+                for idx, kind in sorted(failed.items()):
+                    # 代表份额失败时同族其他份额也没有拿到新属性，按同样的规则处理
+                    for symbol in (fetch[idx], *followers.get(fetch[idx], ())):
+                        if symbol in listing and self.attribute_cache.peek(symbol):
+                            # 详情页失败但有过期的缓存属性：排行榜净值 + 过期的缓存属性；
+                            # 没有缓存属性时仍计为失败（不输出缺少基金经理、类型等字段的记录），可重试或续传
+                            emit(symbol, apply_attributes(listing[symbol], self.attribute_cache.peek(symbol)))
+                        else:
+                            failures[symbol] = kind
+                            if on_failed is not None:
+                                on_failed(symbol, kind, None)
+                self.attribute_cache.save()
+
+            all_results = [records[symbol] for symbol in universe if symbol in records]
+            return self._success_response(
+                all_results,
+                total_count=len(all_results),
+                failed_count=len(failures),
+                failed_by_type=count_by_type(failures),
+                failed_symbols=[symbol for symbol in universe if symbol in failures],
+                mode="hybrid",
+                attribute_cache_hits=cache_hits,
+                detail_fetched=detail_fetched,
+                share_classes={'families': len(families), 'family_cache_hits': family_hits,
+                               'shared_detail': shared_count} if families is not None else None,
+                source="fetch_funds_hybrid"
+            )
+
+        except Exception as e:
+            return self._error_response(f"获取基金信息失败: {str(e)}", error_type=classify_error(e))
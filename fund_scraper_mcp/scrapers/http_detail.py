@@ -0,0 +1,197 @@
+"""
+基金详情页 HTTP 抓取后端
+不启动浏览器，直接请求 /{symbol}.html 并解析 HTML，
+输出与浏览器后端的提取脚本 EastmoneyScraper.DETAIL_EXTRACT_JS 完全相同的字段
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from utils.anti_detection import AntiDetection
+
+
+class DetailParseError(Exception):
+    """详情页 HTML 中缺少提取所需的区块或关键字段"""
+
+
+class _SelectorTextParser(HTMLParser):
+    """
+    单遍扫描 HTML，收集若干简单选择器匹配到的第一个元素的 textContent
+
+    targets: {键: (类名, 祖先类名或 None)}，等价于 querySelector('.类名')
+    或 querySelector('.祖先类名 .类名')
+    """
+
+    VOID_TAGS = frozenset((
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+        'link', 'meta', 'param', 'source', 'track', 'wbr',
+    ))
+
+    def __init__(self, targets: Dict[str, Tuple[str, Optional[str]]]):
+        super().__init__(convert_charrefs=True)
+        self.targets = targets
+        self.texts: Dict[str, Optional[str]] = {key: None for key in targets}
+        self._stack: List[Tuple[str, frozenset]] = []
+        self._active: Dict[str, int] = {}
+        self._parts: Dict[str, List[str]] = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+
+        classes = frozenset((dict(attrs).get('class') or '').split())
+        self._stack.append((tag, classes))
+        depth = len(self._stack)
+
+        for key, (cls, ancestor) in self.targets.items():
+            if self.texts[key] is not None or key in self._active or cls not in classes:
+                continue
+            if ancestor and not any(ancestor in c for _, c in self._stack[:-1]):
+                continue
+            self._active[key] = depth
+            self._parts[key] = []
+
+    def handle_endtag(self, tag):
+        # 容错：弹出到最近的同名标签，忽略没有对应开始标签的结束标签
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                del self._stack[i:]
+                break
+        else:
+            return
+
+        depth = len(self._stack)
+        for key, start_depth in list(self._active.items()):
+            if depth < start_depth:
+                self._finish(key)
+
+    def handle_data(self, data):
+        for key in self._active:
+            self._parts[key].append(data)
+
+    def _finish(self, key: str) -> None:
+        self.texts[key] = ''.join(self._parts.pop(key))
+        del self._active[key]
+
+    def close(self):
+        super().close()
+        for key in list(self._active):
+            self._finish(key)
+
+
+# 与 DETAIL_EXTRACT_JS 中的正则一一对应（re.ASCII 使 \d 与 JS 一致）
+_DATE_RE = re.compile(r'\((\d{4}-\d{2}-\d{2})\)', re.ASCII)
+_NAV_RE = re.compile(r'(\d+\.\d+)([\-\+]?\d+\.\d+)%', re.ASCII)
+_TOTAL_NAV_RE = re.compile(r'累计净值(\d+\.\d+)', re.ASCII)
+_MANAGER_RE = re.compile(r'基金经理[：:](.*?)成 立 日')
+_TYPE_RE = re.compile(r'类型[：:](.*?)\|')
+_SCALE_RE = re.compile(r'规模[：:](\d+\.\d+亿元)', re.ASCII)
+_ESTABLISH_RE = re.compile(r'成 立 日[：:](\d{4}-\d{2}-\d{2})', re.ASCII)
+_COMPANY_RE = re.compile(r'管 理 人[：:](.*?)基金评级')
+
+_DETAIL_TARGETS = {
+    'title': ('fundDetail-tit', None),
+    'data': ('dataOfFund', None),
+    'info': ('infoOfFund', None),
+    'state': ('staticCell', 'fundInfoItem'),
+}
+
+
+def parse_detail_html(html: str) -> Dict[str, str]:
+    """
+    解析基金详情页 HTML
+
+    Returns:
+        与 DETAIL_EXTRACT_JS 相同的字段（未补充 symbol、yesterday_nav、nav_a）
+
+    Raises:
+        DetailParseError: 页面缺少 .fundDetail-tit / .dataOfFund / .infoOfFund，
+            或基金名称、单位净值为空（这些内容由脚本填充，静态 HTML 中没有时需回退到浏览器）
+    """
+    parser = _SelectorTextParser(_DETAIL_TARGETS)
+    parser.feed(html)
+    parser.close()
+    texts = parser.texts
+
+    missing = [key for key in ('title', 'data', 'info') if texts[key] is None]
+    if missing:
+        raise DetailParseError(f"详情页缺少区块: {', '.join(missing)}")
+
+    def first_group(pattern, text: str, group: int = 1, strip: bool = False) -> str:
+        m = pattern.search(text)
+        if not m:
+            return ''
+        return m.group(group).strip() if strip else m.group(group)
+
+    data_text = texts['data'].strip()
+    info_text = texts['info'].strip()
+
+    per_nav, nav_rate = '', ''
+    nav_match = _NAV_RE.search(data_text)
+    if nav_match:
+        per_nav, nav_rate = nav_match.group(1), nav_match.group(2)
+
+    sname = texts['title'].strip()
+    if not sname or not per_nav:
+        raise DetailParseError("详情页基金名称或单位净值为空")
+
+    sg_states = '开放'
+    if texts['state'] is not None:
+        sg_states = '暂停申购' if '暂停' in texts['state'] else '开放'
+
+    return {
+        'sname': sname,
+        'per_nav': per_nav,
+        'total_nav': first_group(_TOTAL_NAV_RE, data_text),
+        'nav_rate': nav_rate,
+        'nav_date': first_group(_DATE_RE, data_text),
+        'fund_manager': first_group(_MANAGER_RE, info_text, strip=True),
+        'jjlx': first_group(_TYPE_RE, info_text, strip=True),
+        'fund_company': first_group(_COMPANY_RE, info_text, strip=True),
+        'establishment_date': first_group(_ESTABLISH_RE, info_text),
+        'fund_scale': first_group(_SCALE_RE, info_text),
+        'sg_states': sg_states,
+    }
+
+
+class HttpDetailClient:
+    """基于连接池的详情页 HTTP 客户端（keep-alive 复用连接）"""
+
+    def __init__(self, base_url: str, max_connections: int = 16, timeout: float = 20.0):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'User-Agent': AntiDetection.get_random_user_agent(),
+                    'Referer': f"{self.base_url}/",
+                    'Accept-Language': 'zh-CN,zh;q=0.9',
+                },
+            )
+        return self._session
+
+    async def fetch_detail_html(self, symbol: str) -> Tuple[int, str]:
+        """请求详情页，返回 (状态码, HTML)"""
+        status, html, _ = await self.fetch(f"/{symbol}.html")
+        return status, html
+
+    async def fetch(self, path: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, str, Dict[str, str]]:
+        """复用连接池请求站内任意路径，返回 (状态码, 文本, 响应头)，响应头名称为小写"""
+        session = await self._get_session()
+        async with session.get(f"{self.base_url}{path}", headers=headers) as response:
+            text = await response.text(encoding=response.charset or 'utf-8', errors='replace')
+            return response.status, text, {k.lower(): v for k, v in response.headers.items()}
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
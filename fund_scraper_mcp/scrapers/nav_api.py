@@ -0,0 +1,126 @@
+"""
+净值历史接口（api.fund.eastmoney.com/f10/lsjz）
+按日期范围和页码直接返回 JSON，不需要渲染 F10 页面，也不受页面只显示第一页的限制
+"""
+import json
+from typing import List, Optional, Tuple
+
+from .http_detail import HttpDetailClient
+from storage.nav_store import NavRow
+from utils.rate_limiter import RateLimiter, get_rate_limiter
+from utils.retry import ErrorKind, ScrapeError, classify_error, classify_status
+
+
+def _to_float(text) -> Optional[float]:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_lsjz(text: str) -> Tuple[List[NavRow], int]:
+    """
+    解析 lsjz 接口响应（JSON 或 JSONP）
+
+    Returns:
+        (本页净值行（接口原始顺序，新到旧）, 范围内总行数)
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start < 0 or end < start:
+        raise ScrapeError(ErrorKind.PARSE_FAILURE, "净值接口返回内容无法解析")
+    try:
+        payload = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ScrapeError(ErrorKind.PARSE_FAILURE, f"净值接口返回内容无法解析: {e}") from e
+
+    if payload.get('ErrCode') not in (0, None):
+        raise ScrapeError(ErrorKind.BLOCKED, f"净值接口错误: {payload.get('ErrMsg') or payload.get('ErrCode')}")
+
+    items = (payload.get('Data') or {}).get('LSJZList') or []
+    rows = [
+        NavRow(item.get('FSRQ', ''), _to_float(item.get('DWJZ')), _to_float(item.get('LJJZ')), _to_float(item.get('JZZZL')))
+        for item in items
+        if item.get('FSRQ')
+    ]
+    return rows, int(payload.get('TotalCount') or 0)
+
+
+class NavApiClient:
+    """净值历史接口客户端（复用 keep-alive 连接池）"""
+
+    API_BASE = "https://api.fund.eastmoney.com"
+    REFERER = "https://fundf10.eastmoney.com/"
+
+    def __init__(
+        self,
+        page_size: int = 20,
+        max_connections: int = 16,
+        timeout: float = 20.0,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Args:
+            page_size: 每页行数（接口默认每页 20 行）
+            max_connections: 连接池大小
+            timeout: 单次请求超时（秒）
+            rate_limiter: 限速器，每页请求计入 f10 接口族（None 时使用进程内共享的限速器）
+        """
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._http = HttpDetailClient(self.API_BASE, max_connections=max_connections, timeout=timeout)
+
+    async def fetch_page(
+        self,
+        symbol: str,
+        page_index: int,
+        start_date: str = '',
+        end_date: str = ''
+    ) -> Tuple[List[NavRow], int]:
+        """请求一页净值，返回 (行, 范围内总行数)"""
+        path = (
+            f"/f10/lsjz?fundCode={symbol}&pageIndex={page_index}&pageSize={self.page_size}"
+            f"&startDate={start_date}&endDate={end_date}"
+        )
+        await self.rate_limiter.acquire("f10")
+        try:
+            status, text, _ = await self._http.fetch(path, headers={'Referer': self.REFERER})
+            kind = classify_status(status)
+            if kind is not None:
+                raise ScrapeError(kind, f"净值接口状态码: {status}")
+            result = parse_lsjz(text)
+        except Exception as e:
+            self.rate_limiter.record_result("f10", classify_error(e))
+            raise
+        self.rate_limiter.record_result("f10")
+        return result
+
+    async def fetch_range(
+        self,
+        symbol: str,
+        start_date: str = '',
+        end_date: str = ''
+    ) -> List[NavRow]:
+        """
+        获取日期范围内的全部净值（按日期升序）
+
+        Args:
+            symbol: 基金代码
+            start_date: 起始日期（含），空表示从成立日起
+            end_date: 结束日期（含），空表示到最新
+        """
+        rows: List[NavRow] = []
+        page_index = 1
+        while True:
+            page_rows, total = await self.fetch_page(symbol, page_index, start_date, end_date)
+            rows.extend(page_rows)
+            if not page_rows or len(rows) >= total:
+                break
+            page_index += 1
+
+        # 接口按日期倒序返回；翻页期间有新净值发布时可能出现重复行
+        unique = {row.date: row for row in rows}
+        return [unique[date] for date in sorted(unique)]
+
+    async def close(self) -> None:
+        await self._http.close()
@@ -4,18 +4,27 @@ Fund Scraper MCP Server
 
 提供的 Tools:
 - scrape_all_fund_codes: 获取全量基金代码列表（约20000+只）
+- search_funds: 按代码、拼音或名称搜索基金（内存索引，无需拉取全量列表）
 - scrape_fund_list: 获取基金排行榜数据（包含净值）
+- screen_funds: 在本地数据上按类型、规模、区间收益、申购状态、基金经理筛选并多字段排序
 - scrape_fund_detail: 获取单个基金详情
 - scrape_fund_nav_history: 获取基金净值历史
+- analyze_fund_nav: 批量计算区间收益、波动率、最大回撤、夏普 / 索提诺比率（基于本地净值历史）
 - scrape_funds_batch: 批量获取多个基金详情
-- fetch_all_funds_info: 一键获取所有基金的完整信息（推荐）
+- fetch_all_funds_info: 一键获取所有基金的完整信息（在一次调用中完成，适合小规模或 refresh 模式）
+- start_crawl_job: 在后台启动获取任务，立即返回任务 ID（推荐用于完整获取）
+- get_job_status: 查询任务进度、吞吐量和预计剩余时间
+- fetch_job_results: 按游标分页读取任务已获取的结果
+- cancel_job: 取消运行中的任务
 - check_browser_status: 检查浏览器状态
+
+所有工具都支持 encoding（rows / columnar / csv）和 max_bytes 参数，
+响应超过 max_bytes 时分页返回，用 response_cursor 读取下一页
 """
 import os
 import sys
 import asyncio
-import json
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict
 
 # 添加项目根目录到 path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -24,8 +33,14 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from analytics.nav_analytics import LOOKBACKS, NAV_FIELDS
 from browser_manager import BrowserManager
+from job_manager import JobManager
 from scrapers.eastmoney_scraper import EastmoneyScraper
+from storage.screener import SORTABLE_COLUMNS
+from utils.response_encoding import ENCODINGS, ResponseEncoder, dumps
+from utils.result_cache import ResultCache
+from utils.single_flight import SingleFlight
 
 
 # 创建 MCP Server
@@ -34,20 +49,129 @@ server = Server("fund-scraper")
 # 全局浏览器管理器
 browser_manager: Optional[BrowserManager] = None
 
+# 全局爬虫（跨调用保留分阶段耗时统计）
+scraper: Optional[EastmoneyScraper] = None
+
+# 可缓存工具的结果有效期（秒）：排行榜盘中会变；净值每个交易日更新一次；基金代码列表很少变化
+TOOL_CACHE_TTL = {
+    "scrape_fund_list": 300,
+    "scrape_fund_detail": 1800,
+    "scrape_fund_nav_history": 4 * 3600,
+    "scrape_all_fund_codes": 6 * 3600,
+}
+
+# 工具调用结果缓存（按结果 JSON 大小做 LRU 淘汰）
+result_cache = ResultCache(max_size=int(float(os.environ.get("RESULT_CACHE_MB", "64")) * 1024 * 1024))
+
+# 过期结果是否先返回、再在后台刷新
+STALE_WHILE_REVALIDATE = os.environ.get("STALE_WHILE_REVALIDATE", "false").lower() == "true"
+
+# 后台刷新任务（同一个键只刷新一次）
+_refresh_tasks: Dict[tuple, asyncio.Task] = {}
+
+# 合并并发的相同调用：同一基金、同一参数的请求正在进行时，后到的请求共享其结果
+single_flight = SingleFlight()
+
+# 响应字节上限（0 表示不限制），可被工具参数 max_bytes 覆盖
+MAX_RESPONSE_BYTES = int(os.environ.get("MAX_RESPONSE_BYTES", "0"))
 
-async def get_browser_manager() -> BrowserManager:
-    """获取或创建浏览器管理器"""
+# 结果编码与分页（未读完的结果保留在服务端）
+response_encoder = ResponseEncoder()
+
+# 所有工具通用的响应参数
+RESPONSE_OPTIONS = {
+    "encoding": {
+        "type": "string",
+        "description": "结果为记录列表时的编码方式: rows=记录列表（每条记录重复字段名）; columnar={fields, rows} 字段名只出现一次; csv=带表头的 CSV 文本。大结果建议用 columnar 或 csv",
+        "enum": list(ENCODINGS),
+        "default": "rows"
+    },
+    "max_bytes": {
+        "type": "integer",
+        "description": "响应字节上限，超出时只返回第一页并附带 next_cursor",
+        "default": None
+    },
+    "response_cursor": {
+        "type": "string",
+        "description": "上一次响应返回的 next_cursor，读取下一页（其他参数被忽略）",
+        "default": None
+    }
+}
+
+# 后台抓取任务（在服务的事件循环中运行，结果持久化在缓存目录下的 jobs/）
+job_manager = JobManager(lambda: get_scraper())
+
+
+def get_browser_manager() -> BrowserManager:
+    """获取或创建浏览器管理器（不启动浏览器，第一次借用页面时才启动 Edge）"""
     global browser_manager
     if browser_manager is None:
         headless = os.environ.get("HEADLESS", "true").lower() == "true"
-        browser_manager = BrowserManager(headless=headless)
-        await browser_manager.start()
+        block_resources = os.environ.get("BLOCK_RESOURCES", "true").lower() == "true"
+        browser_manager = BrowserManager(headless=headless, block_resources=block_resources)
     return browser_manager
 
 
-def format_result(result: dict) -> str:
-    """格式化返回结果为 JSON 字符串"""
-    return json.dumps(result, ensure_ascii=False, indent=2)
+async def get_scraper() -> EastmoneyScraper:
+    """获取或创建爬虫（只读本地缓存的工具和 HTTP 后端都不会启动浏览器）"""
+    global scraper
+    bm = get_browser_manager()
+    if scraper is None or scraper.browser_manager is not bm:
+        readiness = os.environ.get("READINESS", "selector").lower()
+        detail_backend = os.environ.get("DETAIL_BACKEND", "browser").lower()
+        scraper = EastmoneyScraper(bm, readiness=readiness, detail_backend=detail_backend)
+    return scraper
+
+
+def format_result(result: dict, encoding: str = "rows", max_bytes: Optional[int] = None) -> str:
+    """按编码方式把返回结果序列化为紧凑的 JSON 字符串，超过 max_bytes 时分页"""
+    return response_encoder.encode(result, encoding, max_bytes).decode("utf-8")
+
+
+async def cached_call(
+    name: str,
+    params: tuple,
+    call: Callable[[], Awaitable[dict]],
+    refresh: bool = False
+) -> dict:
+    """
+    按 (工具名, 规范化参数) 缓存成功的结果，缓存未命中时合并并发的相同调用
+
+    Args:
+        name: 工具名（决定有效期，见 TOOL_CACHE_TTL）
+        params: 规范化后的参数（已填入默认值）
+        call: 实际执行抓取的协程函数
+        refresh: 跳过缓存直接抓取
+    """
+    key = (name, params)
+    if not refresh:
+        cached, state = result_cache.get(key)
+        if state == ResultCache.HIT:
+            return cached
+        if state == ResultCache.STALE:
+            if key not in _refresh_tasks:
+                _refresh_tasks[key] = asyncio.create_task(_refresh_cached(key, call))
+            return cached
+    return await single_flight.do(key, lambda: _call_and_cache(key, call))
+
+
+async def _call_and_cache(key: tuple, call: Callable[[], Awaitable[dict]]) -> dict:
+    result = await call()
+    if result.get("success"):
+        ttl = TOOL_CACHE_TTL[key[0]]
+        size = len(dumps(result))
+        result_cache.put(key, result, ttl, size=size, stale_for=ttl if STALE_WHILE_REVALIDATE else 0)
+    return result
+
+
+async def _refresh_cached(key: tuple, call: Callable[[], Awaitable[dict]]) -> None:
+    """后台刷新过期条目；失败时保留旧结果直到保留期结束"""
+    try:
+        await single_flight.do(key, lambda: _call_and_cache(key, call))
+    except Exception:
+        pass
+    finally:
+        _refresh_tasks.pop(key, None)
 
 
 # ============== Tools 定义 ==============
@@ -55,16 +179,46 @@ def format_result(result: dict) -> str:
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """列出所有可用的工具"""
-    return [
+    tools = [
         Tool(
             name="scrape_all_fund_codes",
-            description="获取全量基金代码列表（约20000+只基金），包含代码、名称、类型等基础信息。适合用于获取完整的基金代码清单。",
+            description="获取全量基金代码列表（约20000+只基金），包含代码、名称、类型等基础信息。适合用于获取完整的基金代码清单。结果缓存在本地磁盘，过期后自动向服务器验证。",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "忽略缓存有效期，立即向服务器验证是否有更新",
+                        "default": False
+                    }
+                },
                 "required": []
             }
         ),
+        Tool(
+            name="search_funds",
+            description="按基金代码前缀、拼音首字母前缀（如 HXCZ）、全拼前缀（如 huaxia）或名称中的连续汉字（如 沪深300）搜索基金，返回按匹配程度排序的前若干条（代码、名称、类型、拼音）。用于把基金名称解析为代码，无需拉取全量代码列表。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "搜索词"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "最多返回条数",
+                        "default": 20
+                    },
+                    "fund_type": {
+                        "type": "string",
+                        "description": "只保留基金类型包含该文本的基金，如 债券、指数、混合型-偏股",
+                        "default": None
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
         Tool(
             name="scrape_fund_list",
             description="从天天基金排行榜获取基金列表，包含净值、增长率等数据。注意：排行榜可能不包含最新发行的基金。",
@@ -90,6 +244,78 @@ async def list_tools() -> list[Tool]:
                 "required": []
             }
         ),
+        Tool(
+            name="screen_funds",
+            description="在本地数据上筛选基金并排序取前 N 条（不渲染网页，通常几毫秒）：按类型、基金经理、基金公司、申购状态、名称、规模、净值和各区间收益（近1周～近3年、今年来、成立来，百分数）筛选，支持多字段排序。数据来自排行榜接口的全量数据（超过 6 小时自动重新获取）及本地基金属性缓存（类型、经理、规模等需先用 fetch_all_funds_info 的 hybrid/refresh 模式获取过）。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "fund_type": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "基金类型包含任一文本，如 [\"股票型\", \"偏股\"]",
+                        "default": None
+                    },
+                    "manager": {
+                        "type": "string",
+                        "description": "基金经理包含该文本",
+                        "default": None
+                    },
+                    "company": {
+                        "type": "string",
+                        "description": "基金公司包含该文本",
+                        "default": None
+                    },
+                    "subscription": {
+                        "type": "string",
+                        "description": "申购状态包含该文本，如 开放、暂停",
+                        "default": None
+                    },
+                    "name": {
+                        "type": "string",
+                        "description": "基金名称包含该文本",
+                        "default": None
+                    },
+                    "min_scale": {
+                        "type": "number",
+                        "description": "最小规模（亿元）",
+                        "default": None
+                    },
+                    "max_scale": {
+                        "type": "number",
+                        "description": "最大规模（亿元）",
+                        "default": None
+                    },
+                    "ranges": {
+                        "type": "object",
+                        "description": "字段范围条件 {字段: {\"min\": 下限, \"max\": 上限}}，如 {\"year_rate\": {\"min\": 10}, \"month_rate\": {\"max\": 0}}。字段: " + ", ".join(SORTABLE_COLUMNS),
+                        "default": None
+                    },
+                    "sort_by": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "排序字段，\"-\" 前缀表示降序，如 [\"-year_rate\", \"scale\"]（缺失值排在最后）",
+                        "default": None
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "返回条数",
+                        "default": 50
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "跳过前多少条",
+                        "default": 0
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "忽略有效期，立即重新获取排行榜数据",
+                        "default": False
+                    }
+                },
+                "required": []
+            }
+        ),
         Tool(
             name="scrape_fund_detail",
             description="获取单个基金的详细信息，包括净值、基金经理、规模、成立日期等全部字段。",
@@ -133,6 +359,49 @@ async def list_tools() -> list[Tool]:
                 "required": ["symbol"]
             }
         ),
+        Tool(
+            name="analyze_fund_nav",
+            description="基于本地净值历史批量计算基金指标：近1周/1月/3月/6月/1年/今年以来收益、年化收益、年化波动率、最大回撤（及起止日期）、夏普比率、索提诺比率，可选滚动窗口收益和波动率。收益类指标为百分数。指定 symbols 时先增量同步这些基金的净值；不指定时分析本地已同步的全部基金（先运行 sync_nav.py）。需要安装 numpy。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "symbols": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "基金代码列表（不指定则分析本地存储中的全部基金）",
+                        "default": None
+                    },
+                    "lookback": {
+                        "type": "string",
+                        "description": "波动率、回撤、夏普等风险指标的分析区间",
+                        "enum": list(LOOKBACKS),
+                        "default": "1y"
+                    },
+                    "as_of": {
+                        "type": "string",
+                        "description": "截止日期，格式 YYYY-MM-DD（默认为最新净值日期）",
+                        "default": None
+                    },
+                    "risk_free": {
+                        "type": "number",
+                        "description": "年化无风险利率（小数，如 0.02 表示 2%）",
+                        "default": 0
+                    },
+                    "rolling_window": {
+                        "type": "integer",
+                        "description": "滚动窗口的交易日数（如 20 约为一个月），返回最新、最好、最差的滚动收益和滚动波动率",
+                        "default": None
+                    },
+                    "field": {
+                        "type": "string",
+                        "description": "使用的净值: total_nav=累计净值（含分红，默认）; nav=单位净值",
+                        "enum": list(NAV_FIELDS),
+                        "default": "total_nav"
+                    }
+                },
+                "required": []
+            }
+        ),
         Tool(
             name="scrape_funds_batch",
             description="批量获取多个基金的详情数据",
@@ -143,6 +412,11 @@ async def list_tools() -> list[Tool]:
                         "type": "array",
                         "items": {"type": "string"},
                         "description": "基金代码列表，如 ['000001', '000002']"
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": "同时进行的详情请求数（1 表示逐个获取）",
+                        "default": 1
                     }
                 },
                 "required": ["symbols"]
@@ -150,7 +424,7 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="fetch_all_funds_info",
-            description="一键获取所有基金的完整信息（推荐使用）。返回包含12个字段的完整数据，与新浪数据格式兼容。注意：此操作耗时较长（约需数小时），建议先用max_funds参数测试。",
+            description="一键获取所有基金的完整信息，在一次调用中完成并返回全部数据（12个字段，与新浪数据格式兼容）。注意：完整获取耗时较长（约需数小时），请改用 start_crawl_job 在后台运行；有上次快照时用 mode=refresh 只重新获取新基金和详情过期的基金，通常几分钟完成。",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -166,16 +440,140 @@ async def list_tools() -> list[Tool]:
                     },
                     "delay": {
                         "type": "number",
-                        "description": "每个请求之间的延迟（秒）",
+                        "description": "起始请求间隔（秒），之后由限速器按响应情况自动调整",
+                        "default": 1.0
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": "同时进行的详情请求数（1 表示逐个获取）",
+                        "default": 1
+                    },
+                    "mode": {
+                        "type": "string",
+                        "description": "full=重新获取所有详情页; refresh=用排行榜净值更新上次快照，只为新基金和详情过期的基金请求详情页（没有快照时自动执行完整获取）; hybrid=排行榜净值 + 本地属性缓存，只在缓存缺失或过期时访问详情页",
+                        "enum": ["full", "refresh", "hybrid"],
+                        "default": "full"
+                    },
+                    "max_age_days": {
+                        "type": "integer",
+                        "description": "refresh 模式下详情页数据的最长沿用天数",
+                        "default": 7
+                    },
+                    "share_classes": {
+                        "type": "boolean",
+                        "description": "同一基金的 A/B/C 类、前端/后端份额只访问一次详情页，基金经理/公司/类型/成立日期分给其他份额；净值取自排行榜（按 hybrid 模式执行）",
+                        "default": False
+                    }
+                },
+                "required": []
+            }
+        ),
+        Tool(
+            name="start_crawl_job",
+            description="在后台启动获取所有基金完整信息的任务（参数与 fetch_all_funds_info 相同），立即返回任务 ID。结果边获取边保存，用 get_job_status 查询进度，用 fetch_job_results 分页读取结果。同一时间只运行一个任务。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "mode": {
+                        "type": "string",
+                        "description": "full=重新获取所有详情页; refresh=用排行榜净值更新上次快照; hybrid=排行榜净值 + 本地属性缓存",
+                        "enum": ["full", "refresh", "hybrid"],
+                        "default": "full"
+                    },
+                    "batch_size": {
+                        "type": "integer",
+                        "description": "每批处理的基金数量",
+                        "default": 100
+                    },
+                    "max_funds": {
+                        "type": "integer",
+                        "description": "最多获取的基金数量（null表示全部）",
+                        "default": None
+                    },
+                    "delay": {
+                        "type": "number",
+                        "description": "起始请求间隔（秒），之后由限速器按响应情况自动调整",
                         "default": 1.0
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": "同时进行的详情请求数",
+                        "default": 1
+                    },
+                    "max_age_days": {
+                        "type": "integer",
+                        "description": "refresh 模式下详情页数据的最长沿用天数",
+                        "default": 7
+                    },
+                    "share_classes": {
+                        "type": "boolean",
+                        "description": "同一基金的各份额只访问一次详情页（按 hybrid 模式执行）",
+                        "default": False
+                    },
+                    "resume_job_id": {
+                        "type": "string",
+                        "description": "继续一个已中断、已取消或失败的 full 任务（跳过已获取的基金）",
+                        "default": None
+                    }
+                },
+                "required": []
+            }
+        ),
+        Tool(
+            name="get_job_status",
+            description="查询后台任务的状态、进度（总数/成功/失败/剩余）、吞吐量（个/秒）和预计剩余时间；不指定 job_id 时列出所有任务",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "任务 ID"
                     }
                 },
                 "required": []
             }
         ),
+        Tool(
+            name="fetch_job_results",
+            description="按游标分页读取后台任务已获取的结果（任务运行中也可读取）。首次 cursor=0，之后传入上次返回的 next_cursor，直到 has_more 为 false。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "任务 ID"
+                    },
+                    "cursor": {
+                        "type": "integer",
+                        "description": "上次返回的 next_cursor（0 表示从头开始）",
+                        "default": 0
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "description": "每页记录数",
+                        "default": 500
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="取消运行中的后台任务（已获取的结果保留，可用 start_crawl_job 的 resume_job_id 继续）",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "任务 ID"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
         Tool(
             name="check_browser_status",
-            description="检查浏览器连接状态",
+            description="检查浏览器连接状态，以及页面池、资源拦截、结果缓存命中率和各抓取阶段耗时（p50/p95）统计",
             inputSchema={
                 "type": "object",
                 "properties": {},
@@ -183,62 +581,184 @@ async def list_tools() -> list[Tool]:
             }
         )
     ]
+    for tool in tools:
+        tool.inputSchema["properties"].update(RESPONSE_OPTIONS)
+    return tools
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """处理工具调用"""
-    
+    encoding = arguments.get("encoding") or "rows"
+    max_bytes = arguments.get("max_bytes") or MAX_RESPONSE_BYTES or None
+
     try:
-        bm = await get_browser_manager()
-        scraper = EastmoneyScraper(bm)
+        # 读取分页结果的下一页，不需要重新执行工具
+        cursor = arguments.get("response_cursor")
+        if cursor:
+            return [TextContent(type="text", text=response_encoder.next_page(cursor, max_bytes).decode("utf-8"))]
+
+        scraper = await get_scraper()
         
         if name == "scrape_all_fund_codes":
-            result = await scraper.scrape_all_fund_codes()
+            refresh = bool(arguments.get("refresh", False))
+            result = await cached_call(
+                name, (), lambda: scraper.scrape_all_fund_codes(refresh=refresh, verbose=False), refresh=refresh
+            )
             
+        elif name == "search_funds":
+            query = str(arguments.get("query") or "").strip()
+            if not query:
+                result = {"success": False, "error": "缺少必需参数: query"}
+            else:
+                result = await scraper.search_funds(
+                    query, int(arguments.get("limit", 20)), arguments.get("fund_type") or None
+                )
+
         elif name == "scrape_fund_list":
             fund_type = arguments.get("fund_type", "all")
             page = arguments.get("page", 1)
             page_size = arguments.get("page_size", 50)
-            result = await scraper.scrape_list(fund_type, page, page_size)
+            result = await cached_call(
+                name, (fund_type, page, page_size), lambda: scraper.scrape_list(fund_type, page, page_size)
+            )
             
+        elif name == "screen_funds":
+            filters = {
+                key: arguments.get(key)
+                for key in ("fund_type", "manager", "company", "subscription", "name", "min_scale", "max_scale", "ranges")
+            }
+            result = await scraper.screen_funds(
+                filters,
+                arguments.get("sort_by") or None,
+                int(arguments.get("limit", 50)),
+                int(arguments.get("offset") or 0),
+                refresh=bool(arguments.get("refresh", False))
+            )
+
         elif name == "scrape_fund_detail":
-            symbol = arguments.get("symbol")
+            symbol = str(arguments.get("symbol") or "").strip()
             if not symbol:
                 result = {"success": False, "error": "缺少必需参数: symbol"}
             else:
-                result = await scraper.scrape_detail(symbol)
+                result = await cached_call(name, (symbol,), lambda: scraper.scrape_detail(symbol))
                 
         elif name == "scrape_fund_nav_history":
-            symbol = arguments.get("symbol")
+            symbol = str(arguments.get("symbol") or "").strip()
             if not symbol:
                 result = {"success": False, "error": "缺少必需参数: symbol"}
             else:
-                start_date = arguments.get("start_date")
-                end_date = arguments.get("end_date")
+                start_date = arguments.get("start_date") or None
+                end_date = arguments.get("end_date") or None
                 limit = arguments.get("limit", 30)
-                result = await scraper.scrape_nav_history(symbol, start_date, end_date, limit)
+                result = await cached_call(
+                    name, (symbol, start_date, end_date, limit),
+                    lambda: scraper.scrape_nav_history(symbol, start_date, end_date, limit)
+                )
                 
+        elif name == "analyze_fund_nav":
+            rolling_window = arguments.get("rolling_window")
+            result = await scraper.analyze_nav(
+                symbols=arguments.get("symbols") or None,
+                lookback=arguments.get("lookback") or "1y",
+                as_of=arguments.get("as_of") or None,
+                risk_free=float(arguments.get("risk_free") or 0),
+                rolling_window=int(rolling_window) if rolling_window else None,
+                field=arguments.get("field") or "total_nav"
+            )
+
         elif name == "scrape_funds_batch":
             symbols = arguments.get("symbols")
             if not symbols:
                 result = {"success": False, "error": "缺少必需参数: symbols"}
             else:
-                result = await scraper.scrape_funds_batch(symbols)
+                concurrency = arguments.get("concurrency", 1)
+                result = await single_flight.do(
+                    (name, tuple(symbols), concurrency),
+                    lambda: scraper.scrape_funds_batch(symbols, concurrency)
+                )
 
         elif name == "fetch_all_funds_info":
             batch_size = arguments.get("batch_size", 100)
             max_funds = arguments.get("max_funds")
             delay = arguments.get("delay", 1.0)
-            result = await scraper.fetch_all_funds_info(batch_size, max_funds, delay)
+            concurrency = arguments.get("concurrency", 1)
+            mode = arguments.get("mode", "full")
+            share_classes = bool(arguments.get("share_classes", False))
+            if share_classes:
+                result = await single_flight.do(
+                    (name, "hybrid", batch_size, max_funds, delay, concurrency, "share_classes"),
+                    lambda: scraper.fetch_funds_hybrid(
+                        batch_size, max_funds, delay, concurrency, share_classes=True, verbose=False
+                    )
+                )
+            elif mode == "refresh":
+                max_age_days = arguments.get("max_age_days", 7)
+                result = await single_flight.do(
+                    (name, mode, batch_size, max_funds, delay, concurrency, max_age_days),
+                    lambda: scraper.refresh_funds_info(
+                        max_age_days, batch_size, max_funds, delay, concurrency, verbose=False
+                    )
+                )
+            elif mode == "hybrid":
+                result = await single_flight.do(
+                    (name, mode, batch_size, max_funds, delay, concurrency),
+                    lambda: scraper.fetch_funds_hybrid(batch_size, max_funds, delay, concurrency, verbose=False)
+                )
+            else:
+                result = await single_flight.do(
+                    (name, batch_size, max_funds, delay, concurrency),
+                    lambda: scraper.fetch_all_funds_info(batch_size, max_funds, delay, concurrency, verbose=False)
+                )
+
+        elif name == "start_crawl_job":
+            params = {
+                key: arguments[key]
+                for key in ("batch_size", "max_funds", "delay", "concurrency", "max_age_days", "share_classes")
+                if arguments.get(key) is not None
+            }
+            result = job_manager.start(
+                mode=arguments.get("mode", "full"),
+                resume_job_id=arguments.get("resume_job_id") or None,
+                **params
+            )
+
+        elif name == "get_job_status":
+            result = job_manager.status(arguments.get("job_id") or None)
+
+        elif name == "fetch_job_results":
+            job_id = str(arguments.get("job_id") or "").strip()
+            if not job_id:
+                result = {"success": False, "error": "缺少必需参数: job_id"}
+            else:
+                result = job_manager.results(
+                    job_id, int(arguments.get("cursor") or 0), int(arguments.get("page_size", 500))
+                )
+
+        elif name == "cancel_job":
+            job_id = str(arguments.get("job_id") or "").strip()
+            if not job_id:
+                result = {"success": False, "error": "缺少必需参数: job_id"}
+            else:
+                result = job_manager.cancel(job_id)
 
         elif name == "check_browser_status":
-            result = await bm.get_status()
+            result = await scraper.browser_manager.get_status()
+            result["readiness"] = scraper.readiness
+            result["detail_backend"] = scraper.detail_backend
+            result["http_fallbacks"] = scraper.http_fallbacks
+            result["rate_limits"] = scraper.rate_limiter.get_stats()
+            result["fund_code_cache"] = scraper.code_cache.get_stats()
+            result["attribute_cache"] = scraper.attribute_cache.get_stats()
+            result["result_cache"] = result_cache.get_stats()
+            result["response_encoder"] = response_encoder.get_stats()
+            result["coalesced_calls"] = single_flight.get_stats()
+            result["stage_timings"] = scraper.timer.summary()
 
         else:
             result = {"success": False, "error": f"未知工具: {name}"}
         
-        return [TextContent(type="text", text=format_result(result))]
+        return [TextContent(type="text", text=format_result(result, encoding, max_bytes))]
         
     except Exception as e:
         error_result = {"success": False, "error": str(e)}
@@ -247,7 +767,14 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
 async def cleanup():
     """清理资源"""
-    global browser_manager
+    global browser_manager, scraper
+    await job_manager.shutdown()
+    for task in list(_refresh_tasks.values()):
+        task.cancel()
+    _refresh_tasks.clear()
+    if scraper:
+        await scraper.close()
+        scraper = None
     if browser_manager:
         await browser_manager.close()
         browser_manager = None
@@ -0,0 +1,19 @@
+from .attribute_cache import FundAttributeCache
+from .files import atomic_write, default_cache_dir
+from .fund_code_cache import FundCodeCache, FundCodeIndex
+from .fund_search import FundSearchIndex
+from .journal import CrawlJournal
+from .nav_store import CsvNavStore, NavRow
+from .nav_columns import ColumnarNavStore
+from .nav_sync import NavSyncEngine
+from .screener import FundScreener
+from .sink import BufferedSink, CsvSink, JsonlSink, ParquetSink, open_sink
+from .snapshot import FundSnapshot, ListingSnapshot, RefreshPlan, plan_refresh
+
+__all__ = [
+    'FundAttributeCache', 'FundCodeCache', 'FundCodeIndex', 'FundSearchIndex', 'CrawlJournal',
+    'CsvNavStore', 'ColumnarNavStore', 'NavRow', 'NavSyncEngine',
+    'BufferedSink', 'CsvSink', 'JsonlSink', 'ParquetSink', 'open_sink',
+    'FundScreener', 'FundSnapshot', 'ListingSnapshot', 'RefreshPlan', 'plan_refresh',
+    'atomic_write', 'default_cache_dir',
+]
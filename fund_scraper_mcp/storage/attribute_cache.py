@@ -0,0 +1,117 @@
+"""
+基金慢变属性缓存
+基金经理、类型、基金公司、成立日期、规模等字段变化很慢，排行榜接口又不提供，
+按基金代码持久化到本地，每个字段有独立的有效期；只有缓存缺失或过期时才需要访问详情页
+"""
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .files import atomic_write, default_cache_dir
+
+
+# 各字段有效期（天），None 表示永不过期
+ATTRIBUTE_TTL_DAYS: Dict[str, Optional[int]] = {
+    'fund_manager': 7,
+    'sg_states': 7,
+    'fund_scale': 30,
+    'jjlx': 90,
+    'fund_company': 180,
+    'establishment_date': None,
+}
+
+
+class FundAttributeCache:
+    """按基金代码缓存慢变属性（JSON 文件，{基金代码: {字段: [值, 获取日期]}}）"""
+
+    def __init__(self, path: Optional[Path] = None, ttl_days: Optional[Dict[str, Optional[int]]] = None):
+        """
+        Args:
+            path: 缓存文件（None 时为缓存目录下的 fund_attributes.json）
+            ttl_days: 各字段有效期（天），默认见 ATTRIBUTE_TTL_DAYS
+        """
+        self.path = Path(path) if path else default_cache_dir() / 'fund_attributes.json'
+        self.ttl_days = dict(ATTRIBUTE_TTL_DAYS, **(ttl_days or {}))
+        self._entries: Dict[str, Dict[str, list]] = self._load()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, list]]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def _is_fresh(self, field: str, fetched: str, today: date) -> bool:
+        ttl = self.ttl_days.get(field)
+        return ttl is None or (today - date.fromisoformat(fetched)).days < ttl
+
+    def get(self, symbol: str, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """所有字段都在有效期内时返回属性，否则返回 None（需要访问详情页）"""
+        entry = self._entries.get(symbol)
+        today = today or date.today()
+        if entry is None or any(
+            field not in entry or not self._is_fresh(field, entry[field][1], today)
+            for field in self.ttl_days
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {field: value for field, (value, _) in entry.items()}
+
+    def fresh(self, symbol: str, fields: Iterable[str], today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """指定字段都已缓存且在有效期内时返回这些字段，否则返回 None（不计入命中统计）"""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None
+        today = today or date.today()
+        result = {}
+        for field in fields:
+            if field not in entry or not self._is_fresh(field, entry[field][1], today):
+                return None
+            result[field] = entry[field][0]
+        return result
+
+    def peek(self, symbol: str) -> Dict[str, Any]:
+        """返回已缓存的属性，不检查有效期（详情页获取失败时兜底）"""
+        return {field: value for field, (value, _) in self._entries.get(symbol, {}).items()}
+
+    def update(self, symbol: str, data: Dict[str, Any], today: Optional[date] = None) -> None:
+        """用详情页数据更新缓存（只记录 ttl_days 中的字段）"""
+        fetched = (today or date.today()).isoformat()
+        entry = self._entries.setdefault(symbol, {})
+        for field in self.ttl_days:
+            if field in data:
+                entry[field] = [data[field], fetched]
+        self._dirty = True
+
+    def save(self) -> None:
+        """有改动时写回磁盘"""
+        if self._dirty:
+            atomic_write(self.path, json.dumps(self._entries, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'path': str(self.path),
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else None,
+        }
+
+
+def apply_attributes(record: Dict[str, Any], attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """把缓存的属性填入排行榜的 12 字段记录（返回新记录）"""
+    merged = dict(record)
+    for field, column in (('fund_manager', 'fund_manager'), ('jjlx', 'jjlx'),
+                          ('fund_scale', 'jjzfe'), ('sg_states', 'sg_states')):
+        if attributes.get(field):
+            merged[column] = attributes[field]
+    return merged
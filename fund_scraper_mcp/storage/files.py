@@ -0,0 +1,28 @@
+"""
+缓存目录与原子写入（各存储模块共用）
+"""
+import os
+import tempfile
+from pathlib import Path
+
+
+def default_cache_dir() -> Path:
+    """缓存目录：环境变量 CACHE_DIR，默认 ~/.cache/fund_scraper_mcp"""
+    env = os.environ.get("CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / '.cache' / 'fund_scraper_mcp'
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """先写临时文件再替换，避免中断时留下半个文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
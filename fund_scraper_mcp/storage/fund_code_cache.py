@@ -0,0 +1,251 @@
+"""
+全量基金代码（fundcode_search.js）磁盘缓存
+
+- 解析后的代码列表以紧凑的二进制索引保存，启动时直接加载，无需再正则提取 + json.loads
+- 记录 ETag / Last-Modified，过期后用条件请求重新验证（304 时只刷新时间戳）
+- 按基金代码二分查找，单个查询不需要解码整张表
+
+索引文件格式（小端）：
+    magic(8) | count(u32) | code_width(u32) | blob_len(u32)
+    codes: count * code_width 字节（ASCII，右侧补空格，原始顺序）
+    order: count * u32（按代码排序后的行号，用于二分查找）
+    offsets: (count + 1) * u32（每行在 blob 中的起止位置）
+    blob: UTF-8 文本，字段以 \\x1f 分隔，每行以 \\x1e 结尾
+"""
+import json
+import struct
+import sys
+from array import array
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .files import atomic_write, default_cache_dir
+from .fund_search import FundSearchIndex
+
+
+# 每行保存的字段（与 scrape_all_fund_codes 的输出一致）
+FIELDS = ('symbol', 'abbr', 'sname', 'jjlx', 'pinyin')
+
+MAGIC = b'FCIDX\x00\x00\x01'
+HEADER = struct.Struct('<8sIII')
+FIELD_SEP = '\x1f'
+ROW_END = '\x1e'
+
+
+def encode_index(funds: Sequence[Dict[str, Any]]) -> bytes:
+    """把基金代码列表编码为二进制索引"""
+    count = len(funds)
+    codes = [str(f.get('symbol', '')).encode('ascii', 'replace') for f in funds]
+    width = max((len(c) for c in codes), default=0)
+
+    rows = []
+    offsets = [0]
+    position = 0
+    for fund in funds:
+        row = FIELD_SEP.join(
+            str(fund.get(name, '')).replace(FIELD_SEP, ' ').replace(ROW_END, ' ') for name in FIELDS
+        ).encode('utf-8') + ROW_END.encode()
+        rows.append(row)
+        position += len(row)
+        offsets.append(position)
+    blob = b''.join(rows)
+
+    order = sorted(range(count), key=codes.__getitem__)
+    return b''.join((
+        HEADER.pack(MAGIC, count, width, len(blob)),
+        b''.join(c.ljust(width) for c in codes),
+        struct.pack(f'<{count}I', *order),
+        struct.pack(f'<{count + 1}I', *offsets),
+        blob,
+    ))
+
+
+class FundCodeIndex:
+    """二进制索引的只读视图"""
+
+    def __init__(self, data: bytes):
+        magic, count, width, blob_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("基金代码索引格式不正确")
+        self.count = count
+        self._width = width
+        self._data = data
+
+        pos = HEADER.size
+        self._codes_at = pos
+        pos += count * width
+        self._order = self._u32_array(data, pos, count)
+        pos += count * 4
+        self._offsets = self._u32_array(data, pos, count + 1)
+        pos += (count + 1) * 4
+        self._blob_at = pos
+        if len(data) != pos + blob_len:
+            raise ValueError("基金代码索引文件不完整")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def _u32_array(data: bytes, pos: int, count: int) -> array:
+        values = array('I')
+        values.frombytes(data[pos:pos + count * 4])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def _code(self, row: int) -> bytes:
+        start = self._codes_at + row * self._width
+        return self._data[start:start + self._width]
+
+    def _row(self, row: int) -> Dict[str, str]:
+        start = self._blob_at + self._offsets[row]
+        end = self._blob_at + self._offsets[row + 1] - 1
+        return dict(zip(FIELDS, self._data[start:end].decode('utf-8').split(FIELD_SEP)))
+
+    def lookup(self, symbol: str) -> Optional[Dict[str, str]]:
+        """按基金代码二分查找"""
+        key = symbol.encode('ascii', 'replace').ljust(self._width)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._code(self._order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._code(self._order[lo]) == key:
+            return self._row(self._order[lo])
+        return None
+
+    def to_list(self) -> List[Dict[str, str]]:
+        """按原始顺序解码所有行"""
+        rows = self._data[self._blob_at:].decode('utf-8').split(ROW_END)
+        del rows[self.count:]
+        sep = FIELD_SEP
+        return [
+            {'symbol': symbol, 'abbr': abbr, 'sname': sname, 'jjlx': jjlx, 'pinyin': pinyin}
+            for symbol, abbr, sname, jjlx, pinyin in map(lambda row: row.split(sep), rows)
+        ]
+
+
+class FundCodeCache:
+    """fundcode_search.js 的磁盘缓存"""
+
+    INDEX_FILE = 'fundcode_search.idx'
+    META_FILE = 'fundcode_search.meta.json'
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: float = 6 * 3600):
+        """
+        Args:
+            cache_dir: 缓存目录（None 时使用 default_cache_dir()）
+            ttl: 缓存有效期（秒），过期后用条件请求重新验证
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.ttl = ttl
+        self._index: Optional[FundCodeIndex] = None
+        self._search: Optional[FundSearchIndex] = None
+        self._meta: Optional[dict] = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / self.INDEX_FILE
+
+    @property
+    def meta_path(self) -> Path:
+        return self.cache_dir / self.META_FILE
+
+    def _load_meta(self) -> dict:
+        if self._meta is None:
+            try:
+                self._meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self._meta = {}
+        return self._meta
+
+    def load_index(self) -> Optional[FundCodeIndex]:
+        """加载索引；缓存不存在或已损坏时返回 None"""
+        if self._index is None:
+            try:
+                self._index = FundCodeIndex(self.index_path.read_bytes())
+            except (OSError, ValueError, struct.error):
+                return None
+        return self._index
+
+    def load(self) -> Optional[List[Dict[str, str]]]:
+        """加载缓存的基金代码列表"""
+        index = self.load_index()
+        return index.to_list() if index is not None else None
+
+    def lookup(self, symbol: str) -> Optional[Dict[str, str]]:
+        """从缓存中查找单个基金"""
+        index = self.load_index()
+        return index.lookup(symbol) if index is not None else None
+
+    def search_index(self) -> Optional[FundSearchIndex]:
+        """内存搜索索引（第一次使用时从缓存构建，代码列表更新后重建）；没有缓存时返回 None"""
+        if self._search is None:
+            funds = self.load()
+            if funds is not None:
+                self._search = FundSearchIndex(funds)
+        return self._search
+
+    def age(self) -> Optional[float]:
+        """距上次验证的秒数；没有缓存时返回 None"""
+        fetched_at = self._load_meta().get('fetched_at')
+        if fetched_at is None or not self.index_path.exists():
+            return None
+        return time.time() - fetched_at
+
+    def is_fresh(self) -> bool:
+        age = self.age()
+        return age is not None and age < self.ttl
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头（If-None-Match / If-Modified-Since）"""
+        if not self.index_path.exists():
+            return {}
+        meta = self._load_meta()
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def _write_meta(self, meta: dict) -> None:
+        atomic_write(self.meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        self._meta = meta
+
+    def store(
+        self,
+        funds: Sequence[Dict[str, Any]],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """写入新的代码列表及其验证信息"""
+        data = encode_index(funds)
+        atomic_write(self.index_path, data)
+        self._index = FundCodeIndex(data)
+        self._search = None
+        self._write_meta({
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'count': len(funds),
+        })
+
+    def touch(self) -> None:
+        """服务器返回 304：内容未变，只刷新验证时间"""
+        meta = dict(self._load_meta())
+        meta['fetched_at'] = time.time()
+        self._write_meta(meta)
+
+    def get_stats(self) -> dict:
+        meta = self._load_meta()
+        age = self.age()
+        return {
+            'path': str(self.index_path),
+            'count': meta.get('count'),
+            'age_seconds': round(age, 1) if age is not None else None,
+            'fresh': self.is_fresh(),
+        }
@@ -0,0 +1,145 @@
+"""
+基金代码列表的内存搜索索引
+支持四种查找，结果按匹配程度排序后截断：
+
+- 基金代码前缀：000 -> 000001, 000003 ...
+- 拼音首字母前缀：HXCZ -> 华夏成长混合（abbr 字段）
+- 全拼前缀：HUAXIACHENG -> 华夏成长混合（pinyin 字段）
+- 中文子串：成长混合 -> 华夏成长混合（名称二元组倒排索引，候选再做子串校验）
+
+前缀查找在排好序的键上二分，子串查找只校验最短倒排列表中的候选，2 万多只基金单次查询通常在 1 毫秒以内
+"""
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 匹配方式（结果中的 match 字段）
+MATCH_CODE = 'code'
+MATCH_ABBR = 'abbr'
+MATCH_PINYIN = 'pinyin'
+MATCH_NAME = 'name'
+
+_CJK = re.compile(r'[\u3400-\u9fff]')
+
+
+class FundSearchIndex:
+    """基金代码列表的只读搜索索引"""
+
+    def __init__(self, funds: Sequence[Dict[str, Any]]):
+        """
+        Args:
+            funds: scrape_all_fund_codes 的 data（symbol / abbr / sname / jjlx / pinyin）
+        """
+        self.funds = list(funds)
+        self._names = [str(f.get('sname', '')) for f in self.funds]
+        self._codes = self._sorted_keys(str(f.get('symbol', '')) for f in self.funds)
+        self._abbrs = self._sorted_keys(str(f.get('abbr', '')).upper() for f in self.funds)
+        self._pinyins = self._sorted_keys(str(f.get('pinyin', '')).upper() for f in self.funds)
+
+        # 同一匹配层级内的排序：名称短的在前，其次按基金代码
+        ranked = sorted(
+            range(len(self.funds)),
+            key=lambda row: (len(self._names[row]), str(self.funds[row].get('symbol', '')))
+        )
+        self._order = [0] * len(ranked)
+        for position, row in enumerate(ranked):
+            self._order[row] = position
+
+        # 名称的单字和二元组倒排索引（行号升序）
+        self._grams: Dict[str, List[int]] = {}
+        for row, name in enumerate(self._names):
+            for gram in set(name) | {name[i:i + 2] for i in range(len(name) - 1)}:
+                postings = self._grams.get(gram)
+                if postings is None:
+                    self._grams[gram] = [row]
+                else:
+                    postings.append(row)
+
+    @staticmethod
+    def _sorted_keys(keys: Iterable[str]) -> Tuple[List[str], List[int]]:
+        pairs = sorted((key, row) for row, key in enumerate(keys) if key)
+        return [key for key, _ in pairs], [row for _, row in pairs]
+
+    def __len__(self) -> int:
+        return len(self.funds)
+
+    @staticmethod
+    def _prefix_rows(index: Tuple[List[str], List[int]], prefix: str) -> Tuple[List[int], List[int]]:
+        """前缀匹配的行号：(与 prefix 完全相同的, 其余以 prefix 开头的)"""
+        keys, rows = index
+        start = bisect_left(keys, prefix)
+        exact_end = bisect_right(keys, prefix, start)
+        end = bisect_left(keys, prefix + '\U0010ffff', exact_end)
+        return rows[start:exact_end], rows[exact_end:end]
+
+    def _substring_rows(self, text: str) -> List[int]:
+        """名称包含 text 的行号"""
+        if len(text) == 1:
+            return self._grams.get(text, [])
+        postings = []
+        for i in range(len(text) - 1):
+            rows = self._grams.get(text[i:i + 2])
+            if not rows:
+                return []
+            postings.append(rows)
+        candidates = min(postings, key=len)
+        names = self._names
+        return [row for row in candidates if text in names[row]]
+
+    def _tiers(self, query: str) -> List[Tuple[List[int], str]]:
+        """按匹配程度从高到低排列的 (行号列表, 匹配方式)；同一行可能出现在多个层级"""
+        if _CJK.search(query):
+            names = self._names
+            rows = self._substring_rows(query)
+            exact = [row for row in rows if names[row] == query]
+            prefix = [row for row in rows if names[row] != query and names[row].startswith(query)]
+            rest = [row for row in rows if not names[row].startswith(query)]
+            return [(exact, MATCH_NAME), (prefix, MATCH_NAME), (rest, MATCH_NAME)]
+
+        if query.isdigit():
+            exact, prefix = self._prefix_rows(self._codes, query)
+            return [(exact, MATCH_CODE), (prefix, MATCH_CODE)]
+
+        key = query.upper()
+        abbr_exact, abbr_prefix = self._prefix_rows(self._abbrs, key)
+        pinyin_exact, pinyin_prefix = self._prefix_rows(self._pinyins, key)
+        return [(abbr_exact, MATCH_ABBR), (pinyin_exact, MATCH_PINYIN),
+                (abbr_prefix, MATCH_ABBR), (pinyin_prefix, MATCH_PINYIN)]
+
+    def search(self, query: str, limit: int = 20, fund_type: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        搜索基金
+
+        Args:
+            query: 基金代码前缀、拼音首字母 / 全拼前缀（不区分大小写）或名称中的连续汉字
+            limit: 最多返回条数
+            fund_type: 只保留基金类型（jjlx）包含该文本的基金，如 "债券"、"指数"
+
+        Returns:
+            (结果列表（每条附带 match 字段）, 匹配总数)；按匹配程度（完全相同、前缀、全拼前缀、子串）、
+            名称长度、基金代码排序
+        """
+        query = re.sub(r'\s+', '', query or '')
+        if not query:
+            return [], 0
+
+        funds = self.funds
+        order = self._order
+        seen = set()
+        best: List[Tuple[int, str]] = []
+        total = 0
+        for rows, match in self._tiers(query):
+            if seen:
+                rows = [row for row in rows if row not in seen]
+            if fund_type:
+                rows = [row for row in rows if fund_type in str(funds[row].get('jjlx', ''))]
+            if not rows:
+                continue
+            seen.update(rows)
+            total += len(rows)
+            need = limit - len(best)
+            if need > 0:
+                best.extend((row, match) for row in heapq.nsmallest(need, rows, key=order.__getitem__))
+        return [dict(funds[row], match=match) for row, match in best], total
@@ -0,0 +1,218 @@
+"""
+断点续传日志
+与输出 CSV 放在一起（<输出文件>.journal），只追加写入，每行一条记录（制表符分隔）：
+
+  R  {"started": ..., ...}     一次运行的元数据（JSON）
+  D  000001  12345             基金已写入输出文件，之后输出文件的字节长度为 12345
+  F  000002  timeout           基金获取失败及错误类型
+
+续传时只需重放日志（不再解析整个 CSV）；输出文件按最后一条 D 记录的长度截断，
+写入过程中崩溃留下的半行或未记入日志的行都会被丢弃，不会产生重复记录
+"""
+import csv
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class CrawlJournal:
+    """只追加的抓取日志"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 日志文件路径
+        """
+        self.path = Path(path)
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}       # 基金代码 -> 最近一次的错误类型（成功后移除）
+        self.attempts: Dict[str, int] = {}
+        self.runs: List[Dict[str, Any]] = []
+        self.output_size: Optional[int] = None  # 最后一条 D 记录时输出文件的字节长度
+        self.output_path: Optional[str] = None
+        self.legacy_symbols: Optional[Set[str]] = None  # 没有日志的旧输出文件中已有的基金
+        self.dropped_bytes = 0
+        self._file = None
+        self._lock = threading.Lock()   # 缓冲输出的写线程也会记录完成
+
+    @classmethod
+    def for_output(cls, output_path) -> 'CrawlJournal':
+        """
+        打开输出文件对应的日志（<输出文件>.journal）
+
+        输出文件不存在时丢弃旧日志；有日志时重放并截掉输出文件末尾未记入日志的内容；
+        输出文件是没有日志的旧文件时扫描一次其中的基金代码，在 start_run 时写入日志
+        """
+        journal = cls(f"{output_path}.journal")
+        journal.output_path = str(output_path)
+        if not os.path.exists(output_path):
+            journal.reset()
+        elif journal.exists():
+            journal.load()
+            journal.dropped_bytes = journal.restore_output(output_path)
+        else:
+            journal.legacy_symbols = _scan_output_symbols(output_path)
+        return journal
+
+    @property
+    def processed(self) -> Set[str]:
+        """已写入输出文件的基金"""
+        return self.done | (self.legacy_symbols or set())
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> 'CrawlJournal':
+        """重放日志；末尾不完整的一行（写入时崩溃）会被截掉"""
+        try:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return self
+
+        complete = content.rfind(b'\n') + 1
+        if complete < len(content):
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+
+        for line in content[:complete].decode('utf-8').splitlines():
+            kind, _, rest = line.partition('\t')
+            if kind == 'D':
+                symbol, _, size = rest.partition('\t')
+                self.done.add(symbol)
+                self.failed.pop(symbol, None)
+                self.attempts[symbol] = self.attempts.get(symbol, 0) + 1
+                if size:
+                    self.output_size = int(size)
+            elif kind == 'F':
+                symbol, _, error_type = rest.partition('\t')
+                self.failed[symbol] = error_type
+                self.attempts[symbol] = self.attempts.get(symbol, 0) + 1
+            elif kind == 'R':
+                self.runs.append(json.loads(rest))
+        return self
+
+    def reset(self) -> None:
+        """丢弃旧日志（开始新的抓取）"""
+        self.close()
+        if self.path.exists():
+            os.remove(self.path)
+        self.done.clear()
+        self.failed.clear()
+        self.attempts.clear()
+        self.runs.clear()
+        self.output_size = None
+
+    def start_run(self, **meta) -> None:
+        """打开日志并记录本次运行的元数据"""
+        self._file = open(self.path, 'a', encoding='utf-8')
+        meta = {'started': datetime.now().isoformat(timespec='seconds'), **meta}
+        self.runs.append(meta)
+        self._append(f"R\t{json.dumps(meta, ensure_ascii=False)}")
+        if self.legacy_symbols:
+            self.seed(self.legacy_symbols, os.path.getsize(self.output_path))
+        self.legacy_symbols = None
+
+    def seed(self, symbols: Iterable[str], output_size: int) -> None:
+        """把没有日志的旧输出文件中已有的基金记为完成（只在第一次使用日志时扫描一次 CSV）"""
+        for symbol in symbols:
+            if symbol not in self.done:
+                self.done.add(symbol)
+                self._append(f"D\t{symbol}\t{output_size}")
+        self.output_size = output_size
+
+    def record_done(self, symbol: str, output_size: Optional[int] = None) -> None:
+        """
+        记录基金已写入输出文件
+
+        Args:
+            output_size: 写入并刷新后输出文件的字节长度
+        """
+        with self._lock:
+            self.done.add(symbol)
+            self.failed.pop(symbol, None)
+            self.attempts[symbol] = self.attempts.get(symbol, 0) + 1
+            if output_size is not None:
+                self.output_size = output_size
+            self._append(f"D\t{symbol}\t{'' if output_size is None else output_size}")
+
+    def record_done_many(self, symbols: List[str], output_size: int) -> None:
+        """记录一批基金已写入输出文件（缓冲输出写出一批后调用，一次写入日志）"""
+        with self._lock:
+            for symbol in symbols:
+                self.done.add(symbol)
+                self.failed.pop(symbol, None)
+                self.attempts[symbol] = self.attempts.get(symbol, 0) + 1
+            self.output_size = output_size
+            self._append(''.join(f"D\t{symbol}\t{output_size}\n" for symbol in symbols), newline=False)
+
+    def record_failed(self, symbol: str, error_type: str) -> None:
+        """记录一次失败"""
+        with self._lock:
+            self.failed[symbol] = error_type
+            self.attempts[symbol] = self.attempts.get(symbol, 0) + 1
+            self._append(f"F\t{symbol}\t{error_type}")
+
+    def restore_output(self, output_path) -> int:
+        """
+        把输出文件截断到最后一条 D 记录时的长度，丢弃崩溃时写了一半或未记入日志的行
+
+        Returns:
+            丢弃的字节数
+        """
+        if self.output_size is None:
+            return 0
+        try:
+            size = os.path.getsize(output_path)
+        except OSError:
+            return 0
+        if size <= self.output_size:
+            return 0
+        with open(output_path, 'r+b') as f:
+            f.truncate(self.output_size)
+        return size - self.output_size
+
+    def failed_symbols(self) -> List[str]:
+        """最近一次仍失败的基金（按首次失败顺序）"""
+        return list(self.failed)
+
+    def _append(self, line: str, newline: bool = True) -> None:
+        self._file.write(line + '\n' if newline else line)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'CrawlJournal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def _scan_output_symbols(output_path) -> Set[str]:
+    """读取旧输出文件中的基金代码（CSV 兼容中文和英文标题；也支持 .jsonl / .jsonl.gz）"""
+    symbols = set()
+    name = str(output_path).lower()
+    try:
+        if name.endswith('.jsonl') or name.endswith('.jsonl.gz'):
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(output_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        symbols.add(json.loads(line)['symbol'])
+            return symbols
+        with open(output_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                symbol = row.get('symbol') or row.get('基金代码')
+                if symbol:
+                    symbols.add(symbol)
+    except (OSError, EOFError, ValueError, KeyError, csv.Error) as e:
+        print(f"⚠️ 读取已有文件失败: {e}")
+    return symbols
@@ -0,0 +1,446 @@
+"""
+列式净值历史存储（内存映射）
+
+所有基金的净值按列存放在定长数组文件中，读取时通过 mmap 映射，不需要整体加载：
+    date.i32       日期（date.toordinal()）
+    nav.f32        单位净值（缺失为 NaN）
+    total_nav.f32  累计净值
+    rate.f32       日增长率（%）
+    sid.i32        基金编号（symbols 列表中的下标）
+
+index.json 记录基金代码 → 数据区段 [(起始行, 行数), ...]（每个区段内按日期升序）、已提交的行数和文件代号；
+追加时只在各列文件末尾写入新行并更新 index.json，不重写已有数据。
+compact() 把每只基金的区段合并为连续一段，并重建日期索引：
+    date_keys.i32    出现过的日期（升序）
+    date_starts.i32  每个日期在 date_order 中的起始位置（长度为日期数 + 1）
+    date_order.i32   按日期排序的行号（同一日期内按基金代码排列）
+日期索引只覆盖压缩时已有的行，之后追加的行查询时顺序扫描。
+
+压缩结果写入新一代文件（如 date.3.i32，代号 0 为不带代号的文件名），全部写完后
+以一次 index.json 原子替换切换到新一代，再删除旧文件；中途中断时 index.json 仍指向完整的旧一代，
+下次打开时清理未提交的新文件。
+
+数组按本机字节序存储（x86 / ARM 均为小端）。
+"""
+import bisect
+import json
+import math
+import mmap
+import os
+from array import array
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .files import atomic_write, default_cache_dir
+from .nav_store import NavRow
+
+
+# 列名 -> array 类型码
+COLUMNS = (('date', 'i'), ('nav', 'f'), ('total_nav', 'f'), ('rate', 'f'), ('sid', 'i'))
+COLUMN_TYPES = dict(COLUMNS)
+DATE_INDEX_FILES = ('date_keys', 'date_starts', 'date_order')
+ITEM_SIZE = 4
+
+
+def _day(text: str) -> int:
+    return date.fromisoformat(text).toordinal()
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class _MappedColumn:
+    """一个 int32 / float32 列文件的只读内存映射"""
+
+    def __init__(self, path: Path, typecode: str, rows: int):
+        self.rows = rows
+        self._file = None
+        self._mmap = None
+        self._raw = None
+        self.view: Sequence = array(typecode)
+        if rows:
+            self._file = open(path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), rows * ITEM_SIZE, access=mmap.ACCESS_READ)
+            self._raw = memoryview(self._mmap)
+            self.view = self._raw.cast(typecode)
+
+    def raw(self, start: int, count: int) -> memoryview:
+        """第 start 行起 count 行的原始字节"""
+        return self._raw[start * ITEM_SIZE:(start + count) * ITEM_SIZE]
+
+    def close(self) -> None:
+        if self._raw is not None:
+            self.view.release()
+            self._raw.release()
+            self._mmap.close()
+            self._file.close()
+            self._raw = None
+
+
+class ColumnarNavStore:
+    """列式、内存映射的净值历史存储"""
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, root: Optional[Path] = None, auto_compact_extents: int = 32):
+        """
+        Args:
+            root: 存储目录（None 时为缓存目录下的 nav_columns/）
+            auto_compact_extents: 平均每只基金的区段数超过该值时，flush 后自动压缩
+        """
+        self.root = Path(root) if root else default_cache_dir() / 'nav_columns'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.auto_compact_extents = auto_compact_extents
+
+        self._symbols: List[str] = []
+        self._sid: Dict[str, int] = {}
+        self._extents: Dict[str, List[List[int]]] = {}
+        self._rows = 0
+        self._indexed_rows = 0
+        self._generation = 0
+        self._pending: Dict[str, List[NavRow]] = {}
+        self._columns: Dict[str, _MappedColumn] = {}
+        self._date_index: Dict[str, _MappedColumn] = {}
+        self._load_index()
+
+    # ---------- 元数据 ----------
+
+    def _file_path(self, name: str, suffix: str, generation: Optional[int] = None) -> Path:
+        generation = self._generation if generation is None else generation
+        return self.root / (f"{name}.{generation}.{suffix}" if generation else f"{name}.{suffix}")
+
+    def _column_path(self, name: str, generation: Optional[int] = None) -> Path:
+        return self._file_path(name, 'f32' if COLUMN_TYPES[name] == 'f' else 'i32', generation)
+
+    def _generation_files(self, generation: int) -> List[Path]:
+        """某一代的全部数据文件（各列和日期索引）"""
+        return ([self._column_path(name, generation) for name, _ in COLUMNS]
+                + [self._file_path(name, 'i32', generation) for name in DATE_INDEX_FILES])
+
+    def _remove_stale_files(self) -> None:
+        """删除不属于当前一代的数据文件（压缩中断或切换后未删完的文件）"""
+        current = {path.name for path in self._generation_files(self._generation)}
+        for path in self.root.iterdir():
+            if path.suffix in ('.i32', '.f32', '.tmp') and path.name not in current:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _load_index(self) -> None:
+        try:
+            meta = json.loads((self.root / self.INDEX_FILE).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            meta = {}
+        self._symbols = meta.get('symbols', [])
+        self._sid = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._extents = meta.get('extents', {})
+        self._rows = meta.get('rows', 0)
+        self._indexed_rows = meta.get('indexed_rows', 0)
+        self._generation = meta.get('generation', 0)
+        self._remove_stale_files()
+
+        # 上次追加中断时列文件可能比 index.json 记录的长，截掉未提交的部分
+        for name, _ in COLUMNS:
+            path = self._column_path(name)
+            if path.exists() and path.stat().st_size > self._rows * ITEM_SIZE:
+                os.truncate(path, self._rows * ITEM_SIZE)
+
+    def _write_index(self) -> None:
+        meta = {
+            'symbols': self._symbols,
+            'extents': self._extents,
+            'rows': self._rows,
+            'indexed_rows': self._indexed_rows,
+            'generation': self._generation,
+        }
+        atomic_write(self.root / self.INDEX_FILE, json.dumps(meta, separators=(',', ':')).encode('utf-8'))
+
+    def _unmap(self) -> None:
+        for column in self._columns.values():
+            column.close()
+        self._columns.clear()
+        for column in self._date_index.values():
+            column.close()
+        self._date_index.clear()
+
+    def _col(self, name: str) -> Sequence:
+        """列的内存映射视图（行数变化后重新映射）"""
+        column = self._columns.get(name)
+        if column is None or column.rows != self._rows:
+            if column is not None:
+                column.close()
+            column = self._columns[name] = _MappedColumn(self._column_path(name), COLUMN_TYPES[name], self._rows)
+        return column.view
+
+    def _date_col(self, name: str) -> Sequence:
+        column = self._date_index.get(name)
+        if column is None:
+            path = self._file_path(name, 'i32')
+            rows = path.stat().st_size // ITEM_SIZE if path.exists() else 0
+            column = self._date_index[name] = _MappedColumn(path, 'i', rows)
+        return column.view
+
+    def _rows_at(self, positions) -> List[NavRow]:
+        dates, navs, total_navs, rates = (self._col(name) for name in ('date', 'nav', 'total_nav', 'rate'))
+        return [
+            NavRow(
+                date.fromordinal(dates[pos]).isoformat(),
+                _nan_to_none(navs[pos]),
+                _nan_to_none(total_navs[pos]),
+                _nan_to_none(rates[pos]),
+            )
+            for pos in positions
+        ]
+
+    # ---------- 与 CsvNavStore 相同的接口 ----------
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """已存储（含未 flush）的最新日期；没有数据时返回 None"""
+        pending = self._pending.get(symbol)
+        if pending:
+            return pending[-1].date
+        extents = self._extents.get(symbol)
+        if not extents:
+            return None
+        start, count = extents[-1]
+        return date.fromordinal(self._col('date')[start + count - 1]).isoformat()
+
+    def append(self, symbol: str, rows: Sequence[NavRow]) -> int:
+        """
+        追加比已存储最新日期更新的行（rows 需按日期升序），flush 后写入磁盘
+
+        Returns:
+            实际追加的行数
+        """
+        last = self.last_date(symbol)
+        new_rows = [row for row in rows if last is None or row.date > last]
+        if new_rows:
+            self._pending.setdefault(symbol, []).extend(new_rows)
+        return len(new_rows)
+
+    def read(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[NavRow]:
+        """读取日期范围内的净值（升序），只访问该基金所在的区段"""
+        rows: List[NavRow] = []
+        extents = self._extents.get(symbol)
+        if extents:
+            dates = self._col('date')
+            lo_day = _day(start_date) if start_date else None
+            hi_day = _day(end_date) if end_date else None
+            for start, count in extents:
+                lo = bisect.bisect_left(dates, lo_day, start, start + count) if lo_day is not None else start
+                hi = bisect.bisect_right(dates, hi_day, start, start + count) if hi_day is not None else start + count
+                rows.extend(self._rows_at(range(lo, hi)))
+
+        for row in self._pending.get(symbol, ()):
+            if (not start_date or row.date >= start_date) and (not end_date or row.date <= end_date):
+                rows.append(row)
+        return rows
+
+    def read_column(
+        self,
+        symbol: str,
+        name: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Tuple[array, array]:
+        """
+        读取日期范围内某一列的原始数组（批量分析用，直接复制列字节，不创建 NavRow）
+
+        Returns:
+            (日期 array('i')（date.toordinal()），该列的值 array('f')（缺失为 NaN）)，按日期升序
+        """
+        if name not in ('nav', 'total_nav', 'rate'):
+            raise ValueError(f"未知的净值列: {name}")
+        days, values = array('i'), array('f')
+        extents = self._extents.get(symbol)
+        lo_day = _day(start_date) if start_date else None
+        hi_day = _day(end_date) if end_date else None
+        if extents:
+            dates = self._col('date')
+            self._col(name)
+            date_column, value_column = self._columns['date'], self._columns[name]
+            for start, count in extents:
+                lo = bisect.bisect_left(dates, lo_day, start, start + count) if lo_day is not None else start
+                hi = bisect.bisect_right(dates, hi_day, start, start + count) if hi_day is not None else start + count
+                days.frombytes(date_column.raw(lo, hi - lo))
+                values.frombytes(value_column.raw(lo, hi - lo))
+
+        for row in self._pending.get(symbol, ()):
+            day = _day(row.date)
+            value = getattr(row, name)
+            if (lo_day is None or day >= lo_day) and (hi_day is None or day <= hi_day):
+                days.append(day)
+                values.append(math.nan if value is None else value)
+        return days, values
+
+    def symbols(self) -> List[str]:
+        """已有数据的基金代码"""
+        return sorted(set(self._extents) | set(self._pending))
+
+    def flush(self) -> None:
+        """把未写入的行追加到各列文件末尾并提交 index.json"""
+        if not self._pending:
+            return
+
+        buffers = {name: array(typecode) for name, typecode in COLUMNS}
+        position = self._rows
+        for symbol, rows in self._pending.items():
+            sid = self._sid.get(symbol)
+            if sid is None:
+                sid = self._sid[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+            buffers['date'].extend(_day(row.date) for row in rows)
+            buffers['nav'].extend(math.nan if row.nav is None else row.nav for row in rows)
+            buffers['total_nav'].extend(math.nan if row.total_nav is None else row.total_nav for row in rows)
+            buffers['rate'].extend(math.nan if row.rate is None else row.rate for row in rows)
+            buffers['sid'].extend([sid] * len(rows))
+
+            extents = self._extents.setdefault(symbol, [])
+            if extents and sum(extents[-1]) == position:
+                extents[-1][1] += len(rows)
+            else:
+                extents.append([position, len(rows)])
+            position += len(rows)
+
+        for name, _ in COLUMNS:
+            with open(self._column_path(name), 'ab') as f:
+                f.write(buffers[name].tobytes())
+        self._rows = position
+        self._write_index()
+        self._pending.clear()
+
+        if self._extents and sum(map(len, self._extents.values())) > self.auto_compact_extents * len(self._extents):
+            self.compact()
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': 'columnar',
+            'path': str(self.root),
+            'funds': len(self._extents),
+            'rows': self._rows,
+            'indexed_rows': self._indexed_rows,
+            'pending_rows': sum(map(len, self._pending.values())),
+            'extents': sum(map(len, self._extents.values())),
+        }
+
+    # ---------- 按日期查询 ----------
+
+    def read_date(self, day: str) -> Dict[str, NavRow]:
+        """某一日所有基金的净值 {基金代码: 净值}"""
+        target = _day(day)
+        positions: List[int] = []
+
+        if self._indexed_rows:
+            keys = self._date_col('date_keys')
+            i = bisect.bisect_left(keys, target)
+            if i < len(keys) and keys[i] == target:
+                starts = self._date_col('date_starts')
+                positions.extend(self._date_col('date_order')[starts[i]:starts[i + 1]])
+
+        # 日期索引之后追加的行
+        if self._rows > self._indexed_rows:
+            dates = self._col('date')
+            positions.extend(
+                pos for pos in range(self._indexed_rows, self._rows) if dates[pos] == target
+            )
+
+        sids = self._col('sid')
+        result = {self._symbols[sids[pos]]: row for pos, row in zip(positions, self._rows_at(positions))}
+        for symbol, rows in self._pending.items():
+            for row in rows:
+                if row.date == day:
+                    result[symbol] = row
+        return result
+
+    # ---------- 维护 ----------
+
+    def compact(self) -> None:
+        """
+        把每只基金的数据合并为连续一段，并重建日期索引
+
+        新的列文件和日期索引写入下一代文件名，写完并落盘后以一次 index.json 原子替换切换，
+        之后才删除旧一代文件，任何时刻中断都不会让 index.json 指向不一致的列
+        """
+        self.flush()
+        if not self._rows:
+            return
+        old_generation = self._generation
+        generation = old_generation + 1
+
+        # 1. 按基金重排各列（只复制原始字节，不解码）
+        order: List[Tuple[str, List[List[int]]]] = sorted(self._extents.items())
+        new_extents: Dict[str, List[List[int]]] = {}
+        position = 0
+        for symbol, extents in order:
+            count = sum(c for _, c in extents)
+            new_extents[symbol] = [[position, count]]
+            position += count
+
+        for name, _ in COLUMNS:
+            self._col(name)
+            column = self._columns[name]
+            with open(self._column_path(name, generation), 'wb') as f:
+                for _, extents in order:
+                    for start, count in extents:
+                        f.write(column.raw(start, count))
+                f.flush()
+                os.fsync(f.fileno())
+        self._unmap()
+
+        # 2. 日期索引：计数排序（交易日数量有限），重排后行号按基金代码递增，同一日期内自然按代码排列
+        date_column = _MappedColumn(self._column_path('date', generation), 'i', self._rows)
+        try:
+            dates = date_column.view
+            counts = Counter(dates)
+            keys = sorted(counts)
+            starts = array('i', [0])
+            slot: Dict[int, int] = {}
+            for key in keys:
+                slot[key] = starts[-1]
+                starts.append(starts[-1] + counts[key])
+            date_order = array('i', bytes(self._rows * ITEM_SIZE))
+            for pos, day in enumerate(dates):
+                date_order[slot[day]] = pos
+                slot[day] += 1
+        finally:
+            date_column.close()
+
+        for name, values in zip(DATE_INDEX_FILES, (array('i', keys), starts, date_order)):
+            with open(self._file_path(name, 'i32', generation), 'wb') as f:
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        # 3. 一次原子写入 index.json 切换到新一代，再删除旧一代文件
+        self._generation = generation
+        self._extents = new_extents
+        self._indexed_rows = self._rows
+        self._write_index()
+        for path in self._generation_files(old_generation):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def import_from(self, other, batch: int = 500) -> int:
+        """从其他净值存储（如 CsvNavStore）导入全部数据，返回导入的基金数"""
+        symbols = [symbol for symbol in other.symbols() if symbol not in self._extents]
+        for i, symbol in enumerate(symbols, 1):
+            self.append(symbol, other.read(symbol))
+            if i % batch == 0:
+                self.flush()
+        self.compact()
+        return len(symbols)
+
+    def close(self) -> None:
+        self.flush()
+        self._unmap()
@@ -0,0 +1,136 @@
+"""
+净值历史本地存储
+每只基金一个 CSV 文件，按日期升序只追加；最后一行即该基金已存储的最新日期
+"""
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .files import default_cache_dir
+
+
+class NavRow(NamedTuple):
+    """一个交易日的净值"""
+    date: str                   # YYYY-MM-DD
+    nav: Optional[float]        # 单位净值
+    total_nav: Optional[float]  # 累计净值
+    rate: Optional[float]       # 日增长率（%）
+
+
+def _parse_float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _format_float(value: Optional[float], digits: int) -> str:
+    return '' if value is None else f"{value:.{digits}f}"
+
+
+def nav_row_to_dict(row: NavRow) -> Dict[str, str]:
+    """转换为 scrape_nav_history 的输出格式（与页面文本一致的字符串）"""
+    return {
+        'date': row.date,
+        'nav': _format_float(row.nav, 4),
+        'total_nav': _format_float(row.total_nav, 4),
+        'rate': _format_float(row.rate, 2),
+    }
+
+
+class CsvNavStore:
+    """按基金分文件的净值历史存储"""
+
+    HEADER = 'date,nav,total_nav,rate\n'
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Args:
+            root: 存储目录（None 时为缓存目录下的 nav/）
+        """
+        self.root = Path(root) if root else default_cache_dir() / 'nav'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._last_dates: Dict[str, Optional[str]] = {}
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.csv"
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """已存储的最新日期；没有数据时返回 None"""
+        if symbol not in self._last_dates:
+            self._last_dates[symbol] = self._read_last_date(symbol)
+        return self._last_dates[symbol]
+
+    def _read_last_date(self, symbol: str) -> Optional[str]:
+        path = self._path(symbol)
+        try:
+            with open(path, 'rb') as f:
+                # 只读文件末尾，不加载整个文件
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 256))
+                lines = f.read().decode('utf-8').strip().splitlines()
+        except FileNotFoundError:
+            return None
+        if not lines or lines[-1].startswith('date'):
+            return None
+        return lines[-1].split(',', 1)[0]
+
+    def append(self, symbol: str, rows: Sequence[NavRow]) -> int:
+        """
+        追加比已存储最新日期更新的行（rows 需按日期升序）
+
+        Returns:
+            实际写入的行数
+        """
+        last = self.last_date(symbol)
+        new_rows = [row for row in rows if last is None or row.date > last]
+        if not new_rows:
+            return 0
+
+        path = self._path(symbol)
+        lines = [
+            f"{row.date},{_format_float(row.nav, 4)},{_format_float(row.total_nav, 4)},{_format_float(row.rate, 2)}\n"
+            for row in new_rows
+        ]
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            if f.tell() == 0:
+                f.write(self.HEADER)
+            f.writelines(lines)
+        self._last_dates[symbol] = new_rows[-1].date
+        return len(new_rows)
+
+    def read(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[NavRow]:
+        """读取日期范围内的净值（升序）"""
+        try:
+            with open(self._path(symbol), 'r', encoding='utf-8') as f:
+                next(f, None)
+                rows = []
+                for line in f:
+                    date, nav, total_nav, rate = line.rstrip('\n').split(',')
+                    if start_date and date < start_date:
+                        continue
+                    if end_date and date > end_date:
+                        break
+                    rows.append(NavRow(date, _parse_float(nav), _parse_float(total_nav), _parse_float(rate)))
+                return rows
+        except FileNotFoundError:
+            return []
+
+    def symbols(self) -> List[str]:
+        """已有数据的基金代码"""
+        return sorted(path.stem for path in self.root.glob('*.csv'))
+
+    def flush(self) -> None:
+        """每次追加后文件已关闭，无需额外刷新"""
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': 'csv',
+            'path': str(self.root),
+            'funds': len(self.symbols()),
+        }
@@ -0,0 +1,147 @@
+"""
+净值历史增量同步
+首次运行为每只基金回填完整历史，之后只请求本地最新日期之后的净值；
+每只基金当天检查过一次后不再重复请求，检查进度定期写入断点文件，中断后可继续
+"""
+import asyncio
+import json
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .files import atomic_write
+from utils.retry import ErrorKind, RetryPolicy, classify_error
+
+
+class NavSyncEngine:
+    """净值历史同步引擎"""
+
+    STATE_FILE = 'nav_sync_state.json'
+
+    def __init__(
+        self,
+        store,
+        client,
+        workers: int = 8,
+        retry_policy: Optional[RetryPolicy] = None,
+        checkpoint_every: int = 200
+    ):
+        """
+        Args:
+            store: 净值存储（需提供 last_date / append / flush）
+            client: 净值接口客户端（需提供 fetch_range）
+            workers: 并行同步的基金数
+            retry_policy: 单只基金同步失败时的重试策略
+            checkpoint_every: 每同步多少只基金写一次断点文件
+        """
+        self.store = store
+        self.client = client
+        self.workers = max(1, workers)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.state_path = Path(store.root) / self.STATE_FILE
+        self._checked: Dict[str, str] = self._load_state()
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            return json.loads(self.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self) -> None:
+        """写入断点：每只基金最后一次检查的日期"""
+        self.store.flush()
+        atomic_write(self.state_path, json.dumps(self._checked, separators=(',', ':')).encode('utf-8'))
+
+    def is_current(self, symbol: str, today: Optional[str] = None) -> bool:
+        """今天是否已经检查过"""
+        return self._checked.get(symbol) == (today or date.today().isoformat())
+
+    async def sync_fund(self, symbol: str, force: bool = False) -> Dict[str, Any]:
+        """
+        同步一只基金：只请求本地最新日期之后的净值
+
+        Returns:
+            {'success', 'symbol', 'new_rows', 'last_date'}，失败时带 error / error_type
+        """
+        today = date.today().isoformat()
+        if not force and self.is_current(symbol, today):
+            return {'success': True, 'symbol': symbol, 'new_rows': 0, 'last_date': self.store.last_date(symbol)}
+
+        last = self.store.last_date(symbol)
+        start = (date.fromisoformat(last) + timedelta(days=1)).isoformat() if last else ''
+        try:
+            new_rows = 0
+            if not start or start <= today:
+                rows = await self.client.fetch_range(symbol, start_date=start, end_date=today)
+                new_rows = self.store.append(symbol, rows)
+        except Exception as e:
+            return {
+                'success': False,
+                'symbol': symbol,
+                'error': f"同步净值失败: {e}",
+                'error_type': classify_error(e),
+            }
+
+        self._checked[symbol] = today
+        return {'success': True, 'symbol': symbol, 'new_rows': new_rows, 'last_date': self.store.last_date(symbol)}
+
+    async def sync_all(
+        self,
+        symbols: Iterable[str],
+        force: bool = False,
+        on_done: Optional[Callable[[int, str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        并行同步多只基金
+
+        Args:
+            symbols: 基金代码
+            force: 忽略“今天已检查”标记
+            on_done: 每只基金完成时的回调 (序号, 基金代码, 结果)
+
+        Returns:
+            汇总统计
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        todo = 0
+        skipped = 0
+        today = date.today().isoformat()
+        for symbol in symbols:
+            if not force and self.is_current(symbol, today):
+                skipped += 1
+                continue
+            queue.put_nowait(symbol)
+            todo += 1
+
+        summary = {'synced': 0, 'skipped': skipped, 'new_rows': 0, 'failed': {}, 'failed_by_type': {}}
+        done = 0
+
+        async def worker() -> None:
+            nonlocal done
+            while True:
+                try:
+                    symbol = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self.retry_policy.run(lambda: self.sync_fund(symbol, force=force))
+                if result['success']:
+                    summary['synced'] += 1
+                    summary['new_rows'] += result['new_rows']
+                else:
+                    kind = result.get('error_type', ErrorKind.UNKNOWN)
+                    summary['failed'][symbol] = kind
+                    summary['failed_by_type'][kind] = summary['failed_by_type'].get(kind, 0) + 1
+                if on_done:
+                    on_done(done, symbol, result)
+                done += 1
+                if done % self.checkpoint_every == 0:
+                    self.save_state()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, todo) or 1)))
+        finally:
+            self.save_state()
+
+        summary['failed_count'] = len(summary['failed'])
+        return summary
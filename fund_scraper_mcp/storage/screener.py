@@ -0,0 +1,270 @@
+"""
+基金筛选与排序（本地查询引擎）
+在最近一次排行榜全量数据（净值、各区间收益）和本地基金属性（类型、基金经理、基金公司、规模、申购状态）之上
+按条件筛选、多键排序并取前 k 条，不需要渲染排行榜页面。
+
+构建时把每个字段拆成列数组，并预先计算：
+- 可排序列按值排好序的行号：范围条件二分得到连续的一段；排序时按主键的预排序顺序扫描，取够 k 条即停止
+- 文本列的取值 → 行号倒排表：类型、基金经理等子串条件只需在不同取值上匹配
+2 万多只基金的典型筛选在几毫秒内完成
+"""
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 数值列（收益类为百分数，scale 为规模（亿元））
+NUMERIC_COLUMNS = (
+    'per_nav', 'total_nav', 'nav_rate', 'week_rate', 'month_rate', 'quarter_rate', 'half_year_rate',
+    'year_rate', 'two_year_rate', 'three_year_rate', 'ytd_rate', 'since_inception_rate', 'scale',
+)
+
+# 可做范围条件和排序的文本列（按字符串比较）
+ORDERED_TEXT_COLUMNS = ('symbol', 'nav_date', 'establishment_date')
+
+# 子串条件的文本列：筛选参数名 -> 字段
+TEXT_FILTERS = {
+    'fund_type': 'jjlx',
+    'manager': 'fund_manager',
+    'company': 'fund_company',
+    'subscription': 'sg_states',
+    'name': 'sname',
+}
+
+SORTABLE_COLUMNS = NUMERIC_COLUMNS + ORDERED_TEXT_COLUMNS
+
+_SCALE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(亿|万)?')
+
+
+def parse_scale(text: Any) -> Optional[float]:
+    """规模文本转为亿元（如 "29.37亿元"、"5000.00万元"）；无法识别时为 None"""
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _SCALE_RE.search(str(text or ''))
+    if not match:
+        return None
+    value = float(match.group(1))
+    return value / 10000 if match.group(2) == '万' else value
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_sources(
+    listing: Iterable[Dict[str, Any]],
+    records: Dict[str, Dict[str, Any]],
+    attributes: Callable[[str], Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    合并筛选用的数据：净值和区间收益取自排行榜；类型、基金经理、基金公司、规模、申购状态优先取属性缓存，
+    其次取基金信息快照（12 字段记录）
+
+    Args:
+        listing: 排行榜记录（LISTING_FIELDS）
+        records: 基金信息快照 {基金代码: 12 字段记录}（排行榜中没有的基金也会加入，只有快照中的字段）
+        attributes: 基金代码 -> 已缓存的属性（FundAttributeCache.peek）
+    """
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for row in listing:
+        seen.add(row['symbol'])
+        merged.append(_merge_one(dict(row), records.get(row['symbol']) or {}, attributes(row['symbol'])))
+    for symbol, record in records.items():
+        if symbol not in seen:
+            base = {field: record.get(field) for field in ('symbol', 'sname', 'nav_date', 'per_nav', 'total_nav', 'nav_rate')}
+            merged.append(_merge_one(base, record, attributes(symbol)))
+    return merged
+
+
+def _merge_one(row: Dict[str, Any], record: Dict[str, Any], cached: Dict[str, Any]) -> Dict[str, Any]:
+    row['jjlx'] = cached.get('jjlx') or record.get('jjlx') or ''
+    row['fund_manager'] = cached.get('fund_manager') or record.get('fund_manager') or ''
+    row['fund_company'] = cached.get('fund_company') or ''
+    row['sg_states'] = cached.get('sg_states') or record.get('sg_states') or ''
+    row['scale'] = parse_scale(cached.get('fund_scale') or record.get('jjzfe'))
+    if not row.get('establishment_date'):
+        row['establishment_date'] = cached.get('establishment_date') or ''
+    return row
+
+
+class FundScreener:
+    """基金列表的只读筛选索引"""
+
+    def __init__(self, funds: Sequence[Dict[str, Any]]):
+        """
+        Args:
+            funds: merge_sources 的结果
+        """
+        self.funds = list(funds)
+        count = len(self.funds)
+
+        self._values: Dict[str, List[Any]] = {}
+        for column in NUMERIC_COLUMNS:
+            self._values[column] = [_to_float(fund.get(column)) for fund in self.funds]
+        for column in ORDERED_TEXT_COLUMNS:
+            self._values[column] = [str(fund.get(column) or '') or None for fund in self.funds]
+
+        # 升序排列的行号（不含缺失值）及对应的值，供二分和按序扫描
+        self._orders: Dict[str, List[int]] = {}
+        self._sorted: Dict[str, List[Any]] = {}
+        for column in SORTABLE_COLUMNS:
+            values = self._values[column]
+            order = sorted((row for row in range(count) if values[row] is not None), key=values.__getitem__)
+            self._orders[column] = order
+            self._sorted[column] = [values[row] for row in order]
+
+        # 文本列的取值 -> 行号
+        self._postings: Dict[str, Dict[str, List[int]]] = {}
+        for column in TEXT_FILTERS.values():
+            postings: Dict[str, List[int]] = {}
+            for row, fund in enumerate(self.funds):
+                postings.setdefault(str(fund.get(column) or ''), []).append(row)
+            self._postings[column] = postings
+
+    def __len__(self) -> int:
+        return len(self.funds)
+
+    # ---------- 条件 ----------
+
+    def _range_rows(self, column: str, low: Any = None, high: Any = None) -> List[int]:
+        """low <= 值 <= high 的行号（缺失值不匹配）"""
+        values = self._sorted[column]
+        start = bisect_left(values, low) if low is not None else 0
+        end = bisect_right(values, high) if high is not None else len(values)
+        return self._orders[column][start:end]
+
+    def _text_rows(self, column: str, texts: Sequence[str]) -> List[int]:
+        """字段包含任一文本的行号"""
+        rows: List[int] = []
+        for value, postings in self._postings[column].items():
+            if any(text in value for text in texts):
+                rows.extend(postings)
+        return rows
+
+    def _candidates(self, filters: Dict[str, Any]) -> Optional[set]:
+        """满足所有条件的行号集合（没有条件时为 None，表示全部）"""
+        groups: List[List[int]] = []
+        for name, value in filters.items():
+            if value is None or value == '' or value == []:
+                continue
+            if name in TEXT_FILTERS:
+                texts = [value] if isinstance(value, str) else [str(text) for text in value]
+                groups.append(self._text_rows(TEXT_FILTERS[name], texts))
+            elif name == 'min_scale':
+                groups.append(self._range_rows('scale', low=float(value)))
+            elif name == 'max_scale':
+                groups.append(self._range_rows('scale', high=float(value)))
+            elif name == 'ranges':
+                for column, bounds in value.items():
+                    if column not in SORTABLE_COLUMNS:
+                        raise ValueError(f"不支持范围条件的字段: {column}，可选: {', '.join(SORTABLE_COLUMNS)}")
+                    low, high = bounds.get('min'), bounds.get('max')
+                    if column in NUMERIC_COLUMNS:
+                        low = None if low is None else float(low)
+                        high = None if high is None else float(high)
+                    groups.append(self._range_rows(column, low, high))
+            else:
+                raise ValueError(f"未知的筛选条件: {name}")
+
+        if not groups:
+            return None
+        groups.sort(key=len)
+        matched = set(groups[0])
+        for rows in groups[1:]:
+            if not matched:
+                break
+            matched.intersection_update(rows)
+        return matched
+
+    # ---------- 排序 ----------
+
+    @staticmethod
+    def _parse_sort(sort_by: Sequence[str]) -> List[Tuple[str, bool]]:
+        """["-year_rate", "scale"] -> [(字段, 是否降序)]"""
+        keys = []
+        for key in sort_by:
+            descending = key.startswith('-')
+            column = key.lstrip('-+')
+            if column not in SORTABLE_COLUMNS:
+                raise ValueError(f"不支持排序的字段: {column}，可选: {', '.join(SORTABLE_COLUMNS)}")
+            keys.append((column, descending))
+        return keys
+
+    def _sort_rows(self, rows: List[int], keys: List[Tuple[str, bool]]) -> List[int]:
+        """按多个键排序（每个键缺失值都排在最后），从最次要的键开始做稳定排序"""
+        for column, descending in reversed(keys):
+            values = self._values[column]
+            present = [row for row in rows if values[row] is not None]
+            present.sort(key=values.__getitem__, reverse=descending)
+            rows = present + [row for row in rows if values[row] is None]
+        return rows
+
+    def _top_rows(self, matched: Optional[set], keys: List[Tuple[str, bool]], k: int) -> List[int]:
+        """满足条件的行中按 keys 排在前 k 的行"""
+        column, descending = keys[0]
+        values = self._values[column]
+        order = self._orders[column]
+
+        # 按主键的预排序顺序扫描；凑够 k 条后还要取完与第 k 条主键相同的行，再按全部键排序
+        picked: List[int] = []
+        boundary = None
+        for row in (reversed(order) if descending else order):
+            if matched is not None and row not in matched:
+                continue
+            if len(picked) >= k:
+                if values[row] != boundary:
+                    break
+            elif len(picked) == k - 1:
+                boundary = values[row]
+            picked.append(row)
+
+        if len(picked) < k:
+            # 主键缺失的行排在最后
+            candidates = matched if matched is not None else range(len(self.funds))
+            picked.extend(row for row in candidates if values[row] is None)
+        # 所有键都相同的行按原顺序排列（与直接排序的结果一致）
+        picked.sort()
+        return self._sort_rows(picked, keys)[:k]
+
+    def screen(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort_by: Sequence[str] = (),
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        筛选基金
+
+        Args:
+            filters: 条件（同时满足）：
+                fund_type / manager / company / subscription / name: 字段包含该文本（可以是文本列表，包含任一即可）
+                min_scale / max_scale: 规模范围（亿元）
+                ranges: {字段: {"min": 下限, "max": 上限}}，字段见 SORTABLE_COLUMNS，如 {"year_rate": {"min": 10}}
+            sort_by: 排序字段，"-" 前缀表示降序，如 ["-year_rate", "scale"]；缺失值排在最后；不指定时保持排行榜顺序
+            limit: 返回条数
+            offset: 跳过前多少条
+
+        Returns:
+            (结果列表, 满足条件的总数)
+        """
+        matched = self._candidates(filters or {})
+        total = len(self.funds) if matched is None else len(matched)
+        keys = self._parse_sort(sort_by)
+        k = offset + max(0, limit)
+
+        if not k or not total:
+            rows: List[int] = []
+        elif not keys:
+            rows = list(range(min(k, total))) if matched is None else sorted(matched)[:k]
+        elif matched is not None and len(matched) <= 4 * k:
+            rows = self._sort_rows(sorted(matched), keys)[:k]
+        else:
+            rows = self._top_rows(matched, keys, k)
+        return [self.funds[row] for row in rows[offset:k]], total
@@ -0,0 +1,445 @@
+"""
+缓冲输出
+记录放入队列后立即返回，由独立的写线程批量写入文件，按行数或时间间隔刷新，可选按间隔 fsync；
+事件循环不再为每条记录做一次 writerow + flush 系统调用
+
+持久化约定：on_flush 回调只在记录真正写出之后调用（设置 fsync_interval 时在 fsync 之后），
+断点日志在回调里记录完成，因此“日志中记为完成”总是意味着记录已在输出文件中
+
+输出格式（SINK_FORMATS）：
+  csv        utf-8-sig + 中文标题，所有值按原样输出（与旧版输出一致）
+  jsonl      每行一个 JSON 对象，净值、增长率为数值，日期为 YYYY-MM-DD
+  jsonl.gz   同上，每批记录压缩为一个独立的 gzip 成员（可追加、可按批截断）
+  jsonl.zst  同上，每批一个 zstd 帧（需要 zstandard）
+  parquet    每批一个行组，净值、增长率为 float64，日期为 date32（需要 pyarrow，不支持追加）
+"""
+import csv
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+# 与 fetch_funds.py / GUI 输出一致的 12 个字段及中文标题
+FUND_FIELDNAMES = [
+    'symbol', 'sname', 'per_nav', 'total_nav', 'yesterday_nav',
+    'nav_rate', 'nav_a', 'sg_states', 'nav_date', 'fund_manager',
+    'jjlx', 'jjzfe'
+]
+FUND_HEADERS = [
+    '基金代码', '基金名称', '单位净值', '累计净值', '前一日净值',
+    '增长率', '涨跌额', '申购状态', '净值日期', '基金经理',
+    '基金类型', '基金zfe'
+]
+
+# 类型化输出（jsonl / parquet）的列类型
+FUND_COLUMN_TYPES = {
+    'symbol': 'str',
+    'sname': 'str',
+    'per_nav': 'float',
+    'total_nav': 'float',
+    'yesterday_nav': 'float',
+    'nav_rate': 'float',
+    'nav_a': 'float',
+    'sg_states': 'str',
+    'nav_date': 'date',
+    'fund_manager': 'str',
+    'jjlx': 'str',
+    'jjzfe': 'str',
+}
+
+_STOP = object()
+
+
+def _to_float(value) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+def _to_date(value) -> Optional[date]:
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+_CONVERTERS = {
+    'str': lambda value: '' if value is None else str(value),
+    'float': _to_float,
+    'date': _to_date,
+}
+
+
+def typed_record(record: Dict[str, Any], column_types: Dict[str, str] = FUND_COLUMN_TYPES) -> Dict[str, Any]:
+    """按列类型转换一条记录（无法转换的数值、日期为 None），只保留 column_types 中的列"""
+    return {column: _CONVERTERS[kind](record.get(column)) for column, kind in column_types.items()}
+
+
+class BufferedSink(ABC):
+    """
+    写线程 + 队列的缓冲输出（基类）
+
+    子类实现 _open（打开文件、必要时写表头）和 _write_rows（写一批记录）
+    """
+
+    # 能否追加到已有文件（断点续传需要）
+    appendable = True
+
+    def __init__(
+        self,
+        path,
+        flush_rows: int = 500,
+        flush_interval: float = 1.0,
+        fsync_interval: Optional[float] = None,
+        on_flush: Optional[Callable[[List[Any], int], None]] = None,
+        max_queue: int = 10000
+    ):
+        """
+        Args:
+            path: 输出文件
+            flush_rows: 缓冲多少条记录刷新一次
+            flush_interval: 最长多少秒刷新一次
+            fsync_interval: 每隔多少秒 fsync 一次（None 表示只刷新到操作系统，不 fsync）
+            on_flush: 记录写出后的回调 (这批记录的 key 列表, 写出后的文件字节长度)，在写线程中调用
+            max_queue: 队列上限（写线程跟不上时 write 会阻塞，避免内存无限增长）
+        """
+        self.path = str(path)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.on_flush = on_flush
+        self.is_new_file = not os.path.exists(self.path)
+        self.count = 0          # 已提交的记录数（含尚未写出的）
+        self.size = 0           # 最近一次写出后的文件字节长度
+        self.flushes = 0
+        self.fsyncs = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._file = None
+
+    # ---- 子类实现 ----
+
+    @abstractmethod
+    def _open(self):
+        """打开文件（必要时写表头），返回文件对象"""
+        pass
+
+    @abstractmethod
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """写一批记录"""
+        pass
+
+    def _finish(self) -> None:
+        """关闭前写入文件尾（默认无）"""
+
+    # ---- 公共接口 ----
+
+    def open(self) -> 'BufferedSink':
+        self._file = self._open()
+        self.size = self._file.tell()
+        self._thread = threading.Thread(target=self._run, name=f"sink-{os.path.basename(self.path)}", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, record: Dict[str, Any], key: Any = None) -> None:
+        """
+        提交一条记录（不等待写出）
+
+        Args:
+            record: 记录
+            key: 写出后随 on_flush 回调返回（如基金代码），None 表示不需要回调
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((record, key))
+        self.count += 1
+
+    def close(self) -> None:
+        """
+        写出剩余记录（设置了 fsync_interval 时再 fsync 一次）并关闭文件
+
+        写线程出错时抛出该错误（只抛出一次，重复调用 close 不会再次抛出）
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __enter__(self) -> 'BufferedSink':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'records': self.count,
+            'bytes': self.size,
+            'flushes': self.flushes,
+            'fsyncs': self.fsyncs,
+            'queued': self._queue.qsize(),
+        }
+
+    # ---- 写线程 ----
+
+    def _run(self) -> None:
+        rows: List[Dict[str, Any]] = []
+        keys: List[Any] = []        # 已写入缓冲区、尚未回调的 key
+        last_flush = last_fsync = time.monotonic()
+        stopping = False
+        unsynced = False            # 刷新后尚未 fsync
+        try:
+            while not stopping:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    stopping = True
+                elif item is not None:
+                    record, key = item
+                    rows.append(record)
+                    if key is not None:
+                        keys.append(key)
+                    # 把队列里已有的记录一次取完
+                    while len(rows) < self.flush_rows:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _STOP:
+                            stopping = True
+                            break
+                        record, key = item
+                        rows.append(record)
+                        if key is not None:
+                            keys.append(key)
+
+                now = time.monotonic()
+                if not (stopping or len(rows) >= self.flush_rows or now - last_flush >= self.flush_interval):
+                    continue
+                last_flush = now
+                if rows or stopping:
+                    if rows:
+                        self._write_rows(rows)
+                        rows = []
+                    if stopping:
+                        self._finish()
+                    self._file.flush()
+                    self.size = self._file.tell()
+                    self.flushes += 1
+                    unsynced = True
+
+                if self.fsync_interval is not None:
+                    if not unsynced or not (stopping or now - last_fsync >= self.fsync_interval):
+                        continue
+                    os.fsync(self._file.fileno())
+                    self.fsyncs += 1
+                    last_fsync = now
+                unsynced = False
+                if keys and self.on_flush:
+                    self.on_flush(keys, self.size)
+                keys = []
+        except BaseException as e:
+            self._error = e
+            # 让阻塞在 put 上的生产者继续
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        finally:
+            self._file.close()
+
+
+class CsvSink(BufferedSink):
+    """CSV 输出（utf-8-sig，第一行为中文标题，追加已有文件时不重复写表头）"""
+
+    def __init__(
+        self,
+        path,
+        fieldnames: Sequence[str] = FUND_FIELDNAMES,
+        headers: Optional[Sequence[str]] = FUND_HEADERS,
+        **kwargs
+    ):
+        """
+        Args:
+            fieldnames: 记录中按顺序输出的字段
+            headers: 表头（None 时使用 fieldnames）
+            **kwargs: 见 BufferedSink
+        """
+        super().__init__(path, **kwargs)
+        self.fieldnames = list(fieldnames)
+        self.headers = list(headers) if headers else self.fieldnames
+        self._writer = None
+
+    def _open(self):
+        f = open(self.path, 'w' if self.is_new_file else 'a', newline='', encoding='utf-8-sig')
+        if self.is_new_file:
+            f.write(','.join(self.headers) + '\n')
+        self._writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+        return f
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+
+class JsonlSink(BufferedSink):
+    """
+    类型化 JSONL 输出，可选 gzip / zstd 压缩
+
+    压缩时每批记录压缩成一个完整的 gzip 成员或 zstd 帧后再写入，文件是若干完整成员的拼接：
+    追加写入、按断点日志记录的长度截断后都仍可正常解压
+    """
+
+    COMPRESSIONS = (None, 'gzip', 'zstd')
+
+    def __init__(
+        self,
+        path,
+        compression: Optional[str] = None,
+        column_types: Dict[str, str] = FUND_COLUMN_TYPES,
+        level: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Args:
+            compression: None / gzip / zstd
+            column_types: 列类型，见 FUND_COLUMN_TYPES
+            level: 压缩级别（默认 gzip 6、zstd 3）
+            **kwargs: 见 BufferedSink
+        """
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"未知的压缩方式: {compression}，可选: gzip, zstd")
+        super().__init__(path, **kwargs)
+        self.column_types = column_types
+        self.compression = compression
+        self._compress = None
+        if compression == 'gzip':
+            gzip_level = 6 if level is None else level
+            self._compress = lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0)
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("jsonl.zst 输出需要安装 zstandard：pip install zstandard") from e
+            self._compress = zstandard.ZstdCompressor(level=3 if level is None else level).compress
+
+    def _open(self):
+        return open(self.path, 'wb' if self.is_new_file else 'ab')
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        column_types = self.column_types
+        data = ''.join(
+            json.dumps(typed_record(row, column_types), ensure_ascii=False, default=date.isoformat) + '\n'
+            for row in rows
+        ).encode('utf-8')
+        self._file.write(self._compress(data) if self._compress else data)
+
+
+class ParquetSink(BufferedSink):
+    """
+    类型化 Parquet 输出（流式写入，每批记录一个行组）
+
+    Parquet 的文件尾在关闭时写入，因此不支持追加到已有文件；默认批次较大以免行组过碎
+    """
+
+    appendable = False
+
+    def __init__(
+        self,
+        path,
+        column_types: Dict[str, str] = FUND_COLUMN_TYPES,
+        compression: str = 'zstd',
+        flush_rows: int = 10000,
+        flush_interval: float = 60.0,
+        **kwargs
+    ):
+        """
+        Args:
+            column_types: 列类型，见 FUND_COLUMN_TYPES
+            compression: Parquet 列压缩方式（zstd / snappy / gzip / none）
+            flush_rows / flush_interval: 行组大小和最长间隔，见 BufferedSink
+            **kwargs: 见 BufferedSink
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("parquet 输出需要安装 pyarrow：pip install pyarrow") from e
+        super().__init__(path, flush_rows=flush_rows, flush_interval=flush_interval, **kwargs)
+        if not self.is_new_file:
+            raise ValueError(f"Parquet 输出不支持追加到已有文件: {self.path}")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        arrow_types = {'str': pyarrow.string(), 'float': pyarrow.float64(), 'date': pyarrow.date32()}
+        self.column_types = column_types
+        self.schema = pyarrow.schema([(column, arrow_types[kind]) for column, kind in column_types.items()])
+        self.compression = compression
+        self._writer = None
+
+    def _open(self):
+        f = open(self.path, 'wb')
+        self._writer = self._pq.ParquetWriter(f, self.schema, compression=self.compression)
+        return f
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        columns = {column: [] for column in self.column_types}
+        for row in rows:
+            for column, value in typed_record(row, self.column_types).items():
+                columns[column].append(value)
+        self._writer.write_table(self._pa.table(columns, schema=self.schema))
+
+    def _finish(self) -> None:
+        self._writer.close()
+
+
+# 输出格式 -> (扩展名, 构造函数)
+SINK_FORMATS: Dict[str, Any] = {
+    'csv': ('.csv', CsvSink),
+    'jsonl': ('.jsonl', JsonlSink),
+    'jsonl.gz': ('.jsonl.gz', lambda path, **kwargs: JsonlSink(path, compression='gzip', **kwargs)),
+    'jsonl.zst': ('.jsonl.zst', lambda path, **kwargs: JsonlSink(path, compression='zstd', **kwargs)),
+    'parquet': ('.parquet', ParquetSink),
+}
+
+
+def format_for_path(path) -> str:
+    """按文件扩展名判断输出格式（未知扩展名按 csv）"""
+    name = str(path).lower()
+    for fmt, (extension, _) in sorted(SINK_FORMATS.items(), key=lambda item: -len(item[1][0])):
+        if name.endswith(extension):
+            return fmt
+    return 'csv'
+
+
+def open_sink(path, fmt: Optional[str] = None, **kwargs) -> BufferedSink:
+    """
+    创建输出（未 open）
+
+    Args:
+        path: 输出文件
+        fmt: 输出格式，见 SINK_FORMATS（None 时按扩展名判断）
+        **kwargs: 见 BufferedSink
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in SINK_FORMATS:
+        raise ValueError(f"未知的输出格式: {fmt}，可选: {', '.join(SINK_FORMATS)}")
+    return SINK_FORMATS[fmt][1](path, **kwargs)
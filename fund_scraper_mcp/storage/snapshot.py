@@ -0,0 +1,166 @@
+"""
+基金信息快照与增量刷新计划
+保存上一次完整获取的 12 字段记录及每只基金详情页的获取日期；
+日常刷新时用排行榜批量数据比对净值，只为新基金和详情过期的基金安排详情页请求。
+另外保存最近一次排行榜全量数据（含各区间收益），供本地筛选使用
+"""
+import json
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .files import atomic_write, default_cache_dir
+
+
+# 排行榜数据中可以直接覆盖快照的净值字段
+NAV_FIELDS = ('per_nav', 'total_nav', 'yesterday_nav', 'nav_rate', 'nav_a', 'nav_date')
+
+
+def _nav_key(record: dict) -> Tuple[str, Optional[float]]:
+    """(净值日期, 单位净值)；详情页与排行榜的净值格式不同，按数值比较"""
+    try:
+        per_nav = float(record.get('per_nav'))
+    except (TypeError, ValueError):
+        per_nav = None
+    return record.get('nav_date', ''), per_nav
+
+
+class RefreshPlan(NamedTuple):
+    """增量刷新计划"""
+    records: Dict[str, dict]    # 无需请求详情即可得到的记录（快照 + 排行榜净值）
+    fetch: List[str]            # 需要请求详情页的基金
+    counts: Dict[str, int]      # new / stale / changed / unchanged 数量
+
+
+def plan_refresh(
+    universe: Iterable[str],
+    listing: Dict[str, dict],
+    previous: Dict[str, dict],
+    detail_dates: Dict[str, str],
+    today: Optional[date] = None,
+    max_age_days: int = 7
+) -> RefreshPlan:
+    """
+    比对排行榜批量数据与上次快照
+
+    - 新基金（快照中没有）：请求详情
+    - 详情页超过 max_age_days 天未获取（基金经理、类型、规模等）：请求详情
+    - 净值日期或单位净值有变化：用排行榜数据更新净值字段，其余字段沿用快照
+    - 其他：直接沿用快照
+
+    Args:
+        universe: 全部基金代码（决定输出范围和顺序）
+        listing: 排行榜数据 {基金代码: 12 字段记录}
+        previous: 上次快照 {基金代码: 12 字段记录}
+        detail_dates: {基金代码: 详情页获取日期 YYYY-MM-DD}
+        today: 当前日期（默认今天）
+        max_age_days: 详情页数据的最长沿用天数
+    """
+    today = today or date.today()
+    records: Dict[str, dict] = {}
+    fetch: List[str] = []
+    counts = {'new': 0, 'stale': 0, 'changed': 0, 'unchanged': 0}
+
+    for symbol in universe:
+        prev = previous.get(symbol)
+        row = listing.get(symbol)
+        if prev is None:
+            counts['new'] += 1
+            fetch.append(symbol)
+            if row is not None:
+                # 详情获取失败时至少保留排行榜数据
+                records[symbol] = dict(row)
+            continue
+
+        if row is not None and _nav_key(row) != _nav_key(prev):
+            counts['changed'] += 1
+            record = dict(prev)
+            record.update((field, row[field]) for field in NAV_FIELDS)
+        else:
+            counts['unchanged'] += 1
+            record = prev
+        records[symbol] = record
+
+        fetched = detail_dates.get(symbol)
+        if fetched is None or (today - date.fromisoformat(fetched)).days >= max_age_days:
+            counts['stale'] += 1
+            fetch.append(symbol)
+
+    return RefreshPlan(records, fetch, counts)
+
+
+class FundSnapshot:
+    """基金信息快照（JSON 文件）"""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 快照文件（None 时为缓存目录下的 funds_snapshot.json）
+        """
+        self.path = Path(path) if path else default_cache_dir() / 'funds_snapshot.json'
+
+    def load(self) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """读取快照，返回 (记录, 详情获取日期)；没有快照时均为空"""
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}, {}
+        records = {record['symbol']: record for record in payload.get('records', [])}
+        return records, payload.get('detail_dates', {})
+
+    def save(self, records: Iterable[dict], detail_dates: Dict[str, str]) -> None:
+        """整体替换快照"""
+        payload = {
+            'saved_at': date.today().isoformat(),
+            'records': list(records),
+            'detail_dates': detail_dates,
+        }
+        atomic_write(self.path, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    def merge(self, records: Iterable[dict], fetched_on: Optional[str] = None) -> None:
+        """
+        把新获取的详情记录并入快照（用于完整获取或部分获取之后）
+
+        Args:
+            records: 12 字段记录
+            fetched_on: 详情页获取日期（默认今天）
+        """
+        fetched_on = fetched_on or date.today().isoformat()
+        existing, detail_dates = self.load()
+        for record in records:
+            existing[record['symbol']] = record
+            detail_dates[record['symbol']] = fetched_on
+        self.save(existing.values(), detail_dates)
+
+
+class ListingSnapshot:
+    """最近一次排行榜全量数据（JSON 文件，字段名只保存一次：{saved_at, fields, rows}）"""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 文件（None 时为缓存目录下的 rank_listing.json）
+        """
+        self.path = Path(path) if path else default_cache_dir() / 'rank_listing.json'
+
+    def load(self) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        """读取排行榜数据，返回 (记录列表, 保存时间戳)；没有数据时为 ([], None)"""
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return [], None
+        fields = payload.get('fields', [])
+        return [dict(zip(fields, row)) for row in payload.get('rows', [])], payload.get('saved_at')
+
+    def saved_at(self) -> Optional[float]:
+        """保存时间戳（只看文件修改时间，不解析内容）"""
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    def save(self, fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+        """整体替换排行榜数据"""
+        payload = {'saved_at': time.time(), 'fields': list(fields), 'rows': [list(row) for row in rows]}
+        atomic_write(self.path, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
@@ -0,0 +1,217 @@
+"""
+命令行工具 - 同步基金净值历史到本地存储
+首次运行回填每只基金的完整历史，之后只获取本地最新日期之后的净值（可中断，重新运行即继续）
+用法：
+  python sync_nav.py --all                    # 同步所有基金
+  python sync_nav.py --max 100                # 同步前100个基金
+  python sync_nav.py --symbols 000001 110022  # 同步指定基金
+  python sync_nav.py --all --workers 16       # 16 个基金并行同步
+  python sync_nav.py --compact                # 整理本地存储（合并每只基金的数据段、重建日期索引）
+  python sync_nav.py --analyze                # 计算本地全部基金的收益、波动率、最大回撤、夏普比率（需要 numpy）
+  python sync_nav.py --analyze --output nav_metrics.csv --lookback 3y --rolling 20
+"""
+import asyncio
+import csv
+import sys
+import os
+import argparse
+import time
+
+# 设置 UTF-8 编码（Windows 控制台兼容）
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# 添加项目根目录到 path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analytics.nav_analytics import LOOKBACKS, NAV_FIELDS
+from browser_manager import BrowserManager
+from scrapers.eastmoney_scraper import EastmoneyScraper
+
+
+def compact_store():
+    """整理列式存储"""
+    scraper = EastmoneyScraper(BrowserManager())
+    store = scraper.nav_store
+    started = time.perf_counter()
+    store.compact()
+    print(f"✅ 整理完成（耗时 {time.perf_counter() - started:.1f} 秒）: {store.get_stats()}")
+
+
+async def analyze_nav(symbols=None, **options):
+    """批量计算净值指标（不需要浏览器；指定 symbols 时先增量同步这些基金）"""
+    scraper = EastmoneyScraper(BrowserManager())
+    try:
+        return await scraper.analyze_nav(symbols, **options)
+    finally:
+        await scraper.close()
+
+
+def write_metrics(records, filename):
+    """把指标写入 CSV（utf-8-sig，与其他输出一致）"""
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def print_metrics(result, sort_by, top):
+    """打印按 sort_by 降序排列的前 top 只基金"""
+    if result['data'] and sort_by not in result['data'][0]:
+        print(f"❌ 未知的排序字段: {sort_by}，可选: {', '.join(result['data'][0])}")
+        return
+    records = [r for r in result['data'] if r.get(sort_by) is not None]
+    records.sort(key=lambda r: r[sort_by], reverse=True)
+    columns = ('symbol', 'return_1m', 'return_1y', 'return_ytd', 'volatility', 'max_drawdown', 'sharpe', 'sortino')
+    print(f"\n按 {sort_by} 排序的前 {min(top, len(records))} 只基金（截止 {result['as_of']}，区间 {result['lookback']}，收益类为 %）:")
+    print("  ".join(f"{c:>12}" for c in columns))
+    for record in records[:top]:
+        print("  ".join(f"{'-' if record.get(c) is None else record[c]:>12}" for c in columns))
+
+
+async def sync_nav(symbols=None, max_funds=None, workers=8, force=False, delay=None):
+    """同步净值历史，返回汇总统计"""
+    # 基金代码列表走 HTTP + 磁盘缓存，不需要启动浏览器
+    scraper = EastmoneyScraper(BrowserManager())
+    try:
+        if not symbols:
+            print("[1/2] 正在获取基金代码列表...")
+            codes_result = await scraper.scrape_all_fund_codes()
+            if not codes_result['success']:
+                print(f"❌ 获取基金代码列表失败: {codes_result.get('error', '')}")
+                return None
+            symbols = [f['symbol'] for f in codes_result['data']]
+            if max_funds:
+                symbols = symbols[:max_funds]
+        print(f"✅ 共 {len(symbols)} 个基金")
+
+        if delay is not None:
+            scraper.rate_limiter.set_delay('f10', delay)
+
+        engine = scraper.nav_sync
+        engine.workers = max(1, workers)
+        print(f"\n[2/2] 正在同步净值历史（并行 {engine.workers}），存储位置: {scraper.nav_store.root}\n")
+
+        total = len(symbols)
+        started = time.perf_counter()
+
+        def report(idx, symbol, result):
+            if result['success']:
+                status = f"✅ +{result['new_rows']}"
+            else:
+                status = f"❌ {result.get('error_type', '')} {result.get('error', '')[:50]}"
+            print(f"    [{idx + 1}] {symbol}... {status}", flush=True)
+
+        summary = await engine.sync_all(symbols, force=force, on_done=report)
+        summary['total'] = total
+        summary['elapsed'] = time.perf_counter() - started
+        summary['store'] = scraper.nav_store.get_stats()
+        return summary
+
+    finally:
+        await scraper.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='同步基金净值历史到本地存储（增量、可断点续传）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  python sync_nav.py --all                    # 同步所有基金
+  python sync_nav.py --max 100                # 同步前100个基金
+  python sync_nav.py --symbols 000001 110022  # 同步指定基金
+  python sync_nav.py --all --workers 16       # 16 个基金并行同步
+  python sync_nav.py --compact                # 整理本地存储
+  python sync_nav.py --analyze --top 50       # 计算净值指标并打印夏普比率最高的 50 只
+  python sync_nav.py --analyze --symbols 000001 110022 --rolling 20
+        """
+    )
+
+    parser.add_argument('--all', action='store_true', help='同步所有基金')
+    parser.add_argument('--max', type=int, help='同步的最大基金数量')
+    parser.add_argument('--symbols', nargs='+', help='指定基金代码')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='并行同步的基金数 (默认: 8)')
+    parser.add_argument('--delay', type=float,
+                        help='起始请求间隔秒数，之后按响应情况自动调整')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略"今天已同步"标记，重新检查所有基金')
+    parser.add_argument('--compact', action='store_true',
+                        help='整理本地存储：合并每只基金的数据段并重建日期索引（追加较多后会自动整理）')
+
+    analyze_group = parser.add_argument_group('净值分析（--analyze，需要 numpy）')
+    analyze_group.add_argument('--analyze', action='store_true',
+                               help='计算区间收益、年化波动率、最大回撤、夏普 / 索提诺比率（默认本地全部基金，或 --symbols 指定）')
+    analyze_group.add_argument('--lookback', choices=LOOKBACKS, default='1y',
+                               help='风险指标的分析区间 (默认: 1y)')
+    analyze_group.add_argument('--as-of', help='截止日期 YYYY-MM-DD (默认: 最新净值日期)')
+    analyze_group.add_argument('--risk-free', type=float, default=0.0,
+                               help='年化无风险利率，小数 (默认: 0)')
+    analyze_group.add_argument('--rolling', type=int,
+                               help='滚动窗口的交易日数，如 20')
+    analyze_group.add_argument('--field', choices=NAV_FIELDS, default='total_nav',
+                               help='使用累计净值或单位净值 (默认: total_nav)')
+    analyze_group.add_argument('--output', '-o', help='把全部结果写入 CSV 文件')
+    analyze_group.add_argument('--sort', default='sharpe',
+                               help='打印时的排序字段 (默认: sharpe)')
+    analyze_group.add_argument('--top', type=int, default=20,
+                               help='打印前多少只基金 (默认: 20)')
+
+    args = parser.parse_args()
+
+    if args.analyze:
+        result = asyncio.run(analyze_nav(
+            args.symbols,
+            lookback=args.lookback,
+            as_of=args.as_of,
+            risk_free=args.risk_free,
+            rolling_window=args.rolling,
+            field=args.field
+        ))
+        if not result['success']:
+            print(f"❌ 分析失败: {result['error']}")
+            sys.exit(1)
+        print(f"✅ 已分析 {result['total_count']} 个基金（{result['trading_days']} 个交易日），"
+              f"无本地数据: {len(result['missing'])} 个")
+        if result['data'] and args.output:
+            write_metrics(result['data'], args.output)
+            print(f"💾 结果已保存到: {args.output}")
+        print_metrics(result, args.sort, args.top)
+        return
+
+    if args.compact:
+        compact_store()
+        if not (args.all or args.max or args.symbols):
+            return
+
+    if not (args.all or args.max or args.symbols):
+        print("❌ 请指定 --all、--max N 或 --symbols")
+        sys.exit(1)
+
+    summary = asyncio.run(sync_nav(
+        symbols=args.symbols,
+        max_funds=None if args.all else args.max,
+        workers=args.workers,
+        force=args.force,
+        delay=args.delay
+    ))
+
+    if not summary:
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print(f"净值同步完成（耗时 {summary['elapsed']:.1f} 秒）")
+    print("=" * 70)
+    print(f"✅ 已同步: {summary['synced']} 个，新增 {summary['new_rows']} 行")
+    print(f"⏭️  今天已同步过: {summary['skipped']} 个")
+    print(f"❌ 失败: {summary['failed_count']} 个")
+    for kind, count in summary['failed_by_type'].items():
+        print(f"   - {kind}: {count} 个")
+    print(f"💾 本地存储: {summary['store']['funds']} 个基金，{summary['store']['rows']} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import requests
-import re
 import sys
 import io
 
+from utils.rank_parser import parse_rank_data
+
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 url = 'http://fund.eastmoney.com/data/rankhandler.aspx'
@@ -17,14 +18,12 @@ print("正在请求...")
 r = requests.get(url, params=params, headers=headers, timeout=30)
 print(f"状态: {r.status_code}, 长度: {len(r.text)}")
 
-m = re.search(r'allRecords:(\d+)', r.text)
-if m:
-    print(f"总数: {m.group(1)}")
+rank_data = parse_rank_data(r.text)
+if rank_data.all_records is not None:
+    print(f"总数: {rank_data.all_records}")
+print(f"元数据: {rank_data.meta}")
 
-m2 = re.search(r'datas:\[(.*?)\]', r.text, re.DOTALL)
-if m2:
-    datas_str = m2.group(1)
-    funds = [s.strip().strip('"') for s in datas_str.split('","')]
-    print(f"本页基金数: {len(funds)}")
-    if len(funds) > 0:
-        print(f"第一个: {funds[0][:100]}")
+funds = list(rank_data.rows())
+print(f"本页基金数: {len(funds)}")
+if len(funds) > 0:
+    print(f"第一个: {','.join(funds[0].fields)[:100]}")
@@ -0,0 +1,107 @@
+"""EastmoneyScraper.fetch_funds_hybrid 按基金族共用详情页，代表份额失败时同族份额的处理"""
+import asyncio
+from datetime import date
+
+import pytest
+
+from scrapers.eastmoney_scraper import EastmoneyScraper
+from storage.attribute_cache import FundAttributeCache
+from utils.rank_parser import row_to_fund
+from utils.retry import ErrorKind
+
+
+# 000001 / 000004 / 000005 是同一基金族，000001 是代表份额
+CODES = [
+    {'symbol': '000001', 'sname': '甲债券A'},
+    {'symbol': '000002', 'sname': '乙股票'},
+    {'symbol': '000004', 'sname': '甲债券C'},
+    {'symbol': '000005', 'sname': '甲债券E'},
+]
+
+DETAIL = {
+    'sname': '详情', 'per_nav': '1.0000', 'fund_manager': '新经理', 'jjlx': '债券型', 'fund_company': '甲基金',
+    'establishment_date': '2020-01-01', 'sg_states': '开放', 'fund_scale': '2.00亿元',
+}
+
+
+def listing_row(symbol):
+    return row_to_fund([symbol, '名称', 'MC', '2026-02-13', '1.0000', '1.0000', '0.10'])
+
+
+class _RateLimiter:
+    def set_delay(self, *args):
+        pass
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = object.__new__(EastmoneyScraper)
+    scraper.attribute_cache = FundAttributeCache(tmp_path / 'attributes.json')
+    scraper.rate_limiter = _RateLimiter()
+    scraper.failing = set()
+    scraper.requested = []
+
+    async def scrape_all_fund_codes(verbose=True):
+        return {'success': True, 'data': CODES}
+
+    async def fetch_rank_listing():
+        return {'success': True, 'data': [listing_row(fund['symbol']) for fund in CODES]}
+
+    async def scrape_details(symbols, concurrency=1, on_done=None):
+        results = []
+        for symbol in symbols:
+            scraper.requested.append(symbol)
+            if symbol in scraper.failing:
+                results.append({'success': False, 'error': '超时', 'error_type': ErrorKind.TIMEOUT})
+            else:
+                data = dict(DETAIL, symbol=symbol)
+                scraper.attribute_cache.update(symbol, data)
+                results.append({'success': True, 'data': data})
+        return results
+
+    scraper.scrape_all_fund_codes = scrape_all_fund_codes
+    scraper.fetch_rank_listing = fetch_rank_listing
+    scraper.scrape_details = scrape_details
+    return scraper
+
+
+def run(scraper, **kwargs):
+    return asyncio.run(scraper.fetch_funds_hybrid(share_classes=True, verbose=False, **kwargs))
+
+
+def test_leader_shares_attributes(scraper):
+    result = run(scraper)
+    records = {record['symbol']: record for record in result['data']}
+
+    assert sorted(scraper.requested) == ['000001', '000002']
+    assert result['failed_symbols'] == []
+    assert records['000004']['fund_manager'] == '新经理'
+    assert records['000005']['jjlx'] == '债券型'
+
+
+def test_failed_leader_marks_uncached_followers_failed(scraper):
+    # 000004 有过期的缓存属性，000005 没有任何缓存
+    scraper.attribute_cache.update('000004', {'fund_manager': '旧经理', 'jjlx': '债券型'}, today=date(2020, 1, 1))
+    scraper.failing = {'000001'}
+    failed = []
+    result = run(scraper, on_failed=lambda symbol, kind, record: failed.append((symbol, kind, record)))
+    records = {record['symbol']: record for record in result['data']}
+
+    assert result['failed_symbols'] == ['000001', '000005']
+    assert result['failed_count'] == 2
+    assert result['failed_by_type'] == {ErrorKind.TIMEOUT: 2}
+    assert failed == [('000001', ErrorKind.TIMEOUT, None), ('000005', ErrorKind.TIMEOUT, None)]
+    # 有缓存属性的份额沿用过期属性输出，没有的不输出
+    assert records['000004']['fund_manager'] == '旧经理'
+    assert '000001' not in records and '000005' not in records
+    assert records['000002']['fund_manager'] == '新经理'
+
+
+def test_failed_leader_with_stale_cache_is_not_failed(scraper):
+    scraper.attribute_cache.update('000001', {'fund_manager': '旧经理', 'jjlx': '债券型'}, today=date(2020, 1, 1))
+    scraper.failing = {'000001'}
+    result = run(scraper)
+    records = {record['symbol']: record for record in result['data']}
+
+    assert result['failed_symbols'] == ['000004', '000005']
+    assert records['000001']['fund_manager'] == '旧经理'
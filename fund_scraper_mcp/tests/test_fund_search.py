@@ -0,0 +1,78 @@
+"""storage.fund_search.FundSearchIndex 的查找方式与结果排序"""
+import pytest
+
+from storage.fund_search import FundSearchIndex
+
+
+FUNDS = [
+    {'symbol': '000011', 'abbr': 'HXDPHH', 'sname': '华夏大盘精选混合A', 'jjlx': '混合型-偏股', 'pinyin': 'HUAXIADAPANJINGXUANHUNHEA'},
+    {'symbol': '000001', 'abbr': 'HXCZHH', 'sname': '华夏成长混合', 'jjlx': '混合型-偏股', 'pinyin': 'HUAXIACHENGZHANGHUNHE'},
+    {'symbol': '000003', 'abbr': 'ZHKZZA', 'sname': '中海可转债债券A', 'jjlx': '债券型-混合二级', 'pinyin': 'ZHONGHAIKEZHUANZHAIZHAIQUANA'},
+    {'symbol': '100001', 'abbr': 'HX', 'sname': '华夏', 'jjlx': '货币型', 'pinyin': 'HUAXIA'},
+    {'symbol': '000004', 'abbr': 'ZHKZZC', 'sname': '中海可转债债券C', 'jjlx': '债券型-混合二级', 'pinyin': 'ZHONGHAIKEZHUANZHAIZHAIQUANC'},
+    {'symbol': '519001', 'abbr': 'HXCZ', 'sname': '成长混合华夏', 'jjlx': '混合型-偏股', 'pinyin': 'CHENGZHANGHUNHEHUAXIA'},
+]
+
+
+@pytest.fixture
+def index():
+    return FundSearchIndex(FUNDS)
+
+
+def symbols(results):
+    return [fund['symbol'] for fund in results]
+
+
+def test_code_prefix(index):
+    results, total = index.search('0000')
+
+    # 前缀匹配按名称长度、再按代码排序
+    assert symbols(results) == ['000001', '000003', '000004', '000011']
+    assert total == 4
+    assert {fund['match'] for fund in results} == {'code'}
+    assert symbols(index.search('00001')[0]) == ['000011']
+    assert index.search('000001') == ([dict(FUNDS[1], match='code')], 1)
+
+
+def test_abbr_before_pinyin_prefix(index):
+    results, total = index.search('hx')
+
+    # 拼音首字母完全相同 > 首字母前缀（名称短的在前）；同一基金只出现一次
+    assert symbols(results) == ['100001', '000001', '519001', '000011']
+    assert [fund['match'] for fund in results] == ['abbr'] * 4
+    assert total == 4
+
+
+def test_full_pinyin_prefix(index):
+    results, total = index.search('Hua Xia')
+
+    assert results[0] == dict(FUNDS[3], match='pinyin')
+    assert symbols(results) == ['100001', '000001', '000011']
+    assert total == 3
+
+
+def test_chinese_substring_ranking(index):
+    results, total = index.search('华夏')
+
+    # 名称完全相同 > 名称以查询开头 > 名称中间包含
+    assert symbols(results) == ['100001', '000001', '000011', '519001']
+    assert total == 4
+    assert index.search('成长混合')[0] == [dict(FUNDS[5], match='name'), dict(FUNDS[1], match='name')]
+    assert index.search('可')[1] == 2
+    assert index.search('华夏债券') == ([], 0)
+
+
+def test_limit_and_fund_type(index):
+    results, total = index.search('华夏', limit=2)
+    assert symbols(results) == ['100001', '000001']
+    assert total == 4
+
+    results, total = index.search('ZH', fund_type='债券')
+    assert symbols(results) == ['000003', '000004']
+    assert total == 2
+
+
+def test_empty_query(index):
+    assert index.search('  ') == ([], 0)
+    assert index.search(None) == ([], 0)
+    assert index.search('XYZ') == ([], 0)
@@ -0,0 +1,98 @@
+"""scrapers.http_detail.parse_detail_html 与浏览器后端的提取脚本输出一致"""
+import os
+
+import pytest
+
+from scrapers.eastmoney_scraper import EastmoneyScraper
+from scrapers.http_detail import DetailParseError, parse_detail_html
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+EXPECTED = {
+    'detail_open.html': {
+        'sname': '华夏成长混合(000001)',
+        'per_nav': '1.1670',
+        'total_nav': '3.7400',
+        'nav_rate': '-0.51',
+        'nav_date': '2026-01-30',
+        'fund_manager': '郑晓辉等',
+        'jjlx': '混合型-灵活',
+        'fund_company': '华夏基金',
+        'establishment_date': '2001-12-18',
+        'fund_scale': '29.37亿元',
+        'sg_states': '开放',
+    },
+    'detail_suspended.html': {
+        'sname': '易方达消费行业股票 (110022)',
+        'per_nav': '3.5210',
+        'total_nav': '3.5210',
+        'nav_rate': '+0.26',
+        'nav_date': '2026-01-30',
+        'fund_manager': '萧楠',
+        'jjlx': '股票型',
+        'fund_company': '易方达基金',
+        'establishment_date': '2010-08-20',
+        'fund_scale': '252.10亿元',
+        'sg_states': '暂停申购',
+    },
+}
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_parse_fixture(name):
+    assert parse_detail_html(read_fixture(name)) == EXPECTED[name]
+
+
+def test_unrendered_page_is_parse_error():
+    # 区块存在但内容由脚本填充：需回退到浏览器
+    with pytest.raises(DetailParseError):
+        parse_detail_html(read_fixture('detail_unrendered.html'))
+
+
+@pytest.mark.parametrize('html', [
+    '<html><body><div class="dataOfFund">(2026-01-30) 1.1670-0.51%</div></body></html>',
+    '<html><body>请稍后再试</body></html>',
+])
+def test_missing_blocks(html):
+    with pytest.raises(DetailParseError, match='缺少区块'):
+        parse_detail_html(html)
+
+
+@pytest.fixture(scope='module')
+def browser_page():
+    """本机可用的 Edge 或 Chromium 页面；都没有安装时跳过"""
+    sync_api = pytest.importorskip('playwright.sync_api')
+    with sync_api.sync_playwright() as playwright:
+        browser = None
+        for channel in ('msedge', None):
+            try:
+                browser = playwright.chromium.launch(channel=channel, headless=True)
+                break
+            except Exception:
+                continue
+        if browser is None:
+            pytest.skip('没有可用的 Edge / Chromium')
+        page = browser.new_page()
+        yield page
+        browser.close()
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED) + ['detail_unrendered.html'])
+def test_matches_browser_extractor(browser_page, name):
+    html = read_fixture(name)
+    browser_page.set_content(html)
+    extracted = browser_page.evaluate(EastmoneyScraper.DETAIL_EXTRACT_JS)
+
+    try:
+        parsed = parse_detail_html(html)
+    except DetailParseError:
+        # HTTP 后端拒绝的页面，浏览器脚本提取到的名称或单位净值也为空
+        assert not extracted['sname'] or not extracted['per_nav']
+    else:
+        assert parsed == extracted
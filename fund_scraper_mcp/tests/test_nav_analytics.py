@@ -0,0 +1,46 @@
+"""analytics.nav_analytics.analyze 对停止更新（已清盘）基金的处理"""
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from analytics.nav_analytics import NavMatrix, analyze
+
+
+START = date(2025, 1, 1)
+
+
+def series(days, values):
+    return [(START + timedelta(days=day)).toordinal() for day in days], values
+
+
+@pytest.fixture
+def matrix():
+    days = list(range(60))
+    rng = np.random.default_rng(0)
+    active = np.cumprod(1 + rng.normal(0, 0.01, len(days))).tolist()
+    # 第 30 天之后不再有净值
+    stopped = np.cumprod(1 + rng.normal(0, 0.01, 31)).tolist()
+    return NavMatrix.from_series({
+        '000001': series(days, active),
+        '000002': series(days[:31], stopped),
+    })
+
+
+def test_stopped_fund_metrics_end_at_last_nav(matrix):
+    active, stopped = analyze(matrix, lookback='all', rolling_window=5)
+    assert active['observations'] == 59
+    assert stopped['observations'] == 30
+    assert stopped['last_date'] == (START + timedelta(days=30)).isoformat()
+
+    values = matrix.values[1, :31]
+    assert stopped['total_return'] == pytest.approx(round((values[-1] / values[0] - 1) * 100, 2))
+    assert stopped['volatility'] is not None and stopped['volatility'] > 0
+
+
+def test_fund_stopped_before_window_has_no_metrics(matrix):
+    stopped = analyze(matrix, as_of=(START + timedelta(days=59)).isoformat(), lookback='1m')[1]
+    assert stopped['observations'] == 0
+    assert stopped['total_return'] is None
+    assert stopped['volatility'] is None
@@ -0,0 +1,80 @@
+"""storage.nav_columns.ColumnarNavStore 的追加、压缩和中断恢复"""
+import pytest
+
+from storage.nav_columns import ColumnarNavStore
+from storage.nav_store import NavRow
+
+
+def rows(days, base):
+    # 取 float32 可以精确表示的值
+    return [NavRow(f"2026-01-{day:02d}", base + day / 4, base + day / 2, float(day)) for day in days]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ColumnarNavStore(tmp_path, auto_compact_extents=1000)
+    # 交替追加，使每只基金分成多个区段
+    for days in ((1, 2), (3, 4), (5, 6)):
+        for symbol, base in (('000001', 1.0), ('000002', 2.0), ('110022', 3.0)):
+            store.append(symbol, rows(days, base))
+        store.flush()
+    yield store
+    store.close()
+
+
+def snapshot(store):
+    return {symbol: store.read(symbol) for symbol in store.symbols()}
+
+
+def test_compact_keeps_rows(store, tmp_path):
+    before = snapshot(store)
+    store.compact()
+
+    assert snapshot(store) == before
+    assert store.get_stats()['extents'] == 3
+    assert set(store.read_date('2026-01-03')) == {'000001', '000002', '110022'}
+
+    reopened = ColumnarNavStore(tmp_path)
+    assert snapshot(reopened) == before
+    assert reopened.read_date('2026-01-05')['000002'] == rows([5], 2.0)[0]
+    reopened.close()
+
+
+def test_compact_twice_removes_old_generation(store, tmp_path):
+    store.compact()
+    store.append('000001', rows([7], 1.0))
+    store.compact()
+
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == sorted(['index.json'] + [f"{name}.2.{ext}" for name, ext in (
+        ('date', 'i32'), ('nav', 'f32'), ('total_nav', 'f32'), ('rate', 'f32'), ('sid', 'i32'),
+        ('date_keys', 'i32'), ('date_starts', 'i32'), ('date_order', 'i32'),
+    )])
+    assert store.last_date('000001') == '2026-01-07'
+
+
+def test_interrupted_compact_keeps_old_generation(store, tmp_path, monkeypatch):
+    before = snapshot(store)
+
+    def crash():
+        raise OSError("模拟在切换 index.json 之前中断")
+
+    monkeypatch.setattr(store, '_write_index', crash)
+    with pytest.raises(OSError):
+        store.compact()
+
+    # 新一代文件已写出但未提交：重新打开时仍读取旧一代，并清理未提交的文件
+    assert any('.1.' in path.name for path in tmp_path.iterdir())
+    reopened = ColumnarNavStore(tmp_path)
+    assert snapshot(reopened) == before
+    assert not any('.1.' in path.name for path in tmp_path.iterdir())
+    assert reopened.read_date('2026-01-04')['110022'] == rows([4], 3.0)[0]
+    reopened.close()
+
+
+def test_read_column_after_compact(store):
+    store.compact()
+    days, values = store.read_column('000002', 'nav', '2026-01-02', '2026-01-04')
+
+    assert len(days) == 3
+    assert list(values) == [2.5, 2.75, 3.0]
@@ -0,0 +1,208 @@
+"""utils.rank_parser 解析排行榜响应（以 benchmarks/fixtures/rankdata_sample.js 为样例）"""
+import os
+
+import pytest
+
+from utils.rank_parser import (
+    LISTING_FIELDS, ROW_FIELDS, RankParseError, parse_rank_data, row_to_fund, row_to_listing, split_row,
+)
+
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'rankdata_sample.js'
+)
+
+
+@pytest.fixture(scope='module')
+def sample() -> str:
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def payload(rows, tail=',allRecords:{n},pageIndex:1,allPages:1}};') -> str:
+    datas = ','.join(f'"{row}"' for row in rows)
+    return 'var rankData = {datas:[' + datas + ']' + tail.format(n=len(rows))
+
+
+def full_row(*fields, name_commas=0) -> str:
+    """补齐为接口的完整字段数（名称中有逗号时相应多出字段）"""
+    return ','.join(fields + ('',) * (ROW_FIELDS + name_commas - len(fields)))
+
+
+def test_fixture_rows(sample):
+    rows = list(parse_rank_data(sample).rows())
+
+    assert [row.symbol for row in rows] == [
+        '009317', '000001', '110022', '161005', '519001', '000002', '004851', '006228',
+    ]
+    first = rows[0]
+    assert first.sname == '金信核心竞争力混合A'
+    assert first.abbr == 'JXHXJZLHHA'
+    assert first.nav_date == '2026-02-13'
+    assert first.per_nav == 1.1921
+    assert first.total_nav == 2.5879
+    assert first.nav_rate == -1.45
+    assert first.year_rate == 21.07
+    assert first.ytd_rate == 2.85
+    assert first.since_inception_rate == 158.79
+    assert first.establishment_date == '2020-04-20'
+    assert len(first.fields) == 25
+    assert rows[3].sname == '富国天惠成长混合(LOF)A'
+
+
+def test_fixture_missing_values(sample):
+    row = {row.symbol: row for row in parse_rank_data(sample).rows()}['519001']
+
+    assert row.per_nav is None and row.total_nav is None
+    assert row.nav_rate is None and row.ytd_rate is None
+    assert row.establishment_date == '2002-10-08'
+
+
+def test_fixture_meta(sample):
+    data = parse_rank_data(sample)
+
+    assert data.all_records == 8
+    assert data.page_index == 1
+    assert data.all_pages == 1
+    assert data.meta['pageNum'] == 500
+    assert data.meta['gpNum'] == 3
+    assert data.meta['hhNum'] == 4
+    assert data.meta['lofNum'] == 1
+
+
+def test_raw_rows_match_fixture(sample):
+    raw = list(parse_rank_data(sample).raw_rows())
+
+    assert len(raw) == 8
+    assert raw[0].startswith('009317,金信核心竞争力混合A,')
+    assert raw[-1].endswith(',1,0.15%,1,')
+
+
+def test_comma_in_name():
+    row = full_row('000003', '中海可转债债券', 'A类', 'ZHKZZZQA', '2026-02-13', '0.9876', '1.2345', '0.10',
+                   *[''] * 9, '2013-03-20', '1', name_commas=1)
+    rows = list(parse_rank_data(payload([row])).rows())
+
+    assert len(rows) == 1
+    assert rows[0].sname == '中海可转债债券,A类'
+    assert rows[0].abbr == 'ZHKZZZQA'
+    assert rows[0].nav_date == '2026-02-13'
+    assert rows[0].per_nav == 0.9876
+    assert rows[0].establishment_date == '2013-03-20'
+    assert len(rows[0].fields) == ROW_FIELDS
+
+
+def test_split_row_several_commas():
+    fields = split_row(full_row('000004', '名称', '含', '两个逗号', 'ABBR', '2026-02-13', '1.0000', name_commas=2))
+
+    assert fields[:5] == ('000004', '名称,含,两个逗号', 'ABBR', '2026-02-13', '1.0000')
+    assert len(fields) == ROW_FIELDS
+
+
+def test_empty_nav_date_keeps_columns():
+    # 新基金还没有净值：净值日期为空，不能把后面的成立日期当作净值日期
+    row = full_row('000006', '新发基金A', 'XFJJA', '', '', '', *[''] * 10, '2026-02-10', '1')
+    rows = list(parse_rank_data(payload([row])).rows())
+
+    assert rows[0].sname == '新发基金A'
+    assert rows[0].abbr == 'XFJJA'
+    assert rows[0].nav_date == ''
+    assert rows[0].per_nav is None
+    assert rows[0].establishment_date == '2026-02-10'
+
+
+def test_empty_nav_date_with_comma_in_name():
+    row = full_row('000007', '新发基金', 'C类', 'XFJJC', '', '', '', *[''] * 10, '2026-02-10', '1', name_commas=1)
+    rows = list(parse_rank_data(payload([row])).rows())
+
+    assert rows[0].sname == '新发基金,C类'
+    assert rows[0].abbr == 'XFJJC'
+    assert rows[0].nav_date == ''
+    assert rows[0].establishment_date == '2026-02-10'
+
+
+def test_escaped_quote_in_string():
+    content = 'var rankData = {datas:["000005,带\\"引号\\"的基金,ABBR,2026-02-13,1.0"],allRecords:1};'
+    rows = list(parse_rank_data(content).rows())
+
+    assert rows[0].sname == '带"引号"的基金'
+    assert rows[0].per_nav == 1.0
+
+
+def test_missing_meta():
+    data = parse_rank_data('var rankData = {datas:["000001,华夏成长混合,HXCZHH,2026-02-13,1.1670"]};')
+
+    assert data.meta == {}
+    assert data.all_records is None
+    assert data.all_pages is None
+    assert [row.symbol for row in data.rows()] == ['000001']
+
+
+def test_short_and_blank_rows_skipped():
+    rows = list(parse_rank_data(payload(['', '000001,只有名称', '000002,华夏,HX,2026-02-13'])).rows())
+
+    assert [row.symbol for row in rows] == ['000002']
+    assert rows[0].per_nav is None
+
+
+def test_empty_datas():
+    data = parse_rank_data('var rankData = {datas:[],allRecords:0,pageIndex:1,allPages:0};')
+
+    assert list(data.rows()) == []
+    assert data.all_records == 0
+
+
+@pytest.mark.parametrize('content, message', [
+    ('var rankData = {datas:["000001,华夏成长混合,HXCZHH,2026-02-13,1.1670","000002,华', '字符串未结束'),
+    ('var rankData = {datas:["000001,华夏成长混合,HXCZHH,2026-02-13,1.1670",', '未结束'),
+    ('var rankData = {datas:[000001],allRecords:1};', '应为字符串'),
+])
+def test_truncated_datas(content, message):
+    data = parse_rank_data(content)
+
+    with pytest.raises(RankParseError, match=message):
+        list(data.rows())
+
+
+def test_truncated_datas_yields_complete_rows_first():
+    data = parse_rank_data('var rankData = {datas:["000001,华夏成长混合,HXCZHH,2026-02-13,1.1670","0000')
+    rows = data.rows()
+
+    assert next(rows).symbol == '000001'
+    with pytest.raises(RankParseError):
+        next(rows)
+    assert data.meta == {}
+
+
+@pytest.mark.parametrize('content', [
+    'var rankData = {ErrCode:-999,Data:"无访问权限"};',
+    '<html>404</html>',
+])
+def test_rejected_response(content):
+    with pytest.raises(RankParseError):
+        parse_rank_data(content)
+
+
+def test_row_to_listing(sample):
+    row = next(parse_rank_data(sample).rows())
+    listing = dict(zip(LISTING_FIELDS, row_to_listing(row)))
+
+    assert listing['symbol'] == '009317'
+    assert listing['sname'] == '金信核心竞争力混合A'
+    assert 'abbr' not in listing
+    assert listing['ytd_rate'] == 2.85
+    assert listing['establishment_date'] == '2020-04-20'
+
+
+def test_row_to_fund(sample):
+    row = next(parse_rank_data(sample).rows())
+    fund = row_to_fund(row.fields)
+
+    assert fund['symbol'] == '009317'
+    assert fund['per_nav'] == '1.1921'
+    assert fund['nav_rate'] == '-1.45'
+    assert fund['yesterday_nav'] == str(round(1.1921 / (1 - 0.0145), 4))
+    # 排行榜不提供的字段留空：[14] 是今年来收益率，不是规模
+    assert fund['jjzfe'] == ''
+    assert fund['sg_states'] == ''
+    assert fund['fund_manager'] == '' and fund['jjlx'] == ''
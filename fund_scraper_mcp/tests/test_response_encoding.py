@@ -0,0 +1,122 @@
+"""utils.response_encoding.ResponseEncoder 的编码方式和按字节上限分页"""
+import csv
+import io
+import json
+
+import pytest
+
+from utils.response_encoding import ResponseEncoder, encode_data
+
+
+RECORDS = [
+    {'symbol': f'{i:06d}', 'sname': f'基金{i},"测试"\n第二行' if i % 7 == 0 else f'基金{i}', 'per_nav': f'{1 + i / 100:.4f}'}
+    for i in range(60)
+]
+
+
+def result(records=RECORDS):
+    return {'success': True, 'data': list(records), 'total_count': len(records), 'source': 'test'}
+
+
+def decode_rows(page):
+    """把一页的 data 还原为记录列表"""
+    data = page['data']
+    encoding = page.get('encoding', 'rows')
+    if encoding == 'rows':
+        return data
+    if encoding == 'columnar':
+        return [dict(zip(data['fields'], row)) for row in data['rows']]
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+def read_all(encoder, encoding, max_bytes):
+    raw = encoder.encode(result(), encoding, max_bytes)
+    pages = [raw]
+    page = json.loads(raw)
+    while page.get('next_cursor'):
+        raw = encoder.next_page(page['next_cursor'])
+        pages.append(raw)
+        page = json.loads(raw)
+    return pages
+
+
+def test_unpaged_rows_unchanged():
+    encoder = ResponseEncoder()
+
+    assert json.loads(encoder.encode(result())) == result()
+
+
+def test_columnar_and_csv_encoding():
+    columnar = encode_data(RECORDS[:2], 'columnar')
+    text = encode_data(RECORDS[:2], 'csv')
+
+    assert columnar == {'fields': ['symbol', 'sname', 'per_nav'],
+                        'rows': [['000000', RECORDS[0]['sname'], '1.0000'], ['000001', '基金1', '1.0100']]}
+    assert list(csv.DictReader(io.StringIO(text))) == RECORDS[:2]
+
+
+@pytest.mark.parametrize('encoding', ['rows', 'columnar', 'csv'])
+def test_pages_round_trip(encoding):
+    encoder = ResponseEncoder()
+    max_bytes = 1500
+    pages = read_all(encoder, encoding, max_bytes)
+    decoded = [json.loads(page) for page in pages]
+
+    assert len(pages) > 1
+    assert all(len(page) <= max_bytes for page in pages)
+    assert [record for page in decoded for record in decode_rows(page)] == RECORDS
+    # 每页带有偏移和总数，统计字段原样保留
+    assert [page['offset'] for page in decoded] == [sum(page['returned'] for page in decoded[:i]) for i in range(len(decoded))]
+    assert all(page['total_rows'] == len(RECORDS) and page['source'] == 'test' for page in decoded)
+    assert 'next_cursor' not in decoded[-1]
+
+
+def test_small_result_not_paged():
+    encoder = ResponseEncoder()
+    page = json.loads(encoder.encode(result(RECORDS[:3]), 'columnar', 100000))
+
+    assert page['encoding'] == 'columnar'
+    assert 'next_cursor' not in page
+    assert decode_rows(page) == RECORDS[:3]
+
+
+def test_oversized_record_still_returned():
+    encoder = ResponseEncoder()
+    page = json.loads(encoder.encode(result(), 'rows', 10))
+
+    assert page['returned'] == 1
+    assert page['next_cursor'].endswith(':1')
+
+
+def test_next_page_can_change_page_size():
+    encoder = ResponseEncoder()
+    first = json.loads(encoder.encode(result(), 'rows', 1000))
+    rest = json.loads(encoder.next_page(first['next_cursor'], 10 ** 6))
+
+    assert rest['offset'] == first['returned']
+    assert rest['returned'] == len(RECORDS) - first['returned']
+    assert 'next_cursor' not in rest
+
+
+@pytest.mark.parametrize('cursor', ['missing:0', 'no-offset', 'x:abc'])
+def test_invalid_cursor(cursor):
+    page = json.loads(ResponseEncoder().next_page(cursor))
+
+    assert page['success'] is False
+    assert '游标' in page['error']
+
+
+def test_cursor_offset_out_of_range():
+    encoder = ResponseEncoder()
+    token = json.loads(encoder.encode(result(), 'rows', 1000))['next_cursor'].rpartition(':')[0]
+
+    assert json.loads(encoder.next_page(f'{token}:{len(RECORDS) + 1}'))['success'] is False
+
+
+def test_non_record_data_and_unknown_encoding():
+    encoder = ResponseEncoder()
+    plain = {'success': True, 'data': {'connected': False}}
+
+    assert json.loads(encoder.encode(plain, 'csv', 10)) == plain
+    with pytest.raises(ValueError):
+        encoder.encode(result(), 'xml')
@@ -0,0 +1,211 @@
+"""utils.retry 的错误分类、重试策略和熔断器状态转换"""
+import asyncio
+
+import pytest
+
+from utils import retry
+from utils.retry import CircuitBreaker, ErrorKind, RetryPolicy, ScrapeError, classify_error, classify_status, count_by_type
+
+
+class Clock:
+    """替代 time.monotonic 的手动时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    async def sleep(seconds):
+        pass
+
+    monkeypatch.setattr(retry.asyncio, 'sleep', sleep)
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+
+
+@pytest.mark.parametrize('status, kind', [
+    (200, None), (301, None), (403, ErrorKind.BLOCKED), (429, ErrorKind.BLOCKED),
+    (404, ErrorKind.NOT_FOUND), (400, ErrorKind.UNKNOWN), (502, ErrorKind.TIMEOUT),
+])
+def test_classify_status(status, kind):
+    assert classify_status(status) == kind
+
+
+class ClientConnectorError(Exception):
+    pass
+
+
+@pytest.mark.parametrize('error, kind', [
+    (ScrapeError(ErrorKind.SELECTOR_MISSING, '缺少数据区块'), ErrorKind.SELECTOR_MISSING),
+    (asyncio.TimeoutError(), ErrorKind.TIMEOUT),
+    (ConnectionResetError(), ErrorKind.TIMEOUT),
+    (ClientConnectorError(), ErrorKind.TIMEOUT),
+    (ValueError('bad'), ErrorKind.UNKNOWN),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_count_by_type():
+    failed = {'000001': ErrorKind.TIMEOUT, '000002': ErrorKind.NOT_FOUND, '000003': ErrorKind.TIMEOUT}
+
+    assert count_by_type(failed) == {ErrorKind.TIMEOUT: 2, ErrorKind.NOT_FOUND: 1}
+    assert count_by_type({}) == {}
+
+
+def responder(*results):
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        return dict(results[min(len(calls), len(results)) - 1])
+
+    return call, calls
+
+
+def test_run_retries_retryable_until_success(no_sleep):
+    call, calls = responder(
+        {'success': False, 'error_type': ErrorKind.BLOCKED},
+        {'success': True, 'data': 1},
+    )
+    result = asyncio.run(RetryPolicy(max_attempts=3).run(call))
+
+    assert result == {'success': True, 'data': 1, 'attempts': 2}
+    assert len(calls) == 2
+
+
+def test_run_stops_at_max_attempts(no_sleep):
+    call, calls = responder({'success': False, 'error_type': ErrorKind.TIMEOUT})
+    result = asyncio.run(RetryPolicy(max_attempts=3).run(call))
+
+    assert result['attempts'] == 3
+    assert len(calls) == 3
+
+
+def test_run_does_not_retry_permanent_errors(no_sleep):
+    call, calls = responder({'success': False, 'error_type': ErrorKind.NOT_FOUND})
+    result = asyncio.run(RetryPolicy(max_attempts=3).run(call))
+
+    assert result['attempts'] == 1
+    assert len(calls) == 1
+
+
+def test_call_sync_retries_and_reraises(no_sleep):
+    errors = [TimeoutError('超时'), TimeoutError('超时')]
+
+    def flaky():
+        if errors:
+            raise errors.pop()
+        return 'ok'
+
+    assert RetryPolicy(max_attempts=3).call_sync(flaky) == 'ok'
+
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError('解析失败')
+
+    def timeout():
+        calls.append(1)
+        raise TimeoutError('超时')
+
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=3).call_sync(broken)
+    assert len(calls) == 1
+
+    with pytest.raises(TimeoutError):
+        RetryPolicy(max_attempts=2).call_sync(timeout)
+    assert len(calls) == 3
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=2.0, max_delay=5.0)
+
+    assert all(0 <= policy.backoff(attempt) <= 5.0 for attempt in range(1, 10))
+    assert all(policy.backoff(1) <= 2.0 for _ in range(20))
+
+
+def trip(breaker):
+    for _ in range(breaker.min_samples):
+        breaker.record(False)
+
+
+def test_breaker_needs_min_samples(clock):
+    breaker = CircuitBreaker(window=10, min_samples=4, failure_threshold=0.5)
+    for _ in range(3):
+        breaker.record(False)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 1
+
+
+def test_breaker_open_half_open_closed(clock):
+    breaker = CircuitBreaker(window=10, min_samples=4, cooldown=30.0)
+    trip(breaker)
+
+    assert breaker._pause_seconds() == pytest.approx(30.0)
+    assert breaker.get_stats() == {'state': CircuitBreaker.OPEN, 'trips': 1, 'resume_in': 30.0}
+
+    # 冷却结束：放行一个探测请求，其他请求继续等待
+    clock.now += 30.0
+    assert breaker._pause_seconds() == 0.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker._pause_seconds() == breaker.probe_poll
+
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker._pause_seconds() == 0.0
+    # 恢复后窗口重新统计
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_doubles_cooldown(clock):
+    breaker = CircuitBreaker(window=10, min_samples=4, cooldown=30.0, max_cooldown=50.0)
+    trip(breaker)
+
+    clock.now += 30.0
+    assert breaker._pause_seconds() == 0.0
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+    assert breaker._pause_seconds() == pytest.approx(50.0)
+
+    # 再次失败时冷却时间不超过上限；探测成功后恢复初始冷却时间
+    clock.now += 50.0
+    breaker._pause_seconds()
+    breaker.record(False)
+    assert breaker._pause_seconds() == pytest.approx(50.0)
+
+    clock.now += 50.0
+    breaker._pause_seconds()
+    breaker.record(True)
+    trip(breaker)
+    assert breaker._pause_seconds() == pytest.approx(30.0)
+
+
+def test_stale_probe_is_replaced(clock):
+    breaker = CircuitBreaker(window=10, min_samples=4, cooldown=30.0, probe_timeout=120.0)
+    trip(breaker)
+    clock.now += 30.0
+    breaker._pause_seconds()
+
+    # 探测请求一直没有结果（例如被取消），超时后允许新的探测
+    clock.now += 119.0
+    assert breaker._pause_seconds() == breaker.probe_poll
+    clock.now += 1.0
+    assert breaker._pause_seconds() == 0.0
@@ -0,0 +1,143 @@
+"""storage.screener 的数据合并、筛选条件和前 k 条排序"""
+import random
+
+import pytest
+
+from storage.screener import FundScreener, merge_sources, parse_scale
+
+
+def fund(symbol, **fields):
+    return dict({'symbol': symbol, 'sname': f'基金{symbol}', 'jjlx': '', 'fund_manager': '', 'fund_company': '',
+                 'sg_states': '', 'scale': None, 'year_rate': None, 'month_rate': None}, **fields)
+
+
+FUNDS = [
+    fund('000001', sname='华夏成长混合', jjlx='混合型-偏股', fund_manager='张三', scale=30.0, year_rate='12.5', month_rate='1.0'),
+    fund('000002', sname='博时信用债券A', jjlx='债券型-长债', fund_manager='李四', scale=5.0, year_rate='3.1', month_rate='0.2'),
+    fund('000003', sname='易方达蓝筹精选', jjlx='混合型-偏股', fund_manager='张三,王五', scale=0.5, year_rate='-8.0'),
+    fund('000004', sname='南方原油', jjlx='QDII', fund_manager='赵六', year_rate='12.5', month_rate='2.0'),
+    fund('000005', sname='广发纯债', jjlx='债券型-中短债', fund_manager='李四', scale=12.0, month_rate='0.1'),
+]
+
+
+@pytest.fixture
+def screener():
+    return FundScreener(FUNDS)
+
+
+def symbols(results):
+    return [fund['symbol'] for fund in results]
+
+
+@pytest.mark.parametrize('text, scale', [
+    ('29.37亿元', 29.37), ('5000.00万元', 0.5), ('1.2亿份', 1.2), (3, 3.0), ('---', None), (None, None),
+])
+def test_parse_scale(text, scale):
+    assert parse_scale(text) == scale
+
+
+def test_merge_sources():
+    listing = [{'symbol': '000001', 'sname': '华夏成长混合', 'per_nav': 1.2, 'year_rate': 12.5, 'establishment_date': ''}]
+    records = {
+        '000001': {'symbol': '000001', 'jjlx': '旧类型', 'fund_manager': '旧经理', 'jjzfe': '10.00亿元'},
+        '000002': {'symbol': '000002', 'sname': '博时信用债券A', 'per_nav': '1.0', 'jjlx': '债券型', 'jjzfe': '5000万元'},
+    }
+    cached = {'000001': {'jjlx': '混合型-偏股', 'fund_company': '华夏基金', 'fund_scale': '30.00亿元',
+                         'establishment_date': '2001-12-18'}}
+    merged = merge_sources(listing, records, lambda symbol: cached.get(symbol, {}))
+
+    assert symbols(merged) == ['000001', '000002']
+    # 属性缓存优先，其次快照
+    assert merged[0]['jjlx'] == '混合型-偏股'
+    assert merged[0]['fund_manager'] == '旧经理'
+    assert merged[0]['fund_company'] == '华夏基金'
+    assert merged[0]['scale'] == 30.0
+    assert merged[0]['establishment_date'] == '2001-12-18'
+    assert merged[0]['year_rate'] == 12.5
+    # 排行榜中没有的基金只有快照字段
+    assert merged[1]['per_nav'] == '1.0'
+    assert merged[1]['scale'] == 0.5
+    assert 'year_rate' not in merged[1]
+
+
+def test_text_and_range_filters(screener):
+    assert screener.screen({'manager': '张三'}) == ([FUNDS[0], FUNDS[2]], 2)
+    assert symbols(screener.screen({'fund_type': ['债券', 'QDII']})[0]) == ['000002', '000004', '000005']
+    assert symbols(screener.screen({'fund_type': '债券', 'min_scale': 10})[0]) == ['000005']
+    # 缺失值不满足范围条件
+    assert symbols(screener.screen({'max_scale': 5})[0]) == ['000002', '000003']
+    assert symbols(screener.screen({'ranges': {'year_rate': {'min': 0, 'max': 12.5}}})[0]) == ['000001', '000002', '000004']
+    assert symbols(screener.screen({'ranges': {'symbol': {'min': '000004'}}})[0]) == ['000004', '000005']
+    assert screener.screen({'manager': '不存在', 'fund_type': '混合'}) == ([], 0)
+    # 空条件等于不筛选
+    assert screener.screen({'manager': '', 'fund_type': None})[1] == 5
+
+
+def test_sort_missing_last_and_ties(screener):
+    results, total = screener.screen(sort_by=['-year_rate'])
+    # 主键相同保持原顺序，缺失值排在最后
+    assert symbols(results) == ['000001', '000004', '000002', '000003', '000005']
+    assert total == 5
+
+    assert symbols(screener.screen(sort_by=['-year_rate', '-month_rate'])[0])[:2] == ['000004', '000001']
+    assert symbols(screener.screen(sort_by=['scale'])[0]) == ['000003', '000002', '000005', '000001', '000004']
+
+
+def test_limit_and_offset(screener):
+    results, total = screener.screen(sort_by=['-year_rate'], limit=2, offset=1)
+    assert symbols(results) == ['000004', '000002']
+    assert total == 5
+
+    assert symbols(screener.screen(limit=2, offset=3)[0]) == ['000004', '000005']
+    assert screener.screen(limit=0) == ([], 5)
+
+
+def test_invalid_arguments(screener):
+    with pytest.raises(ValueError):
+        screener.screen(sort_by=['fund_manager'])
+    with pytest.raises(ValueError):
+        screener.screen({'ranges': {'sname': {'min': 'a'}}})
+    with pytest.raises(ValueError):
+        screener.screen({'unknown': 1})
+
+
+def reference(funds, sort_by, matched):
+    """逐行比较的参考实现：每个键缺失值排在最后，所有键相同时按原顺序"""
+    def key(row):
+        parts = []
+        for column in sort_by:
+            value = funds[row].get(column.lstrip('-'))
+            value = None if value is None else float(value)
+            parts.append((value is None, 0 if value is None else (-value if column.startswith('-') else value)))
+        return parts + [row]
+    return [funds[row]['symbol'] for row in sorted(matched, key=key)]
+
+
+def text_match(item, name, value):
+    if name == 'manager':
+        return any(text in item['fund_manager'] for text in ([value] if isinstance(value, str) else value))
+    return item['scale'] is not None and item['scale'] >= value
+
+
+@pytest.mark.parametrize('sort_by', [['-year_rate'], ['year_rate', '-scale'], ['-scale', 'year_rate', '-month_rate']])
+def test_top_k_matches_full_sort(sort_by):
+    rng = random.Random(0)
+    funds = [
+        fund(f'{i:06d}',
+             fund_manager=rng.choice(['张三', '李四', '王五']),
+             year_rate=rng.choice([None, -5, 0, 3, 3, 8, 12]),
+             month_rate=rng.choice([None, 0.5, 1, 2]),
+             scale=rng.choice([None, 0.5, 2, 10, 10, 50]))
+        for i in range(300)
+    ]
+    screener = FundScreener(funds)
+
+    for filters in ({}, {'manager': '张三'}, {'manager': ['张三', '李四'], 'min_scale': 1}):
+        matched = [row for row, item in enumerate(funds)
+                   if all(text_match(item, name, value) for name, value in filters.items())]
+        expected = reference(funds, sort_by, matched)
+        for limit, offset in ((1, 0), (10, 0), (10, 25), (500, 0)):
+            results, total = screener.screen(filters, sort_by, limit, offset)
+            assert total == len(matched)
+            assert symbols(results) == expected[offset:offset + limit]
+
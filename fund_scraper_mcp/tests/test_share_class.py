@@ -0,0 +1,59 @@
+"""utils.share_class 份额类别识别与基金族分组"""
+import pytest
+
+from utils.share_class import ShareClassIndex, deduplicate_funds, family_name, shared_attributes
+
+
+@pytest.mark.parametrize('name, family', [
+    ('华夏成长混合', '华夏成长混合'),
+    ('博时信用债券C', '博时信用债券'),
+    ('博时信用债券A/B', '博时信用债券'),
+    ('天弘余额宝A/B/C', '天弘余额宝'),
+    ('广发医疗保健股票A类', '广发医疗保健股票'),
+    ('华夏成长混合(后端)', '华夏成长混合'),
+    ('某某债券A(前端：000001 后端：000002)', '某某债券'),
+    ('南方原油(QDII-LOF)C', '南方原油(QDII-LOF)'),
+    # 名称以大写字母结尾但不是份额标记
+    ('易方达上证50ETF', '易方达上证50ETF'),
+    ('华宝油气(LOF)', '华宝油气(LOF)'),
+])
+def test_family_name(name, family):
+    assert family_name(name) == family
+
+
+def test_index_groups_share_classes():
+    index = ShareClassIndex([
+        {'symbol': '000003', 'sname': '博时信用债券A/B'},
+        {'symbol': '000001', 'sname': '华夏成长混合'},
+        {'symbol': '000004', 'sname': '博时信用债券C'},
+        {'symbol': '000002', 'sname': '华夏成长混合(后端)'},
+        {'symbol': '000005', 'sname': ''},
+    ])
+
+    assert len(index) == 3
+    assert index.members('000004') == ['000003', '000004']
+    assert index.representative('000002') == '000001'
+    # 没有名称的基金各自成组，不认识的代码只返回自身
+    assert index.members('000005') == ['000005']
+    assert index.members('999999') == ['999999']
+    assert index.group(['000004', '000001', '000003']) == {
+        '博时信用债券': ['000004', '000003'],
+        '华夏成长混合': ['000001'],
+    }
+
+
+def test_deduplicate_keeps_smallest_symbol():
+    funds = [
+        {'symbol': '000004', 'sname': '博时信用债券C'},
+        {'symbol': '000001', 'sname': '华夏成长混合'},
+        {'symbol': '000003', 'sname': '博时信用债券A/B'},
+    ]
+
+    assert [fund['symbol'] for fund in deduplicate_funds(funds)] == ['000003', '000001']
+
+
+def test_shared_attributes():
+    attributes = {'fund_manager': '张三', 'jjlx': '债券型', 'fund_scale': '1.00亿元', 'sg_states': '开放'}
+
+    assert shared_attributes(attributes) == {'fund_manager': '张三', 'jjlx': '债券型'}
+    assert shared_attributes(None) == {}
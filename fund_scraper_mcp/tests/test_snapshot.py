@@ -0,0 +1,84 @@
+"""storage.snapshot 的增量刷新计划与快照读写"""
+from datetime import date
+
+import pytest
+
+from storage.snapshot import FundSnapshot, ListingSnapshot, plan_refresh
+
+
+TODAY = date(2026, 2, 16)
+
+
+def record(symbol, nav_date='2026-02-12', per_nav='1.0000', **fields):
+    return dict({'symbol': symbol, 'sname': '基金', 'fund_manager': '张三', 'nav_date': nav_date,
+                 'per_nav': per_nav, 'total_nav': per_nav, 'yesterday_nav': per_nav,
+                 'nav_rate': '0.00', 'nav_a': '0.00'}, **fields)
+
+
+@pytest.fixture
+def previous():
+    return {symbol: record(symbol) for symbol in ('000001', '000002', '000003', '000004')}
+
+
+def test_plan_refresh(previous):
+    listing = {
+        '000001': record('000001', fund_manager=''),
+        '000002': record('000002', nav_date='2026-02-13', per_nav='1.0100'),
+        # 格式不同但数值相同，不算变化
+        '000003': record('000003', per_nav='1.0'),
+        '000005': record('000005', fund_manager=''),
+    }
+    detail_dates = {'000001': '2026-02-15', '000002': '2026-02-10', '000003': '2026-02-09'}
+    plan = plan_refresh(['000005', '000001', '000002', '000003', '000004', '000006'],
+                        listing, previous, detail_dates, today=TODAY, max_age_days=7)
+
+    assert plan.counts == {'new': 2, 'unchanged': 3, 'changed': 1, 'stale': 2}
+    # 请求详情的顺序与 universe 一致：新基金、超过 7 天的 000003、没有获取日期的 000004
+    assert plan.fetch == ['000005', '000003', '000004', '000006']
+    assert list(plan.records) == ['000005', '000001', '000002', '000003', '000004']
+
+    # 新基金先用排行榜数据；排行榜里也没有的不输出
+    assert plan.records['000005'] == listing['000005']
+    assert '000006' not in plan.records
+    # 净值变化时只覆盖净值字段，其余沿用快照
+    assert plan.records['000002']['per_nav'] == '1.0100'
+    assert plan.records['000002']['nav_date'] == '2026-02-13'
+    assert plan.records['000002']['fund_manager'] == '张三'
+    assert plan.records['000001'] is previous['000001']
+    assert plan.records['000003']['per_nav'] == '1.0000'
+
+
+def test_plan_refresh_age_boundary(previous):
+    previous = {'000001': previous['000001']}
+    plan = plan_refresh(['000001'], {}, previous, {'000001': '2026-02-10'}, today=TODAY, max_age_days=7)
+    assert plan.fetch == []
+    assert plan.counts['unchanged'] == 1
+
+    plan = plan_refresh(['000001'], {}, previous, {'000001': '2026-02-09'}, today=TODAY, max_age_days=7)
+    assert plan.fetch == ['000001']
+    assert plan.counts['stale'] == 1
+
+
+def test_fund_snapshot_merge(tmp_path):
+    snapshot = FundSnapshot(tmp_path / 'snapshot.json')
+    assert snapshot.load() == ({}, {})
+
+    snapshot.save([record('000001'), record('000002')], {'000001': '2026-02-01', '000002': '2026-02-01'})
+    snapshot.merge([record('000002', per_nav='2.0000')], fetched_on='2026-02-16')
+    records, detail_dates = snapshot.load()
+
+    assert records['000001'] == record('000001')
+    assert records['000002']['per_nav'] == '2.0000'
+    assert detail_dates == {'000001': '2026-02-01', '000002': '2026-02-16'}
+
+
+def test_listing_snapshot_round_trip(tmp_path):
+    listing = ListingSnapshot(tmp_path / 'listing.json')
+    assert listing.load() == ([], None)
+    assert listing.saved_at() is None
+
+    listing.save(['symbol', 'per_nav'], [('000001', 1.0), ('000002', None)])
+    rows, saved_at = listing.load()
+
+    assert rows == [{'symbol': '000001', 'per_nav': 1.0}, {'symbol': '000002', 'per_nav': None}]
+    assert saved_at is not None and listing.saved_at() is not None
@@ -1,3 +1,13 @@
 from .anti_detection import AntiDetection
+from .resource_blocker import ResourceBlocker
+from .stage_timer import StageTimer
+from .rate_limiter import RateLimiter, AdaptiveTokenBucket, get_rate_limiter
+from .retry import ErrorKind, ScrapeError, RetryPolicy, CircuitBreaker, count_by_type
+from .result_cache import ResultCache
+from .response_encoding import ResponseEncoder
+from .single_flight import SingleFlight
+from .share_class import ShareClassIndex, deduplicate_funds
 
-__all__ = ['AntiDetection']
+__all__ = ['AntiDetection', 'ResourceBlocker', 'StageTimer', 'RateLimiter', 'AdaptiveTokenBucket', 'get_rate_limiter',
+           'ErrorKind', 'ScrapeError', 'RetryPolicy', 'CircuitBreaker', 'count_by_type', 'ResultCache',
+           'ResponseEncoder', 'SingleFlight', 'ShareClassIndex', 'deduplicate_funds']
@@ -0,0 +1,271 @@
+"""
+天天基金排行榜接口（rankhandler.aspx）响应解析器
+
+响应格式：
+  var rankData = {datas:["000001,华夏成长混合,HXCZHH,2026-01-30,1.1670,3.7400,-0.51,...", ...],
+                  allRecords:26000,pageIndex:1,pageNum:500,allPages:52,...};
+
+datas 数组按字符串词法单遍扫描并逐行惰性产出，不依赖正则整体截取，
+字符串中的转义引号、基金名称中的逗号都能正确处理
+"""
+import json
+import re
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+
+class RankParseError(Exception):
+    """排行榜响应格式无法识别"""
+
+
+class RankRow(NamedTuple):
+    """排行榜一行数据（数值字段已转换，缺失为 None）"""
+    symbol: str                         # [0] 基金代码
+    sname: str                          # [1] 基金名称
+    abbr: str                           # [2] 拼音缩写
+    nav_date: str                       # [3] 净值日期
+    per_nav: Optional[float]            # [4] 单位净值
+    total_nav: Optional[float]          # [5] 累计净值
+    nav_rate: Optional[float]           # [6] 日增长率(%)
+    week_rate: Optional[float]          # [7] 近1周
+    month_rate: Optional[float]         # [8] 近1月
+    quarter_rate: Optional[float]       # [9] 近3月
+    half_year_rate: Optional[float]     # [10] 近6月
+    year_rate: Optional[float]          # [11] 近1年
+    two_year_rate: Optional[float]      # [12] 近2年
+    three_year_rate: Optional[float]    # [13] 近3年
+    ytd_rate: Optional[float]           # [14] 今年来
+    since_inception_rate: Optional[float]  # [15] 成立来
+    establishment_date: str             # [16] 成立日期
+    fields: Tuple[str, ...]             # 原始字段（名称中的逗号已合并）
+
+
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}$')
+_META_RE = re.compile(r'(\w+)\s*:\s*(-?\d+(?:\.\d+)?|"(?:[^"\\]|\\.)*")')
+_DATAS_RE = re.compile(r'datas\s*:\s*\[')
+
+# 一行至少需要的字段数（到净值日期为止）
+MIN_FIELDS = 4
+
+# 排行榜接口每行的字段数（末尾逗号后的空串也计入）；多出的字段来自基金名称中的逗号
+ROW_FIELDS = 25
+
+
+def _to_float(value: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        value = value.strip().rstrip('%')
+        try:
+            return float(value) if value and value != '--' else None
+        except ValueError:
+            return None
+
+
+def split_row(row: str) -> Tuple[str, ...]:
+    """
+    拆分一行字段
+
+    字段数超过 ROW_FIELDS 时，多出的片段来自基金名称（第 2 列）中的逗号：
+    在可能的位置中找到净值日期并把之前的片段合并回名称；净值日期为空时按多出的字段数合并
+    """
+    fields = row.split(',')
+    extra = len(fields) - ROW_FIELDS
+    if extra > 0 and not _DATE_RE.match(fields[3]):
+        date_idx = next((idx for idx in range(4, 4 + extra) if _DATE_RE.match(fields[idx])), 3 + extra)
+        name = ','.join(fields[1:date_idx - 1])
+        fields = [fields[0], name] + fields[date_idx - 1:]
+    return tuple(fields)
+
+
+# RankRow 中除 fields 外的列数
+_ROW_WIDTH = len(RankRow._fields) - 1
+
+
+def make_row(fields: Tuple[str, ...]) -> RankRow:
+    """由原始字段构造 RankRow"""
+    f = fields if len(fields) >= _ROW_WIDTH else fields + ('',) * (_ROW_WIDTH - len(fields))
+    to_float = _to_float
+    return RankRow(
+        f[0], f[1], f[2], f[3],
+        to_float(f[4]), to_float(f[5]), to_float(f[6]), to_float(f[7]),
+        to_float(f[8]), to_float(f[9]), to_float(f[10]), to_float(f[11]),
+        to_float(f[12]), to_float(f[13]), to_float(f[14]), to_float(f[15]),
+        f[16], fields,
+    )
+
+
+class RankData:
+    """
+    排行榜响应
+
+    meta 只解析 datas 数组之后的少量文本；rows()/raw_rows() 每次调用都单遍扫描 datas 数组，
+    逐行产出，不构造中间列表
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        if 'ErrCode:-999' in content or '无访问权限' in content:
+            raise RankParseError("API访问被拒绝")
+
+        m = _DATAS_RE.search(content)
+        if not m:
+            raise RankParseError("响应中没有 datas 数组")
+        self._datas_start = m.end()
+        self._meta: Optional[Dict[str, Union[int, float, str]]] = None
+
+    @property
+    def meta(self) -> Dict[str, Union[int, float, str]]:
+        """datas 之后的元数据：allRecords、pageIndex、pageNum、allPages 及各类型数量"""
+        if self._meta is None:
+            # 元数据只含数字，位于最后一个 ']' 之后
+            tail_start = self.content.rfind(']')
+            tail = self.content[tail_start + 1:] if tail_start >= self._datas_start else ''
+            meta: Dict[str, Union[int, float, str]] = {}
+            for key, value in _META_RE.findall(tail):
+                if value.startswith('"'):
+                    meta[key] = json.loads(value)
+                elif '.' in value:
+                    meta[key] = float(value)
+                else:
+                    meta[key] = int(value)
+            self._meta = meta
+        return self._meta
+
+    @property
+    def all_records(self) -> Optional[int]:
+        return self.meta.get('allRecords')
+
+    @property
+    def page_index(self) -> Optional[int]:
+        return self.meta.get('pageIndex')
+
+    @property
+    def all_pages(self) -> Optional[int]:
+        return self.meta.get('allPages')
+
+    def raw_rows(self) -> Iterator[str]:
+        """逐个产出 datas 数组中的字符串"""
+        text = self.content
+        n = len(text)
+        i = self._datas_start
+
+        while True:
+            # 跳过空白和分隔逗号
+            while i < n and text[i] in ' \t\r\n,':
+                i += 1
+            if i >= n:
+                raise RankParseError("datas 数组未结束")
+            ch = text[i]
+            if ch == ']':
+                return
+            if ch != '"':
+                raise RankParseError(f"datas 数组第 {i} 个字符处应为字符串")
+
+            # 找到未被转义的结束引号
+            j = i + 1
+            has_escape = False
+            while True:
+                j = text.find('"', j)
+                if j < 0:
+                    raise RankParseError("字符串未结束")
+                backslashes = 0
+                k = j - 1
+                while text[k] == '\\':
+                    backslashes += 1
+                    k -= 1
+                if backslashes % 2 == 0:
+                    break
+                has_escape = True
+                j += 1
+
+            if has_escape or text.find('\\', i + 1, j) >= 0:
+                yield json.loads(text[i:j + 1])
+            else:
+                yield text[i + 1:j]
+            i = j + 1
+
+    def rows(self) -> Iterator[RankRow]:
+        """逐行产出 RankRow，跳过字段数不足的行"""
+        for raw in self.raw_rows():
+            if not raw.strip():
+                continue
+            fields = split_row(raw)
+            if len(fields) < MIN_FIELDS:
+                continue
+            yield make_row(fields)
+
+
+def parse_rank_data(content: str) -> RankData:
+    """解析 rankhandler.aspx 响应"""
+    return RankData(content)
+
+
+def build_rank_params(page, page_size):
+    """构造排行榜API请求参数"""
+    return {
+        'op': 'ph',      # 排行榜
+        'dt': 'kf',      # 开放式基金
+        'ft': 'all',     # 所有类型
+        'rs': '',
+        'gs': '0',
+        'sc': 'zzf',     # 按规模排序
+        'st': 'desc',    # 降序
+        'sd': '2020-01-01',
+        'ed': '2099-12-31',
+        'qdii': '',
+        'tabSubtype': ',,,,,',
+        'pi': str(page),
+        'pn': str(page_size),
+        'dx': '1'
+    }
+
+
+# 排行榜中供本地筛选保存的字段（RankRow 中除拼音缩写和原始字段外的各列）
+LISTING_FIELDS = tuple(field for field in RankRow._fields if field not in ('abbr', 'fields'))
+
+
+def row_to_listing(row: RankRow) -> Tuple:
+    """RankRow 转为 LISTING_FIELDS 顺序的值"""
+    return row[:2] + row[3:_ROW_WIDTH]
+
+
+def row_to_fund(fields):
+    """
+    将排行榜一行字段转换为12个字段的基金记录
+
+    排行榜不提供申购状态、基金经理、类型和规模，这些字段留空，由详情页或属性缓存补全
+    """
+    nav_rate_str = fields[6] if len(fields) > 6 else '0'
+    nav_rate = nav_rate_str.replace('%', '').strip()
+
+    fund = {
+        'symbol': fields[0],              # [0] 基金代码
+        'sname': fields[1],               # [1] 基金名称
+        'nav_date': fields[3],            # [3] 净值日期
+        'per_nav': fields[4],             # [4] 单位净值
+        'total_nav': fields[5],           # [5] 累计净值
+        'nav_rate': nav_rate,             # [6] 日增长率
+        'nav_a': '',                      # 涨跌额（需计算）
+        'yesterday_nav': '',              # 前一日净值（需计算）
+        'sg_states': '',                  # 申购状态（API不提供）
+        'fund_manager': '',               # 基金经理（API不提供）
+        'jjlx': '',                       # 基金类型（API不提供）
+        'jjzfe': ''                       # 基金规模（API不提供；[14] 是今年来收益率，不是规模）
+    }
+
+    # 计算前一日净值和涨跌额
+    if fund['per_nav'] and fund['nav_rate']:
+        try:
+            per_nav = float(fund['per_nav'])
+            rate = float(fund['nav_rate'])
+            yesterday_nav = per_nav / (1 + rate / 100)
+            nav_a = per_nav - yesterday_nav
+
+            fund['yesterday_nav'] = str(round(yesterday_nav, 4))
+            fund['nav_a'] = str(round(nav_a, 4))
+        except (ValueError, ZeroDivisionError):
+            pass
+
+    return fund
@@ -0,0 +1,232 @@
+"""
+自适应令牌桶限速
+按接口族（详情页、F10 页、排行榜 API）分别限速：
+响应正常时加性提高速率，超时、非 200 或被拒绝访问时乘性降低速率（AIMD）；
+错误率过高时由熔断器暂停整个接口族
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from .retry import CircuitBreaker, HEALTH_FAILURE_KINDS
+
+
+# 被拒绝访问时响应中出现的标记
+BLOCKED_MARKERS = ('ErrCode:-999', '无访问权限')
+
+
+def is_blocked_response(text: str) -> bool:
+    """响应内容是否为拒绝访问"""
+    return any(marker in text for marker in BLOCKED_MARKERS)
+
+
+class AdaptiveTokenBucket:
+    """
+    单个接口族的令牌桶
+
+    acquire 预占令牌：令牌不足时余额变为负数，调用方按欠额等待，
+    因此并发调用方会自然排队，整体速率不超过 rate
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 1.0,
+        min_rate: float = 0.1,
+        max_rate: float = 10.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        decrease_cooldown: float = 2.0,
+        jitter: float = 0.2
+    ):
+        """
+        Args:
+            rate: 起始速率（请求/秒）
+            burst: 桶容量（允许的突发请求数）
+            min_rate: 速率下限
+            max_rate: 速率上限
+            increase: 每次正常响应增加的速率（加性增）
+            decrease: 出错时速率乘以的系数（乘性减）
+            decrease_cooldown: 两次降速的最小间隔（秒），避免一批并发失败连续降速
+            jitter: 等待时间的随机抖动比例，模拟人类行为
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_cooldown = decrease_cooldown
+        self.jitter = jitter
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+        self.successes = 0
+        self.failures = 0
+
+    def _reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+        return wait * (1 + random.uniform(0, self.jitter))
+
+    async def acquire(self) -> None:
+        """异步获取令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        """同步获取令牌（线程中使用）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def set_rate(self, rate: float) -> None:
+        """重置当前速率（限制在上下限之间）"""
+        with self._lock:
+            self.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def record_success(self) -> None:
+        """正常响应：加性提高速率"""
+        with self._lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_failure(self) -> None:
+        """超时、非 200 或拒绝访问：乘性降低速率"""
+        with self._lock:
+            self.failures += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+
+    def get_stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class RateLimiter:
+    """按接口族管理令牌桶"""
+
+    # 接口族默认参数
+    FAMILY_DEFAULTS: Dict[str, dict] = {
+        'detail': {'rate': 1.0, 'min_rate': 0.2, 'max_rate': 8.0},   # 基金详情页 /{symbol}.html
+        'f10': {'rate': 1.0, 'min_rate': 0.2, 'max_rate': 8.0},      # F10 页面 /f10/...
+        'rank': {'rate': 4.0, 'min_rate': 0.2, 'max_rate': 16.0, 'increase': 0.25},  # 排行榜 rankhandler.aspx / fundranking.html
+    }
+
+    def __init__(
+        self,
+        family_config: Optional[Dict[str, dict]] = None,
+        breaker_config: Optional[dict] = None
+    ):
+        """
+        Args:
+            family_config: 各接口族令牌桶参数，覆盖 FAMILY_DEFAULTS
+            breaker_config: 熔断器参数（所有接口族共用）
+        """
+        self._config = {name: dict(cfg) for name, cfg in self.FAMILY_DEFAULTS.items()}
+        for name, cfg in (family_config or {}).items():
+            self._config.setdefault(name, {}).update(cfg)
+        self._breaker_config = dict(breaker_config or {})
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, family: str) -> AdaptiveTokenBucket:
+        """获取接口族的令牌桶（首次使用时创建）"""
+        with self._lock:
+            bucket = self._buckets.get(family)
+            if bucket is None:
+                bucket = self._buckets[family] = AdaptiveTokenBucket(**self._config.get(family, {}))
+            return bucket
+
+    def breaker(self, family: str) -> CircuitBreaker:
+        """获取接口族的熔断器（首次使用时创建）"""
+        with self._lock:
+            breaker = self._breakers.get(family)
+            if breaker is None:
+                breaker = self._breakers[family] = CircuitBreaker(**self._breaker_config)
+            return breaker
+
+    async def acquire(self, family: str) -> None:
+        """等待熔断器放行，再取令牌"""
+        await self.breaker(family).wait()
+        await self.bucket(family).acquire()
+
+    def acquire_sync(self, family: str) -> None:
+        self.breaker(family).wait_sync()
+        self.bucket(family).acquire_sync()
+
+    def set_rate(self, family: str, rate: float) -> None:
+        self.bucket(family).set_rate(rate)
+
+    def set_delay(self, family: str, delay: float) -> None:
+        """按"每个请求间隔 delay 秒"设置起始速率；delay <= 0 时使用速率上限"""
+        bucket = self.bucket(family)
+        bucket.set_rate(1.0 / delay if delay > 0 else bucket.max_rate)
+
+    def record_success(self, family: str) -> None:
+        self.bucket(family).record_success()
+        self.breaker(family).record(True)
+
+    def record_failure(self, family: str) -> None:
+        self.bucket(family).record_failure()
+        self.breaker(family).record(False)
+
+    def record_result(self, family: str, error_kind: Optional[str] = None) -> None:
+        """
+        按错误类型记录一次请求结果
+
+        error_kind 为 None 表示成功；超时/被拒绝计为失败；
+        其他错误（选择器缺失、解析失败等）说明站点有响应，不调整速率，只告知熔断器
+        """
+        if error_kind is None:
+            self.record_success(family)
+        elif error_kind in HEALTH_FAILURE_KINDS:
+            self.record_failure(family)
+        else:
+            self.breaker(family).record(True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            buckets = dict(self._buckets)
+            breakers = dict(self._breakers)
+        stats = {}
+        for name, bucket in buckets.items():
+            stats[name] = bucket.get_stats()
+            if name in breakers:
+                stats[name]["circuit"] = breakers[name].get_stats()
+        return stats
+
+
+# 进程内共享的限速器：爬虫、快速获取脚本、图形界面都从这里取令牌
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限速器"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
@@ -0,0 +1,129 @@
+"""
+资源拦截策略
+通过 context.route 拦截爬取时不需要的资源（图片、字体、样式、广告、统计脚本等）
+"""
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+
+class ResourceBlocker:
+    """请求拦截器 - 按资源类型和域名决定放行或拦截，并统计节省的请求和流量"""
+
+    # 提取数据用不到的资源类型
+    DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font', 'stylesheet', 'texttrack', 'eventsource', 'manifest')
+
+    # 第一方域名：天天基金页面本身及其脚本 CDN（#jztable、#dbtable 由这些脚本渲染）
+    DEFAULT_ALLOWED_DOMAINS = ('eastmoney.com', 'dfcfw.com', '1234567.com.cn')
+
+    # 各类型资源的典型大小（字节），用于估算被拦截请求节省的流量
+    TYPICAL_SIZES = {
+        'image': 20_000,
+        'media': 200_000,
+        'font': 40_000,
+        'stylesheet': 15_000,
+        'script': 30_000,
+        'document': 30_000,
+        'xhr': 5_000,
+        'fetch': 5_000,
+    }
+    DEFAULT_TYPICAL_SIZE = 5_000
+
+    def __init__(
+        self,
+        blocked_types: Optional[Iterable[str]] = None,
+        allowed_domains: Optional[Iterable[str]] = None,
+        blocked_url_keywords: Optional[Iterable[str]] = None,
+        block_third_party: bool = True
+    ):
+        """
+        Args:
+            blocked_types: 拦截的资源类型（Playwright resource_type）
+            allowed_domains: 第一方域名（含子域名），其余域名视为第三方
+            blocked_url_keywords: URL 中包含这些关键字的请求一律拦截（广告、统计等）
+            block_third_party: 是否拦截第三方域名的请求
+        """
+        self.blocked_types = frozenset(self.DEFAULT_BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.allowed_domains = tuple(self.DEFAULT_ALLOWED_DOMAINS if allowed_domains is None else allowed_domains)
+        self.blocked_url_keywords = tuple(blocked_url_keywords or ())
+        self.block_third_party = block_third_party
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """清空本次运行的统计"""
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+        self.blocked_requests = 0
+        self.blocked_bytes_estimate = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.blocked_by_reason: Dict[str, int] = {}
+
+    def is_first_party(self, host: str) -> bool:
+        """判断域名是否属于第一方（含子域名）"""
+        host = host.lower()
+        return any(host == d or host.endswith('.' + d) for d in self.allowed_domains)
+
+    def block_reason(self, url: str, resource_type: str, is_main_navigation: bool = False) -> Optional[str]:
+        """
+        判断请求是否应被拦截
+
+        Returns:
+            拦截原因（'type' / 'keyword' / 'third_party'），放行时返回 None
+        """
+        # 主框架导航（即 page.goto 的目标）永远放行
+        if is_main_navigation:
+            return None
+
+        if resource_type in self.blocked_types:
+            return 'type'
+
+        if any(keyword in url for keyword in self.blocked_url_keywords):
+            return 'keyword'
+
+        if self.block_third_party:
+            host = urlsplit(url).hostname or ''
+            if host and not self.is_first_party(host):
+                return 'third_party'
+
+        return None
+
+    async def handle(self, route) -> None:
+        """context.route 回调"""
+        request = route.request
+        try:
+            is_main_navigation = request.is_navigation_request() and request.frame.parent_frame is None
+        except Exception:
+            is_main_navigation = False
+
+        reason = self.block_reason(request.url, request.resource_type, is_main_navigation)
+        if reason is None:
+            self.allowed_requests += 1
+            await route.continue_()
+            return
+
+        self.blocked_requests += 1
+        self.blocked_bytes_estimate += self.TYPICAL_SIZES.get(request.resource_type, self.DEFAULT_TYPICAL_SIZE)
+        self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+        self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+        await route.abort('blockedbyclient')
+
+    def on_response(self, response) -> None:
+        """context 'response' 事件回调：累计放行请求实际下载的字节数"""
+        try:
+            length = response.headers.get('content-length')
+            if length:
+                self.allowed_bytes += int(length)
+        except (ValueError, TypeError):
+            pass
+
+    def get_stats(self) -> dict:
+        """获取本次运行的拦截统计"""
+        total = self.allowed_requests + self.blocked_requests
+        return {
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+            "blocked_requests": self.blocked_requests,
+            "blocked_ratio": round(self.blocked_requests / total, 3) if total else 0.0,
+            "saved_bytes_estimate": self.blocked_bytes_estimate,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_reason": dict(self.blocked_by_reason),
+        }
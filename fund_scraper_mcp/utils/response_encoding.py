@@ -0,0 +1,191 @@
+"""
+工具调用结果的编码与分页
+结果的 data 为记录列表时可以选择编码方式：
+
+  rows      记录列表（默认，每条记录重复所有字段名）
+  columnar  {"fields": [字段...], "rows": [[值...], ...]}，字段名只出现一次
+  csv       带表头的 CSV 文本
+
+序列化优先使用 orjson（可选依赖），否则使用紧凑格式的标准库 json；
+响应超过字节上限时只返回能放下的前若干条记录，其余保存在服务端，凭 next_cursor 继续读取
+"""
+import csv
+import io
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .result_cache import ResultCache
+
+try:
+    import orjson
+except ImportError:     # 可选依赖
+    orjson = None
+
+
+ENCODINGS = ('rows', 'columnar', 'csv')
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON（有 orjson 时使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def is_record_list(data: Any) -> bool:
+    """data 是否为可按行编码的记录列表"""
+    return isinstance(data, list) and bool(data) and all(isinstance(item, dict) for item in data)
+
+
+def record_fields(records: List[Dict[str, Any]]) -> List[str]:
+    """所有记录的字段（按首次出现的顺序）"""
+    fields: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            if key not in fields:
+                fields[key] = None
+    return list(fields)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode('utf-8')
+    return value
+
+
+def _csv_text(fields: List[str], rows: List[List[Any]], header: bool = True) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(fields)
+    writer.writerows([[_csv_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+def encode_data(records: List[Dict[str, Any]], encoding: str, fields: Optional[List[str]] = None) -> Any:
+    """按编码方式转换记录列表"""
+    if encoding == 'rows':
+        return records
+    fields = fields or record_fields(records)
+    rows = [[record.get(field) for field in fields] for record in records]
+    if encoding == 'columnar':
+        return {'fields': fields, 'rows': rows}
+    if encoding == 'csv':
+        return _csv_text(fields, rows)
+    raise ValueError(f"未知的编码方式: {encoding}，可选: {', '.join(ENCODINGS)}")
+
+
+def _row_sizes(records: List[Dict[str, Any]], encoding: str, fields: List[str]) -> List[int]:
+    """每条记录编码后的字节数（估算分页用）"""
+    if encoding == 'rows':
+        return [len(dumps(record)) + 1 for record in records]
+    rows = [[record.get(field) for field in fields] for record in records]
+    if encoding == 'columnar':
+        return [len(dumps(row)) + 1 for row in rows]
+    # CSV 文本在 JSON 中还会转义引号和换行，按转义后的长度计算
+    return [len(dumps(_csv_text(fields, [row], header=False))) - 2 for row in rows]
+
+
+class ResponseEncoder:
+    """按编码方式序列化工具结果，超过字节上限时分页"""
+
+    def __init__(self, page_ttl: float = 600, max_pending: int = 256 * 1024 * 1024):
+        """
+        Args:
+            page_ttl: 未读完的结果在服务端保留多久（秒）
+            max_pending: 服务端保留的未读完结果总大小上限（字节，超出时淘汰最久未读的）
+        """
+        self.page_ttl = page_ttl
+        self._pending = ResultCache(max_size=max_pending)
+
+    def encode(self, result: Dict[str, Any], encoding: str = 'rows', max_bytes: Optional[int] = None) -> bytes:
+        """
+        序列化结果
+
+        Args:
+            result: 工具结果（data 为记录列表时按 encoding 编码）
+            encoding: rows / columnar / csv
+            max_bytes: 响应字节上限（None 表示不限制）；超出时返回第一页和 next_cursor
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"未知的编码方式: {encoding}，可选: {', '.join(ENCODINGS)}")
+        data = result.get('data')
+        if not is_record_list(data):
+            return dumps(result)
+        if encoding == 'rows' and not max_bytes:
+            return dumps(result)
+
+        fields = record_fields(data)
+        if max_bytes:
+            sizes = _row_sizes(data, encoding, fields)
+            payload = self._page(result, fields, encoding, sizes, max_bytes, 0, None)
+            if payload is not None:
+                return payload
+        return dumps(self._with_data(result, encode_data(data, encoding, fields), encoding))
+
+    def next_page(self, cursor: str, max_bytes: Optional[int] = None) -> bytes:
+        """按 next_cursor 读取下一页（编码方式与第一页相同）"""
+        token, _, offset = cursor.rpartition(':')
+        entry, state = self._pending.get(token)
+        if state == ResultCache.MISS or not offset.isdigit():
+            return dumps({'success': False, 'error': f"游标无效或已过期: {cursor}"})
+        result, fields, encoding, sizes, page_bytes = entry
+        data = result['data']
+        if int(offset) > len(data):
+            return dumps({'success': False, 'error': f"游标无效或已过期: {cursor}"})
+        payload = self._page(result, fields, encoding, sizes, max_bytes or page_bytes, int(offset), token)
+        if payload is None:
+            # 剩余部分一页就能放下
+            rest = data[int(offset):]
+            payload = dumps(self._with_data(
+                result, encode_data(rest, encoding, fields), encoding,
+                offset=int(offset), returned=len(rest), total_rows=len(data)
+            ))
+        return payload
+
+    @staticmethod
+    def _with_data(result: Dict[str, Any], data: Any, encoding: str, **extra) -> Dict[str, Any]:
+        encoded = dict(result, data=data, **extra)
+        if encoding != 'rows':
+            encoded['encoding'] = encoding
+        return encoded
+
+    def _page(
+        self,
+        result: Dict[str, Any],
+        fields: List[str],
+        encoding: str,
+        sizes: List[int],
+        max_bytes: int,
+        offset: int,
+        token: Optional[str]
+    ) -> Optional[bytes]:
+        """从 offset 开始取能放进 max_bytes 的记录；剩余记录一页就能放下时返回 None"""
+        data = result['data']
+        # 外层字段（success、统计信息、CSV 表头、游标等）的大小，按空 data 估算并留出余量
+        envelope = len(dumps(self._with_data(result, encode_data([], encoding, fields), encoding))) + 128
+        if envelope + sum(sizes[offset:]) <= max_bytes:
+            return None
+
+        budget = max_bytes - envelope
+        end = offset
+        while end < len(data) and (end == offset or budget >= sizes[end]):
+            budget -= sizes[end]
+            end += 1
+
+        if token is None:
+            token = uuid.uuid4().hex
+            self._pending.put(token, (result, fields, encoding, sizes, max_bytes), self.page_ttl,
+                              size=sum(sizes) + envelope)
+        page = data[offset:end]
+        count = end - offset
+        next_offset = end
+        return dumps(self._with_data(
+            result, encode_data(page, encoding, fields), encoding,
+            offset=offset, returned=count, total_rows=len(data),
+            next_cursor=f"{token}:{next_offset}" if next_offset < len(data) else None
+        ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'serializer': 'orjson' if orjson is not None else 'json', 'pending_pages': self._pending.get_stats()}
@@ -0,0 +1,107 @@
+"""
+工具调用结果缓存
+按 (工具名, 规范化参数) 缓存结果：每条结果有自己的有效期，总大小超出上限时淘汰最久未使用的条目（LRU）；
+可选保留过期条目一段时间，供调用方先返回旧结果、再在后台刷新
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional, Tuple
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    stale_until: float
+    size: int
+
+
+class ResultCache:
+    """TTL + LRU 结果缓存"""
+
+    HIT = "hit"
+    STALE = "stale"
+    MISS = "miss"
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024, max_entries: int = 2048):
+        """
+        Args:
+            max_size: 缓存总大小上限（单位由调用方 put 时的 size 决定，通常为字节）
+            max_entries: 条目数上限
+        """
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """
+        查询缓存
+
+        Returns:
+            (结果, 状态)：状态为 hit（未过期）、stale（已过期但仍在保留期内）或 miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None, self.MISS
+
+        now = time.monotonic()
+        if now >= entry.stale_until:
+            self._remove(key)
+            self._stats["misses"] += 1
+            return None, self.MISS
+
+        self._entries.move_to_end(key)
+        if now < entry.expires_at:
+            self._stats["hits"] += 1
+            return entry.value, self.HIT
+        self._stats["stale_hits"] += 1
+        return entry.value, self.STALE
+
+    def put(self, key: Hashable, value: Any, ttl: float, size: int = 1, stale_for: float = 0.0) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 结果
+            ttl: 有效期（秒）
+            size: 条目大小（计入 max_size）
+            stale_for: 过期后继续保留多久（秒），期间 get 返回 stale
+        """
+        if size > self.max_size:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, now + ttl, now + ttl + stale_for, size)
+        self._size += size
+
+        while self._size > self.max_size or len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """删除指定条目；key 为 None 时清空"""
+        if key is None:
+            self._entries.clear()
+            self._size = 0
+        elif key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def get_stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
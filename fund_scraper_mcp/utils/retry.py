@@ -0,0 +1,255 @@
+"""
+重试与熔断
+- 错误分类：超时、被拒绝、选择器缺失、解析失败、不存在
+- 重试策略：仅重试可恢复的错误，指数退避 + 随机抖动
+- 熔断器：接口族错误率过高时暂停该接口族的请求，冷却后放行一个探测请求
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ErrorKind:
+    """错误类型（写入响应的 error_type 字段）"""
+    TIMEOUT = "timeout"                    # 导航/请求超时、网络错误、5xx
+    BLOCKED = "blocked"                    # 403/429、ErrCode:-999、无访问权限
+    SELECTOR_MISSING = "selector_missing"  # 页面加载了但等不到数据区块
+    PARSE_FAILURE = "parse_failure"        # 页面内容无法解析
+    NOT_FOUND = "not_found"                # 404，基金页面不存在
+    UNKNOWN = "unknown"
+
+
+# 可以通过重试恢复的错误
+RETRYABLE_KINDS = frozenset((ErrorKind.TIMEOUT, ErrorKind.BLOCKED))
+
+# 反映站点健康状况、计入熔断器的错误
+HEALTH_FAILURE_KINDS = frozenset((ErrorKind.TIMEOUT, ErrorKind.BLOCKED))
+
+
+class ScrapeError(Exception):
+    """带错误类型的抓取异常"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def classify_status(status: int) -> Optional[str]:
+    """按 HTTP 状态码分类，正常状态返回 None"""
+    if status in (403, 429):
+        return ErrorKind.BLOCKED
+    if status == 404:
+        return ErrorKind.NOT_FOUND
+    if status >= 500:
+        return ErrorKind.TIMEOUT
+    if status >= 400:
+        return ErrorKind.UNKNOWN
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """把异常归类为 ErrorKind"""
+    if isinstance(error, ScrapeError):
+        return error.kind
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return ErrorKind.TIMEOUT
+    # Playwright、aiohttp、requests 的超时/连接异常不共享基类，按类名判断
+    name = type(error).__name__
+    if 'Timeout' in name or 'Connect' in name or 'Connection' in name:
+        return ErrorKind.TIMEOUT
+    return ErrorKind.UNKNOWN
+
+
+def count_by_type(failed: Dict[Any, str]) -> Dict[str, int]:
+    """按错误类型统计失败数（failed: {基金代码或序号: 错误类型}）"""
+    counts: Dict[str, int] = {}
+    for kind in failed.values():
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+class RetryPolicy:
+    """指数退避重试策略（full jitter）"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        retryable: frozenset = RETRYABLE_KINDS
+    ):
+        """
+        Args:
+            max_attempts: 最多尝试次数（含第一次）
+            base_delay: 退避基数（秒），第 n 次重试前最多等待 base_delay * 2^(n-1)
+            max_delay: 单次退避上限（秒）
+            retryable: 允许重试的错误类型
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间（attempt 从 1 开始）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def should_retry(self, result: Dict[str, Any]) -> bool:
+        return not result.get('success') and result.get('error_type') in self.retryable
+
+    async def run(self, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        执行返回响应字典的协程，可恢复的失败按退避策略重试
+
+        Returns:
+            最后一次的响应，附带 attempts（尝试次数）
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            result = await call()
+            if attempt >= self.max_attempts or not self.should_retry(result):
+                result['attempts'] = attempt
+                return result
+            await asyncio.sleep(self.backoff(attempt))
+
+    def call_sync(self, call: Callable[[], Any]) -> Any:
+        """
+        同步执行可能抛出异常的调用，可恢复的异常（按 classify_error 分类）按退避策略重试
+
+        Returns:
+            调用的返回值
+
+        Raises:
+            最后一次的异常（不可恢复或已达到最多尝试次数）
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return call()
+            except Exception as e:
+                if attempt >= self.max_attempts or classify_error(e) not in self.retryable:
+                    raise
+            time.sleep(self.backoff(attempt))
+
+
+class CircuitBreaker:
+    """
+    接口族熔断器
+
+    closed: 正常放行；最近 window 次结果中错误率达到阈值时转为 open
+    open: 暂停请求 cooldown 秒，之后转为 half_open
+    half_open: 只放行一个探测请求；成功则 closed，失败则 open 且冷却时间加倍
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_samples: int = 10,
+        failure_threshold: float = 0.5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        probe_poll: float = 1.0,
+        probe_timeout: float = 120.0
+    ):
+        """
+        Args:
+            window: 统计错误率的滑动窗口大小
+            min_samples: 窗口内至少多少个样本才判断错误率
+            failure_threshold: 触发熔断的错误率
+            cooldown: 首次熔断的暂停时间（秒）
+            max_cooldown: 连续熔断时暂停时间上限（秒）
+            probe_poll: 探测请求进行中，其他请求的轮询间隔（秒）
+            probe_timeout: 探测请求迟迟没有结果时（如被取消），多久后允许新的探测（秒）
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_poll = probe_poll
+        self.probe_timeout = probe_timeout
+
+        self.state = self.CLOSED
+        self.trips = 0
+        self._cooldown = cooldown
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._outcomes: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _pause_seconds(self) -> float:
+        """当前需要暂停的秒数；返回 0 表示可以放行（可能作为探测请求）"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self._cooldown - now
+                if remaining > 0:
+                    return remaining
+                self.state = self.HALF_OPEN
+            # half_open：只放行一个探测请求
+            if self._probe_in_flight and now - self._probe_started < self.probe_timeout:
+                return self.probe_poll
+            self._probe_in_flight = True
+            self._probe_started = now
+            return 0.0
+
+    async def wait(self) -> None:
+        """异步等待直到允许请求"""
+        while True:
+            pause = self._pause_seconds()
+            if pause <= 0:
+                return
+            await asyncio.sleep(pause)
+
+    def wait_sync(self) -> None:
+        """同步等待直到允许请求"""
+        while True:
+            pause = self._pause_seconds()
+            if pause <= 0:
+                return
+            time.sleep(pause)
+
+    def record(self, ok: bool) -> None:
+        """记录一次请求结果"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self.state = self.CLOSED
+                    self._cooldown = self.base_cooldown
+                    self._outcomes.clear()
+                else:
+                    self._trip(min(self.max_cooldown, self._cooldown * 2))
+                return
+
+            self._outcomes.append(ok)
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_samples:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_threshold:
+                    self._trip(self._cooldown)
+
+    def _trip(self, cooldown: float) -> None:
+        self.state = self.OPEN
+        self.trips += 1
+        self._cooldown = cooldown
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {"state": self.state, "trips": self.trips}
+            if self.state == self.OPEN:
+                stats["resume_in"] = round(max(0.0, self._opened_at + self._cooldown - time.monotonic()), 1)
+            return stats
@@ -0,0 +1,77 @@
+"""
+基金份额类别识别
+同一只基金的 A/B/C 类份额、前端/后端收费份额名称只差一个后缀，共用基金经理、基金公司、基金类型和成立日期；
+按去掉份额标记后的名称分组（一次遍历，O(n)），抓取时每组只需访问一次详情页，再把共同属性分给同组的其他份额
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+# 同一基金各份额共有的属性（详情页字段名），其余字段（净值、规模、申购状态）按份额各自获取
+SHARED_ATTRIBUTES = ('fund_manager', 'fund_company', 'jjlx', 'establishment_date')
+
+# (前端：000001 后端：000002) / (前端) / (后端)
+_FRONT_BACK = re.compile(r'[(（][^()（）]*(?:前端|后端)[^()（）]*[)）]')
+# 名称末尾（或括号前）的份额字母，可以是 A/B 这样用斜杠连接的多个字母；
+# 前面不能是大写字母，避免误删 ETF / LOF / QDII 的最后一个字母
+_CLASS_SUFFIX = re.compile(r'(?<![A-Z/])[A-FHIY](?:/[A-FHIY])*类?(?=$|[(（])')
+
+
+def family_name(name: str) -> str:
+    """去掉份额标记后的基金名称（同一基金的各份额相同）"""
+    return _CLASS_SUFFIX.sub('', _FRONT_BACK.sub('', name)).strip()
+
+
+class ShareClassIndex:
+    """按基金族（去掉份额标记后的名称）分组的基金代码"""
+
+    def __init__(self, funds: Iterable[Dict[str, Any]], name_field: str = 'sname'):
+        """
+        Args:
+            funds: 含 symbol 和名称字段的记录（基金代码列表或排行榜数据）
+            name_field: 名称字段
+        """
+        self.families: Dict[str, List[str]] = {}
+        self.family_of: Dict[str, str] = {}
+        for fund in funds:
+            symbol = fund['symbol']
+            if symbol in self.family_of:
+                continue
+            family = family_name(str(fund.get(name_field) or '')) or symbol
+            self.family_of[symbol] = family
+            self.families.setdefault(family, []).append(symbol)
+
+    def __len__(self) -> int:
+        return len(self.families)
+
+    def members(self, symbol: str) -> List[str]:
+        """同一基金族的所有份额（含自身）；不认识的代码只返回自身"""
+        family = self.family_of.get(symbol)
+        return self.families[family] if family is not None else [symbol]
+
+    def representative(self, symbol: str) -> str:
+        """基金族的代表份额（代码最小的，通常是 A 类或前端）"""
+        return min(self.members(symbol))
+
+    def group(self, symbols: Sequence[str]) -> Dict[str, List[str]]:
+        """把一组基金代码按基金族分组（保持各组首次出现的顺序和组内顺序）"""
+        groups: Dict[str, List[str]] = {}
+        for symbol in symbols:
+            groups.setdefault(self.family_of.get(symbol, symbol), []).append(symbol)
+        return groups
+
+
+def deduplicate_funds(funds: Sequence[Dict[str, Any]], name_field: str = 'sname') -> List[Dict[str, Any]]:
+    """每个基金族只保留代码最小的份额（按基金族首次出现的顺序）"""
+    selected: Dict[str, Dict[str, Any]] = {}
+    for fund in funds:
+        family = family_name(str(fund.get(name_field) or '')) or fund['symbol']
+        current = selected.get(family)
+        if current is None or fund['symbol'] < current['symbol']:
+            selected[family] = fund
+    return list(selected.values())
+
+
+def shared_attributes(attributes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """只保留各份额共有的属性"""
+    return {field: value for field, value in (attributes or {}).items() if field in SHARED_ATTRIBUTES}
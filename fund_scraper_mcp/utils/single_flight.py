@@ -0,0 +1,40 @@
+"""
+并发请求合并（single-flight）
+同一个键的请求正在进行时，后到的相同请求不再重复抓取，而是等待并共享第一个请求的结果
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """按键合并进行中的协程调用"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行 call；同一个键已有调用在进行时，等待那次调用的结果
+
+        某个等待者被取消不会取消共享的调用，其他等待者仍能拿到结果
+        """
+        self._stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def get_stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._in_flight)}
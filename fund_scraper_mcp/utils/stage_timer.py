@@ -0,0 +1,79 @@
+"""
+分阶段耗时统计
+记录每次抓取在导航、等待就绪、提取等阶段的耗时，用于对比 p50/p95
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict
+
+
+class StageRun:
+    """单次抓取的计时器，每调用一次 mark 记录一个阶段"""
+
+    def __init__(self, timer: "StageTimer", operation: str):
+        self._timer = timer
+        self._operation = operation
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def mark(self, stage: str) -> float:
+        """记录从上一个阶段结束到现在的耗时（秒）"""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self._timer.record(self._operation, stage, elapsed)
+        return elapsed
+
+    def finish(self) -> float:
+        """记录本次抓取的总耗时（秒）"""
+        elapsed = time.perf_counter() - self._start
+        self._timer.record(self._operation, 'total', elapsed)
+        return elapsed
+
+
+class StageTimer:
+    """按 (操作, 阶段) 保存最近的耗时样本并计算分位数"""
+
+    def __init__(self, max_samples: int = 5000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Dict[str, Deque[float]]] = {}
+
+    def start(self, operation: str) -> StageRun:
+        """开始一次抓取计时"""
+        return StageRun(self, operation)
+
+    def record(self, operation: str, stage: str, seconds: float) -> None:
+        """记录一个耗时样本"""
+        stages = self._samples.setdefault(operation, {})
+        samples = stages.get(stage)
+        if samples is None:
+            samples = stages[stage] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+
+    @staticmethod
+    def _percentile(sorted_values, pct: float) -> float:
+        """最近秩法分位数"""
+        if not sorted_values:
+            return 0.0
+        idx = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+        return sorted_values[idx]
+
+    def summary(self) -> dict:
+        """各操作各阶段的样本数、均值、p50、p95（毫秒）"""
+        result = {}
+        for operation, stages in self._samples.items():
+            result[operation] = {}
+            for stage, samples in stages.items():
+                values = sorted(samples)
+                result[operation][stage] = {
+                    "count": len(values),
+                    "mean_ms": round(sum(values) / len(values) * 1000, 1) if values else 0.0,
+                    "p50_ms": round(self._percentile(values, 50) * 1000, 1),
+                    "p95_ms": round(self._percentile(values, 95) * 1000, 1),
+                }
+        return result
+
+    def reset(self) -> None:
+        """清空所有样本"""
+        self._samples.clear()